@@ -48,10 +48,40 @@ RY_string = "2022"
 # use no_mc < 10000 for tests
 #use no_mc > 100000 for a "real" run
 no_mc = 1000
+#Number of Monte Carlo simulations done at once.
+#Use None to do all simulations at once, 
+#use e.g. 100000 to limit the memory needed for a large no_mc.
+mc_chunk_size = None
 
 use_fuel_used = False #set to True to use "fuel used" approach for the CLRTAP reporting
 plot_mode = True #Set to True to plot figures
 make_new_output_folder = False #Set to True to create a new, unique folder name to store the results
+#Set to True to cache the tables read from the input Excel files:
+#the next runs do not parse the Excel files again, as long as they are not modified.
+use_input_cache = True
+#Set to False to skip the formatted Excel report, e.g. for exploratory runs.
+write_excel = True
+#Export format of the machine-readable result tables:
+#const.EXPORT_FORMAT_CSV, const.EXPORT_FORMAT_PARQUET, or None to write no table.
+export_format = None
+#Set to True to keep all Monte Carlo simulations in .npy files in the output folder
+#(8 bytes per simulation and per category, 4 bytes with mc_float32) and compute the sensitivity of RY to BY emissions.
+mc_sample_store = False
+#Seed of the random generators (a non-negative integer), to reproduce the results of a run.
+#Use None to draw a new seed; the seed used is written to the check file and to the output files.
+seed = None
+#Set to a number of significant digits (e.g. 2) to stop the Monte Carlo simulations
+#when the results for the inventory total are stable (JCGM 101:2008, 7.9);
+#no_mc is then the maximum number of simulations. Use None to run no_mc simulations.
+mc_adaptive_digits = None
+#Sampling method: const.MC_SAMPLING_RANDOM, const.MC_SAMPLING_LHS (Latin hypercube)
+#or const.MC_SAMPLING_SOBOL (scrambled Sobol' sequence, use a power of 2 for no_mc)
+#or const.MC_SAMPLING_ANTITHETIC (antithetic variates, half of the random values are mirrored).
+#These methods need fewer simulations for the mean, but not for the 95% interval (see benchmarks/bench_mc_sampling.py).
+mc_sampling = const.MC_SAMPLING_RANDOM
+#Set to True to keep the simulated emissions in single precision (float32):
+#half the memory, the results change by much less than their printed precision.
+mc_float32 = False
 
 #======================================================================
 # IMPORT FILES SPECIFIC FOR THIS RUN: INVENTORY EMISSIONS
@@ -84,4 +114,13 @@ routine_u_kca_wrapper(
         dict_io_out = dict_io_out,
         use_fuel_used = use_fuel_used,
         root_path = root_path,
+        mc_chunk_size = mc_chunk_size,
+        use_input_cache = use_input_cache,
+        write_excel = write_excel,
+        export_format = export_format,
+        mc_sample_store = mc_sample_store,
+        seed = seed,
+        mc_adaptive_digits = mc_adaptive_digits,
+        mc_sampling = mc_sampling,
+        mc_float32 = mc_float32,
               )
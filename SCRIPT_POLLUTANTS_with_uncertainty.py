@@ -49,38 +49,85 @@ RY_string = "2021"
 
 #Number of simulations for the Monte Carlo uncertainty estimation
 no_mc = 1000
+#Number of Monte Carlo simulations done at once.
+#Use None to do all simulations at once, 
+#use e.g. 100000 to limit the memory needed for a large no_mc.
+mc_chunk_size = None
+#Number of processes used to compute the pollutants in parallel.
+#Use None to compute the pollutants one after the other.
+#Each process needs the memory of a run for one pollutant.
+no_workers = None
 
 use_fuel_used = True
 plot_mode = True
 make_new_output_folder = True
+#Set to True to cache the tables read from the input Excel files:
+#the next runs do not parse the Excel files again, as long as they are not modified.
+use_input_cache = True
+#Set to False to skip the formatted Excel report, e.g. for exploratory runs.
+write_excel = True
+#Export format of the machine-readable result tables:
+#const.EXPORT_FORMAT_CSV, const.EXPORT_FORMAT_PARQUET, or None to write no table.
+export_format = None
+#Set to True to keep all Monte Carlo simulations in .npy files in the output folder
+#(8 bytes per simulation and per category, 4 bytes with mc_float32) and compute the sensitivity of RY to BY emissions.
+mc_sample_store = False
+#Seed of the random generators (a non-negative integer), to reproduce the results of a run.
+#Use None to draw a new seed; the seed used is written to the check file and to the output files.
+seed = None
+#Set to a number of significant digits (e.g. 2) to stop the Monte Carlo simulations
+#when the results for the inventory total are stable (JCGM 101:2008, 7.9);
+#no_mc is then the maximum number of simulations. Use None to run no_mc simulations.
+mc_adaptive_digits = None
+#Sampling method: const.MC_SAMPLING_RANDOM, const.MC_SAMPLING_LHS (Latin hypercube)
+#or const.MC_SAMPLING_SOBOL (scrambled Sobol' sequence, use a power of 2 for no_mc)
+#or const.MC_SAMPLING_ANTITHETIC (antithetic variates, half of the random values are mirrored).
+#These methods need fewer simulations for the mean, but not for the 95% interval (see benchmarks/bench_mc_sampling.py).
+mc_sampling = const.MC_SAMPLING_RANDOM
+#Set to True to keep the simulated emissions in single precision (float32):
+#half the memory, the results change by much less than their printed precision.
+mc_float32 = False
 
 #======================================================================
 # IMPORT FILES SPECIFIC FOR THIS RUN: INVENTORY EMISSIONS
 #======================================================================
 
-#automatically set submission year (do not modify)
-sub_string = str(int(RY_string)+2)
-
-dict_io_nomenc = io_nomenc(root_path, sub_string)
-
-dict_io_u = io_u_inventory_nfr(root_path, sub_string, BY_string)
-dict_io_em = io_em_inventory_nfr(root_path, sub_string, BY_string)
-dict_io_out = io_out_inventory_nfr(root_path, sub_string, BY_string, make_new_output_folder)
-
-comp_total = const.COMP_TOTAL_IIR
-routine = const.ROUTINE_IIR
-
-routine_u_kca_wrapper(
-        routine = routine,
-        BY_string = BY_string,
-        RY_string = RY_string,
-        comp_total = comp_total,
-        no_mc = int(round(no_mc)),
-        plot_mode = plot_mode,
-        dict_io_nomenc = dict_io_nomenc,
-        dict_io_em = dict_io_em,
-        dict_io_u = dict_io_u,
-        dict_io_out = dict_io_out,
-        use_fuel_used = use_fuel_used,
-        root_path = root_path,
-              )
+#The run is done only when this file is run as a script,
+#not when it is imported by the processes computing the pollutants in parallel.
+if __name__ == "__main__":
+    #automatically set submission year (do not modify)
+    sub_string = str(int(RY_string)+2)
+
+    dict_io_nomenc = io_nomenc(root_path, sub_string)
+
+    dict_io_u = io_u_inventory_nfr(root_path, sub_string, BY_string)
+    dict_io_em = io_em_inventory_nfr(root_path, sub_string, BY_string)
+    dict_io_out = io_out_inventory_nfr(root_path, sub_string, BY_string, make_new_output_folder)
+
+    comp_total = const.COMP_TOTAL_IIR
+    routine = const.ROUTINE_IIR
+
+    routine_u_kca_wrapper(
+            routine = routine,
+            BY_string = BY_string,
+            RY_string = RY_string,
+            comp_total = comp_total,
+            no_mc = int(round(no_mc)),
+            plot_mode = plot_mode,
+            dict_io_nomenc = dict_io_nomenc,
+            dict_io_em = dict_io_em,
+            dict_io_u = dict_io_u,
+            dict_io_out = dict_io_out,
+            use_fuel_used = use_fuel_used,
+            root_path = root_path,
+            mc_chunk_size = mc_chunk_size,
+            no_workers = no_workers,
+            use_input_cache = use_input_cache,
+            write_excel = write_excel,
+            export_format = export_format,
+            mc_sample_store = mc_sample_store,
+            seed = seed,
+            mc_adaptive_digits = mc_adaptive_digits,
+            mc_sampling = mc_sampling,
+            mc_float32 = mc_float32,
+                  )
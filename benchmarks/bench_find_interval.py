@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Benchmark of the narrowest interval for a large number of Monte Carlo simulations:
+find_interval_np (full sort) against find_interval_np_partition (sort of the tails only).
+
+Run from the root folder of the repository: python benchmarks/bench_find_interval.py
+
+Results (best of 3 runs, one lognormal sample, p = 0.95, one core of 
+a Linux virtual machine with AVX-512), the edges are bit-identical in all cases:
+    numpy 2.4.6
+    no_mc       find_interval_np   find_interval_np_partition   speed-up
+    1000000        0.017 s              0.011 s                    1.6
+    3000000        0.058 s              0.038 s                    1.5
+    10000000       0.210 s              0.138 s                    1.5
+    numpy 1.26.4
+    no_mc       find_interval_np   find_interval_np_partition   speed-up
+    1000000        0.021 s              0.032 s                    0.7
+    3000000        0.068 s              0.091 s                    0.7
+    10000000       0.254 s              0.314 s                    0.8
+With numpy 1.26, np.sort uses the vectorised AVX-512 sort while np.partition 
+does not, so that the partition is slower than the full sort on such processors.
+Since numpy 2.0, np.partition is vectorised as well and the partition is faster.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils_constant as const
+from utils_compute import find_interval_np, find_interval_np_partition
+
+LIST_NO_MC = [10**6, 3 * 10**6, 10**7]
+NO_REPEAT = 3
+
+
+def time_best(function, x):
+    #best run time of NO_REPEAT runs, the input is copied before each run
+    t_best = np.inf
+    for i in range(NO_REPEAT):
+        x_i = x.copy()
+        t0 = time.perf_counter()
+        edges = function(x_i, const.P_DIST)
+        t_best = min(t_best, time.perf_counter() - t0)
+    return t_best, edges
+
+
+print("no_mc       find_interval_np   find_interval_np_partition   speed-up   identical")
+for no_mc in LIST_NO_MC:
+    x = np.random.default_rng(no_mc).lognormal(mean = 0.0, sigma = 0.5, size = no_mc)
+    t_sort, edges_sort = time_best(find_interval_np, x)
+    t_partition, edges_partition = time_best(find_interval_np_partition, x)
+    print("{:<11d} {:8.3f} s           {:8.3f} s                  {:5.1f}      {}".format(
+            no_mc, t_sort, t_partition, t_sort / t_partition,
+            edges_sort[0] == edges_partition[0] and edges_sort[1] == edges_partition[1]))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Benchmark of the sampling modes: how many fewer simulations Latin hypercube sampling
+and the scrambled Sobol' sequence need for the same precision of the 95% interval.
+
+A synthetic inventory of NO_CATEGORY source categories (activity data times emission factor,
+all distribution types) is simulated NO_SEED times with different seeds,
+as in generate_EM_mc_np: activity data and emission factors are drawn in two calls.
+The precision is the standard deviation over the seeds of the mean and of the edges
+of the narrowest 95% interval of the inventory total (find_interval_np_batch).
+With pseudo-random values, this standard deviation decreases as 1/sqrt(no_mc):
+the number of pseudo-random simulations giving the same precision as no_mc simulations
+of another sampling mode is no_mc * (std pseudo-random / std sampling mode)**2.
+
+Run from the root folder of the repository: python benchmarks/bench_mc_sampling.py
+
+Results (numpy 2.4.6, scipy 1.17.1, 40 categories, 100 seeds, one core of a Linux virtual machine),
+ratio of the number of pseudo-random simulations for the same precision to no_mc,
+and run time of one simulation of the inventory:
+    no_mc   sampling            mean   edge_min   edge_max   run time
+    1024    Latin hypercube    180.6      1.1        1.0      0.027 s (pseudo-random: 0.003 s)
+    1024    scrambled Sobol'   240.1      1.0        1.2      0.031 s (pseudo-random: 0.003 s)
+    1024    antithetic           7.4      0.8        1.1      0.024 s (pseudo-random: 0.003 s)
+    4096    Latin hypercube    283.2      1.3        1.2      0.107 s (pseudo-random: 0.011 s)
+    4096    scrambled Sobol'   347.3      1.3        1.4      0.112 s (pseudo-random: 0.011 s)
+    4096    antithetic           8.1      1.1        0.9      0.094 s (pseudo-random: 0.011 s)
+    16384   Latin hypercube    233.0      1.0        1.0      0.474 s (pseudo-random: 0.048 s)
+    16384   scrambled Sobol'   224.5      1.1        1.2      0.403 s (pseudo-random: 0.048 s)
+    16384   antithetic           4.6      1.2        1.1      0.404 s (pseudo-random: 0.048 s)
+The mean of the inventory total needs about 200 to 350 times fewer simulations with
+Latin hypercube sampling or the Sobol' sequence. The edges of the 95% interval,
+which give the reported uncertainty, need 1.0 to 1.4 times fewer simulations:
+with 100 seeds, a ratio between about 0.7 and 1.5 is not significantly different from 1.
+The tails depend on the joint values of all source categories,
+which are not stratified by a design with one dimension per category.
+The inverse cumulative distribution functions (in particular of the gamma distribution)
+make one simulation about 10 times slower than the numpy generators:
+for the interval edges, the pseudo-random values remain the fastest.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils_constant as const
+from utils_compute import generate_random_value_np_batch, find_interval_np_batch
+
+NO_CATEGORY = 40
+NO_SEED = 100
+LIST_NO_MC = [1024, 4096, 16384]
+LIST_SAMPLING = [
+        const.MC_SAMPLING_RANDOM,
+        const.MC_SAMPLING_LHS,
+        const.MC_SAMPLING_SOBOL,
+        const.MC_SAMPLING_ANTITHETIC,
+        ]
+
+
+def make_inventory(no_category):
+    #distribution type, mean, u_left, u_right of activity data and emission factors
+    rng = np.random.default_rng(20230216)
+    dict_inventory = {}
+    for input_type in ["AD", "EF"]:
+        dist = rng.choice([const.DIST_NORMAL, const.DIST_GAMMA, const.DIST_UNIFORM, const.DIST_TRIANGULAR, const.DIST_LOGNORMAL], size = no_category)
+        mean = rng.lognormal(mean = 0.0, sigma = 1.5, size = no_category)
+        u_rel = rng.uniform(0.05, 0.5, size = no_category)
+        #standard deviation for the normal distribution, edges for the triangular (symmetric)
+        u_left = u_rel * mean
+        u_right = u_rel * mean
+        dict_inventory[input_type] = (dist.astype(np.float64), mean, u_left, u_right)
+    return dict_inventory
+
+
+def simulate_total(dict_inventory, no_mc, sampling, seed):
+    #mean and edges of the narrowest 95% interval of the inventory total
+    rng = np.random.default_rng(seed)
+    em = np.ones((NO_CATEGORY, no_mc), dtype = np.float64)
+    for input_type in ["AD", "EF"]:
+        dist, mean, u_left, u_right = dict_inventory[input_type]
+        em *= generate_random_value_np_batch(dist, mean, u_left, u_right, no_mc, rng, sampling)
+    total = np.sum(em, axis = 0)
+    edge_min, edge_max = find_interval_np_batch(total[None, :], const.P_DIST)
+    return np.mean(total), edge_min[0], edge_max[0]
+
+
+dict_inventory = make_inventory(NO_CATEGORY)
+print("no_mc   sampling            mean   edge_min   edge_max   run time")
+for no_mc in LIST_NO_MC:
+    dict_std = {}
+    dict_time = {}
+    for sampling in LIST_SAMPLING:
+        t0 = time.perf_counter()
+        results = np.array([simulate_total(dict_inventory, no_mc, sampling, seed) for seed in range(NO_SEED)])
+        dict_time[sampling] = (time.perf_counter() - t0) / NO_SEED
+        dict_std[sampling] = np.std(results, axis = 0, ddof = 1)
+    for sampling in LIST_SAMPLING[1:]:
+        ratio = (dict_std[const.MC_SAMPLING_RANDOM] / dict_std[sampling])**2
+        print("{:<7d} {:<18s} {:5.1f}    {:5.1f}      {:5.1f}      {:.3f} s (pseudo-random: {:.3f} s)".format(
+                no_mc, const.MC_SAMPLING_NAME[sampling], ratio[0], ratio[1], ratio[2],
+                dict_time[sampling], dict_time[const.MC_SAMPLING_RANDOM]))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Benchmark of the reading of the input Excel files: time to read the six sheets
+of the nomenclature file (the part of the run time reported as t1_read_input_main,
+"Run time for reading nomenclature inputs").
+
+A synthetic workbook is written in a temporary folder, with the six nomenclature sheets
+(process, compound, resource and the three aggregation trees) of NO_ROWS rows,
+and NO_SHEET_EXTRA other sheets of the same size, as in the emission files
+with one sheet per year. The six sheets are read:
+    - with one pd.read_excel per sheet, as before read_excel_workbook:
+        the file is opened (unzipped, shared strings decoded) for each sheet,
+    - with read_excel_cached and one dict_excel_file, without cache:
+        the file is opened once for the six sheets,
+    - with read_excel_cached from the cache (use_input_cache),
+        after a first run that filled the cache.
+The time is the minimum over NO_REPEAT repetitions.
+
+Run from the root folder of the repository: python benchmarks/bench_read_input.py
+
+Results (pandas 3.0.6, openpyxl 3.1.5, one core of a Linux virtual machine),
+time to read the six nomenclature sheets:
+    NO_ROWS   NO_SHEET_EXTRA   file size   one read per sheet   workbook opened once   cache
+    200       0                    59 kB      0.194 s               0.116 s              0.023 s
+    200       42                  441 kB      0.662 s               0.198 s              0.040 s
+    2000      0                   528 kB      1.149 s               1.282 s              0.057 s
+    2000      42                 4197 kB      1.769 s               1.307 s              0.089 s
+Over three runs, the times varied by up to about 30% on this machine.
+Opening the workbook once is 1.3 to 3.3 times faster when the workbook has many sheets
+or small sheets: the time to open the file is then larger than the time to parse the six sheets.
+With large sheets in a small workbook, parsing dominates and there is no measurable difference.
+Reading from the cache is 8 to 20 times faster in all cases:
+it includes the hash of the content of the Excel file, but no parsing.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils_io_read_check import read_excel_cached, close_excel_workbooks
+
+LIST_NO_ROWS = [200, 2000]
+LIST_NO_SHEET_EXTRA = [0, 42]
+NO_REPEAT = 9
+LIST_SHEETNAME = [
+        "process",
+        "compound",
+        "resource",
+        "aggregation_process",
+        "aggregation_compound",
+        "aggregation_resource",
+        ]
+
+
+def make_sheet(rng, no_rows):
+    #codes (text, mostly different), names, depth in the tree and a few numbers
+    codes = np.array(["{}{}".format(rng.choice(["1A", "1B", "2A", "3B", "5C"]), i) for i in range(no_rows)], dtype = object)
+    return pd.DataFrame({
+            "child_id": codes,
+            "parent_id": rng.choice(codes, size = no_rows),
+            "depth_id": rng.integers(0, 5, size = no_rows),
+            "name": np.array(["Name of the category {}".format(code) for code in codes], dtype = object),
+            "value": rng.lognormal(size = no_rows),
+            "status": rng.choice(["NO", "NA", "IE", "ES"], size = no_rows).astype(object),
+            })
+
+
+def write_workbook(pathname, no_rows, no_sheet_extra):
+    rng = np.random.default_rng(20230216)
+    with pd.ExcelWriter(pathname) as writer:
+        for sheetname in LIST_SHEETNAME:
+            make_sheet(rng, no_rows).to_excel(writer, sheet_name = sheetname, index = False)
+        for i in range(no_sheet_extra):
+            make_sheet(rng, no_rows).to_excel(writer, sheet_name = str(1980 + i), index = False)
+
+
+def read_per_sheet(pathname):
+    for sheetname in LIST_SHEETNAME:
+        pd.read_excel(io = pathname, sheet_name = sheetname, keep_default_na = False)
+
+
+def read_workbook_once(pathname, cache_foldername):
+    dict_excel_file = {}
+    for sheetname in LIST_SHEETNAME:
+        read_excel_cached(
+                cache_foldername = cache_foldername,
+                dict_excel_file = dict_excel_file,
+                io = pathname,
+                sheet_name = sheetname,
+                keep_default_na = False)
+    close_excel_workbooks(dict_excel_file)
+
+
+def time_min(function, *args):
+    list_time = []
+    for i in range(NO_REPEAT):
+        t0 = time.perf_counter()
+        function(*args)
+        list_time.append(time.perf_counter() - t0)
+    return min(list_time)
+
+
+foldername = tempfile.mkdtemp()
+try:
+    for no_rows in LIST_NO_ROWS:
+        for no_sheet_extra in LIST_NO_SHEET_EXTRA:
+            pathname = os.path.join(foldername, "nomenclature_{}_{}.xlsx".format(no_rows, no_sheet_extra))
+            cache_foldername = os.path.join(foldername, "cache_{}_{}".format(no_rows, no_sheet_extra)) + os.sep
+            write_workbook(pathname, no_rows, no_sheet_extra)
+            t_per_sheet = time_min(read_per_sheet, pathname)
+            t_once = time_min(read_workbook_once, pathname, None)
+            read_workbook_once(pathname, cache_foldername)
+            t_cache = time_min(read_workbook_once, pathname, cache_foldername)
+            print("{:<9d} {:<16d} {:6.0f} kB   {:8.3f} s            {:8.3f} s              {:.3f} s".format(
+                    no_rows, no_sheet_extra, os.path.getsize(pathname) / 1024.0, t_per_sheet, t_once, t_cache))
+finally:
+    shutil.rmtree(foldername)
@@ -22,15 +22,23 @@ Created on Thu Dec 15 11:06:36 2022
 import pandas as pd
 import numpy as np
 import time
+import os
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
 
 import utils_constant as const
 
 
 from utils_io_read_check import\
+read_excel_cached,\
+close_excel_workbooks,\
 read_excel_nomenc_def,\
+read_excel_em_all_comp,\
+select_em_comp,\
 input_em_data_check,\
 input_u_data_preparation,\
 input_u_data_check_completeness_per_year,\
+input_u_data_fill_BY_from_RY,\
 merge_with_proc,\
 check_main,\
 check_duplicate,\
@@ -43,14 +51,21 @@ groupby_one_attribute_pd,\
 compute_U_propagation_em_pd,\
 compute_U_propagation_trend_pd,\
 compute_U_propagation_normalisation_pd,\
-generate_random_value,\
-find_interval_np #, find_interval, find_interval_pd, find_interval_np_zeronan
+prepare_mc_input_np,\
+generate_EM_mc_np,\
+init_mc_stats_np,\
+update_mc_stats_np,\
+finalize_mc_stats_np,\
+compute_correlation_rows_np_batch,\
+find_interval_np_batch,\
+check_mc_stabilisation_np #, find_interval, find_interval_pd, find_interval_np_zeronan
 
 from utils_plot import\
 plot_distributions_EM_trend,\
 tornado_plot_EM_BY_RY
 
 from utils_io_write_to_excel import write_pr_mc_results
+from utils_io_write_to_table import write_pr_mc_tables
 
 
 
@@ -67,6 +82,16 @@ def routine_u_kca_wrapper(
         dict_io_out: dict,
         use_fuel_used: bool,
         root_path: str,
+        mc_chunk_size: int = None,
+        no_workers: int = None,
+        use_input_cache: bool = False,
+        write_excel: bool = True,
+        export_format: int = None,
+        mc_sample_store: bool = False,
+        seed: int = None,
+        mc_adaptive_digits: int = None,
+        mc_sampling: int = const.MC_SAMPLING_RANDOM,
+        mc_float32: bool = False,
         ):
 
     
@@ -108,12 +133,64 @@ def routine_u_kca_wrapper(
             National Total according to the approach "fuel sold".
         root_path: path where the run files are saved.
             This may be needed on some old Python versions.
+        mc_chunk_size: number of Monte Carlo simulations done at once.
+            Use None to do all simulations at once (exact results, 
+            the memory needed grows with no_mc).
+            Use e.g. 100000 for a large no_mc: the memory needed does then
+            not depend on no_mc, but the confidence intervals are approximated
+            from a quantile sketch of MC_SKETCH_SIZE values per category.
+        no_workers: number of processes used to run the compounds in parallel 
+            (for pollutants only, each pollutant is computed separately).
+            Use None to run the compounds one after the other.
+            Each process needs the memory of a full run for one compound.
+        use_input_cache: to cache the tables read from the input Excel files
+            in dict_io_out["cache_foldername"]. The next runs read the cached
+            tables instead of parsing the Excel files again, 
+            as long as the Excel files are not modified.
+        write_excel: to write the results to the formatted Excel file
+            (set to False to skip the Excel file, e.g. together with export_format).
+        export_format: to also write the results to machine-readable tables,
+            use const.EXPORT_FORMAT_CSV or const.EXPORT_FORMAT_PARQUET
+            (None to write no tables). See write_pr_mc_tables.
+        mc_sample_store: set to True to keep all simulated emissions on disk,
+            see routine_u_kca_computations.
+        seed: seed of the random generators, a non-negative integer.
+            Use None to draw a new seed. The seed is written to the check file
+            and to the output files: a run with the same seed, no_mc and mc_chunk_size
+            gives the same results, whatever no_workers.
+        mc_adaptive_digits: use None to run no_mc Monte Carlo simulations.
+            Otherwise, adaptive Monte Carlo procedure of JCGM 101:2008, 7.9:
+            the simulations are run by batches of mc_chunk_size simulations
+            (const.MC_ADAPTIVE_BATCH_SIZE if None) until the mean, the standard deviation
+            and the edges of the confidence interval of the inventory total
+            for BY, RY and the trend are stable to mc_adaptive_digits significant digits,
+            no_mc being the maximum number of simulations.
+            The number of simulations done and the numerical tolerance 
+            are written to the check file and to the Excel file.
+            Cannot be used with mc_sample_store.
+        mc_sampling: sampling method of the Monte Carlo simulations,
+            const.MC_SAMPLING_RANDOM (pseudo-random values), 
+            const.MC_SAMPLING_LHS (Latin hypercube sampling) or
+            const.MC_SAMPLING_SOBOL (scrambled Sobol' sequence, 
+            use a power of 2 for no_mc or mc_chunk_size) or
+            const.MC_SAMPLING_ANTITHETIC (antithetic variates: pseudo-random values 
+            for half of the simulations, mirrored for the other half).
+            These methods reach the same precision of the mean with fewer simulations,
+            but not of the 95% interval, see benchmarks/bench_mc_sampling.py.
+        mc_float32: set to True to keep the simulated emissions in single precision 
+            (float32) instead of double precision (float64): half the memory 
+            and half the size of the files of mc_sample_store.
+            Sums, means, variances and sensitivities are still computed in double precision.
+            The results change by much less than the printed precision,
+            see routine_u_kca_computations.
         
         
         
     Returns:
         WIP.
         Should return results required for the key category analysis.
+        So far, list with the results of routine_u_kca_computations 
+        for each compound, in the order of the compounds.
         
     Raises:
         The procedure stops in case input values are not valid.
@@ -124,12 +201,49 @@ def routine_u_kca_wrapper(
     
     
     check_file = open(dict_io_out["check_filename"], "w")    
+    
+    if export_format is not None and export_format not in const.EXPORT_FORMAT_EXTENSION:
+        check_file.write("Export format {} is not supported. ".format(export_format) + \
+                         "Use one of: {}.\n".format(list(const.EXPORT_FORMAT_EXTENSION.keys())))
+        check_file.close()
+        raise ValueError("Export format {} is not supported.".format(export_format))
+    
+    if mc_sampling not in const.MC_SAMPLING_NAME:
+        check_file.write("Sampling method {} is not supported. ".format(mc_sampling) + \
+                         "Use one of: {}.\n".format(list(const.MC_SAMPLING_NAME.keys())))
+        check_file.close()
+        raise ValueError("Sampling method {} is not supported.".format(mc_sampling))
+    if mc_adaptive_digits is not None and int(mc_adaptive_digits) < 1:
+        check_file.write("The number of significant digits for the adaptive Monte Carlo simulations must be at least 1.\n")
+        check_file.close()
+        raise ValueError("The number of significant digits for the adaptive Monte Carlo simulations must be at least 1.")
+    if mc_adaptive_digits is not None and mc_sample_store:
+        check_file.write("The Monte Carlo simulations cannot be stored with the adaptive Monte Carlo procedure: " + \
+                         "the number of simulations is not known in advance.\n")
+        check_file.close()
+        raise ValueError("The Monte Carlo simulations cannot be stored with the adaptive Monte Carlo procedure.")
+    
+    #The random streams of all compounds are derived from this seed, see routine_u_kca_computations.
+    #With seed = None, a new seed is drawn from the entropy of the operating system.
+    seed = np.random.SeedSequence(seed).entropy
+    check_file.write("Seed of the random generators: {}\n".format(seed))
+    print("Seed of the random generators: {}".format(seed))
+    check_file.write("Sampling method of the Monte Carlo simulations: {}\n".format(const.MC_SAMPLING_NAME[mc_sampling]))
+    if mc_float32:
+        check_file.write("Monte Carlo simulated emissions kept in single precision (float32).\n")
     #--------------------------------------
     #Read input nomenclature for base year
     #--------------------------------------
     
     t0_read_input_main = time.time()
     
+    if use_input_cache:
+        cache_foldername = dict_io_out["cache_foldername"]
+    else:
+        cache_foldername = None
+    #Each Excel file is opened once, for all sheets read from it.
+    dict_excel_file = {}
+    
     
     #=============================================
     # DEFINE ROUTINE TYPE: ALL COMPOUNDS TOGETHER (GHG) OR EACH COMPOUND SEPARATELY (POLLUTANTS)
@@ -148,7 +262,9 @@ def routine_u_kca_wrapper(
     #t0_read_input = time.time()
     
     #Read input nomenclature for process names
-    df_proc = pd.read_excel(
+    df_proc = read_excel_cached(
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             io = dict_io_nomenc["in_nomenc_pathname"],
             sheetname = dict_io_nomenc["in_proc_sheetname"], 
             header = dict_io_nomenc["in_header_proc"], 
@@ -157,7 +273,9 @@ def routine_u_kca_wrapper(
             names = dict_io_nomenc["in_col_names_proc"], 
             )
     #Read input nomenclature for compounds
-    df_comp = pd.read_excel(
+    df_comp = read_excel_cached(
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             io = dict_io_nomenc["in_nomenc_pathname"],
             sheetname = dict_io_nomenc["in_comp_sheetname"], #Warning! for newer pandas version use sheet_name
             header = dict_io_nomenc["in_header_comp"], 
@@ -167,7 +285,9 @@ def routine_u_kca_wrapper(
             #engine = "openpyxl"
             )
     #Read input nomenclature for resources
-    df_reso = pd.read_excel(
+    df_reso = read_excel_cached(
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             io = dict_io_nomenc["in_nomenc_pathname"],
             sheetname = dict_io_nomenc["in_reso_sheetname"], #Warning! for newer pandas version use sheet_name
             header = dict_io_nomenc["in_header_reso"],  
@@ -188,7 +308,9 @@ def routine_u_kca_wrapper(
     # IMPORT AGGREGATION TREE FOR COMPOUND
     #=============================================
     
-    df_agg_tree_comp = pd.read_excel(
+    df_agg_tree_comp = read_excel_cached(
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             io = dict_io_nomenc["in_nomenc_pathname"],  
             sheetname = dict_io_nomenc["in_comp_agg_tree_sheetname"],  #Warning! for newer pandas version use sheet_name
             header = dict_io_nomenc["in_header_agg_comp"],
@@ -227,7 +349,9 @@ def routine_u_kca_wrapper(
     # IMPORT AGGREGATION TREE FOR RESOURCE
     #=============================================
     
-    df_agg_tree_reso = pd.read_excel(
+    df_agg_tree_reso = read_excel_cached(
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             io = dict_io_nomenc["in_nomenc_pathname"], 
             sheetname = dict_io_nomenc["in_reso_agg_tree_sheetname"],#Warning! for newer pandas version use sheet_name
             header = dict_io_nomenc["in_header_agg_reso"], 
@@ -263,7 +387,9 @@ def routine_u_kca_wrapper(
     # IMPORT AGGREGATION TREE FOR PROCESS NAMES
     #=============================================
     
-    df_agg_tree_proc = pd.read_excel(
+    df_agg_tree_proc = read_excel_cached(
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             io = dict_io_nomenc["in_nomenc_pathname"], 
             sheetname = in_proc_agg_tree_sheetname,  #Warning! for newer pandas version use sheet_name
             header = dict_io_nomenc["in_header_agg_proc"], 
@@ -308,13 +434,58 @@ def routine_u_kca_wrapper(
     check_file.write("Run time for reading nomenclature inputs: " + str(t1_read_input_main) + " seconds\n")
     print("Run time for reading nomenclature inputs: " + str(t1_read_input_main) + " seconds")
     
+    #=============================================
+    # READ INPUT EMISSIONS OF ALL POLLUTANTS
+    #=============================================
+    
+    #For pollutants, the emissions of all compounds are in the same sheet,
+    #one column per compound: read all columns at once 
+    #instead of reading the sheet again for each compound.
+    if routine == const.ROUTINE_IIR:
+        t0_read_input_em = time.time()
+        dict_df_EM_all_comp = {}
+        dict_df_EM_all_comp["BY"] = read_excel_em_all_comp(
+                in_pathname = dict_io_em["in_pathname_EM_BY"],
+                in_sheetname = dict_io_em["in_sheetname_EM_BY"],
+                in_header = dict_io_em["in_header_EM_BY"],
+                in_skiprows = dict_io_em["in_skiprows_EM_BY"],
+                in_usecols_nomenc = dict_io_em["in_usecols_EM_BY_nomenc"],
+                in_usecols_val = dict_io_em["in_usecols_EM_BY_val"],
+                in_col_names = dict_io_em["in_col_names_EM_BY"],
+                in_col_dtype = dict_io_em["in_col_dtype_EM_BY"],
+                in_col_names_comp = dict_io_em["in_col_names_comp"],
+                cache_foldername = cache_foldername,
+                dict_excel_file = dict_excel_file,
+                )
+        dict_df_EM_all_comp["RY"] = read_excel_em_all_comp(
+                in_pathname = dict_io_em["in_pathname_EM_RY"],
+                in_sheetname = dict_io_em["in_sheetname_EM_RY"],
+                in_header = dict_io_em["in_header_EM_RY"],
+                in_skiprows = dict_io_em["in_skiprows_EM_RY"],
+                in_usecols_nomenc = dict_io_em["in_usecols_EM_RY_nomenc"],
+                in_usecols_val = dict_io_em["in_usecols_EM_RY_val"],
+                in_col_names = dict_io_em["in_col_names_EM_RY"],
+                in_col_dtype = dict_io_em["in_col_dtype_EM_RY"],
+                in_col_names_comp = dict_io_em["in_col_names_comp"],
+                cache_foldername = cache_foldername,
+                dict_excel_file = dict_excel_file,
+                )
+        t1_read_input_em = time.time() - t0_read_input_em
+        check_file.write("Run time for reading input emissions of all compounds: " + str(t1_read_input_em) + " seconds\n")
+        print("Run time for reading input emissions of all compounds: " + str(t1_read_input_em) + " seconds")
+    else:
+        dict_df_EM_all_comp = None
+    
     #TODO here start the loop over each compound
-    for i_comp in range(len(dict_io_em["in_usecols_EM_RY_val"])):
-        #For GHG, this loop is run once only
-        #For pollutant, once for each pollutant.
-        
-        if i_comp == 0:
-            df_EM_u, df_pr_out, df_pr_out_AD_EF, df_mc_out, df_mc_out_AD_EF = routine_u_kca_computations(               
+    #For GHG, this loop is run once only
+    #For pollutant, once for each pollutant.
+    t0_comp = time.time()
+    no_comp = len(dict_io_em["in_usecols_EM_RY_val"])
+    list_results = []
+    
+    if no_workers is None or no_workers <= 1 or no_comp <= 1:
+        for i_comp in range(no_comp):
+            list_results.append(routine_u_kca_computations(               
                     routine,
                     BY_string,
                     RY_string,
@@ -334,39 +505,183 @@ def routine_u_kca_wrapper(
                     df_agg_tree_reso,
                     use_fuel_used,
                     check_file,
-                    )
+                    mc_chunk_size,
+                    cache_foldername,
+                    dict_excel_file,
+                    dict_df_EM_all_comp,
+                    write_excel,
+                    export_format,
+                    mc_sample_store,
+                    seed,
+                    mc_adaptive_digits,
+                    mc_sampling,
+                    mc_float32,
+                    ))
             
-        else:
-            df_EM_u_i, df_pr_out_i, df_pr_out_AD_EF_i, df_mc_out_i, df_mc_out_AD_EF_i = routine_u_kca_computations(               
-                    routine,
-                    BY_string,
-                    RY_string,
-                    comp_total,
-                    no_mc,
-                    plot_mode,
-                    dict_io_nomenc,
-                    dict_io_em,
-                    dict_io_u,
-                    dict_io_out,
-                    i_comp,
-                    df_proc,
-                    df_comp,
-                    df_reso,
-                    df_agg_tree_proc,
-                    df_agg_tree_comp,
-                    df_agg_tree_reso,
-                    use_fuel_used,
-                    check_file,
-                    )
+    else:
+        #The compounds are independent from each other: 
+        #run them in separate processes.
+        #Each process writes in its own check file section,
+        #the sections are then copied to the check file in the order of the compounds,
+        #so that the check file is the same as for a serial run.
+        print("Computations run for {} compounds with {} processes.".format(no_comp, no_workers))
+        list_futures = []
+        with ProcessPoolExecutor(max_workers = no_workers) as executor:
+            for i_comp in range(no_comp):
+                list_futures.append(executor.submit(
+                        routine_u_kca_computations_section,
+                        dict_io_out["check_filename"] + ".comp{}".format(i_comp),
+                        routine,
+                        BY_string,
+                        RY_string,
+                        comp_total,
+                        no_mc,
+                        plot_mode,
+                        dict_io_nomenc,
+                        dict_io_em,
+                        dict_io_u,
+                        dict_io_out,
+                        i_comp,
+                        df_proc,
+                        df_comp,
+                        df_reso,
+                        df_agg_tree_proc,
+                        df_agg_tree_comp,
+                        df_agg_tree_reso,
+                        use_fuel_used,
+                        mc_chunk_size,
+                        cache_foldername,
+                        dict_df_EM_all_comp,
+                        write_excel,
+                        export_format,
+                        mc_sample_store,
+                        seed,
+                        mc_adaptive_digits,
+                        mc_sampling,
+                        mc_float32,
+                        ))
             
-            #TODO Concatenat results to get all required values for the KCA.
-            #df_EM_u = pd.concat([df_EM_u, df_EM_u_i], axis =0, ignore_index=True)
+            error_comp = None
+            for i_comp in range(no_comp):
+                try:
+                    list_results.append(list_futures[i_comp].result())
+                except Exception as error:
+                    list_results.append(None)
+                    if error_comp is None:
+                        error_comp = error
+                
+                check_filename_section = dict_io_out["check_filename"] + ".comp{}".format(i_comp)
+                if os.path.isfile(check_filename_section):
+                    with open(check_filename_section, "r") as check_file_section:
+                        check_file.write(check_file_section.read())
+                    os.remove(check_filename_section)
+        
+        if error_comp is not None:
+            check_file.close()
+            raise error_comp
             
+    #TODO Concatenat results to get all required values for the KCA.
+    #df_EM_u = pd.concat([df_EM_u, df_EM_u_i], axis =0, ignore_index=True)
+    
+    t1_comp = time.time() - t0_comp
+    check_file.write("Run time for computations of all compounds: " + str(t1_comp) + " seconds\n")
+    print("Run time for computations of all compounds: " + str(t1_comp) + " seconds")
 
 
     #TODO Here would be the place to export the KCA results to excel.
+    close_excel_workbooks(dict_excel_file)
     check_file.close()
-    return None
+    return list_results
+
+
+
+def routine_u_kca_computations_section(
+        check_filename_section,
+        routine,
+        BY_string,
+        RY_string,
+        comp_total,
+        no_mc,
+        plot_mode,
+        dict_io_nomenc,
+        dict_io_em,
+        dict_io_u,
+        dict_io_out,
+        i_comp,
+        df_proc,
+        df_comp,
+        df_reso,
+        df_agg_tree_proc,
+        df_agg_tree_comp,
+        df_agg_tree_reso,
+        use_fuel_used,
+        mc_chunk_size = None,
+        cache_foldername = None,
+        dict_df_EM_all_comp = None,
+        write_excel = True,
+        export_format = None,
+        mc_sample_store = False,
+        seed = None,
+        mc_adaptive_digits = None,
+        mc_sampling = const.MC_SAMPLING_RANDOM,
+        mc_float32 = False,
+        ):
+    #XXXroutine run in a separate process for one compound
+    """Run the computations for one compound with its own check file section.
+    
+    This function is run by each process when the compounds 
+    are computed in parallel.
+    The check file cannot be shared between processes: 
+    each process writes in its own check file section,
+    that is copied afterwards into the check file.
+    
+    Args:
+        check_filename_section: name of the check file section for this compound.
+        All other arguments: see routine_u_kca_computations.
+        
+    Returns: results of routine_u_kca_computations.
+    """
+    check_file = open(check_filename_section, "w")
+    #the opened Excel files cannot be shared between processes
+    dict_excel_file = {}
+    try:
+        results = routine_u_kca_computations(
+                routine,
+                BY_string,
+                RY_string,
+                comp_total,
+                no_mc,
+                plot_mode,
+                dict_io_nomenc,
+                dict_io_em,
+                dict_io_u,
+                dict_io_out,
+                i_comp,
+                df_proc,
+                df_comp,
+                df_reso,
+                df_agg_tree_proc,
+                df_agg_tree_comp,
+                df_agg_tree_reso,
+                use_fuel_used,
+                check_file,
+                mc_chunk_size,
+                cache_foldername,
+                dict_excel_file,
+                dict_df_EM_all_comp,
+                write_excel,
+                export_format,
+                mc_sample_store,
+                seed,
+                mc_adaptive_digits,
+                mc_sampling,
+                mc_float32,
+                )
+    finally:
+        close_excel_workbooks(dict_excel_file)
+        if not check_file.closed:
+            check_file.close()
+    return results
 
 
 
@@ -390,6 +705,17 @@ def routine_u_kca_computations(
         df_agg_tree_reso,
         use_fuel_used,
         check_file,
+        mc_chunk_size = None,
+        cache_foldername = None,
+        dict_excel_file = None,
+        dict_df_EM_all_comp = None,
+        write_excel = True,
+        export_format = None,
+        mc_sample_store = False,
+        seed = None,
+        mc_adaptive_digits = None,
+        mc_sampling = const.MC_SAMPLING_RANDOM,
+        mc_float32 = False,
         ):
     #XXXroutine comtaining the computations for uncertainties approach 1 and approach 2
     """Load numeric input values and compute uncertainty.
@@ -434,6 +760,58 @@ def routine_u_kca_computations(
             Use "False" otherwise: the total is then the 
             National Total according to the approach "fuel sold".
         check_file: text file where results of automated quality checks are saved.
+        mc_chunk_size: number of Monte Carlo simulations done at once 
+            (None to do all simulations at once).
+        cache_foldername: folder where the tables read from the input Excel files
+            are cached (None to read the Excel files without cache).
+        dict_excel_file: dictionary of the Excel files already opened, 
+            to read all sheets of an Excel file after opening it once
+            (None to open the Excel file again for each sheet).
+        dict_df_EM_all_comp: dictionary with the input emissions of all compounds
+            for "BY" and "RY", read by read_excel_em_all_comp 
+            (None to read the input emissions of this compound only).
+        write_excel: to write the results to the formatted Excel file.
+        export_format: format of the machine-readable result tables
+            (None to write no tables).
+        mc_sample_store: set to True to write the simulated emissions 
+            of all source categories and aggregated categories 
+            to one .npy file per year ("BY", "RY", "trend_normed"),
+            with one row per row of df_mc_out, given by its column "mc_sample_row",
+            and one column per simulation,
+            and the simulated inventory totals to one .npy file ("inventory").
+            The files can be read lazily with np.load(filename, mmap_mode = "r").
+            The sensitivity of RY emission to BY emission is then computed.
+            Warning: each file takes 8 bytes (4 bytes with mc_float32) 
+            * number of rows * no_mc on disk.
+        seed: seed of the random generators, see routine_u_kca_wrapper
+            (None to draw a new seed).
+        mc_adaptive_digits: number of significant digits for the adaptive 
+            Monte Carlo procedure, see routine_u_kca_wrapper
+            (None to run no_mc simulations).
+        mc_sampling: sampling method of the Monte Carlo simulations,
+            see routine_u_kca_wrapper.
+        mc_float32: set to True to keep the simulated emissions 
+            of the source categories, of the aggregated categories 
+            and of the normalised trend in single precision (float32).
+            The values of AD, EF and emissions are still drawn and multiplied 
+            in double precision and then rounded, with a relative error 
+            of at most 2**-24 = 6e-8 per value. Sums over categories, means, 
+            variances and sensitivities are accumulated in double precision.
+            The edges of the narrowest interval are simulated values,
+            so that the width of the interval changes by at most
+            2**-24 * (|edge_min| + |edge_max|).
+            The uncertainties in percent EM_BY_mc_U_mean_p and EM_RY_mc_U_mean_p then change
+            by at most about 100 * 2**-24 * (|edge_min| + |edge_max|) / |mean|,
+            i.e. 1.2e-5 percent for edges of the order of the mean,
+            and EM_trend_normed_mc_U_mean_p by at most about
+            100 * 2**-24 * (|EM_BY| + |EM_RY|) / (inventory total of BY) percent.
+            If two intervals have widths closer than this bound, the rounding can
+            select the neighbouring interval: edge_min and edge_max, and so
+            U_lower_p and U_upper_p, then move by the distance between
+            neighbouring simulated values, much less than the Monte Carlo noise
+            (at most 1.4e-3 percent with 1e5 simulations for the IIR sample data).
+            All these changes are far below the printed precision FORMAT_VAL_U (no decimal):
+            only a value this close to a rounding boundary can be printed differently.
 
             
     Returns: results of the uncertainty estimations.
@@ -461,6 +839,8 @@ def routine_u_kca_computations(
         dict_io_out["filename_KCA_mc_out"] = dict_io_out["filename_out_KCA_root"] + comp_string + ".xlsx"
         dict_io_out["filename_out_u_input"] = dict_io_out["filename_out_u_input_root"] + comp_string + ".xlsx"
         dict_io_out["filename_out_u"] = dict_io_out["filename_out_u_root"] + comp_string + ".xlsx"
+        dict_io_out["filename_out_u_table"] = dict_io_out["filename_out_u_table_root"] + comp_string #do not add extension yet!
+        dict_io_out["filename_out_mc_samples"] = dict_io_out["filename_out_mc_samples_root"] + comp_string + "_" #do not add extension yet!
         dict_io_out["figname_out_mc_tornado"] = dict_io_out["figname_out_mc_tornado_root"] + comp_string #do not add extension yet!
         dict_io_out["figname_out_mc_distribution"] = dict_io_out["figname_out_mc_distribution_root"] + comp_string #do not add extension yet!
         
@@ -476,6 +856,8 @@ def routine_u_kca_computations(
         dict_io_out["filename_KCA_mc_out"] = dict_io_out["filename_out_KCA_root"] + ".xlsx"
         dict_io_out["filename_out_u_input"] = dict_io_out["filename_out_u_input_root"] + ".xlsx"
         dict_io_out["filename_out_u"] = dict_io_out["filename_out_u_root"] + ".xlsx"
+        dict_io_out["filename_out_u_table"] = dict_io_out["filename_out_u_table_root"] #do not add extension yet!
+        dict_io_out["filename_out_mc_samples"] = dict_io_out["filename_out_mc_samples_root"] #do not add extension yet!
         dict_io_out["figname_out_mc_tornado"] = dict_io_out["figname_out_mc_tornado_root"] #do not add extension yet!
         dict_io_out["figname_out_mc_distribution"] = dict_io_out["figname_out_mc_distribution_root"] #do not add extension yet!
 
@@ -512,6 +894,8 @@ def routine_u_kca_computations(
             comp_string = comp_string,
             use_fuel_used = use_fuel_used,
             check_file = check_file,
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             )
     
     #=============================================
@@ -521,6 +905,10 @@ def routine_u_kca_computations(
     #Read Excel data for input emissions for the base year
     check_file.write("************************************************\n")
     check_file.write("Reading input emissions for the base year...\n")
+    if dict_df_EM_all_comp is None:
+        df_in_EM_BY = None
+    else:
+        df_in_EM_BY = select_em_comp(dict_df_EM_all_comp["BY"], dict_io_em["in_col_names_EM_BY"], comp_string)
     df_EM_BY = read_excel_nomenc_def(
             in_pathname = dict_io_em["in_pathname_EM_BY"],
             in_sheetname = dict_io_em["in_sheetname_EM_BY"],
@@ -543,6 +931,9 @@ def routine_u_kca_computations(
             comp_string = comp_string,
             use_fuel_used = use_fuel_used,
             check_file = check_file,
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
+            df_in = df_in_EM_BY,
             )
     
     df_EM_BY = input_em_data_check(df_EM_BY, "BY", check_file)
@@ -550,6 +941,10 @@ def routine_u_kca_computations(
     #Read Excel data for input emissions for the reporting year
     check_file.write("************************************************\n")
     check_file.write("Reading input emissions for the reporting year...\n")
+    if dict_df_EM_all_comp is None:
+        df_in_EM_RY = None
+    else:
+        df_in_EM_RY = select_em_comp(dict_df_EM_all_comp["RY"], dict_io_em["in_col_names_EM_RY"], comp_string)
     df_EM_RY = read_excel_nomenc_def(
             in_pathname = dict_io_em["in_pathname_EM_RY"],
             in_sheetname = dict_io_em["in_sheetname_EM_RY"],
@@ -572,6 +967,9 @@ def routine_u_kca_computations(
             comp_string = comp_string,
             use_fuel_used = use_fuel_used,
             check_file = check_file,
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
+            df_in = df_in_EM_RY,
             )
 
     df_EM_RY = input_em_data_check(df_EM_RY, "RY", check_file)
@@ -658,6 +1056,8 @@ def routine_u_kca_computations(
             comp_string = comp_string,
             use_fuel_used = use_fuel_used,
             check_file = check_file,
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
             )
 
 
@@ -718,6 +1118,8 @@ def routine_u_kca_computations(
                 comp_string = comp_string,
                 use_fuel_used = use_fuel_used,
                 check_file = check_file,
+                cache_foldername = cache_foldername,
+                dict_excel_file = dict_excel_file,
                 )
     
         df_u_BY = input_u_data_preparation(
@@ -747,26 +1149,7 @@ def routine_u_kca_computations(
         #if check_completeness_BY:
         #If missing data for U BY: take value from RY.    
         #(If RY also has a missing data, that's ok)
-        for i in range(len(df_u_BY)):
-            i_RY = df_u_RY.index[(df_u_RY["proc_id"] == df_u_BY["proc_id"].iloc[i]) &
-                                 (df_u_RY["comp_id"] == df_u_BY["comp_id"].iloc[i]) & 
-                                 (df_u_RY["reso_id"] == df_u_BY["reso_id"].iloc[i])
-                                 ].tolist()
-            if len(i_RY) == 0:
-                check_file.write("Code <{}>: missing input for u, RY.\n".format(df_u_BY["proc_id"].iloc[i]))
-            else:
-                i_RY = i_RY[0]
-                for col in df_u_BY.columns.values.tolist():
-                    if col in df_u_RY:
-                        if col in ["uAD_dist", "uEF_dist", "uEM_dist"]:
-                            #if there is no input distribution type for BY: take value from RY
-                            if df_u_BY[col].iloc[i] == -1 and df_u_RY[col].iloc[i_RY] != -1:
-                                df_u_BY[col].iloc[i] = df_u_RY[col].iloc[i_RY]
-                        else:
-                            if (df_u_BY[col].iloc[i] == np.float(0.0) and df_u_RY[col].iloc[i_RY] > np.float(0.0))\
-                            or df_u_BY[col].iloc[i] == "MI"\
-                            or pd.isnull(df_u_BY[col].iloc[i]):
-                                df_u_BY[col].iloc[i] = df_u_RY[col].iloc[i_RY]
+        df_u_BY = input_u_data_fill_BY_from_RY(df_u_BY, df_u_RY, check_file)
     
         df_u_BY = input_u_data_check_completeness_per_year(df_u_BY, "BY", check_file)
     
@@ -1225,13 +1608,13 @@ def routine_u_kca_computations(
     dEM_RY_BY_ratio = np.where((df_EM_u['uEM_is_num_BY'] & EM_BY_isnotzero), df_EM_u['EM_RY']/df_EM_u['EM_BY'], np.nan)
     
     AD_corr_a = AD_RY_BY_ratio
-    AD_corr_b = [float(0.0)]*no_nomenc_in
+    AD_corr_b = np.zeros(no_nomenc_in, dtype = np.float64)
     
-    EF_corr_a = [float(1.0)]*no_nomenc_in
-    EF_corr_b = [float(0.0)]*no_nomenc_in
+    EF_corr_a = np.ones(no_nomenc_in, dtype = np.float64)
+    EF_corr_b = np.zeros(no_nomenc_in, dtype = np.float64)
     
     EM_corr_a = dEM_RY_BY_ratio
-    EM_corr_b = [float(0.0)]*no_nomenc_in
+    EM_corr_b = np.zeros(no_nomenc_in, dtype = np.float64)
     
     #***End of Deal with data correlated between BY and RY*************************
     
@@ -1272,140 +1655,505 @@ def routine_u_kca_computations(
     print("**********************************************************")
     print("Starting Monte Carlo simulations...")
     
-    t0_mc = time.time()  
-    
     no_interv = int(np.ceil(const.P_DIST*no_mc)) #number of points that should be part of the confidence interval to get p_dist
     
-    #creatre empty variable to store results from mc simulations
-    #for sensitivity analysis, we need all generated emission values 
-    #for each category (nomenclature code)
-    #even if it takes memory to store
-    EM_BY_mc = np.zeros((no_nomenc_in, no_mc), dtype = float)
-    EM_RY_mc = np.zeros((no_nomenc_in, no_mc), dtype = float)
-    
-    
-    #***Generate random numbers with specific distribution***            
+    #Independent random streams are derived from the seed for each compound, chunk and year,
+    #identified by their spawn key (i_comp, i_chunk, year) and not by the order of the computations,
+    #so that the results do not depend on the number of processes.
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    
+    #The simulations are done by chunks of no_mc_chunk simulations.
+    #With one single chunk (default), all simulated values of a year are kept in memory
+    #and the results are computed exactly from them.
+    #With several chunks, only statistics are kept from one chunk to the next,
+    #so that the memory needed does not depend on no_mc;
+    #the narrowest interval is then computed from a quantile sketch 
+    #of MC_SKETCH_SIZE values per category and is an approximation.
+    #With the adaptive procedure, the chunks are the batches of JCGM 101:2008, 7.9.4
+    #and no_mc is the maximum number of simulations.
+    if mc_chunk_size is None and mc_adaptive_digits is None:
+        no_mc_chunk = no_mc
+    elif mc_chunk_size is None:
+        no_mc_chunk = min(const.MC_ADAPTIVE_BATCH_SIZE, no_mc)
+    else:
+        no_mc_chunk = max(1, min(int(mc_chunk_size), no_mc))
+    no_chunks = int(np.ceil(float(no_mc) / float(no_mc_chunk)))
+    is_mc_exact = no_chunks == 1
+    is_mc_adaptive = mc_adaptive_digits is not None and not is_mc_exact
+    if mc_adaptive_digits is not None and is_mc_exact:
+        check_file.write("Adaptive Monte Carlo simulations not used: the maximum number of simulations {} ".format(no_mc) + \
+                         "is not larger than the number of simulations per batch {}.\n".format(no_mc_chunk))
+    if mc_sampling == const.MC_SAMPLING_SOBOL and (no_mc_chunk & (no_mc_chunk - 1)) != 0:
+        check_file.write("WARNING: the number of simulations per chunk {} is not a power of 2, ".format(no_mc_chunk) + \
+                         "the Sobol' sequence loses its balance properties.\n")
+    if is_mc_adaptive:
+        check_file.write("Adaptive Monte Carlo simulations done in batches of {} simulations, at most {} simulations.\n".format(no_mc_chunk, no_mc))
+        print("Adaptive Monte Carlo simulations done in batches of {} simulations, at most {} simulations.".format(no_mc_chunk, no_mc))
+    elif not is_mc_exact:
+        check_file.write("Monte Carlo simulations done in {} chunks of {} simulations.\n".format(no_chunks, no_mc_chunk))
+        print("Monte Carlo simulations done in {} chunks of {} simulations.".format(no_chunks, no_mc_chunk))
+    
+    #precision of the simulated emissions, see mc_float32 for the error bounds
+    if mc_float32:
+        mc_dtype = np.float32
+    else:
+        mc_dtype = np.float64
+    
+    #input values of all source categories as numpy arrays
+    dict_mc_in = prepare_mc_input_np(
+            df_EM_u, 
+            AD_corr_a, 
+            AD_corr_b, 
+            EF_corr_a, 
+            EF_corr_b, 
+            EM_corr_a, 
+            EM_corr_b)
+    
+    #All source categories of a block of rows are simulated at once.
+    #The number of rows per block limits the memory needed for the AD and EF values.
+    no_rows_block = max(1, const.MC_NO_VALUES_BLOCK // no_mc_chunk)
+    
+    #statistics of the simulated values for AD and EF, for each source category
+    dict_stats_AD_EF = {}
+    for y_string in ["BY", "RY"]:
+        for input_type in ["AD", "EF"]:
+            dict_stats_AD_EF["{}_{}".format(input_type, y_string)] = init_mc_stats_np(no_nomenc_in, no_mc, no_mc_chunk)
+    #statistics of the simulated values for the inventory total
+    dict_stats_inventory = {}
+    for y_string in ["BY", "RY", "trend_normed"]:
+        dict_stats_inventory[y_string] = init_mc_stats_np(1, no_mc, no_mc_chunk)
+    #statistics of the simulated values for all source categories and aggregated categories,
+    #created with the first chunk once the aggregated categories are known
+    dict_stats_EM = {}
+    #simulated values of all rows, kept on disk if mc_sample_store,
+    #created with the first chunk once the aggregated categories are known
+    dict_mc_store = {}
+    if mc_sample_store:
+        #rows: inventory total for BY, RY, trend_normed
+        dict_mc_store["inventory"] = np.lib.format.open_memmap(
+                dict_io_out["filename_out_mc_samples"] + "inventory.npy",
+                mode = "w+",
+                dtype = np.float64,
+                shape = (3, no_mc))
     
-    for i_code in range(no_nomenc_in):        
+    #numpy data structure used
+    np_axis_mc = 1
+    np_axis_process = 0
     
-        # 20230210 We do not do sensitivity analysis
-        #between neither AD and inventory EM
-        #nor between EF and inventory EM
-        #so we need to store mc results for AD and EF only to compute EM, for each process
-        AD_BY_mc = np.zeros((no_mc), dtype = float)
-        EF_BY_mc = np.zeros((no_mc), dtype = float)
-        AD_RY_mc = np.zeros((no_mc), dtype = float)
-        EF_RY_mc = np.zeros((no_mc), dtype = float)
+    t_mc = float(0.0)
+    t_compute_interval = float(0.0)
+    t_agg = 0
+    t_store = float(0.0)
+    
+    #mean, standard deviation, edges of the confidence interval
+    #of the inventory total for each batch of the adaptive procedure
+    dict_mc_batch = {}
+    for y_string in ["BY", "RY", "trend_normed"]:
+        dict_mc_batch[y_string] = []
+    dict_mc_tolerance = None
+    
+    for i_chunk in range(no_chunks):
+        no_mc_i = min(no_mc_chunk, no_mc - i_chunk * no_mc_chunk)
+        #columns of this chunk in the sample store
+        i_mc_start = i_chunk * no_mc_chunk
+        i_mc_stop = i_mc_start + no_mc_i
         
-    
-        #----------------------------------------------------------------------
-        #***BASE YEAR EMISSION IS NOT ZERO***
-        #----------------------------------------------------------------------
-        if df_EM_u['EM_BY'][i_code] != float(0.0):
-    
-            #***BASE YEAR: UNCERTAINTY GIVEN FOR AD AND EF***        
-            if not df_EM_u['uEM_is_num_BY'][i_code]:
+        #random generators of this chunk, for the base year and the reporting year
+        rng_BY = np.random.default_rng(np.random.SeedSequence(seed, spawn_key = (i_comp, i_chunk, 0)))
+        rng_RY = np.random.default_rng(np.random.SeedSequence(seed, spawn_key = (i_comp, i_chunk, 1)))
+        if not is_mc_exact:
+            print("Monte Carlo simulations, chunk {} of {}.".format(i_chunk + 1, no_chunks))
+        
+        t0_mc = time.time()  
+        
+        #creatre empty variable to store results from mc simulations
+        #for sensitivity analysis, we need all generated emission values 
+        #for each category (nomenclature code)
+        #even if it takes memory to store
+        EM_BY_mc = np.zeros((no_nomenc_in, no_mc_i), dtype = mc_dtype)
+        EM_RY_mc = np.zeros((no_nomenc_in, no_mc_i), dtype = mc_dtype)
+        
+        
+        #***Generate random numbers with specific distribution***
+        
+        for i_start in range(0, no_nomenc_in, no_rows_block):
+            i_stop = min(i_start + no_rows_block, no_nomenc_in)
             
-                #Base year, activity data AD
-                AD_BY_mc[:] = generate_random_value(
-                        df_EM_u['uAD_dist_BY'][i_code],
-                        df_EM_u['EM_BY'][i_code], 
-                        df_EM_u["uAD_lower_BY"][i_code], 
-                        df_EM_u["uAD_upper_BY"][i_code],
-                        no_mc)
-    
-                #base year, emission factor EF
-                EF_BY_mc[:] = generate_random_value(
-                        df_EM_u['uEF_dist_BY'][i_code],
-                        np.float64(1.0), #BY_EF_interm[i_code],
-                        df_EM_u["uEF_lower_f_BY"][i_code],
-                        df_EM_u["uEF_upper_f_BY"][i_code],
-                        no_mc)
-    
-                #compute confidence intervals for AD and EF
-                df_mc_out_AD_EF["AD_BY_mc_edge_min"].iloc[i_code], df_mc_out_AD_EF["AD_BY_mc_edge_max"].iloc[i_code] = find_interval_np(AD_BY_mc, const.P_DIST)#const.P_DIST) #no_mc, no_interv)
-                df_mc_out_AD_EF["EF_BY_mc_edge_min"].iloc[i_code], df_mc_out_AD_EF["EF_BY_mc_edge_max"].iloc[i_code] = find_interval_np(EF_BY_mc, const.P_DIST)#const.P_DIST) #no_mc, no_interv)
-                #Store mean value for AD and EF
-                df_mc_out_AD_EF["AD_BY_mc_mean"].iloc[i_code] = np.nanmean(AD_BY_mc)
-                df_mc_out_AD_EF["EF_BY_mc_mean"].iloc[i_code] = np.nanmean(EF_BY_mc)
+            dict_AD_EF_mc = generate_EM_mc_np(
+                    dict_mc_in, 
+                    slice(i_start, i_stop), 
+                    no_mc_i, 
+                    rng_BY, 
+                    EM_BY_mc[i_start:i_stop], 
+                    EM_RY_mc[i_start:i_stop],
+                    rng_RY = rng_RY,
+                    sampling = mc_sampling)
             
-                EM_BY_mc[i_code, :] = AD_BY_mc * EF_BY_mc
+            #confidence intervals and mean values for AD and EF
+            for y_string in ["BY", "RY"]:
+                index_block = np.flatnonzero(dict_AD_EF_mc["is_AD_EF_{}".format(y_string)])
+                for input_type in ["AD", "EF"]:
+                    update_mc_stats_np(
+                            dict_stats_AD_EF["{}_{}".format(input_type, y_string)], 
+                            dict_AD_EF_mc["{}_{}_mc".format(input_type, y_string)][index_block], 
+                            rows = i_start + index_block)
+        
+        #delete a few unecessary variables to save some memory space
+        del dict_AD_EF_mc
+        
+        t_mc = t_mc + time.time() - t0_mc
+        
+        #Compute sum of emissions 
+        #(aggregation over all {code, compound, resource})
+        #Sum of emissions for the inventory, over all input rows, for each mc simulation
+        #implicitely, all the input rows together makes the sum of the inventory.
+        #The sums are done in double precision, also with mc_float32.
+        EM_BY_mc_inventory = np.nansum(EM_BY_mc, axis = np_axis_process, dtype = np.float64) #has 1 dimension and lenght of np_axis_mc
+        EM_RY_mc_inventory = np.nansum(EM_RY_mc, axis = np_axis_process, dtype = np.float64) #has 1 dimension and lenght of np_axis_mc
+        
         
-            #***BASE YEAR: UNCERTAINTY GIVEN FOR DIRECT EMISSION***        
-            else:                             
-                EM_BY_mc[i_code, :] = generate_random_value(
-                        df_EM_u['uEM_dist_BY'][i_code],
-                        df_EM_u['EM_BY'][i_code],
-                        df_EM_u["uEM_lower_BY"][i_code],
-                        df_EM_u["uEM_upper_BY"][i_code],
-                        no_mc)
+        #************************trend**************************************
+        
+        trend_normed_mc = np.empty((no_nomenc_in, no_mc_i), dtype = mc_dtype)
+        #Compute trend for each row, normalised by simulations of inventory sum for BY
+        #The sum of the rows from the normalised trend gives the trend of the inventory sum!
+        for i_code in range(no_nomenc_in):
+            trend_normed_mc[i_code, :] = np.where(
+                    EM_BY_mc_inventory != np.float64(0.0), 
+                    (EM_RY_mc[i_code, :]-EM_BY_mc[i_code, :])/EM_BY_mc_inventory*np.float64(100.0), 
+                    np.nan)
+            
+        #trend for the inventory, for each mc simulation
+        EM_trend_mc_inventory = np.where(EM_BY_mc_inventory!= float(0), (EM_RY_mc_inventory-EM_BY_mc_inventory)/EM_BY_mc_inventory * float(100.0), np.nan)
+        
+        update_mc_stats_np(dict_stats_inventory["BY"], EM_BY_mc_inventory[None, :])
+        update_mc_stats_np(dict_stats_inventory["RY"], EM_RY_mc_inventory[None, :])
+        update_mc_stats_np(dict_stats_inventory["trend_normed"], EM_trend_mc_inventory[None, :])
+        
+        if mc_sample_store:
+            dict_mc_store["inventory"][0, i_mc_start:i_mc_stop] = EM_BY_mc_inventory
+            dict_mc_store["inventory"][1, i_mc_start:i_mc_stop] = EM_RY_mc_inventory
+            dict_mc_store["inventory"][2, i_mc_start:i_mc_stop] = EM_trend_mc_inventory
+        
+        if is_mc_adaptive:
+            for y_string, x_inventory in [
+                    ("BY", EM_BY_mc_inventory), 
+                    ("RY", EM_RY_mc_inventory), 
+                    ("trend_normed", EM_trend_mc_inventory)]:
+                edge_min, edge_max = find_interval_np_batch(x_inventory[None, :], const.P_DIST)
+                dict_mc_batch[y_string].append([np.mean(x_inventory), np.std(x_inventory), edge_min[0], edge_max[0]])
+        
+        
+        #=============================================
+        # AGGREGATE MC-SIMULATED EMISSIONS ACCORDING TO PROCESSES
+        #=============================================
+        #The aggregated categories and their status do not depend on the simulations:
+        #the aggregation is done once with the first chunk, without the simulated values,
+        #and gives a sparse matrix of the source categories summed up in each aggregated category.
+        #The simulated values of all aggregated categories are then obtained 
+        #with one product, for each year and each chunk.
+        
+        if i_chunk == 0:
+            t0_agg = time.time()
+            #emissions and status of all years at once: the aggregated rows are the same for all years,
+            #the groupby chain runs once and the status of each year is aggregated within it
+            list_col_EM_status = ["EM_status_BY", "EM_status_RY", "EM_status_trend_normed"]
+            use_cols_y_all = ["EM_status_BY", "EM_BY", "EM_status_RY", "EM_RY", "EM_status_trend_normed", "EM_trend_normed"]
+            use_cols_for_agg = use_cols_id + use_cols_y_all + use_col_agg_proc + use_col_agg_comp + use_col_agg_reso
+            df_EM_u_mc = df_EM_u[use_cols_for_agg].copy()
+            #the first rows are the source categories themselves
+            agg_matrix = sparse.identity(no_nomenc_in, dtype = float, format = "csr")
+            
+            if agg_proc:
+                print("Starting aggregation by process.")
+                df_EM_u_mc, agg_matrix = groupby_one_attribute_pd(
+                        df = df_EM_u_mc,
+                        df_agg_tree = df_agg_tree_proc,
+                        agg_str = "_proc",
+                        child_id_left = "proc_id",
+                        col_unique_groupby_extra = ["reso_id", "comp_id"],
+                        col_EM_status = list_col_EM_status,
+                        agg_matrix = agg_matrix,
+                        )
+            if agg_comp:
+                print("Starting aggregation by compound.")
+                df_EM_u_mc, agg_matrix = groupby_one_attribute_pd(
+                        df = df_EM_u_mc,
+                        df_agg_tree = df_agg_tree_comp,
+                        agg_str = "_comp",
+                        child_id_left = "comp_id",
+                        col_unique_groupby_extra = ["proc_id", "reso_id"],
+                        col_EM_status = list_col_EM_status,
+                        agg_matrix = agg_matrix,
+                        )
+            if agg_reso:
+                print("Starting aggregation by resource.")
+                df_EM_u_mc, agg_matrix = groupby_one_attribute_pd(
+                        df = df_EM_u_mc,
+                        df_agg_tree = df_agg_tree_reso,
+                        agg_str = "_reso",
+                        child_id_left = "reso_id",
+                        col_unique_groupby_extra = ["proc_id", "comp_id"],
+                        col_EM_status = list_col_EM_status,
+                        agg_matrix = agg_matrix,
+                        )
+            
+            #the same for all years, only the rows of the aggregated categories are needed
+            agg_matrix_mc = agg_matrix[no_nomenc_in:]
+            del agg_matrix
+            t_agg = t_agg + time.time() - t0_agg
+        
+        for i_y in range(3):
+            if i_y == 0:
+                y_string = "BY"
+                sensitivity_ref = EM_BY_mc_inventory #reference variable to compute sensitivity
+                x_mc = EM_BY_mc
                 
+            elif i_y == 1:
+                y_string = "RY"
+                sensitivity_ref = EM_RY_mc_inventory
+                x_mc = EM_RY_mc
                 
-        #----------------------------------------------------------------------
-        #***REPORTING YEAR EMISSION IS NOT ZERO***
-        #----------------------------------------------------------------------
-        if df_EM_u['EM_RY'][i_code] != float(0.0): #either no correlation or RY cannot be computed from BY if BY is zero but RY is not zero                                   
-    
-            #***REPORTING YEAR: UNCERTAINTY GIVEN FOR AD AND EF***        
-            if not df_EM_u['uEM_is_num_RY'][i_code]:                    
-                #Reporting year, AD
-                if df_EM_u['uAD_corr'][i_code] and df_EM_u['EM_BY'][i_code] != float(0.0): #full correlation with AD_BY and AD_BY != 0
-                    AD_RY_mc = AD_BY_mc * AD_corr_a[i_code] + AD_corr_b[i_code]                                               
-                else:
-                    AD_RY_mc[:] = generate_random_value(
-                            df_EM_u['uAD_dist_RY'][i_code],
-                            df_EM_u['EM_RY'][i_code],
-                            df_EM_u["uAD_lower_RY"][i_code],
-                            df_EM_u["uAD_upper_RY"][i_code],
-                            no_mc)
-                                            
-                #Reporting year, EF
-                if df_EM_u['uEF_corr'][i_code] and df_EM_u['EM_BY'][i_code] != float(0.0): #full correlation with BY
-                    #it could be that values are fully correlated but that process started later than BY, for example
-                    EF_RY_mc = EF_BY_mc * EF_corr_a[i_code] + EF_corr_b[i_code]    
-                else:
-                    EF_RY_mc[:] = generate_random_value(
-                            df_EM_u['uEF_dist_RY'][i_code],
-                            np.float64(1.0), #RY_EF_interm[i_code],
-                            df_EM_u["uEF_lower_f_RY"][i_code],
-                            df_EM_u["uEF_upper_f_RY"][i_code],
-                            no_mc)
-    
-                #compute confidence intervals for AD and EF
-                df_mc_out_AD_EF["AD_RY_mc_edge_min"].iloc[i_code], df_mc_out_AD_EF["AD_RY_mc_edge_max"].iloc[i_code] = find_interval_np(AD_RY_mc, const.P_DIST) #const.P_DIST) #no_mc, no_interv) 
-                df_mc_out_AD_EF["EF_RY_mc_edge_min"].iloc[i_code], df_mc_out_AD_EF["EF_RY_mc_edge_max"].iloc[i_code] = find_interval_np(EF_RY_mc, const.P_DIST) #const.P_DIST) #no_mc, no_interv)
-                #Store mean value for AD and EF
-                df_mc_out_AD_EF["AD_RY_mc_mean"].iloc[i_code] = np.nanmean(AD_RY_mc)
-                df_mc_out_AD_EF["EF_RY_mc_mean"].iloc[i_code] = np.nanmean(EF_RY_mc)
-    
-                EM_RY_mc[i_code, :] = AD_RY_mc * EF_RY_mc
-    
-            #***REPORTING YEAR: UNCERTAINTY GIVEN FOR DIRECT EMISSION***                                              
+            elif i_y == 2:
+                y_string = "trend_normed"
+                sensitivity_ref = EM_trend_mc_inventory
+                x_mc = trend_normed_mc
+            col_EM_status = "EM_status_{}".format(y_string)
+            col_EM_is_num = "EM_is_num_{}".format(y_string)
+            use_cols_y = [col_EM_status, "EM_{}".format(y_string)]
+        
+            t0_agg = time.time()
+            
+            #nan values are counted as zero in the sums, as with pandas groupby().sum()
+            if np.any(np.isnan(x_mc)):
+                x_agg_mc = agg_matrix_mc.dot(np.where(np.isnan(x_mc), float(0.0), x_mc))
             else:
-                if df_EM_u['uEM_corr'][i_code] and df_EM_u['EM_BY'][i_code] != float(0.0): #full correlation with BY
-                    EM_RY_mc[i_code, :] = EM_BY_mc[i_code, :]* EM_corr_a[i_code] + EM_corr_b[i_code]    
-                else:
-                    EM_RY_mc[i_code, :] = generate_random_value(
-                            df_EM_u['uEM_dist_RY'][i_code],
-                            df_EM_u['EM_RY'][i_code],
-                            df_EM_u["uEM_lower_RY"][i_code],
-                            df_EM_u["uEM_upper_RY"][i_code],
-                            no_mc)
-    
-        #implicitely, else are emissions zero.
-        #Do not assign nan to emissions otherwise 
-        #contribution to inventory trend cannot be computed.
-    
-    #delete a few unecessary variables to save some memory space
-    del AD_BY_mc
-    del AD_RY_mc
-    del EF_BY_mc
-    del EF_RY_mc
+                x_agg_mc = agg_matrix_mc.dot(x_mc)
+            #the sparse product is done in double precision
+            x_agg_mc = x_agg_mc.astype(mc_dtype, copy = False)
+                
+            t_agg = t_agg + time.time() - t0_agg
+            
+            if i_chunk == 0:
+                if i_y == 0:
+                    #df_mc_out is still completely empty.
+                    df_mc_out_len = len(df_EM_u_mc)
+                    df_mc_out = pd.DataFrame(
+                            float(0.0),
+                            columns=[
+                                    #use_cols_id
+                                    #"proc_id", 
+                                    #"comp_id", 
+                                    #"reso_id",
+                            
+                                    #"import",
+            
+                                    #use_cols_y
+                                    #"EM_BY",
+                                    #"EM_status_BY",
+                                    #"EM_is_num_BY",
+                                    #"unit_BY",
+                                    #"EM_RY",
+                                    #"EM_status_RY",
+                                    #"EM_is_num_RY",
+                                    #"unit_RY",
+                                    #"EM_trend_normed",
+                                    #"EM_status_trend_normed",
+                                    #"EM_is_num_trend_normed",
+                                    #"unit_trend_normed",
+            
+                                    #"report", #do not create here otherwise raise ValueError: Cannot use name of an existing column for indicator column
+            
+                                    "EM_BY_mc_edge_min",
+                                    "EM_BY_mc_edge_max",
+                                    "EM_BY_mc_mean",
+                                    "EM_RY_mc_edge_min",
+                                    "EM_RY_mc_edge_max",
+                                    "EM_RY_mc_mean",
+                                    "EM_trend_normed_mc_edge_min",
+                                    "EM_trend_normed_mc_edge_max",
+                                    "EM_trend_normed_mc_mean",                
+            
+                                    "EM_BY_mc_U_lower_p",
+                                    "EM_BY_mc_U_upper_p",
+                                    "EM_BY_mc_U_mean_p",
+                                    "EM_RY_mc_U_lower_p",
+                                    "EM_RY_mc_U_upper_p",
+                                    "EM_RY_mc_U_mean_p",
+                                    "EM_trend_normed_mc_U_lower_p",
+                                    "EM_trend_normed_mc_U_upper_p",
+                                    "EM_trend_normed_mc_U_mean_p",
+            
+                                    "EM_BY_mc_2stddev_p",
+                                    "EM_RY_mc_2stddev_p",
+                                    "EM_trend_normed_mc_2stddev_p",
+                            
+                                    "EM_BY_mc_sensitivity", #sensitivity of source category emission to inventory emission for BY
+                                    "EM_RY_mc_sensitivity", #sensitivity of source category emission to inventory emission for RY
+                                    "EM_trend_normed_mc_sensitivity", #sensitivity of source category normalised trend to inventory trend
+                                    "EM_BY_RY_mc_sensitivity", #sensitivity of RY emission to BY emission: computed only with mc_sample_store.
+                                    "EM_BY_mc_var",
+                                    "EM_RY_mc_var",
+                                    "EM_trend_normed_mc_var",
+                                    "EM_BY_mc_var_normed",     
+                                    "EM_RY_mc_var_normed",
+                                    "EM_trend_normed_mc_var_normed",             
+                                    ],
+                                    index=range(len(df_EM_u_mc)))
+    
+    
+                    df_mc_out[use_cols_id] = df_EM_u_mc[use_cols_id].copy()
+                    #row of the simulated values in the sample store, kept when df_mc_out is sorted
+                    df_mc_out["mc_sample_row"] = np.arange(df_mc_out_len)
+                    df_mc_out["import"] = df_EM_u["import"].copy()
+                    df_mc_out["import"].loc[pd.isnull(df_mc_out["import"])] = False
+                
+                df_mc_out[use_cols_y] = df_EM_u_mc[use_cols_y].copy()    
+                df_mc_out[col_EM_is_num] = False
+                df_mc_out[col_EM_is_num].loc[df_mc_out[col_EM_status] == "ES"] = True
+                
+                #confidence intervals and sensitivity are computed only for non-zero emissions
+                dict_stats_EM[y_string] = init_mc_stats_np(
+                        df_mc_out_len, 
+                        no_mc, 
+                        no_mc_chunk, 
+                        is_interval = np.asarray(df_EM_u_mc["EM_{}".format(y_string)] != float(0.0)))
+                
+                if mc_sample_store:
+                    #same rows as df_mc_out: source categories, then aggregated categories
+                    dict_mc_store[y_string] = np.lib.format.open_memmap(
+                            dict_io_out["filename_out_mc_samples"] + y_string + ".npy",
+                            mode = "w+",
+                            dtype = mc_dtype,
+                            shape = (df_mc_out_len, no_mc))
+            
+            #---------------------------------------------------------------------
+            # FIND NARROWEST INTERVAL CONTAINING CHOSEN INTERVAL E.G. 95%
+            #---------------------------------------------------------------------    
+            
+            #===========================================================================
+            # MC: SENSITIVITY ANALYSIS
+            #===========================================================================
+            #what equation?
+            #in Table 3.3 Chap 3 IPCC, Column H is "contribution to variance"
+            #Report the ‘contribution to uncertainty’. It is estimated dividing the variance of each category by
+            #the total variance of the inventory (var(x)/sum(var(x[i]))).
+            #but is this really an appropriate and suitable method?
+            #yes because a sum is a linear process so uncertainty propagation is ok.
+               
+            
+            #*************************    
+            #Other method: covariance between each input source and the sum.
+            #sensitivity = cov(x,y)/sqrt(var(x)*var(y)) #note: this is np.corrcoef
+            #but for that we need to keep all generated input values in memory, from each source,
+            #or to update the covariance chunk by chunk.
+            #Use this sensitivity for tornado plot.
+            
+            t0_compute_interval = time.time()
             
+            #source categories, then aggregated categories
+            update_mc_stats_np(
+                    dict_stats_EM[y_string], 
+                    x_mc, 
+                    rows = np.arange(no_nomenc_in),
+                    ref = sensitivity_ref)
+            update_mc_stats_np(
+                    dict_stats_EM[y_string], 
+                    x_agg_mc, 
+                    rows = np.arange(no_nomenc_in, df_mc_out_len),
+                    ref = sensitivity_ref)
+            
+            t_compute_interval = t_compute_interval + time.time() - t0_compute_interval
+            
+            #The sensitivity between base year and reporting year needs the simulations
+            #of both years, that are deleted after each loop to save memory:
+            #they are kept on disk if mc_sample_store and the sensitivity is computed afterwards.
+            if mc_sample_store:
+                t0_store = time.time()
+                dict_mc_store[y_string][:no_nomenc_in, i_mc_start:i_mc_stop] = x_mc
+                dict_mc_store[y_string][no_nomenc_in:, i_mc_start:i_mc_stop] = x_agg_mc
+                t_store = t_store + time.time() - t0_store
+            
+            #Delete variables to save memory space
+            del x_mc
+            del x_agg_mc
+            del sensitivity_ref
+            
+        if i_chunk == 0:
+            del df_EM_u_mc
+        del EM_BY_mc
+        del EM_RY_mc
+        del trend_normed_mc
+        if not is_mc_exact:
+            del EM_BY_mc_inventory
+            del EM_RY_mc_inventory
+            del EM_trend_mc_inventory
+        
+        if is_mc_adaptive:
+            #stop when the results for the inventory total are stabilised for all years
+            is_mc_stable = True
+            dict_mc_tolerance = {}
+            for y_string in dict_mc_batch:
+                u_inventory = np.sqrt(dict_stats_inventory[y_string]["M2"][0] / dict_stats_inventory[y_string]["count"][0])
+                is_stable, dict_mc_tolerance[y_string] = check_mc_stabilisation_np(
+                        np.array(dict_mc_batch[y_string], dtype = np.float64),
+                        u_inventory,
+                        int(mc_adaptive_digits))
+                is_mc_stable = is_mc_stable and is_stable
+            if is_mc_stable:
+                break
+    
+    if is_mc_adaptive:
+        #number of simulations actually done
+        no_mc = i_mc_stop
+        if is_mc_stable:
+            check_file.write("Adaptive Monte Carlo simulations stabilised to {} significant digits ".format(mc_adaptive_digits) + \
+                             "after {} simulations ({} batches).\n".format(no_mc, i_chunk + 1))
+        else:
+            check_file.write("WARNING: adaptive Monte Carlo simulations not stabilised to {} significant digits ".format(mc_adaptive_digits) + \
+                             "after the maximum number of {} simulations.\n".format(no_mc))
+        for y_string in dict_mc_tolerance:
+            check_file.write("Numerical tolerance of the Monte Carlo simulations for the inventory total {}: {}\n".format(y_string, dict_mc_tolerance[y_string]))
+        print("Monte Carlo simulations: {} simulations done.".format(no_mc))
+    
+    del dict_mc_in
     
     print("Monte Carlo simulations completed.")
-    check_file.write("Run time for Monte Carlo simulations: " + str(time.time() - t0_mc) + " seconds\n")   
-    print("Run time for Monte Carlo simulations: " + str(time.time() - t0_mc) + " seconds")   
+    check_file.write("Run time for Monte Carlo simulations: " + str(t_mc) + " seconds\n")   
+    print("Run time for Monte Carlo simulations: " + str(t_mc) + " seconds")   
+    
+    if mc_sample_store:
+        #compute sensitivity between base year and reporting year from the stored simulations,
+        #read by blocks of rows
+        t0_store = time.time()
+        for y_string in dict_mc_store:
+            dict_mc_store[y_string].flush()
+        df_mc_out["EM_BY_RY_mc_sensitivity"] = compute_correlation_rows_np_batch(
+                dict_mc_store["BY"], 
+                dict_mc_store["RY"])
+        del dict_mc_store
+        t_store = t_store + time.time() - t0_store
+        check_file.write("Monte Carlo simulations written to: " + dict_io_out["filename_out_mc_samples"] + "*.npy\n")
+        check_file.write("Run time for writing Monte Carlo simulations: " + str(t_store) + " seconds\n")   
+        print("Run time for writing Monte Carlo simulations: " + str(t_store) + " seconds")   
+    else:
+        df_mc_out["EM_BY_RY_mc_sensitivity"] = np.nan
+    
+    #***Compute results***
+    
+    #Finish all computations for AD and EF
+    for y_string in ["BY", "RY"]:
+        #rows where AD and EF were simulated
+        index_AD_EF = np.flatnonzero(
+                (np.asarray(df_EM_u["EM_{}".format(y_string)], dtype = float) != np.float64(0.0)) 
+                & np.logical_not(np.asarray(df_EM_u["uEM_is_num_{}".format(y_string)], dtype = bool)))
+        for input_type in ["AD", "EF"]:
+            dict_stats = finalize_mc_stats_np(dict_stats_AD_EF["{}_{}".format(input_type, y_string)])
+            df_mc_out_AD_EF.loc[index_AD_EF, "{}_{}_mc_edge_min".format(input_type, y_string)] = dict_stats["edge_min"][index_AD_EF]
+            df_mc_out_AD_EF.loc[index_AD_EF, "{}_{}_mc_edge_max".format(input_type, y_string)] = dict_stats["edge_max"][index_AD_EF]
+            df_mc_out_AD_EF.loc[index_AD_EF, "{}_{}_mc_mean".format(input_type, y_string)] = dict_stats["mean"][index_AD_EF]
+    del dict_stats_AD_EF
     
     #t0_compute_results_mc = time.time()            
     #***Compute results***
@@ -1435,41 +2183,26 @@ def routine_u_kca_computations(
     df_mc_out_AD_EF["EF_RY_mc_U_upper_p"].iloc[indexes_nonzero] = abs((df_mc_out_AD_EF["EF_RY_mc_edge_max"].iloc[indexes_nonzero] - df_mc_out_AD_EF["EF_RY_mc_mean"].iloc[indexes_nonzero]) / df_mc_out_AD_EF["EF_RY_mc_mean"].iloc[indexes_nonzero]) * np.float(100.0)
     
                     
-    #numpy data structure used
-    np_axis_mc = 1
-    np_axis_process = 0
     
     #=============================================================
     # PLOT DISTRIBUTION OF DATA FOR INVENTORY: BY, RY, TREND
     #=============================================================
     
-    #Compute sum of emissions 
-    #(aggregation over all {code, compound, resource})
-    #Sum of emissions for the inventory, over all input rows, for each mc simulation
-    #implicitely, all the input rows together makes the sum of the inventory.
-    EM_BY_mc_inventory = np.nansum(EM_BY_mc, axis = np_axis_process) #has 1 dimension and lenght of np_axis_mc
-    EM_RY_mc_inventory = np.nansum(EM_RY_mc, axis = np_axis_process) #has 1 dimension and lenght of np_axis_mc
-    EM_BY_mc_inventory_mean = np.nanmean(EM_BY_mc_inventory)
-    EM_RY_mc_inventory_mean = np.nanmean(EM_RY_mc_inventory)
-    EM_BY_mc_inventory_stddev = np.nanstd(EM_BY_mc_inventory)
-    EM_RY_mc_inventory_stddev = np.nanstd(EM_RY_mc_inventory)
-    
-    
-    #************************trend**************************************
-    
-    trend_normed_mc = np.empty((no_nomenc_in, no_mc), dtype = float)
-    #Compute trend for each row, normalised by simulations of inventory sum for BY
-    #The sum of the rows from the normalised trend gives the trend of the inventory sum!
-    for i_code in range(no_nomenc_in):
-        trend_normed_mc[i_code, :] = np.where(
-                EM_BY_mc_inventory != np.float64(0.0), 
-                (EM_RY_mc[i_code, :]-EM_BY_mc[i_code, :])/EM_BY_mc_inventory*np.float64(100.0), 
-                np.nan)
-        
-    #trend for the inventory, for each mc simulation
-    EM_trend_mc_inventory = np.where(EM_BY_mc_inventory!= float(0), (EM_RY_mc_inventory-EM_BY_mc_inventory)/EM_BY_mc_inventory * float(100.0), np.nan)
-    EM_trend_mc_inventory_mean = np.nanmean(EM_trend_mc_inventory)
-    EM_trend_mc_inventory_stddev = np.nanstd(EM_trend_mc_inventory)
+    for y_string in ["BY", "RY", "trend_normed"]:
+        finalize_mc_stats_np(dict_stats_inventory[y_string])
+    EM_BY_mc_inventory_mean = dict_stats_inventory["BY"]["mean"][0]
+    EM_RY_mc_inventory_mean = dict_stats_inventory["RY"]["mean"][0]
+    EM_trend_mc_inventory_mean = dict_stats_inventory["trend_normed"]["mean"][0]
+    EM_BY_mc_inventory_stddev = np.sqrt(dict_stats_inventory["BY"]["var"][0])
+    EM_RY_mc_inventory_stddev = np.sqrt(dict_stats_inventory["RY"]["var"][0])
+    EM_trend_mc_inventory_stddev = np.sqrt(dict_stats_inventory["trend_normed"]["var"][0])
+    
+    if not is_mc_exact:
+        #the values of the quantile sketch all have the same weight
+        #and are used for the histograms instead of all simulated values.
+        EM_BY_mc_inventory = dict_stats_inventory["BY"]["sketch"][0]
+        EM_RY_mc_inventory = dict_stats_inventory["RY"]["sketch"][0]
+        EM_trend_mc_inventory = dict_stats_inventory["trend_normed"]["sketch"][0]
     
     
     t0_plot_dist = time.time()   
@@ -1505,306 +2238,28 @@ def routine_u_kca_computations(
     t1_plot_dist = time.time() - t0_plot_dist
     check_file.write("Run time for plotting distributions: " + str(t1_plot_dist) + " seconds\n")  
     print("Run time for plotting distributions: " + str(t1_plot_dist) + " seconds")  
+    del EM_BY_mc_inventory
+    del EM_RY_mc_inventory
+    del EM_trend_mc_inventory
     
     
-    
-    #=============================================
-    # AGGREGATE MC-SIMULATED EMISSIONS ACCORDING TO PROCESSES
-    #=============================================
-    #To save memory space, do aggregation of each df separately: 
-    #one for BY, one for RY, one for trend.
-    
-    
-    t_compute_interval = float(0.0)
-    t_agg = 0
-    
     for i_y in range(3):
         if i_y == 0:
             y_string = "BY"
-            sensitivity_ref = EM_BY_mc_inventory #reference variable to compute sensitivity
-            col_EM_status = "EM_status_{}".format(y_string)
-            col_EM_is_num = "EM_is_num_{}".format(y_string)
-            use_cols_y = [col_EM_status, "EM_{}".format(y_string)]
-            use_cols_for_agg = use_cols_id + use_cols_y + use_col_agg_proc + use_col_agg_comp + use_col_agg_reso
-            df_EM_u_mc = pd.concat([df_EM_u[use_cols_for_agg], pd.DataFrame(data = EM_BY_mc)], axis = 1)
-            
         elif i_y == 1:
             y_string = "RY"
-            sensitivity_ref = EM_RY_mc_inventory
-            col_EM_status = "EM_status_{}".format(y_string)
-            col_EM_is_num = "EM_is_num_{}".format(y_string)
-            use_cols_y = [col_EM_status, "EM_{}".format(y_string)]
-            use_cols_for_agg = use_cols_id + use_cols_y + use_col_agg_proc + use_col_agg_comp + use_col_agg_reso
-            df_EM_u_mc = pd.concat([df_EM_u[use_cols_for_agg], pd.DataFrame(data = EM_RY_mc)], axis = 1)
-            
         elif i_y == 2:
             y_string = "trend_normed"
-            sensitivity_ref = EM_trend_mc_inventory
-            col_EM_status = "EM_status_{}".format(y_string)
-            col_EM_is_num = "EM_is_num_{}".format(y_string)
-            use_cols_y = [col_EM_status, "EM_{}".format(y_string)]
-            use_cols_for_agg = use_cols_id + use_cols_y + use_col_agg_proc + use_col_agg_comp + use_col_agg_reso
-            df_EM_u_mc = pd.concat([df_EM_u[use_cols_for_agg], pd.DataFrame(data = trend_normed_mc)], axis = 1)
-    
-        start_column_mc = len(use_cols_for_agg)    
-        stop_column_mc = df_EM_u_mc.shape[1]
-        
-        #DOES NOT work:
-        #compute confidence intervals here? make sense only if intermediate agg can be trown away, which is not the case so far.
-    
-    
-        t0_agg = time.time()
         
-        for i_agg_type in range(3):
-            if i_agg_type == 0:
-                agg_type = agg_proc
-                agg_str = "_proc"
-                agg_str_long = "process"
-                child_id_left = "proc_id"
-                col_unique_groupby_extra = ["reso_id", "comp_id"]
-                      
-            elif i_agg_type == 1:
-                agg_type = agg_comp
-                agg_str = "_comp"
-                agg_str_long = "compound"
-                child_id_left = "comp_id"
-                col_unique_groupby_extra = ["proc_id", "reso_id"]
-                
-            elif i_agg_type == 2:
-                agg_type = agg_reso
-                agg_str = "_reso"
-                agg_str_long = "resource"
-                child_id_left = "reso_id"
-                col_unique_groupby_extra = ["proc_id", "comp_id"]
-                
-            if agg_type:
-                print("Starting aggregation by {}.".format(agg_str_long))
-        
-                depth_id = "depth_id{}".format(agg_str)
-                parent_id = "parent_id{}".format(agg_str)
-                child_id = "child_id{}".format(agg_str)
-                parent_id_tree = "parent_id{}_tree".format(agg_str)
-                child_id_tree = "child_id{}_tree".format(agg_str)
-                parent_id_agg = "parent_id{}_agg".format(agg_str)
-                
-                if i_agg_type == 0:
-                    df_agg_tree = df_agg_tree_proc
-                elif i_agg_type == 1:
-                    df_agg_tree = df_agg_tree_comp
-                elif i_agg_type == 2:
-                    df_agg_tree = df_agg_tree_reso
+        dict_stats = finalize_mc_stats_np(dict_stats_EM[y_string], ref = True)
         
-        
-                #this is working
-                df_test = pd.merge(
-                        df_EM_u_mc[[child_id_left]],
-                        df_agg_tree,
-                        left_on=[child_id_left], 
-                        right_on = [child_id], 
-                        how="left", 
-                        indicator="exists_agg")
-                        
-                #https://pandas.pydata.org/pandas-docs/stable/user_guide/merging.html#merging-together-values-within-series-or-dataframe-columns
-                df_EM_u_mc[depth_id] = df_test[depth_id].copy()
-                df_EM_u_mc[parent_id] = df_test[parent_id].copy()        
-    
-                agg_max_depth = np.int(np.max(df_EM_u_mc[depth_id]))
-                print(y_string + " group by: " + str([parent_id] + col_unique_groupby_extra + [depth_id]))
-                    
-                for i_depth in range(agg_max_depth, 0, -1):
-                    #aggregate only to one level above
-                    print("mc, i_depth: " + str(i_depth))
-                    
-            
-                    df_agg_mc = df_EM_u_mc.loc[df_EM_u_mc[depth_id] == i_depth].groupby(
-                            by = [parent_id] + col_unique_groupby_extra + [depth_id]).sum().reset_index()
-    
-                    
-                    #TODO  20230216 The next loop is very slow. 
-                    #Find a better way using .agg
-                    df_agg_mc[col_EM_status] = "ES"
-                    #df_agg_mc["EM_is_num_BY"] = True
-                    for i in range(len(df_agg_mc)):
-                        status_list = pd.unique(df_EM_u_mc[col_EM_status].loc[
-                                (df_EM_u_mc[col_unique_groupby_extra[0]] == df_agg_mc[col_unique_groupby_extra[0]].iloc[i])
-                                & (df_EM_u_mc[col_unique_groupby_extra[1]] == df_agg_mc[col_unique_groupby_extra[1]].iloc[i])
-                                & (df_EM_u_mc[parent_id] == df_agg_mc[parent_id].iloc[i])
-                                ]).tolist()
-                        if len(status_list) == 1:
-                            df_agg_mc[col_EM_status].iloc[i] = status_list[0]
-    
-                    #Update depth_id of resulting rows: one level up.
-                    df_agg_mc[depth_id] -= 1
-                    df_agg_mc[child_id_left] = df_agg_mc[parent_id].copy()
-                    #df_agg_mc["import"] = False
-                                
-                    df_agg_mc = pd.merge(
-                            df_agg_mc, 
-                            df_agg_tree, 
-                            left_on=[parent_id, depth_id], 
-                            right_on = [child_id, depth_id], 
-                            how="left", 
-                            indicator="exists_agg",
-                            suffixes = ["_agg", "_tree"] #suffixes = ['_agg', None] #does not work!!!
-                            ).rename(columns = {parent_id_tree: parent_id, child_id_tree: child_id}) #suffixes = [None, "_tree"]
-                    df_agg_mc["exists_agg"] = np.where(df_agg_mc["exists_agg"] == "both", True, False)
-                    #drop redundant columns
-                    df_agg_mc.drop([parent_id_agg, child_id], axis=1, inplace=True) #, "exists_agg"
-                
-                    #Technical aspect: drop this column resulting from the merge
-                    #because it will be added with the next merge with the aggregation tree
-                    df_agg_mc.drop(["exists_agg"], axis=1, inplace=True) #,     
-                    
-                    
-                    #Concatenate the aggregated rows with the original DataFrame, to get all results into one DataFrame
-                    #TODO  20230217: think abut a less memory-intensive method.
-                    #The problem is, such intermediate results are needed for subsequent aggregations.
-                    df_EM_u_mc = pd.concat([df_EM_u_mc, df_agg_mc], axis =0, ignore_index=True)
-    
-    
-                print("Aggregation by {} completed.".format(agg_str_long))
-                t_agg = t_agg + time.time() - t0_agg
-            
-        del df_agg_mc
-        
-        if i_y == 0:
-            #df_mc_out is still completely empty.
-            df_mc_out_len = len(df_EM_u_mc)
-            df_mc_out = pd.DataFrame(
-                    np.float(0.0),
-                    columns=[
-                            #use_cols_id
-                            #"proc_id", 
-                            #"comp_id", 
-                            #"reso_id",
-                            
-                            #"import",
-            
-                            #use_cols_y
-                            #"EM_BY",
-                            #"EM_status_BY",
-                            #"EM_is_num_BY",
-                            #"unit_BY",
-                            #"EM_RY",
-                            #"EM_status_RY",
-                            #"EM_is_num_RY",
-                            #"unit_RY",
-                            #"EM_trend_normed",
-                            #"EM_status_trend_normed",
-                            #"EM_is_num_trend_normed",
-                            #"unit_trend_normed",
-            
-                            #"report", #do not create here otherwise raise ValueError: Cannot use name of an existing column for indicator column
-            
-                            "EM_BY_mc_edge_min",
-                            "EM_BY_mc_edge_max",
-                            "EM_BY_mc_mean",
-                            "EM_RY_mc_edge_min",
-                            "EM_RY_mc_edge_max",
-                            "EM_RY_mc_mean",
-                            "EM_trend_normed_mc_edge_min",
-                            "EM_trend_normed_mc_edge_max",
-                            "EM_trend_normed_mc_mean",                
-            
-                            "EM_BY_mc_U_lower_p",
-                            "EM_BY_mc_U_upper_p",
-                            "EM_BY_mc_U_mean_p",
-                            "EM_RY_mc_U_lower_p",
-                            "EM_RY_mc_U_upper_p",
-                            "EM_RY_mc_U_mean_p",
-                            "EM_trend_normed_mc_U_lower_p",
-                            "EM_trend_normed_mc_U_upper_p",
-                            "EM_trend_normed_mc_U_mean_p",
-            
-                            "EM_BY_mc_2stddev_p",
-                            "EM_RY_mc_2stddev_p",
-                            "EM_trend_normed_mc_2stddev_p",
-                            
-                            "EM_BY_mc_sensitivity", #sensitivity of source category emission to inventory emission for BY
-                            "EM_RY_mc_sensitivity", #sensitivity of source category emission to inventory emission for RY
-                            "EM_trend_normed_mc_sensitivity", #sensitivity of source category normalised trend to inventory trend
-                            #"EM_BY_RY_mc_sensitivity", #sensitivity of RY emission to BY emission: cannot be computed in this version.    
-                            "EM_BY_mc_var",
-                            "EM_RY_mc_var",
-                            "EM_trend_normed_mc_var",
-                            "EM_BY_mc_var_normed",     
-                            "EM_RY_mc_var_normed",
-                            "EM_trend_normed_mc_var_normed",             
-                            ],
-                            index=range(len(df_EM_u_mc)))
-    
-    
-            df_mc_out[use_cols_id] = df_EM_u_mc[use_cols_id].copy()
-            df_mc_out["import"] = df_EM_u["import"].copy()
-            df_mc_out["import"].loc[pd.isnull(df_mc_out["import"])] = False
-            
-        
-        df_mc_out[use_cols_y] = df_EM_u_mc[use_cols_y].copy()    
-        df_mc_out[col_EM_is_num] = False
-        df_mc_out[col_EM_is_num].loc[df_mc_out[col_EM_status] == "ES"] = True
-    
-        df_mc_out["EM_{}_mc_mean".format(y_string)] = np.nanmean(df_EM_u_mc.iloc[:, start_column_mc:stop_column_mc], axis = np_axis_mc)
-        df_mc_out["EM_{}_mc_var".format(y_string)] = np.nanvar(df_EM_u_mc.iloc[:, start_column_mc:stop_column_mc], axis = np_axis_mc)
+        df_mc_out["EM_{}_mc_mean".format(y_string)] = dict_stats["mean"]
+        df_mc_out["EM_{}_mc_var".format(y_string)] = dict_stats["var"]
         df_mc_out["EM_{}_mc_2stddev_p".format(y_string)] = np.sqrt(df_mc_out["EM_{}_mc_var".format(y_string)])/df_mc_out["EM_{}_mc_mean".format(y_string)] * np.float(200.0) #2 times the standard deviation, needed to use as input for next mc simulation for indirect emissions.
-    
-    
-        print("Now computing confidence intervals for {}.".format(y_string))
-    
-        #---------------------------------------------------------------------
-        # FIND NARROWEST INTERVAL CONTAINING CHOSEN INTERVAL E.G. 95%
-        #---------------------------------------------------------------------    
-        
-        t0_compute_interval = time.time()
-        
-        for i in range(df_mc_out_len):
-            if df_EM_u_mc["EM_{}".format(y_string)].iloc[i] != np.float(0.0):
-                df_slice = df_EM_u_mc.iloc[i, start_column_mc:stop_column_mc].copy().values
-                np_slice = np.array([val for val in df_slice])
-                
-        
-                #TODO  20230113 the line above is absolutely not optimal but I could not find a better way so far.
-                #other options require a more up-to-date version of pandas.
-                #df_slice = df_slice.to_numpy() #only for pandas >= 0.24.1        
-                #print(np_slice.dtype)       
-                #df_slice = np.array(df_slice) #does not work        
-                #print(df_slice.dtype)        
-                #pd.isnull(df_slice)
-                #np.isnan(np_slice)
-                
-                df_mc_out["EM_{}_mc_edge_min".format(y_string)].iloc[i], df_mc_out["EM_{}_mc_edge_max".format(y_string)].iloc[i] = find_interval_np(np_slice, const.P_DIST)       
-    
-    
-                #===========================================================================
-                # MC: SENSITIVITY ANALYSIS
-                #===========================================================================
-                #what equation?
-                #in Table 3.3 Chap 3 IPCC, Column H is "contribution to variance"
-                #Report the ‘contribution to uncertainty’. It is estimated dividing the variance of each category by
-                #the total variance of the inventory (var(x)/sum(var(x[i]))).
-                #but is this really an appropriate and suitable method?
-                #yes because a sum is a linear process so uncertainty propagation is ok.
-                   
-                
-                #*************************    
-                #Other method: covariance between each input source and the sum.
-                #sensitivity = cov(x,y)/sqrt(var(x)*var(y)) #note: this is np.corrcoef
-                #but for that we need to keep all generated input values in memory, from each source
-                
-                #Use this sensitivity for tornado plot.
-                df_mc_out["EM_{}_mc_sensitivity".format(y_string)].iloc[i] = np.corrcoef(np_slice, sensitivity_ref)[0,1]
-            
-                #Alternative pandas method
-                #pd_series_slice = df_EM_u_BY_mc.iloc[i, start_column_mc:stop_column_mc].squeeze()    
-                #df_mc_out["EM_BY_mc_edge_min"].iloc[i], df_mc_out["EM_BY_mc_edge_max"].iloc[i] = find_interval_pd(pd_series_slice, const.P_DIST)       
-                #df_mc_out["EM_BY_mc_sensitivity"].iloc[i] = pd_series_slice.corrwith(other = pd.Series(EM_BY_mc_inventory), method = 'pearson')
+        df_mc_out["EM_{}_mc_edge_min".format(y_string)] = dict_stats["edge_min"]
+        df_mc_out["EM_{}_mc_edge_max".format(y_string)] = dict_stats["edge_max"]
+        df_mc_out["EM_{}_mc_sensitivity".format(y_string)] = dict_stats["sensitivity"]
         
-            #compute sensitivity between base year and reporting year
-            #TODO This would be nice to have but cannot be compute since the mc simulations are deleted after each loop, to save memory
-            #if df_EM_u_BY_mc['EM_BY'].iloc[i] != np.float(0.0) and df_EM_u_RY_mc['EM_RY'].iloc[i] != np.float(0.0):           
-            #    df_mc_out["EM_BY_RY_mc_sensitivity"].iloc[i] = np.corrcoef(np_slice_BY, np_slice_RY)[0,1]
-    
-        t_compute_interval = t_compute_interval + time.time() - t0_compute_interval
-    
         indexes_nonzero = df_mc_out.index[((df_mc_out["EM_{}_mc_mean".format(y_string)]!=0) & (pd.isnull(df_mc_out["EM_{}_mc_mean".format(y_string)]) == False))].tolist()
         if i_y == 0 or i_y == 1:
             #Computation for BY and RY
@@ -1820,25 +2275,11 @@ def routine_u_kca_computations(
             df_mc_out["EM_trend_normed_mc_U_lower_p"].iloc[indexes_nonzero] = abs(df_mc_out["EM_trend_normed_mc_mean"].iloc[indexes_nonzero] - df_mc_out["EM_trend_normed_mc_edge_min"].iloc[indexes_nonzero])
             df_mc_out["EM_trend_normed_mc_U_upper_p"].iloc[indexes_nonzero] = abs(df_mc_out["EM_trend_normed_mc_edge_max"].iloc[indexes_nonzero] - df_mc_out["EM_trend_normed_mc_mean"].iloc[indexes_nonzero])
               
-            
-        #Delete variables to save memory space
-        del df_EM_u_mc
-        del df_slice
-        del np_slice
-        if i_y == 0:
-            del EM_BY_mc
-            del sensitivity_ref
-            del EM_BY_mc_inventory
-        elif i_y == 1:
-            del EM_RY_mc
-            del sensitivity_ref
-            del EM_RY_mc_inventory
-        elif i_y == 2:
-            del trend_normed_mc
-            del sensitivity_ref
-            del EM_trend_mc_inventory
+    
+    del dict_stats_EM
     
     
+
     check_file.write("Run time for aggregations: " + str(t_agg) + " seconds\n")  
     print("Run time for aggregations: " + str(t_agg) + " seconds")  
     
@@ -2061,26 +2502,54 @@ def routine_u_kca_computations(
         check_file.write("There is a problem with the aggregation: sum of aggregated rows assigned to total are not the same of the sum of all rows for RY.\n")
     
     
-    write_pr_mc_results(
-            df_EM_u,
-            df_pr_out,
-            df_pr_out_AD_EF,
-            df_mc_out,
-            df_mc_out_AD_EF,
-            index_pr_total,
-            index_pr_proc_sector_total,
-            index_pr_comp_total,
-            index_pr_inv_with_without_lulucf,
-            index_mc_total,
-            index_mc_proc_sector_total,
-            index_mc_comp_total,
-            index_mc_inv_with_without_lulucf,
-            BY_string,
-            RY_string,
-            no_mc,
-            routine,
-            dict_io_out["filename_out_u"],
-            )
+    if write_excel:
+        t0_write_excel = time.time()
+        write_pr_mc_results(
+                df_EM_u,
+                df_pr_out,
+                df_pr_out_AD_EF,
+                df_mc_out,
+                df_mc_out_AD_EF,
+                index_pr_total,
+                index_pr_proc_sector_total,
+                index_pr_comp_total,
+                index_pr_inv_with_without_lulucf,
+                index_mc_total,
+                index_mc_proc_sector_total,
+                index_mc_comp_total,
+                index_mc_inv_with_without_lulucf,
+                BY_string,
+                RY_string,
+                no_mc,
+                routine,
+                dict_io_out["filename_out_u"],
+                seed = str(seed),
+                dict_mc_tolerance = dict_mc_tolerance,
+                )
+        t_write_excel = time.time() - t0_write_excel
+        check_file.write("Run time for writing results to Excel: " + str(t_write_excel) + " seconds\n")
+        print("Run time for writing results to Excel: " + str(t_write_excel) + " seconds")
+    
+    #machine-readable tables with the same results, without formatting
+    if export_format is not None:
+        t0_write_table = time.time()
+        write_pr_mc_tables(
+                df_EM_u,
+                df_pr_out,
+                df_pr_out_AD_EF,
+                df_mc_out,
+                df_mc_out_AD_EF,
+                BY_string,
+                RY_string,
+                no_mc,
+                str(seed),
+                routine,
+                export_format,
+                dict_io_out["filename_out_u_table"],
+                )
+        t_write_table = time.time() - t0_write_table
+        check_file.write("Run time for writing result tables: " + str(t_write_table) + " seconds\n")
+        print("Run time for writing result tables: " + str(t_write_table) + " seconds")
     
             
     
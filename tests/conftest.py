@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Configuration of the tests, run with: python -m pytest tests
+
+The modules of the repository are not installed as a package:
+the root folder of the repository is added to the search path,
+so that the tests import them as the SCRIPT files do.
+"""
+import os
+import sys
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_PATH not in sys.path:
+    sys.path.insert(0, ROOT_PATH)
+
+#folder with the fixtures (input and expected output tables) of the tests
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
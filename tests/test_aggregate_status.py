@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Regression test of the status of aggregated rows: aggregate_status_pd (one groupby)
+must give the same status as the search of the children of each aggregated row,
+which was done in groupby_one_attribute_pd before.
+The status of all years can be aggregated in one run of groupby_one_attribute_pd.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils_compute import aggregate_status_pd, groupby_one_attribute_pd
+
+SEED = 20230216
+COL_GROUPBY = ["parent_id_proc", "comp_id", "reso_id"]
+COL_EM_STATUS = "EM_status_BY"
+LIST_STATUS = ["NA", "NO", "IE", "NE", "C", np.nan]
+
+
+def aggregate_status_loop(df, df_agg, col_groupby, col_EM_status):
+    #reference: loop over the aggregated rows, as in groupby_one_attribute_pd before
+    status = np.full(len(df_agg), "ES", dtype = object)
+    for i in range(len(df_agg)):
+        is_child = np.ones(len(df), dtype = bool)
+        for col in col_groupby:
+            is_child &= np.asarray(df[col] == df_agg[col].iloc[i])
+        status_list = pd.unique(df[col_EM_status].loc[is_child]).tolist()
+        if len(status_list) == 1:
+            status[i] = status_list[0]
+    return status
+
+
+def assert_same_status(status, status_ref):
+    assert len(status) == len(status_ref)
+    for s, s_ref in zip(status, status_ref):
+        if pd.isna(s_ref):
+            assert pd.isna(s)
+        else:
+            assert s == s_ref
+
+
+def make_frames(rng, no_row, no_parent):
+    #children with random parents, nan keys and nan statuses;
+    #aggregated rows with all parents, including parents without children and nan keys
+    df = pd.DataFrame({
+            "parent_id_proc": rng.integers(0, no_parent, size = no_row).astype(str).astype(object),
+            "comp_id": rng.choice(["NOx", "SOx"], size = no_row).astype(object),
+            "reso_id": rng.choice(["GAS", "OIL", "-"], size = no_row).astype(object),
+            COL_EM_STATUS: [LIST_STATUS[i] for i in rng.integers(0, len(LIST_STATUS), size = no_row)],
+            })
+    df.loc[rng.random(no_row) < 0.1, "parent_id_proc"] = np.nan
+    df.loc[rng.random(no_row) < 0.05, "reso_id"] = np.nan
+    df_agg = df[COL_GROUPBY].drop_duplicates().reset_index(drop = True)
+    df_agg_extra = pd.DataFrame({
+            "parent_id_proc": [str(no_parent), str(no_parent + 1)],
+            "comp_id": ["NOx", "NOx"],
+            "reso_id": ["GAS", np.nan],
+            })
+    df_agg = pd.concat([df_agg, df_agg_extra], ignore_index = True)
+    return df, df_agg
+
+
+@pytest.mark.parametrize("no_row, no_parent", [(1, 1), (10, 3), (50, 5), (200, 40), (1000, 20)])
+def test_same_status_as_loop_random(no_row, no_parent):
+    rng = np.random.default_rng(SEED + no_row)
+    for i_trial in range(5):
+        df, df_agg = make_frames(rng, no_row, no_parent)
+        status = aggregate_status_pd(df, df_agg, COL_GROUPBY, COL_EM_STATUS)
+        assert_same_status(status, aggregate_status_loop(df, df_agg, COL_GROUPBY, COL_EM_STATUS))
+
+
+def test_same_status_as_loop_cases():
+    df = pd.DataFrame({
+            "parent_id_proc": ["1", "1", "2", "2", "3", "3", np.nan, np.nan, "5", "6", "6"],
+            "comp_id": ["NOx"] * 11,
+            "reso_id": ["-"] * 11,
+            COL_EM_STATUS: ["NO", "NO", "NO", "IE", "NO", np.nan, "NO", "NO", np.nan, np.nan, np.nan],
+            })
+    df_agg = pd.DataFrame({
+            "parent_id_proc": ["1", "2", "3", np.nan, "4", "5", "6"],
+            "comp_id": ["NOx"] * 7,
+            "reso_id": ["-"] * 7,
+            })
+    status = aggregate_status_pd(df, df_agg, COL_GROUPBY, COL_EM_STATUS)
+    status_ref = aggregate_status_loop(df, df_agg, COL_GROUPBY, COL_EM_STATUS)
+    assert_same_status(status, status_ref)
+    #1: same status; 2: mixed statuses; 3: one child with nan status;
+    #nan grouping key: no child is found; 4: no child; 5 and 6: nan status only
+    assert_same_status(status, ["NO", "ES", "ES", "ES", "ES", np.nan, np.nan])
+
+
+def test_groupby_all_years_at_once():
+    #the aggregation of the emissions and status of all years at once
+    #gives the same rows as one aggregation per year
+    df_agg_tree = pd.DataFrame({
+            "child_id_proc": ["1A1a", "1A1b", "1A1", "1A2", "1A", "1"],
+            "parent_id_proc": ["1A1", "1A1", "1A", "1A", "1", np.nan],
+            "depth_id_proc": [3, 3, 2, 2, 1, 0],
+            })
+    df = pd.DataFrame({
+            "proc_id": ["1A1a", "1A1b", "1A2", "1A1a", "1A1b", "1A2"],
+            "comp_id": ["NOx", "NOx", "NOx", "SOx", "SOx", "SOx"],
+            "reso_id": ["-"] * 6,
+            "EM_status_BY": ["NO", "NO", "NO", "ES", "NO", np.nan],
+            "EM_BY": [0.0, 0.0, 0.0, 1.5, 0.0, np.nan],
+            "EM_status_RY": ["ES", "NO", "NO", "ES", "ES", "ES"],
+            "EM_RY": [2.0, 0.0, 0.0, 1.0, 3.0, 0.5],
+            })
+    list_col_EM_status = ["EM_status_BY", "EM_status_RY"]
+    df_all = groupby_one_attribute_pd(
+            df = df.copy(),
+            df_agg_tree = df_agg_tree,
+            agg_str = "_proc",
+            child_id_left = "proc_id",
+            col_unique_groupby_extra = ["reso_id", "comp_id"],
+            col_EM_status = list_col_EM_status,
+            )
+    for y_string in ["BY", "RY"]:
+        use_cols_y = ["EM_status_{}".format(y_string), "EM_{}".format(y_string)]
+        df_y = groupby_one_attribute_pd(
+                df = df[["proc_id", "comp_id", "reso_id"] + use_cols_y].copy(),
+                df_agg_tree = df_agg_tree,
+                agg_str = "_proc",
+                child_id_left = "proc_id",
+                col_unique_groupby_extra = ["reso_id", "comp_id"],
+                col_EM_status = use_cols_y[0],
+                )
+        pd.testing.assert_frame_equal(df_all[df_y.columns], df_y)
+    #1A1 NOx: same status "NO" in BY, mixed statuses in RY
+    is_1A1_NOx = np.asarray((df_all["proc_id"] == "1A1") & (df_all["comp_id"] == "NOx"))
+    assert df_all["EM_status_BY"][is_1A1_NOx].tolist() == ["NO"]
+    assert df_all["EM_status_RY"][is_1A1_NOx].tolist() == ["ES"]
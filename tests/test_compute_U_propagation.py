@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Golden-output test of the uncertainty propagation (approach 1), compute_U_propagation_em_pd.
+
+The fixtures are in tests/data:
+    compute_U_propagation_em_input.csv: input table, with all combinations of
+    distribution types for activity data and emission factors, emissions equal to zero,
+    uncertainties that are not numerical values and emissions that are not numerical values.
+    compute_U_propagation_em_expected.csv: df_u computed with the row by row
+    implementation (before the computation by distribution type on numpy arrays).
+The row by row implementation did not compute the lognormal distribution (the result was zero):
+for these values, the expected results are computed here with scipy.stats.lognorm.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.stats import lognorm
+
+import utils_constant as const
+from utils_compute import compute_U_propagation_em_pd
+from conftest import DATA_PATH
+
+#relative tolerance: the results are computed by numpy arrays instead of one value at a time
+RTOL = 1e-12
+
+
+def read_fixtures():
+    df = pd.read_csv(os.path.join(DATA_PATH, "compute_U_propagation_em_input.csv"))
+    df_u_expected = pd.read_csv(os.path.join(DATA_PATH, "compute_U_propagation_em_expected.csv"))
+    return df, df_u_expected
+
+
+def add_lognormal_expected(df, df_u_expected):
+    #expected values for the lognormal distribution, computed one value at a time
+    df_u_expected = df_u_expected.copy()
+    for input_year in ["BY", "RY"]:
+        em = "EM_{}".format(input_year)
+        is_lognormal = np.zeros(len(df), dtype = bool)
+        for input_type in ["AD", "EF"]:
+            for i in range(len(df)):
+                if (df["u{}_is_num_{}".format(input_type, input_year)].iloc[i]
+                        and df[em].iloc[i] != float(0.0)
+                        and df["u{}_dist_{}".format(input_type, input_year)].iloc[i] == const.DIST_LOGNORMAL):
+                    u_upper = df["u{}_upper_f_{}".format(input_type, input_year)].iloc[i]
+                    df_u_expected.loc[i, "{}_{}_pr_U_lower_p".format(input_type, input_year)] = (float(1.0) - lognorm.ppf(const.DIST_PPF_EDGE_LOWER, u_upper)) * float(100.0)
+                    df_u_expected.loc[i, "{}_{}_pr_U_upper_p".format(input_type, input_year)] = (lognorm.ppf(const.DIST_PPF_EDGE_UPPER, u_upper) - float(1.0)) * float(100.0)
+                    is_lognormal[i] = True
+        for i in np.flatnonzero(is_lognormal):
+            if df["uAD_is_num_{}".format(input_year)].iloc[i] and df["uEF_is_num_{}".format(input_year)].iloc[i]:
+                for edge in ["lower", "upper"]:
+                    df_u_expected.loc[i, "EM_{}_pr_U_{}_p".format(input_year, edge)] = np.sqrt(
+                            np.square(df_u_expected["AD_{}_pr_U_{}_p".format(input_year, edge)].iloc[i])
+                            + np.square(df_u_expected["EF_{}_pr_U_{}_p".format(input_year, edge)].iloc[i]))
+            if df["EM_is_num_{}".format(input_year)].iloc[i]:
+                for edge in ["lower", "upper"]:
+                    df_u_expected.loc[i, "EM_{}_pr_contrib_var_{}".format(input_year, edge)] = np.square(
+                            df_u_expected["EM_{}_pr_U_{}_p".format(input_year, edge)].iloc[i] * df[em].iloc[i])
+    return df_u_expected
+
+
+def test_fixture_covers_all_distributions():
+    df, df_u_expected = read_fixtures()
+    for dist in [const.DIST_UNIFORM, const.DIST_NORMAL, const.DIST_TRIANGULAR, const.DIST_GAMMA, const.DIST_LOGNORMAL]:
+        for col in ["uAD_dist_BY", "uEF_dist_BY", "uAD_dist_RY", "uEF_dist_RY"]:
+            assert np.any(df[col] == dist)
+    assert len(df_u_expected) == len(df)
+
+
+def test_golden_output_without_lognormal():
+    df, df_u_expected = read_fixtures()
+    df_u = compute_U_propagation_em_pd(df)
+    assert list(df_u.columns) == list(df_u_expected.columns)
+    assert list(df_u.index) == list(range(len(df)))
+    is_lognormal = np.zeros(len(df), dtype = bool)
+    for col in ["uAD_dist_BY", "uEF_dist_BY", "uAD_dist_RY", "uEF_dist_RY"]:
+        is_lognormal |= np.asarray(df[col] == const.DIST_LOGNORMAL)
+    assert np.any(np.logical_not(is_lognormal))
+    #same results as the row by row implementation, including zeros (not nan) where nothing is computed
+    np.testing.assert_allclose(
+            df_u.to_numpy()[np.logical_not(is_lognormal)],
+            df_u_expected.to_numpy()[np.logical_not(is_lognormal)],
+            rtol = RTOL, atol = 0)
+
+
+def test_golden_output_with_lognormal():
+    df, df_u_expected = read_fixtures()
+    df_u = compute_U_propagation_em_pd(df)
+    df_u_expected = add_lognormal_expected(df, df_u_expected)
+    assert df_u.dtypes.eq(np.float64).all()
+    assert not df_u.isna().any().any()
+    np.testing.assert_allclose(df_u.to_numpy(), df_u_expected[df_u.columns].to_numpy(), rtol = RTOL, atol = 0)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Golden-output test of the uncertainty propagation for the trend (approach 1), compute_U_propagation_trend_pd.
+
+The fixtures are in tests/data:
+    compute_U_propagation_trend_input.csv: input table (df, and the uncertainties
+    of the reporting year of df_u), with all combinations of EM_is_num_BY/RY,
+    import (True, False, empty), uEM_is_num_BY/RY and correlation of AD, EF and EM
+    between base year and reporting year, in random order of rows.
+    compute_U_propagation_trend_expected.csv: df_u computed with the row by row
+    implementation (before the computation on numpy arrays).
+The inventory sums are the sums of the emissions with EM_is_num.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils_compute import compute_U_propagation_trend_pd
+from conftest import DATA_PATH
+
+#relative tolerance: the results are computed by numpy arrays instead of one value at a time
+RTOL = 1e-12
+
+
+def read_fixtures():
+    df = pd.read_csv(os.path.join(DATA_PATH, "compute_U_propagation_trend_input.csv"))
+    df_u_expected = pd.read_csv(os.path.join(DATA_PATH, "compute_U_propagation_trend_expected.csv"))
+    return df, df_u_expected
+
+
+def compute_trend(df):
+    df_u = df[[col for col in df.columns if col.endswith("_RY_pr_U_lower_p") or col.endswith("_RY_pr_U_upper_p")]].copy()
+    EM_BY_sum = df["EM_BY"][df["EM_is_num_BY"]].sum()
+    EM_RY_sum = df["EM_RY"][df["EM_is_num_RY"]].sum()
+    return compute_U_propagation_trend_pd(df, df_u, EM_BY_sum, EM_RY_sum)
+
+
+def test_fixture_covers_all_branches():
+    df, df_u_expected = read_fixtures()
+    #empty values of import are read as nan
+    is_import_nan = np.asarray(pd.isnull(df["import"]))
+    is_import_false = np.asarray(df["import"] == False)
+    assert np.any(is_import_nan) and np.any(is_import_false)
+    is_RY = np.asarray(df["EM_is_num_RY"], dtype = bool)
+    is_u_AD_EF = np.logical_not(np.asarray(df["uEM_is_num_BY"], dtype = bool) | np.asarray(df["uEM_is_num_RY"], dtype = bool))
+    for is_import in [is_import_nan, is_import_false, np.logical_not(is_import_nan | is_import_false)]:
+        for is_u in [is_u_AD_EF, np.logical_not(is_u_AD_EF)]:
+            for col_corr in ["uAD_corr", "uEF_corr", "uEM_corr"]:
+                for is_corr in [True, False]:
+                    assert np.any(is_RY & is_import & is_u & np.asarray(df[col_corr] == is_corr))
+    #uncertainty given for EM in one year only
+    assert np.any(is_RY & np.asarray(df["uEM_is_num_BY"] != df["uEM_is_num_RY"]))
+    #emission of the reporting year not numeric: nothing is computed, but the sensitivities
+    is_BY_only = np.asarray(df["EM_is_num_BY"], dtype = bool) & np.logical_not(is_RY)
+    assert np.any(is_BY_only)
+    assert np.all(df_u_expected["sens_no_corr"][is_BY_only] != float(0.0))
+    assert np.all(df_u_expected["EM_trend_normed_pr_contrib_var_lower"][is_BY_only] == float(0.0))
+    assert len(df_u_expected) == len(df)
+
+
+def test_golden_output():
+    df, df_u_expected = read_fixtures()
+    df_u = compute_trend(df)
+    assert list(df_u.columns) == list(df_u_expected.columns)
+    assert df_u.dtypes.eq(np.float64).all()
+    #same results as the row by row implementation, including zeros (not nan) where nothing is computed
+    np.testing.assert_allclose(df_u.to_numpy(), df_u_expected.to_numpy(), rtol = RTOL, atol = 0)
+
+
+def test_import_nan_is_true():
+    #as in "if df['import'][i]" of the row by row implementation: empty import (nan) is True,
+    #the contributions of AD and EF are computed
+    df, df_u_expected = read_fixtures()
+    df_u = compute_trend(df)
+    is_import_nan = np.asarray(pd.isnull(df["import"]))
+    df["import"] = np.where(is_import_nan, True, df["import"]).astype(bool)
+    df_u_true = compute_trend(df)
+    pd.testing.assert_frame_equal(df_u, df_u_true)
+    is_AD_EF = (is_import_nan & np.asarray(df["EM_is_num_RY"], dtype = bool)
+            & np.logical_not(np.asarray(df["uEM_is_num_BY"], dtype = bool) | np.asarray(df["uEM_is_num_RY"], dtype = bool)))
+    assert np.any(is_AD_EF)
+    assert np.all(df_u["AD_trend_normed_pr_contrib_var_lower"][is_AD_EF] != float(0.0))
+
+
+@pytest.mark.parametrize("col_corr", ["uAD_corr", "uEF_corr", "uEM_corr"])
+def test_missing_corr_is_not_correlated(col_corr):
+    #a missing column of correlation gives the same results as a column with False only
+    df, df_u_expected = read_fixtures()
+    df[col_corr] = False
+    df_u_false = compute_trend(df)
+    df_u_missing = compute_trend(df.drop(columns = [col_corr]))
+    pd.testing.assert_frame_equal(df_u_missing, df_u_false)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Regression tests of the narrowest interval: find_interval_np_partition
+and find_interval_np_batch must give bit-identical results to find_interval_np,
+which sorts the whole dataset.
+"""
+import numpy as np
+import pytest
+
+import utils_constant as const
+from utils_compute import find_interval_np, find_interval_np_partition, find_interval_np_batch
+
+SEED = 20230216
+LIST_P = [const.P_DIST, 0.99, 0.5, 0.3]
+LIST_NO_MC = [2, 3, 19, 20, 21, 1000, 1001, 20000]
+
+
+def list_samples(no_mc):
+    #random, nan-containing and tied samples of length no_mc
+    rng = np.random.default_rng(SEED + no_mc)
+    x_normal = rng.normal(loc = 10.0, scale = 2.0, size = no_mc)
+    x_lognormal = rng.lognormal(mean = 0.0, sigma = 1.0, size = no_mc)
+
+    x_nan = x_normal.copy()
+    x_nan[rng.random(no_mc) < 0.1] = np.nan
+    x_nan[0] = np.nan
+
+    #many identical values: the first minimum must be found in the same place
+    x_tied = np.round(rng.normal(loc = 0.0, scale = 1.0, size = no_mc), 1)
+    x_tied_integer = rng.integers(0, 5, size = no_mc).astype(np.float64)
+    x_tied_nan = x_tied_integer.copy()
+    x_tied_nan[rng.random(no_mc) < 0.2] = np.nan
+
+    return [x_normal, x_lognormal, x_nan, x_tied, x_tied_integer, x_tied_nan]
+
+
+def assert_same_edges(edges, edges_ref):
+    assert np.array_equal(np.array(edges, dtype = np.float64), np.array(edges_ref, dtype = np.float64), equal_nan = True)
+
+
+@pytest.mark.parametrize("no_mc", LIST_NO_MC)
+@pytest.mark.parametrize("p", LIST_P)
+def test_partition_identical(no_mc, p):
+    for x in list_samples(no_mc):
+        x_in = x.copy()
+        if np.sum(np.logical_not(np.isnan(x))) == 0:
+            continue
+        edges_ref = find_interval_np(x.copy(), p)
+        assert_same_edges(find_interval_np_partition(x_in, p), edges_ref)
+        #x is not modified
+        assert np.array_equal(x_in, x, equal_nan = True)
+
+
+@pytest.mark.parametrize("no_mc", LIST_NO_MC)
+@pytest.mark.parametrize("p", LIST_P)
+def test_batch_identical(no_mc, p):
+    x = np.array(list_samples(no_mc))
+    x_in = x.copy()
+    edge_min, edge_max = find_interval_np_batch(x_in, p)
+    assert np.array_equal(x_in, x, equal_nan = True)
+    for i in range(x.shape[0]):
+        if np.all(np.isnan(x[i])):
+            #find_interval_np cannot handle a row without any value
+            assert_same_edges((edge_min[i], edge_max[i]), (np.nan, np.nan))
+        else:
+            assert_same_edges((edge_min[i], edge_max[i]), find_interval_np(x[i].copy(), p))
+
+
+def test_constant_and_single_values():
+    #all values identical: no interval (nan), as in find_interval_np
+    for x in [np.full(100, 3.0), np.array([3.0, np.nan, 3.0])]:
+        assert_same_edges(find_interval_np_partition(x, const.P_DIST), find_interval_np(x.copy(), const.P_DIST))
+        assert_same_edges(find_interval_np_partition(x, const.P_DIST), (np.nan, np.nan))
+    #one single value
+    x = np.array([np.nan, 2.0, np.nan])
+    assert_same_edges(find_interval_np_partition(x, const.P_DIST), find_interval_np(x.copy(), const.P_DIST))
+    assert_same_edges(find_interval_np_partition(x, const.P_DIST), (2.0, 2.0))
+    #only nan values
+    x = np.full(10, np.nan)
+    assert_same_edges(find_interval_np_partition(x, const.P_DIST), (np.nan, np.nan))
+    assert_same_edges(find_interval_np_batch(x[None, :], const.P_DIST), ([np.nan], [np.nan]))
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Statistical equivalence of the numpy sampling engine (generate_random_value_np_batch)
+with the reference implementation based on the package random (generate_random_value).
+
+Both are drawn with a fixed seed, so that the results of the tests do not change
+from one run to the next.
+"""
+import random
+
+import numpy as np
+import pytest
+from scipy import stats
+
+import utils_constant as const
+from utils_compute import generate_random_value, generate_random_value_np_batch
+
+NO_RANDOM = 20000
+SEED = 20230216
+#the samples are considered different below this p-value of the two-sample KS test
+P_VALUE_MIN = 1e-3
+
+#distribution type, mean, u_left, u_right, as in the input uncertainty files
+#(u_left, u_right in absolute value, see generate_random_value)
+LIST_DIST_PARAMETERS = [
+        (const.DIST_NORMAL, 10.0, 2.0, 2.0),
+        (const.DIST_GAMMA, 5.0, 3.0, 2.0),
+        (const.DIST_UNIFORM, 3.0, 1.0, 2.0),
+        (const.DIST_TRIANGULAR, 4.0, 1.5, 1.5),
+        (const.DIST_TRIANGULAR, 4.0, 1.0, 2.0),
+        (const.DIST_LOGNORMAL, 2.0, 0.5, 0.5),
+        ]
+
+
+def expected_mean(dist, mean, u_left, u_right):
+    #mean of the distribution defined by the input values: the input "mean" 
+    #is the median of the lognormal distribution and the uniform distribution 
+    #is not centred on it if u_left != u_right
+    if dist == const.DIST_UNIFORM:
+        return mean + (u_right - u_left) / float(2.0)
+    if dist == const.DIST_LOGNORMAL:
+        return mean * np.exp((u_right / mean)**2 / float(2.0))
+    return mean
+
+
+def draw_reference(dist, mean, u_left, u_right, no_random):
+    random.seed(SEED)
+    return np.array(generate_random_value(dist, mean, u_left, u_right, no_random), dtype = np.float64)
+
+
+def draw_np(dist, mean, u_left, u_right, no_random):
+    val = generate_random_value_np_batch(
+            np.array([dist]),
+            np.array([mean]),
+            np.array([u_left]),
+            np.array([u_right]),
+            no_random,
+            np.random.default_rng(SEED))
+    assert val.shape == (1, no_random)
+    assert val.dtype == np.float64 and val.flags["C_CONTIGUOUS"]
+    return val[0]
+
+
+@pytest.mark.parametrize("dist, mean, u_left, u_right", LIST_DIST_PARAMETERS)
+def test_same_distribution_ks(dist, mean, u_left, u_right):
+    x_ref = draw_reference(dist, mean, u_left, u_right, NO_RANDOM)
+    x_np = draw_np(dist, mean, u_left, u_right, NO_RANDOM)
+    assert stats.ks_2samp(x_ref, x_np).pvalue > P_VALUE_MIN
+
+
+@pytest.mark.parametrize("dist, mean, u_left, u_right", LIST_DIST_PARAMETERS)
+def test_same_moments(dist, mean, u_left, u_right):
+    x_ref = draw_reference(dist, mean, u_left, u_right, NO_RANDOM)
+    x_np = draw_np(dist, mean, u_left, u_right, NO_RANDOM)
+    #standard error of the difference of two means, of two standard deviations (approximation)
+    se_mean = np.sqrt((np.var(x_ref) + np.var(x_np)) / NO_RANDOM)
+    se_std = np.std(x_ref) * np.sqrt(float(2.0) / NO_RANDOM) * float(2.0)
+    assert abs(np.mean(x_np) - np.mean(x_ref)) < float(5.0) * se_mean
+    assert abs(np.std(x_np) - np.std(x_ref)) < float(5.0) * se_std
+    #both samples have the expected mean
+    assert abs(np.mean(x_np) - expected_mean(dist, mean, u_left, u_right)) < float(5.0) * se_mean
+    assert abs(np.mean(x_ref) - expected_mean(dist, mean, u_left, u_right)) < float(5.0) * se_mean
+
+
+@pytest.mark.parametrize("dist, mean, u_left, u_right", LIST_DIST_PARAMETERS)
+def test_same_quantiles(dist, mean, u_left, u_right):
+    x_ref = draw_reference(dist, mean, u_left, u_right, NO_RANDOM)
+    x_np = draw_np(dist, mean, u_left, u_right, NO_RANDOM)
+    q = [const.DIST_PPF_EDGE_LOWER, 0.5, const.DIST_PPF_EDGE_UPPER]
+    q_ref = np.quantile(x_ref, q)
+    q_np = np.quantile(x_np, q)
+    width = q_ref[2] - q_ref[0]
+    np.testing.assert_allclose(q_np, q_ref, rtol = 0, atol = float(0.03) * width)
+
+
+@pytest.mark.parametrize("dist, mean, u_left, u_right", [
+        (const.DIST_GAMMA, 0.0, 1.0, 1.0),
+        (const.DIST_LOGNORMAL, 0.0, 1.0, 1.0),
+        (const.DIST_UNIFORM, 3.0, 0.0, 0.0),
+        (const.DIST_TRIANGULAR, 3.0, 0.0, 0.0),
+        ])
+def test_same_constant_values(dist, mean, u_left, u_right):
+    x_ref = draw_reference(dist, mean, u_left, u_right, 10)
+    x_np = draw_np(dist, mean, u_left, u_right, 10)
+    assert np.array_equal(x_ref, np.full(10, mean))
+    assert np.array_equal(x_np, np.full(10, mean))
+
+
+@pytest.mark.parametrize("dist, mean, u_left, u_right", [
+        (99, 1.0, 0.1, 0.1), #unknown distribution type
+        (const.DIST_UNIFORM, 1.0, -0.5, -0.5), #right edge < left edge
+        (const.DIST_TRIANGULAR, 1.0, 0.1, 0.9), #mode < left edge
+        ])
+def test_same_errors(dist, mean, u_left, u_right):
+    with pytest.raises(ValueError):
+        draw_reference(dist, mean, u_left, u_right, 10)
+    with pytest.raises(ValueError):
+        draw_np(dist, mean, u_left, u_right, 10)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Equivalence test of the filling of the input uncertainties for the base year:
+input_u_data_fill_BY_from_RY (one merge on the keys) must give the same table
+and the same text in the check file as the loop over the rows for BY,
+which was done in routine_u_kca before.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils_io_read_check import input_u_data_fill_BY_from_RY
+
+SEED = 20230216
+NO_TRIAL = 200
+COL_KEYS = ["proc_id", "comp_id", "reso_id"]
+
+
+def fill_BY_from_RY_loop(df_u_BY, df_u_RY, check_file):
+    #reference: loop over the rows for BY, as in routine_u_kca before
+    df_u_BY = df_u_BY.copy()
+    for i in range(len(df_u_BY)):
+        i_RY = np.flatnonzero((df_u_RY["proc_id"] == df_u_BY["proc_id"].iloc[i]).values &
+                              (df_u_RY["comp_id"] == df_u_BY["comp_id"].iloc[i]).values &
+                              (df_u_RY["reso_id"] == df_u_BY["reso_id"].iloc[i]).values
+                              ).tolist()
+        if len(i_RY) == 0:
+            check_file.write("Code <{}>: missing input for u, RY.\n".format(df_u_BY["proc_id"].iloc[i]))
+        else:
+            i_RY = i_RY[0]
+            for col in df_u_BY.columns.values.tolist():
+                if col in df_u_RY:
+                    j = df_u_BY.columns.get_loc(col)
+                    if col in ["uAD_dist", "uEF_dist", "uEM_dist"]:
+                        #if there is no input distribution type for BY: take value from RY
+                        if df_u_BY[col].iloc[i] == -1 and df_u_RY[col].iloc[i_RY] != -1:
+                            df_u_BY.iloc[i, j] = df_u_RY[col].iloc[i_RY]
+                    else:
+                        if (df_u_BY[col].iloc[i] == float(0.0) and df_u_RY[col].iloc[i_RY] > float(0.0))\
+                        or df_u_BY[col].iloc[i] == "MI"\
+                        or pd.isnull(df_u_BY[col].iloc[i]):
+                            df_u_BY.iloc[i, j] = df_u_RY[col].iloc[i_RY]
+    return df_u_BY
+
+
+def as_object(df):
+    #text and mixed columns have the dtype object, as read from Excel
+    #(otherwise, recent versions of pandas use a string dtype for columns with text only)
+    for col in df.columns:
+        if col not in ["uAD_dist", "uEF_dist", "uAD_is_num", "u_RY_only", "u_BY_only"]:
+            df[col] = df[col].astype(object)
+    return df
+
+
+def random_values(rng, no_row):
+    #uncertainty values as read from Excel: numbers, zeros, missing data (MI) and nan
+    choice = rng.integers(0, 4, size = no_row)
+    values = np.round(rng.uniform(0.0, 50.0, size = no_row), 1).astype(object)
+    values[choice == 1] = float(0.0)
+    values[choice == 2] = "MI"
+    values[choice == 3] = np.nan
+    return values
+
+
+def make_u_RY(rng, no_row):
+    df_u_RY = pd.DataFrame({
+            "proc_id": np.array(["1A{}".format(i) for i in rng.integers(0, no_row, size = no_row)], dtype = object),
+            "comp_id": rng.choice(["NOx", "SOx"], size = no_row).astype(object),
+            "reso_id": rng.choice(["GAS", "-"], size = no_row).astype(object),
+            "uAD_dist": rng.integers(-1, 4, size = no_row),
+            "uAD_lower_p": random_values(rng, no_row),
+            "uAD_upper_p": random_values(rng, no_row),
+            "uEF_dist": rng.integers(-1, 4, size = no_row),
+            "uEF_lower_p": random_values(rng, no_row),
+            "uEF_ref": rng.choice(["EMEP", "MI", "IPCC"], size = no_row).astype(object),
+            "uAD_is_num": rng.random(no_row) < 0.5,
+            "u_RY_only": np.arange(no_row),
+            })
+    return as_object(df_u_RY)
+
+
+def make_u_BY(rng, df_u_RY):
+    #shuffled copy of RY with gaps, rows missing for RY and duplicated keys
+    no_row = len(df_u_RY)
+    df_u_BY = df_u_RY.drop(columns = ["u_RY_only"]).sample(frac = 1.0, random_state = rng.integers(0, 2**31)).reset_index(drop = True)
+    df_u_BY["uAD_dist"] = np.where(rng.random(no_row) < 0.3, -1, df_u_BY["uAD_dist"].values)
+    df_u_BY["uEF_dist"] = np.where(rng.random(no_row) < 0.3, -1, df_u_BY["uEF_dist"].values)
+    for col in ["uAD_lower_p", "uAD_upper_p", "uEF_lower_p"]:
+        df_u_BY[col] = random_values(rng, no_row)
+    df_u_BY["uAD_is_num"] = rng.random(no_row) < 0.5
+    df_u_BY["u_BY_only"] = np.full(no_row, np.nan)
+    df_u_BY.loc[rng.random(no_row) < 0.1, "proc_id"] = "1B_not_in_RY"
+    return as_object(df_u_BY)
+
+
+def prepare_comparable(df_u_BY, df_u_RY):
+    #where BY is zero, the value for RY is compared with 0 by both implementations:
+    #it cannot be MI (comparison of a string with a number)
+    df_u_RY = df_u_RY.copy()
+    for col in ["uAD_lower_p", "uAD_upper_p", "uEF_lower_p"]:
+        for i in range(len(df_u_BY)):
+            if isinstance(df_u_BY[col].iloc[i], float) and df_u_BY[col].iloc[i] == float(0.0):
+                is_RY = np.asarray(
+                        (df_u_RY["proc_id"] == df_u_BY["proc_id"].iloc[i])
+                        & (df_u_RY["comp_id"] == df_u_BY["comp_id"].iloc[i])
+                        & (df_u_RY["reso_id"] == df_u_BY["reso_id"].iloc[i]))
+                is_MI = np.asarray(df_u_RY[col] == "MI")
+                df_u_RY.loc[is_RY & is_MI, col] = float(1.0)
+    return df_u_RY
+
+
+def assert_same_fill(df_u_BY, df_u_RY):
+    check_file = io.StringIO()
+    check_file_ref = io.StringIO()
+    df_new = input_u_data_fill_BY_from_RY(df_u_BY.copy(), df_u_RY, check_file)
+    df_ref = fill_BY_from_RY_loop(df_u_BY, df_u_RY, check_file_ref)
+    pd.testing.assert_frame_equal(df_new, df_ref)
+    assert check_file.getvalue() == check_file_ref.getvalue()
+
+
+def test_same_as_loop_random():
+    rng = np.random.default_rng(SEED)
+    for i_trial in range(NO_TRIAL):
+        no_row = int(rng.integers(1, 40))
+        df_u_RY = make_u_RY(rng, no_row)
+        df_u_BY = make_u_BY(rng, df_u_RY)
+        #some rows of RY are dropped: missing RY for these keys
+        df_u_RY = df_u_RY.loc[rng.random(no_row) < 0.8].reset_index(drop = True)
+        df_u_RY = prepare_comparable(df_u_BY, df_u_RY)
+        assert_same_fill(df_u_BY, df_u_RY)
+
+
+def test_same_as_loop_cases():
+    df_u_RY = pd.DataFrame({
+            "proc_id": np.array(["1A1", "1A1", "1A2", "1A3", "1A4"], dtype = object),
+            "comp_id": np.array(["NOx"] * 5, dtype = object),
+            "reso_id": np.array(["-"] * 5, dtype = object),
+            "uAD_dist": [1, 2, -1, 3, 1],
+            "uAD_lower_p": np.array([10.0, 20.0, 5.0, "MI", 0.0], dtype = object),
+            })
+    df_u_RY = as_object(df_u_RY)
+    df_u_BY = pd.DataFrame({
+            "proc_id": np.array(["1A1", "1A2", "1A3", "1A3", "1A4", "1A5"], dtype = object),
+            "comp_id": np.array(["NOx"] * 6, dtype = object),
+            "reso_id": np.array(["-"] * 6, dtype = object),
+            "uAD_dist": [-1, -1, 2, -1, -1, -1],
+            "uAD_lower_p": np.array(["MI", 0.0, 7.0, np.nan, 0.0, "MI"], dtype = object),
+            })
+    df_u_BY = as_object(df_u_BY)
+    check_file = io.StringIO()
+    df_new = input_u_data_fill_BY_from_RY(df_u_BY.copy(), df_u_RY, check_file)
+    assert_same_fill(df_u_BY, df_u_RY)
+    #duplicate key 1A1: the first row for RY is used
+    assert df_new["uAD_dist"].iloc[0] == 1 and df_new["uAD_lower_p"].iloc[0] == 10.0
+    #-1 for RY as well: -1 is kept; 0 for BY and RY > 0: value for RY
+    assert df_new["uAD_dist"].iloc[1] == -1 and df_new["uAD_lower_p"].iloc[1] == 5.0
+    #7.0 for BY, MI for RY: BY is kept, RY is not compared with 0
+    assert df_new["uAD_lower_p"].iloc[2] == 7.0
+    #nan for BY, MI for RY: MI
+    assert df_new["uAD_lower_p"].iloc[3] == "MI"
+    #0 for BY and 0 for RY: 0 is kept
+    assert df_new["uAD_lower_p"].iloc[4] == 0.0
+    #missing RY: nothing changes and the missing row is written in the check file
+    assert df_new["uAD_dist"].iloc[5] == -1 and df_new["uAD_lower_p"].iloc[5] == "MI"
+    assert check_file.getvalue() == "Code <1A5>: missing input for u, RY.\n"
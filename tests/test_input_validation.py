@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Equivalence test of the checks of the input emissions and uncertainties
+(input_em_data_check, input_u_data_preparation, input_u_data_check_completeness_per_year,
+input_u_data_check_correlation, check_reso_id_default): the checks on whole columns
+must give the same table and the same text in the check file
+as the loops over the rows, which were done before.
+The reference loops are the previous functions, where np.float and np.int are replaced
+by float and int, and the values are set with the position of the column
+(chained assignment does not modify the table with copy-on-write).
+"""
+import io
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils_constant as const
+from utils_io_read_check import (
+        input_em_data_check,
+        input_u_data_preparation,
+        input_u_data_check_completeness_per_year,
+        input_u_data_check_correlation,
+        check_reso_id_default,
+        check_dist_triangular,
+        )
+
+SEED = 20230216
+NO_TRIAL = 50
+#notation key ES is valid for emissions only
+#(for uncertainties, the loops compared ES to zero as if it was a value)
+LIST_KEY_EM = ["NA", "NO", "IE", "C", "ES"]
+LIST_KEY_U = ["NA", "NO", "IE", "C"]
+LIST_DIST_STRING = ["normal", "uniform", "triangle", "lognormal", "gamma", "fractile", "", "other", np.nan]
+
+
+def set_value(df, i, col, val):
+    df.iloc[i, df.columns.get_loc(col)] = val
+
+
+def input_em_data_check_loop(df, input_year, check_file):
+    #reference: loop over the rows, as in input_em_data_check before
+    df["EM"] = [float(val) if (isinstance(val, Number) and not pd.isnull(val)) else float(0.0) for val in df["EM_status"]]
+    for i in range(len(df["EM_status"])):
+        val = df.iloc[i, df.columns.get_loc("EM_status")]
+        if val in const.NOTATION_KEY:
+            check_file.write("Code <{}>, compound <{}>, resource <{}>, <{}>: emission input recognised as notation key: {}.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], input_year, val))
+        else:
+            if not pd.isnull(val) and isinstance(val, Number):
+                status = "ES"
+            else:
+                status = "MI"
+            df.iloc[i, df.columns.get_loc("EM_status")] = status
+            if status == "MI":
+                check_file.write("Notation key or value not recognised for emission at line {}: {}.\n".format(i, val))
+            if df.iloc[i, df.columns.get_loc("EM")] == float(0.0):
+                check_file.write("Code <{}>, compound <{}>, resource <{}>, <{}>: emission is zero! Please write notation key instead.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], input_year))
+    no_valid_input = sum([1 if val in const.NOTATION_KEY else 0 for val in df["EM_status"]])
+    df["EM_is_num"] = [True if val in const.NOTATION_KEY else False for val in df["EM_status"]]
+    check_file.write("Found {} numeric entries or notation keys for EM for {}.\n".format(no_valid_input, input_year))
+    return df
+
+
+def input_u_data_preparation_loop(df, input_type, input_year, check_file):
+    #reference: loops over the rows, as in input_u_data_preparation before
+    u_dist = "u{}_dist".format(input_type)
+    u_status = "u{}_status".format(input_type)
+    u_sym_f = "u{}_sym_f".format(input_type)
+    u_lower_f = "u{}_lower_f".format(input_type)
+    u_upper_f = "u{}_upper_f".format(input_type)
+    u_is_num = "u{}_is_num".format(input_type)
+    u_corr = "u{}_corr".format(input_type)
+    u_ref = "u{}_ref".format(input_type)
+    if u_ref not in df.columns:
+        df[u_ref] = None
+    df_len = len(df)
+
+    df[u_dist] = df[u_dist].astype(object)
+    for i in range(df_len):
+        dist_string = df[u_dist].iloc[i]
+        if dist_string in const.DIST_FROM_STRING:
+            dist_val = const.DIST_FROM_STRING[dist_string]
+        else:
+            dist_val = int(-1)
+        set_value(df, i, u_dist, dist_val)
+    if sum([0 if np.isnan(df[u_dist].iloc[i]) else 1 for i in range(df_len)]) > 0:
+        df[u_dist] = df[u_dist].astype(str).astype(int)
+
+    index_u_dist_sym = df.index[(
+            (df[u_dist] == const.DIST_NORMAL) |
+            (df[u_dist] == const.DIST_UNIFORM) |
+            (df[u_dist] == const.DIST_GAMMA))
+        ].tolist()
+    index_u_dist_notsym = [i for i in range(df_len) if i not in index_u_dist_sym]
+
+    df[u_status] = "MI"
+    for i in index_u_dist_sym:
+        if pd.isnull(df[u_sym_f].iloc[i]):
+            val = "MI"
+        elif isinstance(df[u_sym_f].iloc[i], Number):
+            val = "ES"
+        elif df[u_sym_f].iloc[i] in const.NOTATION_KEY:
+            val = str(df[u_sym_f].iloc[i])
+        else:
+            val = "MI"
+        set_value(df, i, u_status, val)
+        if not df[u_dist].iloc[i] == int(-1) and not pd.isnull(df[u_dist].iloc[i]):
+            if val == "MI":
+                check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value is missing <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_sym_f].iloc[i]))
+            if val == "ES" and df[u_sym_f].iloc[i] <= 0:
+                check_file.write("{}, {}, {}>: distribution type is <{}> but input uncertainty value is <= zero <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_sym_f].iloc[i]))
+
+    for i in index_u_dist_notsym:
+        if pd.isnull(df[u_lower_f].iloc[i]) or pd.isnull(df[u_upper_f].iloc[i]):
+            val = "MI"
+        elif isinstance(df[u_lower_f].iloc[i], Number) and isinstance(df[u_upper_f].iloc[i], Number):
+            val = "ES"
+        elif df[u_lower_f].iloc[i] in const.NOTATION_KEY and df[u_lower_f].iloc[i] == df[u_upper_f].iloc[i]:
+            val = str(df[u_lower_f].iloc[i])
+        else:
+            val = "MI"
+        set_value(df, i, u_status, val)
+        if not df[u_dist].iloc[i] == int(-1) and not pd.isnull(df[u_dist].iloc[i]):
+            if val == "MI":
+                check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value is missing <{}> <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_lower_f].iloc[i], df[u_upper_f].iloc[i]))
+            if val == "ES" and df[u_lower_f].iloc[i] <= 0:
+                check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value for lower edge is <= zero <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_lower_f].iloc[i]))
+            if val == "ES" and df[u_upper_f].iloc[i] <= 0:
+                check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value for upper edge is <= zero <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_upper_f].iloc[i]))
+            if val == "ES" and df[u_dist].iloc[i] == const.DIST_TRIANGULAR:
+                dist_i, lower_i, upper_i = check_dist_triangular(
+                        df[u_lower_f].iloc[i],
+                        df[u_upper_f].iloc[i],
+                        df["proc_id"].iloc[i],
+                        df["comp_id"].iloc[i],
+                        df["reso_id"].iloc[i],
+                        "RY",
+                        "EF",
+                        check_file,
+                        )
+                set_value(df, i, u_dist, dist_i)
+                set_value(df, i, u_lower_f, lower_i)
+                set_value(df, i, u_upper_f, upper_i)
+        if (pd.isnull(df[u_dist].iloc[i]) or df[u_dist].iloc[i] == int(-1)) and val == "ES":
+            check_file.write("{}, {}, {}: distribution type is not recognised <{}> but uncertainty value is > 0 for lower edge <{}> or upper edge <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_lower_f].iloc[i], df[u_upper_f].iloc[i]))
+
+    df[u_is_num] = [True if df[u_status].iloc[i] == "ES" and not pd.isnull(df[u_dist].iloc[i]) else False for i in range(df_len)]
+    check_file.write("Found {} numeric entries for u_{}_{}.\n".format(np.nansum(np.where(df[u_is_num], int(1), int(0))), input_type, input_year))
+    df[u_sym_f] = [float(val) if (isinstance(val, Number) and not pd.isnull(val)) else float(0.0) for val in df[u_sym_f].copy()]
+    df[u_lower_f] = [float(val) if (isinstance(val, Number) and not pd.isnull(val)) else float(0.0) for val in df[u_lower_f].copy()]
+    df[u_upper_f] = [float(val) if (isinstance(val, Number) and not pd.isnull(val)) else float(0.0) for val in df[u_upper_f].copy()]
+    df[u_sym_f] = df[u_sym_f] / float(100.0)
+    df[u_lower_f] = df[u_lower_f] / float(100.0)
+    df[u_upper_f] = df[u_upper_f] / float(100.0)
+    for i in index_u_dist_sym:
+        set_value(df, i, u_sym_f, df[u_sym_f].iloc[i] / const.FACTOR_U_DIST_95_PERCENT)
+        set_value(df, i, u_lower_f, df[u_sym_f].iloc[i])
+        set_value(df, i, u_upper_f, df[u_sym_f].iloc[i])
+    df[u_corr] = [True if val == const.STRING_CORRELATED else False for val in df[u_corr]]
+    return df
+
+
+def input_u_data_check_completeness_per_year_loop(df, input_year, check_file):
+    #reference: loop over the rows, as in input_u_data_check_completeness_per_year before;
+    #within a row, each check sees the values set by the previous checks
+    df["u_is_num"] = True
+    for i in range(len(df)):
+        if not df["uAD_is_num"].iloc[i] and not df["uEF_is_num"].iloc[i] and not df["uEM_is_num"].iloc[i]:
+            set_value(df, i, "u_is_num", False)
+            check_file.write("Code <{}>, {}: input uncertainty is valid for neither AD, nor EF nor EM.\n".format(df["proc_id"].iloc[i], input_year))
+        if df["uAD_is_num"].iloc[i] and not df["uEF_is_num"].iloc[i] and not df["uEM_is_num"].iloc[i]:
+            set_value(df, i, "u_is_num", False)
+            check_file.write("Code <{}>, {}: input uncertainty is valid for AD but not for EF or EM.\n".format(df["proc_id"].iloc[i], input_year))
+        if not df["uAD_is_num"].iloc[i] and df["uEF_is_num"].iloc[i] and not df["uEM_is_num"].iloc[i]:
+            set_value(df, i, "u_is_num", False)
+            check_file.write("Code <{}>, {}: input uncertainty is valid for EF but not for AD or EM.\n".format(df["proc_id"].iloc[i], input_year))
+        if df["uAD_is_num"].iloc[i] and not df["uEF_is_num"].iloc[i] and df["uEM_is_num"].iloc[i]:
+            set_value(df, i, "uAD_is_num", False)
+            set_value(df, i, "uAD_status", "MI")
+            check_file.write("Code <{}>, {}: input uncertainty is valid for AD and EM but not for EF, input for EM only will be used.\n".format(df["proc_id"].iloc[i], input_year))
+        if not df["uAD_is_num"].iloc[i] and df["uEF_is_num"].iloc[i] and df["uEM_is_num"].iloc[i]:
+            set_value(df, i, "uEF_is_num", False)
+            set_value(df, i, "uEF_status", "MI")
+            check_file.write("Code <{}>, {}: input uncertainty is valid for EF and EM but not for AD, input for EM only will be used.\n".format(df["proc_id"].iloc[i], input_year))
+        if df["uAD_is_num"].iloc[i] and df["uEF_is_num"].iloc[i] and df["uEM_is_num"].iloc[i]:
+            set_value(df, i, "uEM_is_num", False)
+            set_value(df, i, "uEM_status", "MI")
+            check_file.write("Code <{}>, {}: input uncertainty is valid for AD, EF and EM: input for EM will be ignored.\n".format(df["proc_id"].iloc[i], input_year))
+    return df
+
+
+def input_u_data_check_correlation_loop(df, check_file):
+    #reference: loop over the rows, as in input_u_data_check_correlation before
+    for i in range(len(df)):
+        for col_BY, col_RY, text in [
+                ("uAD_dist_BY", "uAD_dist_RY", "Code <{}>: input uncertainties for BY and RY are correlated but distributions for BY and RY are not identical, correlation set to False.\n"),
+                ("uAD_lower_f_BY", "uAD_lower_f_RY", "Code <{}>: input uncertainties for BY and RY are correlated but lower uncertainty values for BY and RY are not identical, correlation set to False.\n"),
+                ("uAD_upper_f_BY", "uAD_upper_f_RY", "Code <{}>: input uncertainties for BY and RY are correlated but upper uncertainty values for BY and RY are not identical, correlation set to False.\n")]:
+            if df[col_BY].iloc[i] != df[col_RY].iloc[i]:
+                if df["uAD_corr"].iloc[i]:
+                    set_value(df, i, "uAD_corr", False)
+                    check_file.write(text.format(df["proc_id"].iloc[i]))
+                elif col_BY == "uAD_dist_BY":
+                    check_file.write("Code <{}>: use specific input uncertainty distribution for BY.\n".format(df["proc_id"].iloc[i]))
+                else:
+                    check_file.write("Code <{}>: use specific input uncertainty value for BY.\n".format(df["proc_id"].iloc[i]))
+        if not df["u_is_num_BY"].iloc[i]:
+            set_value(df, i, "u_is_num", False)
+            check_file.write("Code <{}>, compound <{}>, resource <{}>: no input uncertainty value for BY.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i]))
+        if not df["u_is_num_RY"].iloc[i]:
+            set_value(df, i, "u_is_num", False)
+            check_file.write("Code <{}>, compound <{}>, resource <{}>: no input uncertainty value for RY.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i]))
+    return df
+
+
+def check_reso_id_default_loop(df):
+    #reference: loop over the rows, as in check_reso_id_default before
+    if "reso_id" not in df.columns:
+        df["reso_id"] = const.RESO_TOTAL
+    else:
+        count_empty = 0
+        for i in range(len(df["reso_id"])):
+            if df["reso_id"].iloc[i] == "" or df["reso_id"].iloc[i] == "MI" or pd.isnull(df["reso_id"].iloc[i]):
+                count_empty += 1
+                set_value(df, i, "reso_id", const.RESO_TOTAL_INTERMEDIATE)
+        if count_empty == len(df):
+            df["reso_id"] = const.RESO_TOTAL
+    return df
+
+
+def as_object(values):
+    #text and mixed columns have the dtype object, as read from Excel
+    #(otherwise, recent versions of pandas use a string dtype for columns with text only)
+    return np.array(list(values), dtype = object)
+
+
+def random_input_values(rng, no_row, low, high, list_key):
+    #input values as read from Excel: numbers (integers, zero, negative), notation keys, text, blanks, nan
+    choice = rng.integers(0, 8, size = no_row)
+    values = as_object(np.round(rng.uniform(low, high, size = no_row), 1))
+    values[choice == 1] = float(0.0)
+    values[choice == 2] = as_object(rng.integers(1, 100, size = np.sum(choice == 2)))
+    values[choice == 3] = as_object(rng.choice(list_key, size = np.sum(choice == 3)))
+    values[choice == 4] = "MI"
+    values[choice == 5] = ""
+    values[choice == 6] = np.nan
+    return values
+
+
+def make_keys(rng, no_row):
+    return pd.DataFrame({
+            "proc_id": as_object(["1A{}".format(i) for i in range(no_row)]),
+            "comp_id": as_object(rng.choice(["NOx", "SOx", ""], size = no_row)),
+            "reso_id": as_object(rng.choice(["GAS", "", "MI", "-"], size = no_row)),
+            })
+
+
+def make_u(rng, no_row):
+    df = make_keys(rng, no_row)
+    df["uAD_dist"] = as_object([LIST_DIST_STRING[k] for k in rng.integers(0, len(LIST_DIST_STRING), size = no_row)])
+    df["uAD_sym_f"] = random_input_values(rng, no_row, -5.0, 60.0, LIST_KEY_U)
+    df["uAD_lower_f"] = random_input_values(rng, no_row, -5.0, 120.0, LIST_KEY_U)
+    #same notation key for lower and upper values in some rows
+    df["uAD_upper_f"] = np.where(rng.random(no_row) < 0.2, df["uAD_lower_f"].values, random_input_values(rng, no_row, -5.0, 200.0, LIST_KEY_U))
+    df["uAD_upper_f"] = df["uAD_upper_f"].astype(object)
+    df["uAD_corr"] = as_object(rng.choice([const.STRING_CORRELATED, "", "other"], size = no_row))
+    return df
+
+
+def is_text_dtype(dtype):
+    return dtype == object or isinstance(dtype, pd.StringDtype)
+
+
+def assert_same(df, df_ref, text, text_ref):
+    assert text == text_ref
+    #columns of text may be object or string (recent versions of pandas),
+    #depending on how the column was set: the values must be the same
+    for col in df.columns:
+        if not (is_text_dtype(df[col].dtype) and is_text_dtype(df_ref[col].dtype)):
+            assert df[col].dtype == df_ref[col].dtype, col
+    pd.testing.assert_frame_equal(df, df_ref, check_dtype = False)
+
+
+def run_both(function, function_loop, df, *args):
+    check_file = io.StringIO()
+    check_file_ref = io.StringIO()
+    df_out = function(df.copy(), *args, check_file)
+    df_ref = function_loop(df.copy(), *args, check_file_ref)
+    assert_same(df_out, df_ref, check_file.getvalue(), check_file_ref.getvalue())
+    return check_file.getvalue()
+
+
+@pytest.mark.parametrize("no_row", [1, 7, 60])
+def test_input_em_data_check(no_row):
+    rng = np.random.default_rng(SEED + no_row)
+    for i_trial in range(NO_TRIAL):
+        df = make_keys(rng, no_row)
+        df["EM_status"] = random_input_values(rng, no_row, -10.0, 1000.0, LIST_KEY_EM)
+        run_both(input_em_data_check, input_em_data_check_loop, df, "BY")
+
+
+@pytest.mark.parametrize("no_row", [1, 7, 60])
+def test_input_u_data_preparation(no_row):
+    rng = np.random.default_rng(SEED + no_row)
+    list_text = []
+    for i_trial in range(NO_TRIAL):
+        df = make_u(rng, no_row)
+        if i_trial % 2 == 0:
+            df["uAD_ref"] = as_object(rng.choice(["EMEP", ""], size = no_row))
+        list_text.append(run_both(input_u_data_preparation, input_u_data_preparation_loop, df, "AD", "RY"))
+    if no_row == 60:
+        #all types of messages were compared, including the corrected triangular distributions
+        text = "".join(list_text)
+        for message in ["is missing", "value is <= zero", "lower edge is <= zero", "upper edge is <= zero",
+                        "Triangular U input not valid", "distribution type is not recognised"]:
+            assert message in text
+
+
+@pytest.mark.parametrize("no_row", [1, 7, 60])
+def test_input_u_data_check_completeness_per_year(no_row):
+    rng = np.random.default_rng(SEED + no_row)
+    for i_trial in range(NO_TRIAL):
+        df = make_keys(rng, no_row)
+        for input_type in ["AD", "EF", "EM"]:
+            df["u{}_is_num".format(input_type)] = rng.random(no_row) < 0.5
+            df["u{}_status".format(input_type)] = as_object(rng.choice(["ES", "MI", "NA"], size = no_row))
+        run_both(input_u_data_check_completeness_per_year, input_u_data_check_completeness_per_year_loop, df, "BY")
+
+
+@pytest.mark.parametrize("no_row", [1, 7, 60])
+def test_input_u_data_check_correlation(no_row):
+    rng = np.random.default_rng(SEED + no_row)
+    for i_trial in range(NO_TRIAL):
+        df = make_keys(rng, no_row)
+        #values for BY and RY often the same, sometimes different
+        for col, values in [("uAD_dist", rng.integers(-1, 5, size = no_row)),
+                            ("uAD_lower_f", np.round(rng.uniform(0.0, 0.5, size = no_row), 2)),
+                            ("uAD_upper_f", np.round(rng.uniform(0.0, 0.5, size = no_row), 2))]:
+            df["{}_RY".format(col)] = values
+            df["{}_BY".format(col)] = np.where(rng.random(no_row) < 0.3, np.roll(values, 1), values)
+        df["uAD_corr"] = rng.random(no_row) < 0.6
+        df["u_is_num"] = rng.random(no_row) < 0.8
+        df["u_is_num_BY"] = rng.random(no_row) < 0.8
+        df["u_is_num_RY"] = rng.random(no_row) < 0.8
+        run_both(input_u_data_check_correlation, input_u_data_check_correlation_loop, df)
+
+
+@pytest.mark.parametrize("no_row", [1, 7, 60])
+def test_check_reso_id_default(no_row):
+    rng = np.random.default_rng(SEED + no_row)
+    for i_trial in range(NO_TRIAL):
+        df = make_keys(rng, no_row)
+        df["reso_id"] = as_object(rng.choice(["GAS", "", "MI", np.nan], p = [0.1, 0.3, 0.3, 0.3], size = no_row))
+        pd.testing.assert_frame_equal(check_reso_id_default(df.copy()), check_reso_id_default_loop(df.copy()))
+    #no column for resources
+    df = make_keys(rng, no_row).drop(columns = ["reso_id"])
+    pd.testing.assert_frame_equal(check_reso_id_default(df.copy()), check_reso_id_default_loop(df.copy()))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Tests of mc_float32: with the same random values, the simulated emissions kept
+in single precision must give the same uncertainties EM_*_mc_U_*_p
+as in double precision, once printed with FORMAT_VAL_U (no decimal).
+The statistics and the uncertainties in percent are computed
+as in routine_u_kca_computations.
+"""
+import numpy as np
+import pytest
+
+import utils_constant as const
+from utils_compute import generate_random_value_np_batch, init_mc_stats_np, update_mc_stats_np, finalize_mc_stats_np
+
+SEED = 20230216
+NO_CATEGORY = 40
+NO_MC = 20000
+#number of decimals printed with FORMAT_VAL_U = "#,##0"
+NO_DECIMALS_U = 0
+LIST_DIST = [const.DIST_NORMAL, const.DIST_GAMMA, const.DIST_UNIFORM, const.DIST_TRIANGULAR, const.DIST_LOGNORMAL]
+
+
+def simulate_EM(rng, no_category, no_mc):
+    #emissions of BY and RY, AD times EF as in generate_EM_mc_np, in double precision
+    dict_EM_mc = {}
+    for y_string in ["BY", "RY"]:
+        EM_mc = np.ones((no_category, no_mc), dtype = np.float64)
+        for input_type in ["AD", "EF"]:
+            dist = rng.choice(LIST_DIST, size = no_category).astype(np.float64)
+            mean = rng.lognormal(mean = 0.0, sigma = 2.0, size = no_category)
+            u = rng.uniform(0.02, 0.4, size = no_category) * mean
+            EM_mc *= generate_random_value_np_batch(dist, mean, u, u, no_mc, rng)
+        dict_EM_mc[y_string] = EM_mc
+    return dict_EM_mc
+
+
+def compute_U_p(dict_EM_mc, mc_dtype, no_mc_chunk):
+    #uncertainties in percent of the source categories and of the inventory total,
+    #as in routine_u_kca_computations: the simulated values are rounded to mc_dtype,
+    #the sums over categories are done in double precision
+    EM_BY_mc = dict_EM_mc["BY"].astype(mc_dtype)
+    EM_RY_mc = dict_EM_mc["RY"].astype(mc_dtype)
+    no_rows = EM_BY_mc.shape[0] + 1
+    no_mc = EM_BY_mc.shape[1]
+    dict_stats = {}
+    for y_string in ["BY", "RY", "trend_normed"]:
+        dict_stats[y_string] = init_mc_stats_np(no_rows, no_mc, no_mc_chunk)
+    for i_start in range(0, no_mc, no_mc_chunk):
+        index_mc = slice(i_start, i_start + no_mc_chunk)
+        EM_BY_mc_inventory = np.nansum(EM_BY_mc[:, index_mc], axis = 0, dtype = np.float64)
+        EM_RY_mc_inventory = np.nansum(EM_RY_mc[:, index_mc], axis = 0, dtype = np.float64)
+        trend_normed_mc = ((EM_RY_mc[:, index_mc] - EM_BY_mc[:, index_mc]) / EM_BY_mc_inventory * np.float64(100.0)).astype(mc_dtype)
+        EM_trend_mc_inventory = (EM_RY_mc_inventory - EM_BY_mc_inventory) / EM_BY_mc_inventory * float(100.0)
+        for y_string, x_mc, x_inventory in [
+                ("BY", EM_BY_mc[:, index_mc], EM_BY_mc_inventory),
+                ("RY", EM_RY_mc[:, index_mc], EM_RY_mc_inventory),
+                ("trend_normed", trend_normed_mc, EM_trend_mc_inventory)]:
+            #source categories, then the aggregated category (the total, summed in double precision)
+            x_agg_mc = np.sum(x_mc, axis = 0, dtype = np.float64).astype(mc_dtype)[None, :]
+            update_mc_stats_np(dict_stats[y_string], x_mc, rows = np.arange(no_rows - 1), ref = x_inventory)
+            update_mc_stats_np(dict_stats[y_string], x_agg_mc, rows = np.array([no_rows - 1]), ref = x_inventory)
+
+    dict_U_p = {}
+    for y_string in ["BY", "RY", "trend_normed"]:
+        stats = finalize_mc_stats_np(dict_stats[y_string], ref = True)
+        if y_string == "trend_normed":
+            #do not divide by the mean and do not multiply by 100
+            dict_U_p["EM_trend_normed_mc_U_mean_p"] = np.abs(stats["edge_max"] - stats["edge_min"]) / float(2.0)
+            dict_U_p["EM_trend_normed_mc_U_lower_p"] = np.abs(stats["mean"] - stats["edge_min"])
+            dict_U_p["EM_trend_normed_mc_U_upper_p"] = np.abs(stats["edge_max"] - stats["mean"])
+        else:
+            dict_U_p["EM_{}_mc_U_mean_p".format(y_string)] = np.abs((stats["edge_max"] - stats["edge_min"]) / float(2.0) / stats["mean"]) * float(100.0)
+            dict_U_p["EM_{}_mc_U_lower_p".format(y_string)] = np.abs((stats["mean"] - stats["edge_min"]) / stats["mean"]) * float(100.0)
+            dict_U_p["EM_{}_mc_U_upper_p".format(y_string)] = np.abs((stats["edge_max"] - stats["mean"]) / stats["mean"]) * float(100.0)
+    return dict_U_p
+
+
+@pytest.mark.parametrize("seed", [SEED, SEED + 1])
+@pytest.mark.parametrize("no_mc_chunk", [NO_MC, NO_MC // 4])
+def test_float32_same_printed_U(seed, no_mc_chunk):
+    dict_EM_mc = simulate_EM(np.random.default_rng(seed), NO_CATEGORY, NO_MC)
+    dict_U_p_64 = compute_U_p(dict_EM_mc, np.float64, no_mc_chunk)
+    dict_U_p_32 = compute_U_p(dict_EM_mc, np.float32, no_mc_chunk)
+    for col in dict_U_p_64:
+        assert np.all(np.isfinite(dict_U_p_64[col]))
+        #far below the printed precision
+        np.testing.assert_allclose(dict_U_p_32[col], dict_U_p_64[col], rtol = 0, atol = 1e-3)
+        #same printed values
+        np.testing.assert_array_equal(
+                np.round(dict_U_p_32[col], NO_DECIMALS_U),
+                np.round(dict_U_p_64[col], NO_DECIMALS_U),
+                err_msg = col)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Tests of the sampling modes of generate_random_value_np_batch
+(Latin hypercube, scrambled Sobol' sequence, antithetic variates):
+the mapping of uniform values through the inverse cumulative distribution function
+must reproduce the mean and the 95% interval of each distribution,
+as given by scipy.stats for the same parameters.
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+import utils_constant as const
+from utils_compute import generate_random_value_np_batch, generate_uniform_np_batch
+
+SEED = 20230216
+NO_RANDOM = 2**14
+
+#distribution type, mean, u_left, u_right, as in test_generate_random_value
+LIST_DIST_PARAMETERS = [
+        (const.DIST_NORMAL, 10.0, 2.0, 2.0),
+        (const.DIST_GAMMA, 5.0, 3.0, 2.0),
+        (const.DIST_UNIFORM, 3.0, 1.0, 2.0),
+        (const.DIST_TRIANGULAR, 4.0, 1.5, 1.5),
+        (const.DIST_TRIANGULAR, 4.0, 1.0, 2.0),
+        (const.DIST_LOGNORMAL, 2.0, 0.5, 0.5),
+        ]
+
+#maximum error on the mean and on the values at 2.5% and 97.5%,
+#in fraction of the width of the 95% interval
+DICT_TOLERANCE = {
+        const.MC_SAMPLING_LHS: (1e-4, 2e-3),
+        const.MC_SAMPLING_SOBOL: (1e-4, 2e-3),
+        const.MC_SAMPLING_ANTITHETIC: (5e-3, 4e-2),
+        }
+
+
+def scipy_distribution(dist, mean, u_left, u_right):
+    #same distribution as in generate_random_value, as frozen scipy.stats distribution
+    if dist == const.DIST_NORMAL:
+        return stats.norm(loc = mean, scale = u_left)
+    if dist == const.DIST_GAMMA:
+        beta = u_right**2 / mean
+        return stats.gamma(a = mean / beta, scale = beta)
+    if dist == const.DIST_UNIFORM:
+        return stats.uniform(loc = mean - u_left, scale = u_left + u_right)
+    if dist == const.DIST_TRIANGULAR:
+        left_edge = mean - u_left
+        right_edge = mean + u_right
+        mode = mean * float(3.0) - left_edge - right_edge
+        return stats.triang(c = (mode - left_edge) / (right_edge - left_edge), loc = left_edge, scale = right_edge - left_edge)
+    if dist == const.DIST_LOGNORMAL:
+        return stats.lognorm(s = u_right / mean, scale = mean)
+
+
+def draw_all(sampling, seed):
+    #all distributions are drawn in one call, one row each
+    parameters = np.array(LIST_DIST_PARAMETERS, dtype = np.float64)
+    return generate_random_value_np_batch(
+            parameters[:, 0],
+            parameters[:, 1],
+            parameters[:, 2],
+            parameters[:, 3],
+            NO_RANDOM,
+            np.random.default_rng(seed),
+            sampling)
+
+
+@pytest.mark.parametrize("sampling", [const.MC_SAMPLING_LHS, const.MC_SAMPLING_SOBOL, const.MC_SAMPLING_ANTITHETIC])
+@pytest.mark.parametrize("seed", [SEED, SEED + 1])
+def test_mean_and_interval(sampling, seed):
+    val = draw_all(sampling, seed)
+    assert val.shape == (len(LIST_DIST_PARAMETERS), NO_RANDOM)
+    tol_mean, tol_interval = DICT_TOLERANCE[sampling]
+    for i, parameters in enumerate(LIST_DIST_PARAMETERS):
+        distribution = scipy_distribution(*parameters)
+        interval = distribution.ppf([const.DIST_PPF_EDGE_LOWER, const.DIST_PPF_EDGE_UPPER])
+        width = interval[1] - interval[0]
+        assert abs(np.mean(val[i]) - distribution.mean()) < tol_mean * width
+        np.testing.assert_allclose(
+                np.quantile(val[i], [const.DIST_PPF_EDGE_LOWER, const.DIST_PPF_EDGE_UPPER]),
+                interval, rtol = 0, atol = tol_interval * width)
+
+
+@pytest.mark.parametrize("sampling", [const.MC_SAMPLING_LHS, const.MC_SAMPLING_SOBOL])
+def test_one_value_per_stratum(sampling):
+    #in one dimension, both designs have exactly one value in each interval [k/N, (k+1)/N):
+    #after the inverse cumulative distribution function, the k-th smallest value
+    #lies between the values of the distribution at k/N and (k+1)/N
+    val = draw_all(sampling, SEED)
+    k = np.arange(NO_RANDOM)
+    for i, parameters in enumerate(LIST_DIST_PARAMETERS):
+        distribution = scipy_distribution(*parameters)
+        x = np.sort(val[i])
+        atol = float(1e-9) * distribution.std()
+        assert np.all(x >= distribution.ppf(k / NO_RANDOM) - atol)
+        assert np.all(x <= distribution.ppf((k + 1) / NO_RANDOM) + atol)
+
+
+def test_antithetic_pairs():
+    #each value of the second half is the mirror of one value of the first half:
+    #the probabilities of both values sum up to 1
+    val = draw_all(const.MC_SAMPLING_ANTITHETIC, SEED)
+    half = NO_RANDOM // 2
+    for i, parameters in enumerate(LIST_DIST_PARAMETERS):
+        distribution = scipy_distribution(*parameters)
+        np.testing.assert_allclose(
+                distribution.cdf(val[i, :half]) + distribution.cdf(val[i, half:]),
+                np.ones(half), rtol = 0, atol = 1e-8)
+
+
+@pytest.mark.parametrize("sampling", [const.MC_SAMPLING_LHS, const.MC_SAMPLING_SOBOL, const.MC_SAMPLING_ANTITHETIC])
+@pytest.mark.parametrize("no_random", [1, 7, 1024])
+def test_uniform_design(sampling, no_random):
+    u = generate_uniform_np_batch(3, no_random, np.random.default_rng(SEED), sampling)
+    assert u.shape == (3, no_random)
+    assert u.dtype == np.float64
+    assert np.all(u > float(0.0)) and np.all(u < float(1.0))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Tests of the cache of the tables read from the input Excel files (read_excel_cached):
+the cached tables are the same as the tables read from Excel,
+and the cache files are read without pickle.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils_io_read_check
+from utils_io_read_check import read_excel_cached, write_table_npz, read_table_npz
+
+
+def make_table():
+    #columns as read from the input Excel files: codes, numbers mixed with text (MI, NA, C), dates
+    df = pd.DataFrame({
+            "proc_code": np.array(["1A1a", "1A2", "3B1a", "NA"], dtype = object),
+            "EM_status": np.array([12.5, "NA", 3, np.nan], dtype = object),
+            "u_is_num": [True, False, True, True],
+            "depth_id_proc": [1, 2, 3, 4],
+            "u_lower_p": [10.0, np.nan, 5.5, 0.0],
+            "date": pd.to_datetime(["2023-02-15", "2023-02-16", None, "2023-02-17"]),
+            })
+    df["mixed"] = np.array([None, True, 2, "MI"], dtype = object)
+    df[5] = pd.Series(["a", None, "b", "c"], dtype = "string")
+    return df
+
+
+def test_npz_round_trip(tmp_path):
+    df = make_table()
+    pathname = str(tmp_path / "table.npz")
+    assert write_table_npz(df, pathname)
+    df_read = read_table_npz(pathname)
+    pd.testing.assert_frame_equal(df_read, df)
+    #same types of values in the columns with the dtype object
+    for col in ["EM_status", "mixed"]:
+        assert [type(value) for value in df_read[col]] == [type(value) for value in df[col]]
+    #empty table
+    df = pd.DataFrame({"proc_code": pd.Series([], dtype = object), "EM": pd.Series([], dtype = np.float64)})
+    assert write_table_npz(df, pathname)
+    pd.testing.assert_frame_equal(read_table_npz(pathname), df)
+
+
+def test_npz_not_saved(tmp_path):
+    #values that cannot be saved without pickle: the table is not saved
+    pathname = str(tmp_path / "table.npz")
+    df = pd.DataFrame({"date": np.array([pd.Timestamp("2023-02-15"), "MI"], dtype = object)})
+    assert not write_table_npz(df, pathname)
+    df = pd.DataFrame({"EM": [1.0, 2.0]}, index = [3, 4])
+    assert not write_table_npz(df, pathname)
+    assert not os.path.isfile(pathname)
+
+
+def test_npz_with_pickle_rejected(tmp_path):
+    #a cache file containing Python objects (pickle) is never loaded
+    pathname = str(tmp_path / "table.npz")
+    assert write_table_npz(make_table(), pathname)
+    with np.load(pathname, allow_pickle = False) as npz_file:
+        dict_array = {key: npz_file[key] for key in npz_file.files}
+    dict_array["str_0"] = np.array(["1A1a", "1A2", "3B1a", "NA"], dtype = object)
+    np.savez(pathname, **dict_array)
+    with pytest.raises(ValueError):
+        read_table_npz(pathname)
+
+
+def test_read_excel_cached(tmp_path, monkeypatch):
+    pytest.importorskip("openpyxl")
+    df = make_table().drop(columns = ["mixed", 5, "date"])
+    in_pathname = str(tmp_path / "input.xlsx")
+    df.to_excel(in_pathname, sheet_name = "data", index = False)
+    cache_foldername = str(tmp_path / "cache") + os.sep
+    kwargs_read_excel = {"io": in_pathname, "sheet_name": "data", "keep_default_na": False}
+
+    df_expected = pd.read_excel(**kwargs_read_excel)
+    df_first = read_excel_cached(cache_foldername = cache_foldername, **kwargs_read_excel)
+    pd.testing.assert_frame_equal(df_first, df_expected)
+    assert [name[-4:] for name in os.listdir(cache_foldername)] == [".npz"]
+
+    #the second time, the table is read from the cache and not from the Excel file
+    def read_excel_workbook_fail(dict_excel_file, **kwargs):
+        raise AssertionError("the Excel file is read again")
+    monkeypatch.setattr(utils_io_read_check, "read_excel_workbook", read_excel_workbook_fail)
+    df_second = read_excel_cached(cache_foldername = cache_foldername, **kwargs_read_excel)
+    pd.testing.assert_frame_equal(df_second, df_expected)
+
+
+def test_read_excel_not_cached(tmp_path):
+    pytest.importorskip("openpyxl")
+    #with keep_default_na = False, the empty date is read as "": 
+    #a column with dates and text cannot be cached, the Excel file is read at each run
+    df = make_table().drop(columns = ["mixed", 5])
+    in_pathname = str(tmp_path / "input.xlsx")
+    df.to_excel(in_pathname, sheet_name = "data", index = False)
+    cache_foldername = str(tmp_path / "cache") + os.sep
+    kwargs_read_excel = {"io": in_pathname, "sheet_name": "data", "keep_default_na": False}
+    
+    df_expected = pd.read_excel(**kwargs_read_excel)
+    for i in range(2):
+        pd.testing.assert_frame_equal(read_excel_cached(cache_foldername = cache_foldername, **kwargs_read_excel), df_expected)
+        assert os.listdir(cache_foldername) == []
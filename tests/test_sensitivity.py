@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software:
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed
+in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Tests of the sensitivity (correlation coefficient with the inventory total)
+computed by compute_sensitivity_np_batch, compared to np.corrcoef:
+rows with zero variance have a sensitivity of zero (np.corrcoef gives nan or rounding noise)
+and are shown after all other categories in the tornado plot.
+"""
+import numpy as np
+import pytest
+
+import utils_constant as const
+from utils_compute import compute_sensitivity_np_batch, init_mc_stats_np, update_mc_stats_np, finalize_mc_stats_np
+
+SEED = 20230216
+NO_MC = 1000
+
+
+def make_simulations(seed):
+    #rows correlated with the total, independent rows, a constant row (zero emissions), a row with nan
+    rng = np.random.default_rng(seed)
+    x = rng.normal(loc = 10.0, scale = 2.0, size = (6, NO_MC))
+    x[2] = rng.normal(loc = 1.0, scale = 0.1, size = NO_MC)
+    x[3] = float(0.0)
+    x[4] = float(3.7)
+    x[5, 10] = np.nan
+    ref = np.sum(x[:3], axis = 0)
+    return x, ref
+
+
+@pytest.mark.parametrize("seed", [SEED, SEED + 1])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_compare_corrcoef(seed, dtype):
+    x, ref = make_simulations(seed)
+    sensitivity = compute_sensitivity_np_batch(x.astype(dtype), ref.astype(dtype))
+    assert sensitivity.dtype == np.float64
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        sensitivity_corrcoef = np.array([np.corrcoef(x_i.astype(dtype), ref.astype(dtype))[0, 1] for x_i in x])
+    #rows with variance: same value as np.corrcoef
+    np.testing.assert_allclose(sensitivity[:3], sensitivity_corrcoef[:3], rtol = 1e-10, atol = 1e-12)
+    #constant rows: zero, where np.corrcoef gives nan (zeros) or rounding noise (other constant)
+    assert np.isnan(sensitivity_corrcoef[3])
+    assert np.all(sensitivity[3:5] == float(0.0))
+    #rows with nan values: nan, as np.corrcoef
+    assert np.isnan(sensitivity[5]) and np.isnan(sensitivity_corrcoef[5])
+
+
+def test_constant_reference():
+    #constant reference (e.g. all emissions zero): no variance to explain
+    x, ref = make_simulations(SEED)
+    sensitivity = compute_sensitivity_np_batch(x, np.full(NO_MC, float(2.5)))
+    assert np.all(sensitivity[:5] == float(0.0))
+    assert np.isnan(sensitivity[5])
+
+
+def test_blocks(monkeypatch):
+    #the result does not depend on the size of the blocks of rows
+    x, ref = make_simulations(SEED)
+    sensitivity = compute_sensitivity_np_batch(x, ref)
+    monkeypatch.setattr(const, "MC_NO_VALUES_BLOCK", 2 * NO_MC)
+    np.testing.assert_allclose(compute_sensitivity_np_batch(x, ref), sensitivity, rtol = 1e-14, atol = 0)
+
+
+def test_update_mc_stats_exact_and_chunks():
+    #all simulations at once or chunk by chunk: same sensitivity, zero for the constant rows
+    x, ref = make_simulations(SEED)
+    x = x[:5]
+    dict_stats_exact = init_mc_stats_np(x.shape[0], NO_MC, NO_MC)
+    update_mc_stats_np(dict_stats_exact, x, ref = ref)
+    dict_stats_exact = finalize_mc_stats_np(dict_stats_exact, ref = True)
+    dict_stats_chunks = init_mc_stats_np(x.shape[0], NO_MC, 200)
+    for i_start in range(0, NO_MC, 200):
+        update_mc_stats_np(dict_stats_chunks, x[:, i_start:i_start + 200], ref = ref[i_start:i_start + 200])
+    dict_stats_chunks = finalize_mc_stats_np(dict_stats_chunks, ref = True)
+    assert np.all(dict_stats_exact["sensitivity"][3:5] == float(0.0))
+    np.testing.assert_allclose(dict_stats_exact["sensitivity"], dict_stats_chunks["sensitivity"], rtol = 1e-10, atol = 1e-12)
+
+
+def test_tornado_plot_zero_variance(tmp_path, monkeypatch):
+    pytest.importorskip("matplotlib")
+    import matplotlib
+    matplotlib.use("Agg")
+    import utils_plot
+    #keep the figure open to read the bars
+    list_fig = []
+    close_all = utils_plot.plt.close
+    def close_keep():
+        list_fig.append(utils_plot.plt.gcf())
+    monkeypatch.setattr(utils_plot.plt, "close", close_keep)
+    
+    x, ref = make_simulations(SEED)
+    sensitivity = compute_sensitivity_np_batch(x, ref)
+    nomenc_list = ["1A1", "1A2", "1A3", "2A1", "2A2", "3B1"]
+    utils_plot.tornado_plot_EM_BY_RY(
+            nomenc_list, sensitivity, sensitivity, "1990", "2021", None, str(tmp_path / "tornado.png"))
+    ax = list_fig[0].axes[0]
+    labels = [label.get_text() for label in ax.get_yticklabels()]
+    widths = [bar.get_width() for bar in ax.patches]
+    close_all("all")
+    #nan excluded, categories with variance first by decreasing absolute sensitivity, then constant categories
+    index_var = np.argsort(np.abs(sensitivity[:3]))[::-1]
+    assert labels[:3] == [nomenc_list[i] for i in index_var]
+    assert sorted(labels[3:]) == ["2A1", "2A2"]
+    np.testing.assert_array_equal(widths, np.concatenate([sensitivity[index_var], [0.0, 0.0]]))
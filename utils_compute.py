@@ -23,7 +23,10 @@ import numpy as np
 import pandas as pd
 import random
 import utils_constant as const
-from scipy.stats import gamma, triang #,norm,  , lognorm
+from scipy.stats import gamma, triang, lognorm #,norm
+from scipy.stats import qmc
+from scipy import sparse
+from scipy import special
 
 
 
@@ -51,7 +54,7 @@ def compute_U_propagation_em_pd(
     len_df = len(df)
     #https://www.statology.org/pandas-create-dataframe-with-column-names/
     df_u = pd.DataFrame(
-            np.float(0.0), #fill all cells with zeros, this is the default result (not nan!)
+            float(0.0), #fill all cells with zeros, this is the default result (not nan!)
             columns=[
             "AD_RY_pr_U_lower_p",
             "AD_RY_pr_U_upper_p",
@@ -91,7 +94,12 @@ def compute_U_propagation_em_pd(
     #(this might be reduced to
     #because usually gamma dist is non-symetric,
     #but I could not find a way to choose the value then)
-            
+    
+    #All rows are computed at once, for each distribution type:
+    #results are computed as numpy arrays and written to df_u at the end.
+    dict_u = {}
+    for col in df_u.columns:
+        dict_u[col] = np.zeros(len_df, dtype = np.float64)
             
     for i_year in range(2):
         if i_year == int(0):
@@ -116,6 +124,8 @@ def compute_U_propagation_em_pd(
         em_is_num = "EM_is_num_{}".format(input_year)
         em = "EM_{}".format(input_year)
         
+        em_values = np.asarray(df[em], dtype = np.float64)
+        
 
         for i_type in range(3):
             if i_type == 0:
@@ -142,51 +152,69 @@ def compute_U_propagation_em_pd(
             _pr_U_lower_p = "{}_{}_pr_U_lower_p".format(input_type, input_year)
             _pr_U_upper_p = "{}_{}_pr_U_upper_p".format(input_type, input_year)
 
-
-            for i in range(len(df)):
-                if df[u_is_num].iloc[i] and df[em].iloc[i] != np.float64(0.0):
-                    #print("{} {} {}".format(input_year, input_type, df[u_is_num].iloc[i], df[em].iloc[i] != np.float64(0.0)))
-                
-                    if df[u_dist].iloc[i] == const.DIST_NORMAL:
-                        df_u[_pr_U_lower_p].iloc[i] = df[u_lower_f].iloc[i]*float(100.0)*const.FACTOR_U_DIST_95_PERCENT
-                        df_u[_pr_U_upper_p].iloc[i] = df[u_upper_f].iloc[i]*float(100.0)*const.FACTOR_U_DIST_95_PERCENT
-
-                    elif df[u_dist].iloc[i] == const.DIST_GAMMA:
-                        #implicitely, value is one because input U is in percent
-                        #https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.gamma.html
-                        variance = (df[u_upper_f].iloc[i])**2
-                        beta = variance #/1 #mean is one
-                        alpha = float(1.0) / beta 
-                        df_u[_pr_U_lower_p].iloc[i] = (float(1.0) - gamma.ppf(const.DIST_PPF_EDGE_LOWER, alpha, loc = 0, scale =beta))*float(100.0)
-                        df_u[_pr_U_upper_p].iloc[i] = (gamma.ppf(const.DIST_PPF_EDGE_UPPER, alpha, loc = 0, scale =beta) - float(1.0))*float(100.0)
-                                
-                    elif df[u_dist].iloc[i] == const.DIST_TRIANGULAR:
-                        #input U is the edge, in fraction of the mean
-                        #equations for pdf distribution is from wikipedia
-                        #https://en.wikipedia.org/wiki/Triangular_distribution
-                        #equation from GUM can be used ONLY IF the triangular distribution is symmetric
-                        #we use the function <triang> from scipy.stats
-                        triangle_min = float(1.0) - df[u_lower_f].iloc[i]
-                        triangle_max = float(1.0) + df[u_upper_f].iloc[i]
-                        triangle_modus = float(1.0) * float(3.0) - triangle_min - triangle_max
-                        triangle_scale = triangle_max - triangle_min
-                        triangle_c = (triangle_modus - triangle_min)/triangle_scale            
-                        df_u[_pr_U_lower_p].iloc[i] = (float(1.0) - triang.ppf(q = const.DIST_PPF_EDGE_LOWER, c = triangle_c, loc = triangle_min, scale = triangle_scale)) * float(100.0)
-                        df_u[_pr_U_upper_p].iloc[i] = (triang.ppf(q = const.DIST_PPF_EDGE_UPPER, c = triangle_c, loc = triangle_min, scale = triangle_scale) - float(1.0)) * float(100.0)
-        
-                    #TODO  20230228 add lognormal distribution
+            #rows with uncertainty values, as in "if df[u_is_num].iloc[i] and df[em].iloc[i] != 0"
+            is_row = np.asarray(df[u_is_num], dtype = bool) & (em_values != np.float64(0.0))
+            if not np.any(is_row):
+                continue
+            dist = np.asarray(df[u_dist], dtype = np.float64)
+            u_lower = np.asarray(df[u_lower_f], dtype = np.float64)
+            u_upper = np.asarray(df[u_upper_f], dtype = np.float64)
+            
+            index = np.flatnonzero(is_row & (dist == const.DIST_NORMAL))
+            dict_u[_pr_U_lower_p][index] = u_lower[index]*float(100.0)*const.FACTOR_U_DIST_95_PERCENT
+            dict_u[_pr_U_upper_p][index] = u_upper[index]*float(100.0)*const.FACTOR_U_DIST_95_PERCENT
+
+            index = np.flatnonzero(is_row & (dist == const.DIST_GAMMA))
+            if len(index) > 0:
+                #implicitely, value is one because input U is in percent
+                #https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.gamma.html
+                variance = (u_upper[index])**2
+                beta = variance #/1 #mean is one
+                alpha = float(1.0) / beta 
+                dict_u[_pr_U_lower_p][index] = (float(1.0) - gamma.ppf(const.DIST_PPF_EDGE_LOWER, alpha, loc = 0, scale =beta))*float(100.0)
+                dict_u[_pr_U_upper_p][index] = (gamma.ppf(const.DIST_PPF_EDGE_UPPER, alpha, loc = 0, scale =beta) - float(1.0))*float(100.0)
+                        
+            index = np.flatnonzero(is_row & (dist == const.DIST_TRIANGULAR))
+            if len(index) > 0:
+                #input U is the edge, in fraction of the mean
+                #equations for pdf distribution is from wikipedia
+                #https://en.wikipedia.org/wiki/Triangular_distribution
+                #equation from GUM can be used ONLY IF the triangular distribution is symmetric
+                #we use the function <triang> from scipy.stats
+                triangle_min = float(1.0) - u_lower[index]
+                triangle_max = float(1.0) + u_upper[index]
+                triangle_modus = float(1.0) * float(3.0) - triangle_min - triangle_max
+                triangle_scale = triangle_max - triangle_min
+                triangle_c = (triangle_modus - triangle_min)/triangle_scale            
+                dict_u[_pr_U_lower_p][index] = (float(1.0) - triang.ppf(q = const.DIST_PPF_EDGE_LOWER, c = triangle_c, loc = triangle_min, scale = triangle_scale)) * float(100.0)
+                dict_u[_pr_U_upper_p][index] = (triang.ppf(q = const.DIST_PPF_EDGE_UPPER, c = triangle_c, loc = triangle_min, scale = triangle_scale) - float(1.0)) * float(100.0)
+            
+            index = np.flatnonzero(is_row & (dist == const.DIST_LOGNORMAL))
+            if len(index) > 0:
+                #same parameters as for the Monte Carlo simulations:
+                #the natural logarithm of the values divided by the mean is normally distributed
+                #with mean zero and standard deviation u_upper (in fraction of the mean)
+                #https://docs.scipy.org/doc/scipy/reference/generated/scipy.stats.lognorm.html
+                dict_u[_pr_U_lower_p][index] = (float(1.0) - lognorm.ppf(const.DIST_PPF_EDGE_LOWER, u_upper[index])) * float(100.0)
+                dict_u[_pr_U_upper_p][index] = (lognorm.ppf(const.DIST_PPF_EDGE_UPPER, u_upper[index]) - float(1.0)) * float(100.0)
         
-        for i in range(len(df)):
-            #TODO  20230215 check if this is the right condition
-            if df[u_AD_is_num].iloc[i] and df[u_EF_is_num].iloc[i] and df[em].iloc[i] != np.float64(0.0):
-                df_u[EM_pr_U_lower_p].iloc[i] = np.sqrt(np.square(df_u[AD_pr_U_lower_p].iloc[i]) + np.square(df_u[EF_pr_U_lower_p].iloc[i]))
-                df_u[EM_pr_U_upper_p].iloc[i] = np.sqrt(np.square(df_u[AD_pr_U_upper_p].iloc[i]) + np.square(df_u[EF_pr_U_upper_p].iloc[i]))
+        #TODO  20230215 check if this is the right condition
+        index = np.flatnonzero(
+                np.asarray(df[u_AD_is_num], dtype = bool) 
+                & np.asarray(df[u_EF_is_num], dtype = bool) 
+                & (em_values != np.float64(0.0)))
+        dict_u[EM_pr_U_lower_p][index] = np.sqrt(np.square(dict_u[AD_pr_U_lower_p][index]) + np.square(dict_u[EF_pr_U_lower_p][index]))
+        dict_u[EM_pr_U_upper_p][index] = np.sqrt(np.square(dict_u[AD_pr_U_upper_p][index]) + np.square(dict_u[EF_pr_U_upper_p][index]))
                 
         
         #col IPCC H, but without normalisation, so that it can be use to compute per gas
         #if emission values are zero the value of the contribution to variance will be zero, ok
-        df_u[EM_contrib_var_lower].loc[df[em_is_num]] = np.square(df_u[EM_pr_U_lower_p].loc[df[em_is_num]]*df[em].loc[df[em_is_num]])
-        df_u[EM_contrib_var_upper].loc[df[em_is_num]] = np.square(df_u[EM_pr_U_upper_p].loc[df[em_is_num]]*df[em].loc[df[em_is_num]])
+        index = np.flatnonzero(np.asarray(df[em_is_num], dtype = bool))
+        dict_u[EM_contrib_var_lower][index] = np.square(dict_u[EM_pr_U_lower_p][index]*em_values[index])
+        dict_u[EM_contrib_var_upper][index] = np.square(dict_u[EM_pr_U_upper_p][index]*em_values[index])
+    
+    for col in df_u.columns:
+        df_u[col] = dict_u[col]
     
     return df_u
 
@@ -204,51 +232,64 @@ def compute_U_propagation_trend_pd(
     
     """
 
-    df_u["sens_corr"] = np.float(0.0) #sensitivity if full correlation between base year and reporting year
-    df_u["sens_no_corr"] = np.float(0.0) #sensitivity if no correlation between base year and reporting year
-    df_u["AD_trend_normed_pr_contrib_var_lower"] = np.float(0.0)
-    df_u["AD_trend_normed_pr_contrib_var_upper"] = np.float(0.0)
-    df_u["EF_trend_normed_pr_contrib_var_lower"] = np.float(0.0)
-    df_u["EF_trend_normed_pr_contrib_var_upper"] = np.float(0.0)
-    df_u["EM_trend_normed_pr_contrib_var_lower"] = np.float(0.0)
-    df_u["EM_trend_normed_pr_contrib_var_upper"] = np.float(0.0)
-   
-    indexes = df.index[df['EM_is_num_BY'] | df['EM_is_num_RY']].tolist()
-
+    #All rows are computed at once: the conditions of each branch
+    #(correlation between base year and reporting year, AD and EF given or direct emission)
+    #are boolean arrays, the results are selected with np.where.
+    #Logical values are used as in "if df['import'][i]".
+    em_BY = np.asarray(df['EM_BY'], dtype = np.float64)
+    em_RY = np.asarray(df['EM_RY'], dtype = np.float64)
+    is_row = np.asarray(df['EM_is_num_BY'], dtype = bool) | np.asarray(df['EM_is_num_RY'], dtype = bool)
+    
     #IPCC/EMEP type A sensitivity: base year and reporting year are fully correlated
-    df_u['sens_corr'][indexes] = np.abs((0.01* df['EM_RY'][indexes] + EM_RY_sum - (0.01* df['EM_BY'][indexes] + EM_BY_sum)) / (0.01* df['EM_BY'][indexes] + EM_BY_sum) *float(100) - (EM_RY_sum - EM_BY_sum)/ EM_BY_sum* float(100.0))
-    #IPCC/EMEP type B sensitivity: base year and reporting year are not correlated
-    df_u['sens_no_corr'][indexes] = np.abs(df['EM_RY'][indexes]/EM_BY_sum) 
-   
-    for i in indexes:
-        if df['EM_is_num_RY'][i]:
-            if df["import"][i] and not df['uEM_is_num_BY'][i] and not df['uEM_is_num_RY'][i]:
-                #Inputs given, and for AD and EF
-                if df['uAD_corr'][i]:
-                    df_u['AD_trend_normed_pr_contrib_var_lower'][i] = df_u['sens_corr'][i] * df_u['AD_RY_pr_U_lower_p'][i]
-                    df_u['AD_trend_normed_pr_contrib_var_upper'][i] = df_u['sens_corr'][i] * df_u['AD_RY_pr_U_upper_p'][i]
-                else:
-                    df_u['AD_trend_normed_pr_contrib_var_lower'][i] = df_u['sens_no_corr'][i] * np.sqrt(2.0) * df_u['AD_RY_pr_U_lower_p'][i]
-                    df_u['AD_trend_normed_pr_contrib_var_upper'][i] = df_u['sens_no_corr'][i] * np.sqrt(2.0) * df_u['AD_RY_pr_U_upper_p'][i]
-                    
-                if df['uEF_corr'][i]:
-                    df_u['EF_trend_normed_pr_contrib_var_lower'][i] = df_u['sens_corr'][i] * df_u['EF_RY_pr_U_lower_p'][i]
-                    df_u['EF_trend_normed_pr_contrib_var_upper'][i] = df_u['sens_corr'][i] * df_u['EF_RY_pr_U_upper_p'][i]
-                else:
-                    df_u['EF_trend_normed_pr_contrib_var_lower'][i] = df_u['sens_no_corr'][i] * np.sqrt(2.0) * df_u['EF_RY_pr_U_lower_p'][i]
-                    df_u['EF_trend_normed_pr_contrib_var_upper'][i] = df_u['sens_no_corr'][i] * np.sqrt(2.0) * df_u['EF_RY_pr_U_upper_p'][i]
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        sens_corr = np.abs((0.01* em_RY + EM_RY_sum - (0.01* em_BY + EM_BY_sum)) / (0.01* em_BY + EM_BY_sum) *float(100) - (EM_RY_sum - EM_BY_sum)/ EM_BY_sum* float(100.0))
+        #IPCC/EMEP type B sensitivity: base year and reporting year are not correlated
+        sens_no_corr = np.abs(em_RY/EM_BY_sum) 
+    sens_corr = np.where(is_row, sens_corr, float(0.0)) #sensitivity if full correlation between base year and reporting year
+    sens_no_corr = np.where(is_row, sens_no_corr, float(0.0)) #sensitivity if no correlation between base year and reporting year
     
-                df_u['EM_trend_normed_pr_contrib_var_lower'][i] = np.square(df_u['EF_trend_normed_pr_contrib_var_lower'][i]) + np.square(df_u['AD_trend_normed_pr_contrib_var_lower'][i])
-                df_u['EM_trend_normed_pr_contrib_var_upper'][i] = np.square(df_u['EF_trend_normed_pr_contrib_var_upper'][i]) + np.square(df_u['AD_trend_normed_pr_contrib_var_upper'][i])
-        
-            else:
-                #This is a direct emission
-                if df['uEM_corr'][i]:
-                    df_u['EM_trend_normed_pr_contrib_var_lower'][i] = np.square(df_u['sens_corr'][i] * df_u['EM_RY_pr_U_lower_p'][i])
-                    df_u['EM_trend_normed_pr_contrib_var_upper'][i] = np.square(df_u['sens_corr'][i] * df_u['EM_RY_pr_U_upper_p'][i])
-                else:
-                    df_u['EM_trend_normed_pr_contrib_var_lower'][i] = np.square(df_u['sens_no_corr'][i] * np.sqrt(2.0) * df_u['EM_RY_pr_U_lower_p'][i])
-                    df_u['EM_trend_normed_pr_contrib_var_upper'][i] = np.square(df_u['sens_no_corr'][i] * np.sqrt(2.0) * df_u['EM_RY_pr_U_upper_p'][i])
+    is_RY = is_row & np.asarray(df['EM_is_num_RY'], dtype = bool)
+    #Inputs given, and for AD and EF
+    is_AD_EF = is_RY & np.asarray(df["import"], dtype = bool) & np.logical_not(np.asarray(df['uEM_is_num_BY'], dtype = bool)) & np.logical_not(np.asarray(df['uEM_is_num_RY'], dtype = bool))
+    #This is a direct emission
+    is_EM = is_RY & np.logical_not(is_AD_EF)
+    
+    #correlation between base year and reporting year,
+    #the columns may be missing if there is no row of this kind (as in prepare_mc_input_np)
+    dict_is_corr = {}
+    for input_type in ["AD", "EF", "EM"]:
+        col_corr = 'u{}_corr'.format(input_type)
+        if col_corr in df:
+            dict_is_corr[input_type] = np.asarray(df[col_corr], dtype = bool)
+        else:
+            dict_is_corr[input_type] = np.zeros(len(df), dtype = bool)
+    
+    dict_trend = {}
+    for input_type in ["AD", "EF"]:
+        is_corr = dict_is_corr[input_type]
+        for side in ["lower", "upper"]:
+            U_RY = np.asarray(df_u['{}_RY_pr_U_{}_p'.format(input_type, side)], dtype = np.float64)
+            dict_trend["{}_{}".format(input_type, side)] = np.where(
+                    is_AD_EF,
+                    np.where(is_corr, sens_corr * U_RY, sens_no_corr * np.sqrt(2.0) * U_RY),
+                    float(0.0))
+    
+    is_corr = dict_is_corr["EM"]
+    for side in ["lower", "upper"]:
+        U_RY = np.asarray(df_u['EM_RY_pr_U_{}_p'.format(side)], dtype = np.float64)
+        dict_trend["EM_{}".format(side)] = np.where(
+                is_AD_EF,
+                np.square(dict_trend["EF_{}".format(side)]) + np.square(dict_trend["AD_{}".format(side)]),
+                np.where(
+                        is_EM,
+                        np.where(is_corr, np.square(sens_corr * U_RY), np.square(sens_no_corr * np.sqrt(2.0) * U_RY)),
+                        float(0.0)))
+    
+    df_u["sens_corr"] = sens_corr
+    df_u["sens_no_corr"] = sens_no_corr
+    for input_type in ["AD", "EF", "EM"]:
+        for side in ["lower", "upper"]:
+            df_u["{}_trend_normed_pr_contrib_var_{}".format(input_type, side)] = dict_trend["{}_{}".format(input_type, side)]
 
     return df_u
 
@@ -316,6 +357,10 @@ def generate_random_value(
     This function contains the generation of one or several random number(s)
     according to distribution type and corresponding parameters.
     
+    The Monte Carlo simulations use generate_random_value_np_batch.
+    This function is kept as the reference implementation 
+    for the statistical-equivalence tests (tests/test_generate_random_value.py).
+    
     INPUT:
         dist: disribution type. Supported types are:
             normal (gaussian)
@@ -480,194 +525,496 @@ def generate_random_value(
     
     return val
 
-def generate_random_value_np(
-        dist: int, 
-        mean: float, 
-        u_left: float, 
-        u_right: float, 
+
+def generate_uniform_np_batch(
+        no_rows: int,
         no_random: int,
-        ):
-    #TODO work in progress: generate random values using the numpy package.
-    """
-     2022.03.16
-    WORK IN PROGRESS
-    FOR TEST PURPOSE: DO THE SAME AS generate_random_value 
-    BUT USING NUMPY FUNCTIONS.
+        rng: np.random.Generator,
+        sampling: int,
+        ) -> np.ndarray:
+    #XXX generate uniform values with Latin hypercube sampling, a scrambled Sobol' sequence or antithetic variates
+    """Generate values uniformly distributed in (0, 1) for several rows at once.
     
-    This function contains the generation of one or several random number(s)
-    according to distribution type and corresponding parameters.
+    Each row is one dimension of the design.
+    With Latin hypercube sampling, each row has exactly one value 
+    in each of the no_random intervals of same probability.
+    With antithetic variates, pseudo-random values u are drawn for the first half
+    of the simulations and mirrored as 1 - u for the second half.
+    With the scrambled Sobol' sequence, the rows are the dimensions 
+    of a low-discrepancy sequence, randomised with rng;
+    no_random should then be a power of 2.
+    The order of the points is randomly permuted (Latin supercube sampling, 
+    Owen 1998, ACM Transactions on Modeling and Computer Simulation 8(1), 71-102),
+    otherwise the values of two calls would be dependent:
+    each call starts again with the first dimensions of the sequence.
     
-    INPUT:
-        dist: disribution type. Supported types are:
-            normal (gaussian)
-            triangular
-            gamma
-        
-        mean: mean (average) value
+    Args:
+        no_rows: number of rows (dimensions).
+        no_random: number of simulations.
+        rng: numpy random Generator used to randomise the design.
+        sampling: const.MC_SAMPLING_LHS, const.MC_SAMPLING_SOBOL
+            or const.MC_SAMPLING_ANTITHETIC.
         
-        u_left: uncertainty value on the left hand side of the mean,
-                in absolute value (not in percent)
-        u_right: uncertainty value on the right hand side of the mean,
-                in absolute value (not in percent)
-        no_random: number of simulations
+    Returns:
+        u: numpy array of float64 with shape (no_rows, no_random),
+            values strictly between 0 and 1.
     """
-    val = None
-
-    if dist == const.DIST_NORMAL:
-        """
-        Normal distribution. 
-        loc is the mean, and 
-        scale is the standard deviation.
-        https://numpy.org/doc/stable/reference/random/generated/numpy.random.normal.html
-        """
-        #mean: mean
-        #u_left: standard deviation (1 sigma, in absolute value (not percent))
+    if sampling == const.MC_SAMPLING_ANTITHETIC:
+        u = rng.random(size = (no_rows, (no_random + 1) // 2))
+        u = np.concatenate([u, float(1.0) - u], axis = 1)[:, :no_random]
+    else:
+        if sampling == const.MC_SAMPLING_LHS:
+            sampler = qmc.LatinHypercube(d = no_rows, seed = rng)
+        else:
+            sampler = qmc.Sobol(d = no_rows, scramble = True, seed = rng)
+        u = sampler.random(no_random)
+        if sampling == const.MC_SAMPLING_SOBOL:
+            u = u[rng.permutation(no_random)]
+        u = np.ascontiguousarray(u.T)
+    #the inverse CDF of the normal, lognormal and gamma distributions is infinite at 0 and 1
+    u_min = float(2.0)**(-53)
+    np.clip(u, u_min, float(1.0) - u_min, out = u)
+    return u
+
+
+def generate_random_value_np_batch(
+        dist: np.ndarray, 
+        mean: np.ndarray, 
+        u_left: np.ndarray, 
+        u_right: np.ndarray, 
+        no_random: int,
+        rng: np.random.Generator = None,
+        sampling: int = const.MC_SAMPLING_RANDOM,
+        ) -> np.ndarray:
+    #XXX generate random values for many rows at once using the numpy package
+    """Generate random values for several source categories at once.
+    
+    This function does the same as generate_random_value,
+    but draws the values with a numpy random Generator, for a whole set of rows: 
+    rows are grouped by distribution type and all values of a group 
+    are drawn with one single numpy call.
+    The input arguments have the same meaning as for generate_random_value.
+    
+    Args:
+        dist: numpy array, distribution type of each row 
+            (DIST_ constants from utils_constant, nan if missing).
+        mean: numpy array, mean (average) value of each row.
+        u_left: numpy array, uncertainty value on the left hand side of the mean,
+            in absolute value (not in percent).
+        u_right: numpy array, uncertainty value on the right hand side of the mean,
+            in absolute value (not in percent).
+        no_random: number of simulations.
+        rng: numpy random Generator used to draw the values.
+            If None, a new Generator is created with fresh entropy from the OS.
+        sampling: const.MC_SAMPLING_RANDOM to draw pseudo-random values,
+            const.MC_SAMPLING_LHS, const.MC_SAMPLING_SOBOL or const.MC_SAMPLING_ANTITHETIC
+            to map the values of generate_uniform_np_batch through the inverse 
+            cumulative distribution function of each distribution.
+            With antithetic variates, the values of the normal and uniform distributions
+            are mirrored around the mean, the values of the other distributions
+            are mirrored around the median.
             
-        #val = [random.normalvariate(mu = mean, sigma = u_left) for i in range(no_random)]
-        val = np.random.normal(loc = mean, scale = u_left, size = no_random)
-
-
-    elif dist == const.DIST_GAMMA:
-
-        """
-        random.gammavariate(alpha, beta)
+    Returns:
+        val: numpy array of float64 with shape (number of rows, no_random).
         
-            Gamma distribution. (Not the gamma function!) Conditions on the parameters are alpha > 0 and beta > 0.
+    Raises:
+        ValueError: if a distribution type is not supported 
+            or if the input values do not define a valid distribution.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    
+    dist = np.asarray(dist, dtype = np.float64)
+    mean = np.asarray(mean, dtype = np.float64)
+    u_left = np.asarray(u_left, dtype = np.float64)
+    u_right = np.asarray(u_right, dtype = np.float64)
+    
+    val = np.empty((len(dist), no_random), dtype = np.float64)
+    if len(dist) == 0:
+        return val
+    
+    #check that all distribution types are supported before drawing anything
+    dist_supported = [
+            const.DIST_NORMAL, 
+            const.DIST_GAMMA, 
+            const.DIST_UNIFORM, 
+            const.DIST_TRIANGULAR, 
+            const.DIST_LOGNORMAL]
+    is_supported = np.isin(dist, dist_supported)
+    if not np.all(is_supported):
+        dist_wrong = dist[np.logical_not(is_supported)][0]
+        if np.isnan(dist_wrong):
+            raise ValueError("Distribution type is None, please check for potential missing input value.")
+        raise ValueError("Given distribution type <{}> does not correspond to anything programmed.".format(dist_wrong))
         
-            The probability distribution function is:
+    #the distribution types are always processed in the same order,
+    #so that a given random Generator always gives the same values.
+    for dist_type in dist_supported:
+        index = np.flatnonzero(dist == dist_type)
+        if len(index) == 0:
+            continue
         
-                      x ** (alpha - 1) * math.exp(-x / beta)
-            pdf(x) =  --------------------------------------
-                        math.gamma(alpha) * beta ** alpha
-                        
-        Note: 
-            alpha parameter here is the same as k in Wikipedia, Gamma distribution.
-            beta parameter here is the same as teta in Wikipedia, Gamma distribution.
-            
-        https://numpy.org/doc/stable/reference/random/generated/numpy.random.gamma.html
+        #parameters as column vectors, to be broadcasted over all simulations
+        mean_i = mean[index][:, None]
+        u_left_i = u_left[index][:, None]
+        u_right_i = u_right[index][:, None]
         
-        """
-
-        if mean > float(0.0):
-            #variance = u_left**2
-            #important: use u_right as input for variance,
-            #not u_left because u_left was re-computed as border at 2.5%
-            #to prepare for uncertainty approach 1
-            variance = u_right**2
-            beta = variance/mean
-            alpha = mean/beta
+        if dist_type == const.DIST_NORMAL:
+            #u_left: standard deviation (1 sigma, in absolute value (not percent))
+            if sampling == const.MC_SAMPLING_RANDOM:
+                val_i = rng.standard_normal(size = (len(index), no_random))
+            else:
+                val_i = special.ndtri(generate_uniform_np_batch(len(index), no_random, rng, sampling))
+            val_i *= u_left_i
+            val_i += mean_i
+            val[index] = val_i
             
-            #val = [random.gammavariate(alpha = alpha, beta = beta) for i in range(no_random)]
-            #gamma.ppf(const.DIST_PPF_EDGE_LOWER, alpha, loc = 0, scale =beta)
-            val = np.random.gamma(shape = alpha, scale = beta, size = no_random)
-        else:
-            val = [mean]*no_random
+        elif dist_type == const.DIST_GAMMA:
+            #important: use u_right as input for variance, see generate_random_value
+            is_positive = mean_i[:, 0] > float(0.0)
+            val[index[np.logical_not(is_positive)]] = mean_i[np.logical_not(is_positive)]
+            if np.any(is_positive):
+                variance = u_right_i[is_positive]**2
+                if not np.all(variance > float(0.0)):
+                    raise ValueError("Gamma distribution: variance must be > 0, please check input value.")
+                beta = variance/mean_i[is_positive]
+                alpha = mean_i[is_positive]/beta
+                if sampling == const.MC_SAMPLING_RANDOM:
+                    val[index[is_positive]] = rng.gamma(
+                            shape = alpha, 
+                            scale = beta, 
+                            size = (int(np.sum(is_positive)), no_random))
+                else:
+                    #inverse of the cumulative distribution function, as gamma.ppf
+                    val[index[is_positive]] = special.gammaincinv(
+                            alpha, 
+                            generate_uniform_np_batch(int(np.sum(is_positive)), no_random, rng, sampling)) * beta
+                
+        elif dist_type == const.DIST_UNIFORM or dist_type == const.DIST_TRIANGULAR:
+            #u_left and u_right are the distances from mean to the edges,
+            #they are not the values at 2.5% and 97.5% of the distribution!
+            left_edge = mean_i - u_left_i
+            right_edge = mean_i + u_right_i
+            if np.any(right_edge < left_edge):
+                if dist_type == const.DIST_UNIFORM:
+                    raise ValueError("Uniform distribution: right edge < left edge, please check input value.")
+                raise ValueError("Triangular distribution: right edge < left edge, please check input value.")
+            is_constant = (right_edge == left_edge)[:, 0]
+            is_random = np.logical_not(is_constant)
+            val[index[is_constant]] = mean_i[is_constant]
+            if np.any(is_random):
+                if dist_type == const.DIST_UNIFORM and sampling == const.MC_SAMPLING_RANDOM:
+                    val[index[is_random]] = rng.uniform(
+                            low = left_edge[is_random], 
+                            high = right_edge[is_random], 
+                            size = (int(np.sum(is_random)), no_random))
+                elif dist_type == const.DIST_UNIFORM:
+                    u_i = generate_uniform_np_batch(int(np.sum(is_random)), no_random, rng, sampling)
+                    val[index[is_random]] = left_edge[is_random] + u_i * (right_edge[is_random] - left_edge[is_random])
+                else:
+                    mode = mean_i*float(3.0) - left_edge - right_edge
+                    if np.any(mode[is_random] < left_edge[is_random]):
+                        i_wrong = np.flatnonzero(mode[is_random] < left_edge[is_random])[0]
+                        raise ValueError("Triangular distribution: mode < left_edge: {} < {}.".format(
+                                mode[is_random][i_wrong, 0], left_edge[is_random][i_wrong, 0]))
+                    if np.any(mode[is_random] > right_edge[is_random]):
+                        i_wrong = np.flatnonzero(mode[is_random] > right_edge[is_random])[0]
+                        raise ValueError("Triangular distribution: mode > right_edge: {} < {}.".format(
+                                mode[is_random][i_wrong, 0], right_edge[is_random][i_wrong, 0]))
+                    if sampling == const.MC_SAMPLING_RANDOM:
+                        val[index[is_random]] = rng.triangular(
+                                left = left_edge[is_random], 
+                                mode = mode[is_random], 
+                                right = right_edge[is_random], 
+                                size = (int(np.sum(is_random)), no_random))
+                    else:
+                        #inverse of the cumulative distribution function, as triang.ppf
+                        u_i = generate_uniform_np_batch(int(np.sum(is_random)), no_random, rng, sampling)
+                        width = right_edge[is_random] - left_edge[is_random]
+                        width_left = mode[is_random] - left_edge[is_random]
+                        width_right = right_edge[is_random] - mode[is_random]
+                        val[index[is_random]] = np.where(
+                                u_i * width < width_left,
+                                left_edge[is_random] + np.sqrt(u_i * width * width_left),
+                                right_edge[is_random] - np.sqrt((float(1.0) - u_i) * width * width_right))
+                    
+        elif dist_type == const.DIST_LOGNORMAL:
+            #same parameters as for random.lognormvariate(mu, sigma)
+            is_positive = mean_i[:, 0] > float(0.0)
+            val[index[np.logical_not(is_positive)]] = mean_i[np.logical_not(is_positive)]
+            if np.any(is_positive) and sampling == const.MC_SAMPLING_RANDOM:
+                val[index[is_positive]] = rng.lognormal(
+                        mean = np.log(mean_i[is_positive]), 
+                        sigma = u_right_i[is_positive]/mean_i[is_positive], 
+                        size = (int(np.sum(is_positive)), no_random))
+            elif np.any(is_positive):
+                #inverse of the cumulative distribution function, as lognorm.ppf
+                val[index[is_positive]] = np.exp(
+                        np.log(mean_i[is_positive]) 
+                        + u_right_i[is_positive]/mean_i[is_positive] 
+                        * special.ndtri(generate_uniform_np_batch(int(np.sum(is_positive)), no_random, rng, sampling)))
+    
+    return val
 
 
-    elif dist == const.DIST_UNIFORM:
-        """   
-        random.uniform(a, b)
+def prepare_mc_input_np(
+        df_EM_u: pd.DataFrame,
+        AD_corr_a, 
+        AD_corr_b, 
+        EF_corr_a, 
+        EF_corr_b, 
+        EM_corr_a, 
+        EM_corr_b,
+        ) -> dict:
+    """Collect all input values needed for the Monte Carlo simulations as numpy arrays.
     
-        Return a random floating point number N such that
-        a <= N <= b for a <= b and b <= N <= a for b < a.
+    Args:
+        df_EM_u: pd.DataFrame containing emissions and uncertainties 
+            (in absolute values) for each source category.
+        AD_corr_a, AD_corr_b, EF_corr_a, EF_corr_b, EM_corr_a, EM_corr_b:
+            coefficients RY = BY * a + b for data correlated 
+            between base year and reporting year, one value per row of df_EM_u.
+            
+    Returns:
+        dict_mc_in: dictionary of numpy arrays with one value per row of df_EM_u.
+    """
+    no_rows = len(df_EM_u)
+    dict_mc_in = {}
     
-        The end-point value b may or may not be included 
-        in the range depending on floating-point rounding 
-        in the equation a + (b-a) * random().
-        
-        a and b are the edges of the uniform distribution!
-        not the values at 2.5% and 97.5% of the interval.
-
-        u_left must be the distance from mean to left edge (point of the triangle)
-        u_left is not the value at 2.5% of the distribution!
-        u_right must be the distance from mean to right edge (point of the triangle)
-        u_right is not the value at 97.5% of the distribution!
-        
-        https://numpy.org/doc/stable/reference/random/generated/numpy.random.uniform.html
-        random.uniform(low=0.0, high=1.0, size=None)
-        """ 
-        left_edge = mean - u_left
-        right_edge = mean + u_right
-        
-        if right_edge == left_edge:
-            val = [mean]*no_random
-        elif right_edge < left_edge:
-            raise ValueError("Uniform distribution: right edge < left edge, please check input value.")
-        else:            
-            #val = [random.uniform(a = left_edge, b = right_edge) for i in range(no_random)]
-            val = np.random.uniform(low = left_edge, high = right_edge, size = no_random)
-
-
-
-    elif dist == const.DIST_TRIANGULAR:
-        """
-        u_left must be the distance from mean to left edge (point of the triangle)
-        u_left is not the value at 2.5% of the distribution!
-        u_right must be the distance from mean to right edge (point of the triangle)
-        u_right is not the value at 97.5% of the distribution!
-        
-        mode: mode of the triangle, i.e. x position where the probability is maximum,
-        i.e. this is the likeliest value to be sampled, or the tip of the triangle. 
-        If the triangle is symetric: mode = mean = median.
-        If the triangle is not symetric, the mode is not the mean and is not the median.
-        
-        https://numpy.org/doc/stable/reference/random/generated/numpy.random.triangular.html
-        random.triangular(left, mode, right, size=None)
-        """            
-
-        left_edge  = mean - u_left
-        right_edge = mean + u_right
-
-        if right_edge == left_edge:
-            val = [mean]*no_random
-        elif right_edge < left_edge:
-            raise ValueError("Uniform distribution: right edge < left edge, please check input value.")
-        else:            
-            mode = mean*float(3.0) - left_edge - right_edge
-            if mode < left_edge:
-                raise ValueError("Triangular distribution: mode < left_edge: {} < {}.".format(mode, left_edge))
-            if mode > right_edge:
-                raise ValueError("Triangular distribution: mode > right_edge: {} < {}.".format(mode, right_edge))
+    for y_string in ["BY", "RY"]:
+        dict_mc_in["EM_{}".format(y_string)] = np.asarray(df_EM_u["EM_{}".format(y_string)], dtype = np.float64)
+        for input_type in ["AD", "EF", "EM"]:
+            #values are used as logical values, as in "if df_EM_u['uEM_is_num_BY'][i_code]"
+            col_is_num = "u{}_is_num_{}".format(input_type, y_string)
+            dict_mc_in[col_is_num] = np.asarray(df_EM_u[col_is_num], dtype = bool)
+            
+            #uncertainties for AD and EM are given in absolute values,
+            #uncertainties for EF are given as fraction of the mean (all EF are set to one).
+            for key in ["u{}_dist_{}", "u{}_lower_{}", "u{}_upper_{}"]:
+                key = key.format(input_type, y_string)
+                col = key
+                if input_type == "EF" and key != "uEF_dist_{}".format(y_string):
+                    col = key.replace("_{}".format(y_string), "_f_{}".format(y_string))
+                if col in df_EM_u:
+                    dict_mc_in[key] = np.asarray(df_EM_u[col], dtype = np.float64)
+                else:
+                    #no uncertainty given for direct emissions
+                    dict_mc_in[key] = np.full(no_rows, np.nan, dtype = np.float64)
     
-            #val = [random.triangular(left_edge, right_edge, mode) for i in range(no_random)]
-            val = np.random.triangular(left = left_edge, right = right_edge, mode = mode, size = no_random)
+    for input_type in ["AD", "EF", "EM"]:
+        col_corr = "u{}_corr".format(input_type)
+        if col_corr in df_EM_u:
+            dict_mc_in[col_corr] = np.asarray(df_EM_u[col_corr], dtype = bool)
+        else:
+            dict_mc_in[col_corr] = np.zeros(no_rows, dtype = bool)
+            
+    dict_mc_in["AD_corr_a"] = np.asarray(AD_corr_a, dtype = np.float64)
+    dict_mc_in["AD_corr_b"] = np.asarray(AD_corr_b, dtype = np.float64)
+    dict_mc_in["EF_corr_a"] = np.asarray(EF_corr_a, dtype = np.float64)
+    dict_mc_in["EF_corr_b"] = np.asarray(EF_corr_b, dtype = np.float64)
+    dict_mc_in["EM_corr_a"] = np.asarray(EM_corr_a, dtype = np.float64)
+    dict_mc_in["EM_corr_b"] = np.asarray(EM_corr_b, dtype = np.float64)
+    
+    return dict_mc_in
 
 
-                
-    elif dist == const.DIST_LOGNORMAL:
-        """
-        Documentation from
-        https://docs.python.org/3/library/random.html
-
-        random.lognormvariate(mu, sigma)
+def correlate_rows_np_batch(
+        x_BY_mc: np.ndarray,
+        a: np.ndarray,
+        b: np.ndarray,
+        is_corr: np.ndarray,
+        x_RY_mc: np.ndarray,
+        ):
+    #XXX compute values of the reporting year correlated with the base year, in place
+    """Compute the simulated values of the reporting year correlated with the base year, in place.
     
-        Log normal distribution. 
-        If you take the natural logarithm of this distribution, 
-        you’ll get a normal distribution 
-        with mean mu and standard deviation sigma. 
-        mu can have any value, and sigma must be greater than zero.
-        """        
-        
-        #("lognorm")
-        #print(u_right)
-        #print(mean)
-        if mean > float(0.0):
-
-            lognorm_sigma = u_right/mean
+    The values of the reporting year are fully correlated with the values 
+    of the base year: RY = BY * a + b.
+    The rows is_corr of x_RY_mc are written in place, all at once,
+    without copying the rows of x_BY_mc: the other rows are not modified
+    (their values of a and b, e.g. nan, are not used).
+    The addition is skipped if b is zero for all rows is_corr,
+    so that it costs one single multiplication over the block.
+    
+    Args:
+        x_BY_mc: numpy array of shape (number of rows, number of simulations),
+            simulated values of the base year.
+        a: numpy array of length number of rows, ratio RY / BY of each row.
+        b: numpy array of length number of rows, offset of each row.
+        is_corr: boolean array of length number of rows, rows to compute.
+        x_RY_mc: numpy array of the same shape as x_BY_mc, 
+            simulated values of the reporting year, modified in place.
+    """
+    if not np.any(is_corr):
+        return
+    where = is_corr[:, None]
+    np.multiply(x_BY_mc, a[:, None], out = x_RY_mc, where = where)
+    if np.any(b[is_corr] != float(0.0)):
+        np.add(x_RY_mc, b[:, None], out = x_RY_mc, where = where)
+
+
+def generate_EM_mc_np(
+        dict_mc_in: dict,
+        rows: slice,
+        no_mc: int,
+        rng: np.random.Generator,
+        EM_BY_mc: np.ndarray,
+        EM_RY_mc: np.ndarray,
+        rng_RY: np.random.Generator = None,
+        sampling: int = const.MC_SAMPLING_RANDOM,
+        ) -> dict:
+    """Generate Monte Carlo simulated emissions for a block of source categories.
+    
+    All rows of the block are simulated together, 
+    for the base year and the reporting year,
+    grouped by kind of input (AD, EF or direct emission) and by distribution type.
+    If uncertainties are given for AD and EF, the emission is the product AD * EF.
+    Values correlated between base year and reporting year
+    are not drawn again but computed from the base year values: RY = BY * a + b.
+    Rows with an emission of zero keep simulated values of zero.
+    
+    Args:
+        dict_mc_in: dictionary of numpy arrays, see prepare_mc_input_np.
+        rows: slice, rows of dict_mc_in making the block.
+        no_mc: number of Monte Carlo simulations.
+        rng: numpy random Generator used to draw the values
+            (for the base year only if rng_RY is given).
+        EM_BY_mc: numpy array of shape (number of rows in the block, no_mc),
+            filled with the simulated emissions for the base year.
+        EM_RY_mc: numpy array of shape (number of rows in the block, no_mc),
+            filled with the simulated emissions for the reporting year.
+        rng_RY: numpy random Generator used to draw the values for the reporting year
+            (None to use rng).
+        sampling: sampling method, see generate_random_value_np_batch.
             
-            val = [random.lognormvariate(np.log(mean), lognorm_sigma) for i in range(no_random)]
-        else:
-            val = [mean]*no_random
-
-        
+    Returns:
+        dict_AD_EF_mc: dictionary containing the simulated values for AD and EF 
+            ("AD_BY_mc", "EF_BY_mc", "AD_RY_mc", "EF_RY_mc", each of shape 
+            (number of rows in the block, no_mc)) and the boolean arrays 
+            "is_AD_EF_BY", "is_AD_EF_RY" giving the rows where AD and EF were simulated.
+    """
+    dict_in = {key: val[rows] for key, val in dict_mc_in.items()}
+    no_rows = len(dict_in["EM_BY"])
+    if rng_RY is None:
+        rng_RY = rng
+    
+    is_BY = dict_in["EM_BY"] != float(0.0)
+    is_RY = dict_in["EM_RY"] != float(0.0)
+    
+    is_AD_EF_BY = is_BY & np.logical_not(dict_in["uEM_is_num_BY"])
+    is_EM_BY = is_BY & dict_in["uEM_is_num_BY"]
+    is_AD_EF_RY = is_RY & np.logical_not(dict_in["uEM_is_num_RY"])
+    is_EM_RY = is_RY & dict_in["uEM_is_num_RY"]
+    
+    # 20230210 We do not do sensitivity analysis
+    #between neither AD and inventory EM
+    #nor between EF and inventory EM
+    #so we need to store mc results for AD and EF only to compute EM, for each process
+    dict_AD_EF_mc = {
+            "AD_BY_mc": np.zeros((no_rows, no_mc), dtype = np.float64),
+            "EF_BY_mc": np.zeros((no_rows, no_mc), dtype = np.float64),
+            "AD_RY_mc": np.zeros((no_rows, no_mc), dtype = np.float64),
+            "EF_RY_mc": np.zeros((no_rows, no_mc), dtype = np.float64),
+            "is_AD_EF_BY": is_AD_EF_BY,
+            "is_AD_EF_RY": is_AD_EF_RY,
+            }
+    
+    #----------------------------------------------------------------------
+    #***BASE YEAR: UNCERTAINTY GIVEN FOR AD AND EF***
+    #----------------------------------------------------------------------
+    index = np.flatnonzero(is_AD_EF_BY)
+    dict_AD_EF_mc["AD_BY_mc"][index] = generate_random_value_np_batch(
+            dict_in["uAD_dist_BY"][index],
+            dict_in["EM_BY"][index],
+            dict_in["uAD_lower_BY"][index],
+            dict_in["uAD_upper_BY"][index],
+            no_mc,
+            rng,
+            sampling = sampling)
+    #implicitely, all EF are set to a value of one (1).
+    dict_AD_EF_mc["EF_BY_mc"][index] = generate_random_value_np_batch(
+            dict_in["uEF_dist_BY"][index],
+            np.ones(len(index), dtype = np.float64),
+            dict_in["uEF_lower_BY"][index],
+            dict_in["uEF_upper_BY"][index],
+            no_mc,
+            rng,
+            sampling = sampling)
+    EM_BY_mc[index] = dict_AD_EF_mc["AD_BY_mc"][index] * dict_AD_EF_mc["EF_BY_mc"][index]
+    
+    #----------------------------------------------------------------------
+    #***BASE YEAR: UNCERTAINTY GIVEN FOR DIRECT EMISSION***
+    #----------------------------------------------------------------------
+    index = np.flatnonzero(is_EM_BY)
+    EM_BY_mc[index] = generate_random_value_np_batch(
+            dict_in["uEM_dist_BY"][index],
+            dict_in["EM_BY"][index],
+            dict_in["uEM_lower_BY"][index],
+            dict_in["uEM_upper_BY"][index],
+            no_mc,
+            rng,
+            sampling = sampling)
+    
+    #----------------------------------------------------------------------
+    #***REPORTING YEAR: UNCERTAINTY GIVEN FOR AD AND EF***
+    #----------------------------------------------------------------------
+    #full correlation with BY is possible only if BY is not zero
+    #(it could be that values are fully correlated but that process started later than BY, for example)
+    for input_type in ["AD", "EF"]:
+        x_BY_mc = dict_AD_EF_mc["{}_BY_mc".format(input_type)]
+        x_RY_mc = dict_AD_EF_mc["{}_RY_mc".format(input_type)]
+        is_corr = is_AD_EF_RY & dict_in["u{}_corr".format(input_type)] & is_BY
         
-    elif dist is None:
-        raise ValueError("Distribution type is None, please check for potential missing input value.")
+        correlate_rows_np_batch(
+                x_BY_mc,
+                dict_in["{}_corr_a".format(input_type)],
+                dict_in["{}_corr_b".format(input_type)],
+                is_corr,
+                x_RY_mc)
         
-    else:
-        raise ValueError("Given distribution type <{}> does not correspond to anything programmed.".format(dist))
+        index = np.flatnonzero(is_AD_EF_RY & np.logical_not(is_corr))
+        if input_type == "AD":
+            mean = dict_in["EM_RY"][index]
+        else:
+            mean = np.ones(len(index), dtype = np.float64)
+        x_RY_mc[index] = generate_random_value_np_batch(
+                dict_in["u{}_dist_RY".format(input_type)][index],
+                mean,
+                dict_in["u{}_lower_RY".format(input_type)][index],
+                dict_in["u{}_upper_RY".format(input_type)][index],
+                no_mc,
+                rng_RY,
+                sampling = sampling)
     
-    return val
+    index = np.flatnonzero(is_AD_EF_RY)
+    EM_RY_mc[index] = dict_AD_EF_mc["AD_RY_mc"][index] * dict_AD_EF_mc["EF_RY_mc"][index]
+    
+    #----------------------------------------------------------------------
+    #***REPORTING YEAR: UNCERTAINTY GIVEN FOR DIRECT EMISSION***
+    #----------------------------------------------------------------------
+    is_corr = is_EM_RY & dict_in["uEM_corr"] & is_BY
+    correlate_rows_np_batch(
+            EM_BY_mc,
+            dict_in["EM_corr_a"],
+            dict_in["EM_corr_b"],
+            is_corr,
+            EM_RY_mc)
+    
+    index = np.flatnonzero(is_EM_RY & np.logical_not(is_corr))
+    EM_RY_mc[index] = generate_random_value_np_batch(
+            dict_in["uEM_dist_RY"][index],
+            dict_in["EM_RY"][index],
+            dict_in["uEM_lower_RY"][index],
+            dict_in["uEM_upper_RY"][index],
+            no_mc,
+            rng_RY,
+            sampling = sampling)
+    
+    #implicitely, else are emissions zero.
+    #Do not assign nan to emissions otherwise 
+    #contribution to inventory trend cannot be computed.
+    
+    return dict_AD_EF_mc
 
 
 
@@ -760,8 +1107,8 @@ def find_interval_np(x, p):
     """
     
     #TODO  20230216
-    #use partition to speed up sorting
     #use partition estimate values from uncertainty propagation
+    #(partition to speed up sorting: see find_interval_np_partition)
     #https://numpy.org/doc/stable/reference/generated/numpy.ndarray.partition.html#numpy.ndarray.partition
     edge_min = np.nan
     edge_max = np.nan    
@@ -802,6 +1149,141 @@ def find_interval_np(x, p):
 
     return edge_min, edge_max  
 
+def find_interval_np_partition(x, p):
+    #XXX find interval from a numpy array, sorting only the tails
+    """
+    Find the smallest interval of values from x that represents the fraction
+    "p" of the dataset.
+    Same results as find_interval_np (bit for bit), but faster for large arrays.
+    x must be a numpy array, it is not modified.
+    
+    Only the lowest and highest no_mc - no_interv + 1 values can be 
+    edges of the interval (about 5% of the values at each tail if p = 0.95).
+    These values are isolated with np.partition in O(no_mc)
+    and only they are sorted, instead of sorting the whole dataset.
+    For p < 0.5 the two tails overlap and the whole dataset is sorted.
+    
+    Returns:
+        edge_min, edge_max: values at the lower and upper edges of the interval.
+    """
+    edge_min = np.nan
+    edge_max = np.nan    
+    #remove all nan values
+    x = x[np.logical_not(np.isnan(x))]
+    no_mc = len(x)
+    
+    if no_mc > 1:
+        #minimum interval defined by fraction of points compared to tal number of points
+        no_interv = int(np.ceil(p*no_mc)) #950 if no_mc = 1000
+        #number of candidate positions for the lower edge
+        no_tail = no_mc - no_interv + 1 
+        
+        if no_tail <= no_interv:
+            #x[0:no_tail] contains the no_tail smallest values, 
+            #x[no_interv - 1:no_mc] the no_tail largest values.
+            #Two partitions with one index each are faster than one partition with two indexes.
+            #x is already a copy (nan removed), it can be partitioned in place.
+            x.partition(no_tail - 1)
+            if no_interv > no_tail:
+                x[no_tail:no_mc].partition(no_interv - 1 - no_tail)
+            x_low = np.sort(x[0:no_tail])
+            x_high = np.sort(x[no_interv - 1:no_mc])
+        else:
+            x = np.sort(x)
+            x_low = x[0:no_tail]
+            x_high = x[no_interv - 1:no_mc]
+        
+        if x_low[0] < x_high[no_tail - 1]:
+            a = np.abs(x_low - x_high)
+            #find index of smallest value for the difference:
+            qi_opt = np.argmin(a) #result is a scalar value
+            
+            edge_min = x_low[qi_opt]
+            edge_max = x_high[qi_opt]
+    
+    elif no_mc == 1:
+        edge_min = x[0]
+        edge_max = x[0]
+    
+    return edge_min, edge_max
+
+def find_interval_np_batch(
+        x: np.ndarray, 
+        p: float,
+        ):
+    #XXX find interval for all rows of a 2-D numpy array at once
+    """
+    Find the smallest interval of values that represents the fraction "p"
+    of the values, for each row of x.
+    Same as find_interval_np, applied to each row of x, 
+    but all rows without nan values are searched at once,
+    sorting only the tails of each row as in find_interval_np_partition.
+    Rows containing nan values are computed with find_interval_np_partition.
+    x must be a numpy array of shape (number of rows, number of simulations),
+    in double or single precision (float32 values are not converted).
+    x is not modified.
+    
+    Returns:
+        edge_min, edge_max: numpy arrays with the values at the lower 
+            and upper edges of the interval, one value per row.
+            As with find_interval_np, the edges are nan if all values of a row 
+            are identical, and also nan if a row contains only nan values.
+    """
+    x = np.asarray(x)
+    if x.dtype != np.float32:
+        x = np.asarray(x, dtype = float)
+    no_rows = x.shape[0]
+    no_mc = x.shape[1]
+    edge_min = np.full(no_rows, np.nan, dtype = float)
+    edge_max = np.full(no_rows, np.nan, dtype = float)
+    if no_rows == 0 or no_mc == 0:
+        return edge_min, edge_max
+    
+    is_nan_row = np.any(np.isnan(x), axis = 1)
+    
+    #rows with nan values: the number of values differs from one row to the other
+    for i in np.flatnonzero(is_nan_row):
+        edge_min[i], edge_max[i] = find_interval_np_partition(x[i], p)
+    
+    #rows without nan values, by blocks of rows to limit the memory needed
+    index_num = np.flatnonzero(np.logical_not(is_nan_row))
+    if no_mc == 1:
+        edge_min[index_num] = x[index_num, 0]
+        edge_max[index_num] = x[index_num, 0]
+        return edge_min, edge_max
+    
+    no_interv = int(np.ceil(p*no_mc)) #950 if no_mc = 1000
+    no_tail = no_mc - no_interv + 1 #number of candidate positions for the lower edge
+    no_rows_block = max(1, const.MC_NO_VALUES_BLOCK // no_mc)
+    for i_start in range(0, len(index_num), no_rows_block):
+        index_block = index_num[i_start:i_start + no_rows_block]
+        #sort only the lowest and highest no_tail values of each row, 
+        #see find_interval_np_partition
+        if no_tail <= no_interv:
+            x_block = x[index_block] #copy of the rows
+            x_block.partition(no_tail - 1, axis = 1)
+            if no_interv > no_tail:
+                x_block[:, no_tail:no_mc].partition(no_interv - 1 - no_tail, axis = 1)
+            x_low = np.sort(x_block[:, 0:no_tail], axis = 1)
+            x_high = np.sort(x_block[:, no_interv - 1:no_mc], axis = 1)
+        else:
+            x_block = np.sort(x[index_block], axis = 1) #sort each row by strictly ascending order
+            x_low = x_block[:, 0:no_tail]
+            x_high = x_block[:, no_interv - 1:no_mc]
+        del x_block
+        
+        #width of all intervals containing no_interv values, for all rows
+        a = np.abs(x_low - x_high)
+        qi_opt = np.argmin(a, axis = 1)
+        del a
+        
+        #rows with all values identical have no interval, as in find_interval_np
+        is_interval = x_low[:, 0] < x_high[:, no_tail - 1]
+        edge_min[index_block] = np.where(is_interval, np.take_along_axis(x_low, qi_opt[:, None], axis = 1)[:, 0], np.nan)
+        edge_max[index_block] = np.where(is_interval, np.take_along_axis(x_high, qi_opt[:, None], axis = 1)[:, 0], np.nan)
+    
+    return edge_min, edge_max
+
 def find_interval_pd(x: pd.Series, p: float):
     #XXX find interval from a pandas DataFrame
     """
@@ -988,6 +1470,467 @@ def find_interval_centered(x, p):
 
 
 
+def compute_sensitivity_np_batch(
+        x: np.ndarray,
+        ref: np.ndarray,
+        ) -> np.ndarray:
+    #XXX compute correlation coefficient of each row with a reference, for all rows at once
+    """Compute the sensitivity of each row of x to the reference ref.
+    
+    The sensitivity is the Pearson correlation coefficient, 
+    as np.corrcoef(x[i], ref)[0,1], but the reference is centred once 
+    and the covariances of all rows are computed with one matrix-vector product.
+    
+    Args:
+        x: numpy array of shape (number of rows, number of simulations),
+            in double or single precision. The sensitivity is computed in double precision,
+            by blocks of rows to limit the memory needed.
+        ref: numpy array of the simulations of the reference 
+            (typically the inventory total), of length number of simulations.
+        
+    Returns:
+        sensitivity: numpy array, one value per row, in double precision.
+            Rows with zero variance (constant values) have a sensitivity of zero,
+            since they do not contribute to the variance of the reference.
+            Rows containing nan values have a sensitivity of nan.
+    """
+    no_rows = x.shape[0]
+    no_mc = x.shape[1]
+    sensitivity = np.full(no_rows, np.nan, dtype = np.float64)
+    if no_rows == 0 or no_mc == 0:
+        return sensitivity
+    
+    ref_centered = np.asarray(ref, dtype = np.float64)
+    ref_centered = ref_centered - np.mean(ref_centered)
+    ref_norm = np.sqrt(np.dot(ref_centered, ref_centered))
+    
+    #by blocks of rows to limit the memory needed for the centred values
+    no_rows_block = max(1, const.MC_NO_VALUES_BLOCK // no_mc)
+    for i_start in range(0, no_rows, no_rows_block):
+        i_stop = min(i_start + no_rows_block, no_rows)
+        x_centered = np.array(x[i_start:i_stop], dtype = np.float64)
+        x_centered -= np.mean(x_centered, axis = 1)[:, None]
+        cov = np.dot(x_centered, ref_centered)
+        x_norm = np.sqrt(np.einsum("ij,ij->i", x_centered, x_centered))
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            sensitivity[i_start:i_stop] = cov / (x_norm * ref_norm)
+        del x_centered
+        
+        #constant rows: the centred values may not be exactly zero after rounding,
+        #so test the values themselves (np.max and np.min propagate nan).
+        #If the reference is constant, there is no variance to explain.
+        x_max = np.max(x[i_start:i_stop], axis = 1)
+        x_min = np.min(x[i_start:i_stop], axis = 1)
+        is_zero = (x_max == x_min) | ((ref_norm == float(0.0)) & np.logical_not(np.isnan(x_max)))
+        sensitivity[i_start:i_stop][is_zero] = float(0.0)
+    
+    return sensitivity
+
+
+def compute_correlation_rows_np_batch(
+        x: np.ndarray,
+        y: np.ndarray,
+        ) -> np.ndarray:
+    #XXX compute correlation coefficient between the same rows of two arrays
+    """Compute the correlation coefficient between each row of x and the same row of y.
+
+    The result is np.corrcoef(x[i], y[i])[0,1] for each row i.
+    The rows are read by blocks, so that x and y can be memory-mapped arrays
+    (e.g. opened with np.load(filename, mmap_mode = "r")) larger than the memory.
+
+    Args:
+        x: numpy array of shape (number of rows, number of simulations).
+        y: numpy array of the same shape as x.
+
+    Returns:
+        correlation: numpy array, one value per row.
+            Rows where x or y is constant have a correlation of zero,
+            as in compute_sensitivity_np_batch.
+            Rows containing nan values have a correlation of nan.
+    """
+    no_rows = x.shape[0]
+    no_mc = x.shape[1]
+    correlation = np.full(no_rows, np.nan, dtype = np.float64)
+    if no_rows == 0 or no_mc == 0:
+        return correlation
+
+    no_rows_block = max(1, const.MC_NO_VALUES_BLOCK // no_mc)
+    for i_start in range(0, no_rows, no_rows_block):
+        i_stop = min(i_start + no_rows_block, no_rows)
+        x_centered = np.array(x[i_start:i_stop], dtype = np.float64)
+        y_centered = np.array(y[i_start:i_stop], dtype = np.float64)
+        x_max = np.max(x_centered, axis = 1)
+        x_min = np.min(x_centered, axis = 1)
+        y_max = np.max(y_centered, axis = 1)
+        y_min = np.min(y_centered, axis = 1)
+        x_centered -= np.mean(x_centered, axis = 1)[:, None]
+        y_centered -= np.mean(y_centered, axis = 1)[:, None]
+        cov = np.einsum("ij,ij->i", x_centered, y_centered)
+        x_norm = np.sqrt(np.einsum("ij,ij->i", x_centered, x_centered))
+        y_norm = np.sqrt(np.einsum("ij,ij->i", y_centered, y_centered))
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            correlation[i_start:i_stop] = cov / (x_norm * y_norm)
+        del x_centered
+        del y_centered
+
+        #constant rows (np.max and np.min propagate nan)
+        is_zero = ((x_max == x_min) & np.logical_not(np.isnan(y_max))) \
+                | ((y_max == y_min) & np.logical_not(np.isnan(x_max)))
+        correlation[i_start:i_stop][is_zero] = float(0.0)
+
+    return correlation
+
+
+def init_mc_stats_np(
+        no_rows: int,
+        no_mc: int,
+        no_mc_chunk: int,
+        is_interval: np.ndarray = None,
+        sketch_size: int = const.MC_SKETCH_SIZE,
+        ) -> dict:
+    #XXX prepare statistics of Monte Carlo simulated values, updated chunk by chunk
+    """Create the container of the statistics of Monte Carlo simulated values.
+    
+    The simulated values are given chunk by chunk (a chunk is a set of simulations)
+    to update_mc_stats_np and the results are obtained with finalize_mc_stats_np.
+    If all simulations are given in one single chunk, the results are exact
+    and computed directly from the simulated values.
+    Otherwise, mean, variance and sensitivity are updated incrementally from 
+    the sums of each chunk, and the narrowest interval is computed from 
+    a mergeable quantile sketch of sketch_size values per row,
+    so that the memory needed does not depend on no_mc.
+    
+    Args:
+        no_rows: number of rows (source categories or aggregated categories).
+        no_mc: total number of Monte Carlo simulations.
+        no_mc_chunk: number of Monte Carlo simulations per chunk.
+        is_interval: boolean array of length no_rows, rows for which 
+            the interval and the sensitivity are computed (all rows if None).
+        sketch_size: number of values kept per row in the quantile sketch.
+        
+    Returns:
+        dict_stats: dictionary containing the statistics, one value per row.
+    """
+    if is_interval is None:
+        is_interval = np.ones(no_rows, dtype = bool)
+    
+    dict_stats = {}
+    dict_stats["is_exact"] = no_mc_chunk >= no_mc
+    dict_stats["is_interval"] = np.asarray(is_interval, dtype = bool)
+    dict_stats["sketch_size"] = sketch_size
+    
+    #default result for rows without interval is zero (not nan!)
+    dict_stats["mean"] = np.full(no_rows, np.nan, dtype = np.float64)
+    dict_stats["var"] = np.full(no_rows, np.nan, dtype = np.float64)
+    dict_stats["edge_min"] = np.zeros(no_rows, dtype = np.float64)
+    dict_stats["edge_max"] = np.zeros(no_rows, dtype = np.float64)
+    dict_stats["sensitivity"] = np.zeros(no_rows, dtype = np.float64)
+    
+    if not dict_stats["is_exact"]:
+        #number of values (without nan), mean and sum of squared deviations from the mean
+        dict_stats["count"] = np.zeros(no_rows, dtype = np.float64)
+        dict_stats["M2"] = np.zeros(no_rows, dtype = np.float64)
+        dict_stats["mean"] = np.zeros(no_rows, dtype = np.float64)
+        #minimum and maximum values, to find rows with constant values
+        dict_stats["x_min"] = np.full(no_rows, np.inf, dtype = np.float64)
+        dict_stats["x_max"] = np.full(no_rows, -np.inf, dtype = np.float64)
+        #sum of cross deviations with the reference, for the sensitivity
+        dict_stats["C"] = np.zeros(no_rows, dtype = np.float64)
+        dict_stats["no_mc_ref"] = np.zeros(no_rows, dtype = np.float64)
+        dict_stats["ref_mean"] = np.zeros(no_rows, dtype = np.float64)
+        dict_stats["ref_M2"] = np.zeros(no_rows, dtype = np.float64)
+        #quantile sketch: sorted values, all with the same weight, nan if unused
+        dict_stats["sketch"] = np.full((no_rows, 0), np.nan, dtype = np.float64)
+        
+    return dict_stats
+
+
+def compact_sketch_np(
+        x: np.ndarray,
+        w: np.ndarray,
+        sketch_size: int,
+        ) -> np.ndarray:
+    #XXX reduce weighted sorted values to a given number of values with the same weight
+    """Compute a quantile sketch of a set of weighted values, for each row.
+    
+    Each value is placed at the centre of its cumulated weight,
+    and the new values are interpolated at the centre of sketch_size intervals 
+    of same cumulated weight, so that each new value represents 
+    the same fraction of the distribution.
+    
+    Args:
+        x: numpy array of shape (rows, n), sorted along axis 1, nan values at the end.
+        w: numpy array of shape (rows, n), weight of each value (zero for nan values).
+        sketch_size: number of values to keep per row.
+        
+    Returns:
+        sketch: numpy array of shape (rows, sketch_size), sorted along axis 1.
+            Rows with a total weight of zero contain nan.
+    """
+    no_rows, no_values = x.shape
+    w_cumsum = np.cumsum(w, axis = 1)
+    w_total = w_cumsum[:, no_values - 1]
+    #position of each value: centre of its cumulated weight
+    w_centre = w_cumsum - w / float(2.0)
+    
+    #cumulated weights at the centre of each new interval
+    w_target = (np.arange(sketch_size, dtype = np.float64) + float(0.5)) / float(sketch_size)
+    w_target = w_target[None, :] * w_total[:, None]
+    
+    #search all rows at once: shift each row by an offset larger than any total weight
+    offset = (np.arange(no_rows, dtype = np.float64) * (np.max(w_total) + float(1.0)))[:, None]
+    index = np.searchsorted((w_centre + offset).ravel(), (w_target + offset).ravel(), side = "right")
+    index = index.reshape(no_rows, sketch_size) - np.arange(no_rows)[:, None] * no_values - 1
+    index = np.clip(index, 0, max(no_values - 2, 0))
+    index_next = np.minimum(index + 1, no_values - 1)
+    
+    #nan values (weight zero) are replaced by the largest value of the row
+    with np.errstate(invalid = "ignore"):
+        x = np.where(np.isnan(x), np.nanmax(np.where(w > float(0.0), x, -np.inf), axis = 1)[:, None], x)
+    
+    #linear interpolation between the two nearest values
+    x_0 = np.take_along_axis(x, index, axis = 1)
+    x_1 = np.take_along_axis(x, index_next, axis = 1)
+    c_0 = np.take_along_axis(w_centre, index, axis = 1)
+    c_1 = np.take_along_axis(w_centre, index_next, axis = 1)
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        frac = np.where(c_1 > c_0, (w_target - c_0) / (c_1 - c_0), float(0.0))
+    frac = np.clip(frac, float(0.0), float(1.0))
+    sketch = x_0 + frac * (x_1 - x_0)
+    sketch[w_total == float(0.0)] = np.nan
+    
+    return sketch
+
+
+def update_mc_stats_np(
+        dict_stats: dict,
+        x: np.ndarray,
+        rows: np.ndarray = None,
+        ref: np.ndarray = None,
+        ):
+    #XXX update statistics with a new chunk of Monte Carlo simulations
+    """Update the statistics with a new chunk of Monte Carlo simulated values.
+    
+    Args:
+        dict_stats: dictionary created by init_mc_stats_np, updated in place.
+        x: numpy array of shape (number of rows given, number of simulations in the chunk),
+            in double or single precision. The statistics are computed in double precision.
+        rows: integer array, rows of dict_stats corresponding to the rows of x
+            (all rows if None).
+        ref: numpy array of the simulations of the reference 
+            (typically the inventory total) for the same chunk.
+            If given, the sensitivity (correlation coefficient) of each row 
+            to the reference is computed.
+    """
+    if rows is None:
+        rows = np.arange(len(dict_stats["mean"]))
+    rows = np.asarray(rows)
+    no_mc_chunk = x.shape[1]
+    if len(rows) == 0 or no_mc_chunk == 0:
+        return
+    is_interval = dict_stats["is_interval"][rows]
+    
+    if dict_stats["is_exact"]:
+        #all simulations are given at once: compute results directly
+        dict_stats["mean"][rows] = np.nanmean(x, axis = 1, dtype = np.float64)
+        dict_stats["var"][rows] = np.nanvar(x, axis = 1, dtype = np.float64)
+        index = np.flatnonzero(is_interval)
+        dict_stats["edge_min"][rows[index]], dict_stats["edge_max"][rows[index]] = find_interval_np_batch(x[index], const.P_DIST)
+        if ref is not None:
+            dict_stats["sensitivity"][rows[index]] = compute_sensitivity_np_batch(x[index], ref)
+        return
+    
+    #***mean and variance, without nan values***
+    #Merge of the statistics of two sets of values, see
+    #Chan, Golub, LeVeque, 1979, Updating formulae and a pairwise algorithm for computing sample variances
+    is_num = np.logical_not(np.isnan(x))
+    count_b = np.sum(is_num, axis = 1).astype(np.float64)
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        mean_b = np.where(count_b > float(0.0), np.nansum(x, axis = 1, dtype = np.float64) / count_b, float(0.0))
+    x_centered = x - mean_b[:, None]
+    M2_b = np.nansum(x_centered**2, axis = 1)
+    
+    count_a = dict_stats["count"][rows]
+    mean_a = dict_stats["mean"][rows]
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        factor = np.where(count > float(0.0), count_b / count, float(0.0))
+    dict_stats["mean"][rows] = mean_a + delta * factor
+    dict_stats["M2"][rows] += M2_b + delta**2 * count_a * factor
+    dict_stats["count"][rows] = count
+    #np.max and np.min propagate nan, as the sensitivity
+    dict_stats["x_min"][rows] = np.minimum(dict_stats["x_min"][rows], np.min(x, axis = 1))
+    dict_stats["x_max"][rows] = np.maximum(dict_stats["x_max"][rows], np.max(x, axis = 1))
+    
+    #***cross deviations with the reference, for the sensitivity***
+    #nan values are not removed here, so that the result is nan as with np.corrcoef
+    if ref is not None:
+        ref_mean_b = np.mean(ref)
+        ref_centered = ref - ref_mean_b
+        C_b = np.dot(x_centered, ref_centered)
+        
+        n_a = dict_stats["no_mc_ref"][rows]
+        n = n_a + float(no_mc_chunk)
+        ref_delta = ref_mean_b - dict_stats["ref_mean"][rows]
+        dict_stats["C"][rows] += C_b + delta * ref_delta * n_a * float(no_mc_chunk) / n
+        dict_stats["ref_M2"][rows] += np.dot(ref_centered, ref_centered) + ref_delta**2 * n_a * float(no_mc_chunk) / n
+        dict_stats["ref_mean"][rows] += ref_delta * float(no_mc_chunk) / n
+        dict_stats["no_mc_ref"][rows] = n
+    
+    #***quantile sketch, only for rows where the interval is needed***
+    sketch_size = dict_stats["sketch_size"]
+    index = np.flatnonzero(is_interval)
+    if len(index) == 0:
+        return
+    sketch_a = dict_stats["sketch"][rows[index]]
+    if sketch_a.shape[1] == 0:
+        sketch_a = np.full((len(index), sketch_size), np.nan, dtype = np.float64)
+    #all values of the sketch have the same weight
+    no_sketch_a = np.sum(np.logical_not(np.isnan(sketch_a)), axis = 1)
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        w_a = np.where(no_sketch_a > 0, count_a[index] / no_sketch_a, float(0.0))
+    w_a = np.where(np.isnan(sketch_a), float(0.0), w_a[:, None])
+    w_b = is_num[index].astype(np.float64)
+    
+    x_ab = np.concatenate([sketch_a, x[index]], axis = 1)
+    w_ab = np.concatenate([w_a, w_b], axis = 1)
+    #sort values, nan values are sorted at the end
+    order = np.argsort(x_ab, axis = 1, kind = "mergesort")
+    x_ab = np.take_along_axis(x_ab, order, axis = 1)
+    w_ab = np.take_along_axis(w_ab, order, axis = 1)
+    
+    if dict_stats["sketch"].shape[1] == 0:
+        dict_stats["sketch"] = np.full((len(dict_stats["mean"]), sketch_size), np.nan, dtype = np.float64)
+    dict_stats["sketch"][rows[index]] = compact_sketch_np(x_ab, w_ab, sketch_size)
+
+
+def finalize_mc_stats_np(
+        dict_stats: dict,
+        ref: bool = False,
+        ) -> dict:
+    #XXX compute results from the statistics of all chunks
+    """Compute mean, variance, narrowest interval and sensitivity from the statistics.
+    
+    Args:
+        dict_stats: dictionary updated by update_mc_stats_np with all chunks.
+        ref: True if a reference was given with the chunks, to compute the sensitivity.
+        
+    Returns:
+        dict_stats: the same dictionary, where "mean", "var", "edge_min", 
+            "edge_max" and "sensitivity" contain the final results.
+    """
+    if dict_stats["is_exact"]:
+        return dict_stats
+    
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        dict_stats["mean"] = np.where(dict_stats["count"] > float(0.0), dict_stats["mean"], np.nan)
+        dict_stats["var"] = np.where(dict_stats["count"] > float(0.0), dict_stats["M2"] / dict_stats["count"], np.nan)
+        sensitivity = dict_stats["C"] / np.sqrt(dict_stats["M2"] * dict_stats["ref_M2"])
+    #rows with constant values, or constant reference: see compute_sensitivity_np_batch
+    is_zero = (dict_stats["x_min"] == dict_stats["x_max"]) | ((dict_stats["ref_M2"] == float(0.0)) & np.logical_not(np.isnan(dict_stats["x_max"])))
+    sensitivity[is_zero] = float(0.0)
+    
+    index = np.flatnonzero(dict_stats["is_interval"] & (dict_stats["count"] > float(0.0)))
+    dict_stats["edge_min"][index], dict_stats["edge_max"][index] = find_interval_np_batch(dict_stats["sketch"][index], const.P_DIST)
+    if ref:
+        dict_stats["sensitivity"][index] = sensitivity[index]
+        
+    return dict_stats
+
+
+def check_mc_stabilisation_np(
+        batch_stats: np.ndarray,
+        u: float,
+        no_digits: int,
+        ):
+    #XXX check if the results of the adaptive Monte Carlo procedure are stabilised
+    """Check if the results of batches of Monte Carlo simulations are stabilised.
+
+    Adaptive Monte Carlo procedure of JCGM 101:2008, 7.9.4.
+    The results are stabilised when twice the standard deviation
+    of the average over the batches of each result
+    (estimate, standard uncertainty, lower and upper edges of the coverage interval)
+    is not larger than the numerical tolerance of the standard uncertainty.
+
+    Args:
+        batch_stats: numpy array of shape (number of batches, 4) with, for each batch,
+            the mean, the standard deviation and the lower and upper edges
+            of the coverage interval of the simulated values.
+        u: standard uncertainty (standard deviation) of all simulated values.
+        no_digits: number of significant decimal digits of u
+            that should be numerically stable.
+
+    Returns:
+        is_stable: True if the results are stabilised.
+        tolerance: numerical tolerance delta, see JCGM 101:2008, 7.9.2.
+    """
+    if not np.isfinite(u) or u == float(0.0):
+        #constant values: nothing to stabilise
+        return True, float(0.0)
+
+    #u = c * 10**l, where c is an integer of no_digits digits
+    l = int(np.floor(np.log10(abs(u)))) - no_digits + 1
+    tolerance = float(0.5) * float(10.0)**l
+
+    no_batches = batch_stats.shape[0]
+    if no_batches < 2:
+        return False, tolerance
+
+    #standard deviation of the average of each result over the batches
+    s = np.std(batch_stats, axis = 0, ddof = 1) / np.sqrt(float(no_batches))
+    is_stable = bool(np.all(float(2.0) * s <= tolerance))
+
+    return is_stable, tolerance
+
+
+
+def aggregate_status_pd(
+        df: pd.DataFrame,
+        df_agg: pd.DataFrame,
+        col_groupby: list,
+        col_EM_status: str,
+        ) -> np.ndarray:
+    """Find the status of aggregated rows from the status of their children.
+    
+    For each row of df_agg, the children are all rows of df 
+    with the same values in the columns col_groupby.
+    If all children have the same status (including nan), 
+    the aggregated row gets this status, otherwise it gets "ES".
+    A row of df_agg without any child gets "ES".
+    
+    Args:
+        df: pd.DataFrame, rows to aggregate (the children).
+        df_agg: pd.DataFrame, aggregated rows, 
+            containing the columns col_groupby.
+        col_groupby: list of columns identifying the parent of each row.
+        col_EM_status: str, name of the column with the status.
+        
+    Returns:
+        status: numpy array with the status of each row of df_agg.
+    """
+    #one groupby over all rows instead of a search in df for each aggregated row
+    df_status = df[col_groupby + [col_EM_status]].groupby(by = col_groupby)[col_EM_status]
+    df_status = pd.DataFrame({
+            "no_status": df_status.nunique(dropna = False),
+            "first_status": df_status.first(),
+            }).reset_index()
+    #with nan values only, first() gives nan as well
+    
+    df_status = pd.merge(
+            df_agg[col_groupby],
+            df_status,
+            on = col_groupby,
+            how = "left",
+            )
+    status = np.where(
+            np.asarray(df_status["no_status"] == 1),
+            np.asarray(df_status["first_status"], dtype = object),
+            "ES").astype(object)
+    
+    return status
+
+
 def groupby_one_attribute_pd(
         df: pd.DataFrame,
         df_agg_tree: pd.DataFrame,
@@ -995,6 +1938,7 @@ def groupby_one_attribute_pd(
         child_id_left: str,
         col_unique_groupby_extra: list,
         col_EM_status: str,
+        agg_matrix: sparse.csr_matrix = None,
         ) -> pd.DataFrame:
     """Perform aggregation of source categories
     
@@ -1010,10 +1954,17 @@ def groupby_one_attribute_pd(
         agg_str: str,
         child_id_left: str,
         col_unique_groupby_extra: list, length is 2.
-        col_EM_status: str,
+        col_EM_status: str, or list of str to aggregate the status of several years at once.
+        agg_matrix: optional, sparse matrix of shape (len(df), number of source categories),
+            element [i, j] is 1 if the source category j is summed up in row i of df.
+            If given, the matrix is completed with the rows obtained by aggregation
+            and returned as well, so that any values of the source categories
+            (e.g. Monte Carlo simulations) can be aggregated 
+            with one product agg_matrix.dot(values), without df.
 
     Returns:
         df: concatenation of rows of input df together with rows obtained by aggregation.        
+        agg_matrix: only if agg_matrix is given as input, completed aggregation matrix.
     
     """
 
@@ -1025,6 +1976,11 @@ def groupby_one_attribute_pd(
     child_id_tree = "child_id{}_tree".format(agg_str)
     parent_id_agg = "parent_id{}_agg".format(agg_str)
     
+    if isinstance(col_EM_status, str):
+        list_col_EM_status = [col_EM_status]
+    else:
+        list_col_EM_status = list(col_EM_status)
+
 
 
     #this is working
@@ -1040,7 +1996,7 @@ def groupby_one_attribute_pd(
     df[depth_id] = df_test[depth_id].copy()
     df[parent_id] = df_test[parent_id].copy()        
 
-    agg_max_depth = np.int(np.max(df[depth_id]))
+    agg_max_depth = int(np.max(df[depth_id]))
     print("group by: " + str([parent_id] + col_unique_groupby_extra + [depth_id]))
         
     for i_depth in range(agg_max_depth, 0, -1):
@@ -1050,17 +2006,29 @@ def groupby_one_attribute_pd(
         df_agg_mc = df.loc[df[depth_id] == i_depth].groupby(
                 by = [parent_id] + col_unique_groupby_extra + [depth_id]).sum().reset_index()
 
+        if agg_matrix is not None:
+            #each aggregated row is the sum of the rows of its children:
+            #group_matrix[k, i] = 1 if row i of df at this depth is a child of aggregated row k.
+            #ngroup numbers the groups in the same order as groupby().sum()
+            index_depth = np.flatnonzero(np.asarray(df[depth_id] == i_depth))
+            index_group = np.asarray(df.iloc[index_depth].groupby(
+                    by = [parent_id] + col_unique_groupby_extra + [depth_id]).ngroup())
+            is_group = index_group >= 0 #rows with a nan key are not aggregated
+            group_matrix = sparse.csr_matrix(
+                    (np.ones(np.sum(is_group), dtype = float), (index_group[is_group].astype(int), index_depth[is_group])),
+                    shape = (len(df_agg_mc), len(df)))
+            agg_matrix = sparse.vstack([agg_matrix, group_matrix.dot(agg_matrix)], format = "csr")
         
-        #TODO 20230216 The next loop is very slow. 
-        df_agg_mc[col_EM_status] = "ES"
-        for i in range(len(df_agg_mc)):
-            status_list = pd.unique(df[col_EM_status].loc[
-                    (df[col_unique_groupby_extra[0]] == df_agg_mc[col_unique_groupby_extra[0]].iloc[i])
-                    & (df[col_unique_groupby_extra[1]] == df_agg_mc[col_unique_groupby_extra[1]].iloc[i])
-                    & (df[parent_id] == df_agg_mc[parent_id].iloc[i])
-                    ]).tolist()
-            if len(status_list) == 1:
-                df_agg_mc[col_EM_status].iloc[i] = status_list[0]
+        #Status of the aggregated rows: if all children have the same status,
+        #use this status, otherwise use "ES".
+        #The children are all rows of df with the same parent and extra attributes.
+        for col_status in list_col_EM_status:
+            df_agg_mc[col_status] = aggregate_status_pd(
+                    df = df,
+                    df_agg = df_agg_mc,
+                    col_groupby = [parent_id] + col_unique_groupby_extra,
+                    col_EM_status = col_status,
+                    )
 
         #Update depth_id of resulting rows: one level up.
         df_agg_mc[depth_id] -= 1
@@ -1089,4 +2057,6 @@ def groupby_one_attribute_pd(
         #The problem is, such intermediate results are needed for subsequent aggregations.
         df = pd.concat([df, df_agg_mc], axis =0, ignore_index=True)
 
+    if agg_matrix is not None:
+        return df, agg_matrix
     return df
\ No newline at end of file
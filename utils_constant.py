@@ -161,12 +161,66 @@ DIST_GAMMA = 3
 DIST_LOGNORMAL = 4
 DIST_FRACTILE = 5
 
+#text of each distribution type in the input uncertainty files
+DIST_FROM_STRING = {
+        "uniform": DIST_UNIFORM,
+        "normal": DIST_NORMAL,
+        "triangle": DIST_TRIANGULAR,
+        "gamma": DIST_GAMMA,
+        "lognormal": DIST_LOGNORMAL,
+        "fractile": DIST_FRACTILE,
+        }
+
+
+#maximum number of simulated values (rows times simulations)
+#generated at once for a block of source categories during the Monte Carlo simulations
+MC_NO_VALUES_BLOCK = 2**22
+
+#number of values kept per category in the quantile sketch
+#used to find the narrowest interval when the Monte Carlo simulations are done by chunks
+MC_SKETCH_SIZE = 2000
+
+#minimum number of Monte Carlo simulations per batch in the adaptive procedure,
+#JCGM 101:2008, 7.9.4 b): max(100/(1-p), 10**4), i.e. 10**4 for p = P_DIST = 0.95
+MC_ADAPTIVE_BATCH_SIZE = 10**4
+
+#assign an integer to each supported sampling method of the Monte Carlo simulations
+MC_SAMPLING_RANDOM = 0 #pseudo-random values
+MC_SAMPLING_LHS = 1 #Latin hypercube sampling
+MC_SAMPLING_SOBOL = 2 #scrambled Sobol' sequence (quasi-Monte Carlo)
+MC_SAMPLING_ANTITHETIC = 3 #antithetic variates: pseudo-random values for half of the simulations, mirrored for the other half
+
+#name of each sampling method, written to the check file
+MC_SAMPLING_NAME = {
+        MC_SAMPLING_RANDOM: "pseudo-random",
+        MC_SAMPLING_LHS: "Latin hypercube",
+        MC_SAMPLING_SOBOL: "scrambled Sobol'",
+        MC_SAMPLING_ANTITHETIC: "antithetic",
+        }
+
 
 #assign an integer to each supported routine type
 ROUTINE_IIR = 0
 ROUTINE_NID = 1
 ROUTINE_IIR_WITHOUT_U = 2
 
+#assign an integer to each supported format to export the result tables
+EXPORT_FORMAT_CSV = 0
+EXPORT_FORMAT_PARQUET = 1
+
+#file extension of each export format
+EXPORT_FORMAT_EXTENSION = {
+        EXPORT_FORMAT_CSV: ".csv",
+        EXPORT_FORMAT_PARQUET: ".parquet",
+        }
+
+#assign an integer to each type of value in the columns of the tables cached in .npz files
+NPZ_TYPE_NONE = 0
+NPZ_TYPE_BOOL = 1
+NPZ_TYPE_INT = 2
+NPZ_TYPE_FLOAT = 3
+NPZ_TYPE_STR = 4
+
 
 
 
@@ -254,6 +254,8 @@ def io_out_inventory_crt(
     dict_io_out["out_name_script"] = "inventory"
 
     dict_io_out["output_foldername"] = root_path + "\\output_data\\output_sub" + SY_string + "\\" + "output_sub" + SY_string + "_NID\\"
+    #folder where tables read from the input Excel files are cached, shared by all runs
+    dict_io_out["cache_foldername"] = root_path + "\\output_data\\input_cache\\"
     if make_new_output_folder:
         folder_name_start = dict_io_out["output_foldername"] + "NID_sub{}_{}_".format(SY_string, dict_io_out["out_name_script"])
         dict_io_out["output_foldername"] = make_new_folder(folder_name_start)
@@ -262,6 +264,8 @@ def io_out_inventory_crt(
     dict_io_out["filename_out_KCA_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_KCA1_KCA2".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_input_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_input".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_app1_app2".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_u_table_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_table".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_mc_samples_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_mc_samples_".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_tornado_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_fig_mc_tornado".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_distribution_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_fig_mc_distribution".format(SY_string, dict_io_out["out_name_script"])
 
@@ -325,6 +329,8 @@ def io_out_indirect(
     dict_io_out["out_name_script"] = "indirectEM"
     
     dict_io_out["output_foldername"] = root_path + "\\output_data\\output_sub" + SY_string + "\\" + "output_sub" + SY_string + "_NID\\"    
+    #folder where tables read from the input Excel files are cached, shared by all runs
+    dict_io_out["cache_foldername"] = root_path + "\\output_data\\input_cache\\"
     if make_new_output_folder:
         folder_name_start = dict_io_out["output_foldername"] + "NID_sub{}_{}_".format(SY_string, dict_io_out["out_name_script"])
         dict_io_out["output_foldername"] = make_new_folder(folder_name_start)
@@ -333,6 +339,8 @@ def io_out_indirect(
     dict_io_out["filename_out_KCA_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_KCA1_KCA2".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_input_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_input".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_app1_app2".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_u_table_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_table".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_mc_samples_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_mc_samples_".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_tornado_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_fig_mc_tornado".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_distribution_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_fig_mc_distribution".format(SY_string, dict_io_out["out_name_script"])
 
@@ -396,6 +404,8 @@ def io_out_lulucf(
     dict_io_out["out_name_script"] = "LULUCF"
 
     dict_io_out["output_foldername"] = root_path + "\\output_data\\output_sub" + SY_string + "\\" + "output_sub" + SY_string + "_NID\\"
+    #folder where tables read from the input Excel files are cached, shared by all runs
+    dict_io_out["cache_foldername"] = root_path + "\\output_data\\input_cache\\"
     if make_new_output_folder:
         folder_name_start = dict_io_out["output_foldername"] + "NID_sub{}_{}_".format(SY_string, dict_io_out["out_name_script"])
         dict_io_out["output_foldername"] = make_new_folder(folder_name_start)
@@ -404,6 +414,8 @@ def io_out_lulucf(
     dict_io_out["filename_out_KCA_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_KCA1_KCA2".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_input_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_input".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_app1_app2".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_u_table_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_uncertainties_table".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_mc_samples_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_mc_samples_".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_tornado_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_fig_mc_tornado".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_distribution_root"] = dict_io_out["output_foldername"] + "NID_sub{}_{}_fig_mc_distribution".format(SY_string, dict_io_out["out_name_script"])
 
@@ -472,6 +484,8 @@ def io_out_inventory_nfr(
     dict_io_out["out_name_script"] = "inventory"
 
     dict_io_out["output_foldername"] = root_path + "\\output_data\\output_sub" + SY_string + "\\" + "output_sub" + SY_string + "_IIR\\"
+    #folder where tables read from the input Excel files are cached, shared by all runs
+    dict_io_out["cache_foldername"] = root_path + "\\output_data\\input_cache\\"
     if make_new_output_folder:
         folder_name_start = dict_io_out["output_foldername"] + "IIR_sub{}_{}_".format(SY_string, dict_io_out["out_name_script"])
         dict_io_out["output_foldername"] = make_new_folder(folder_name_start)
@@ -480,6 +494,8 @@ def io_out_inventory_nfr(
     dict_io_out["filename_out_KCA_root"] = dict_io_out["output_foldername"] + "IIR_sub{}_{}_KCA1_KCA2_".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_input_root"] = dict_io_out["output_foldername"] + "IIR_sub{}_{}_uncertainties_input_".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["filename_out_u_root"] = dict_io_out["output_foldername"] + "IIR_sub{}_{}_uncertainties_app1_app2_".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_u_table_root"] = dict_io_out["output_foldername"] + "IIR_sub{}_{}_uncertainties_table_".format(SY_string, dict_io_out["out_name_script"])
+    dict_io_out["filename_out_mc_samples_root"] = dict_io_out["output_foldername"] + "IIR_sub{}_{}_mc_samples_".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_tornado_root"] = dict_io_out["output_foldername"] + "IIR_sub{}_{}_fig_mc_tornado_".format(SY_string, dict_io_out["out_name_script"])
     dict_io_out["figname_out_mc_distribution_root"] = dict_io_out["output_foldername"] + "IIR_sub{}_{}_fig_mc_distribution_".format(SY_string, dict_io_out["out_name_script"])
 
@@ -22,12 +22,51 @@ Created on Thu Dec 15 11:06:36 2022
 import pandas as pd
 import numpy as np
 from numbers import Number
+import hashlib
+import os
+from io import StringIO
 
 import utils_constant as const
 
 
 
 
+def write_check_rows(
+        check_file,
+        df_len: int,
+        list_check: list,
+        ) -> None:
+    """Write the messages of row-wise checks, in the order of the rows.
+    
+    The checks are done on whole columns. For each row, the messages
+    are written in the order of list_check, as they would be written 
+    by a loop over the rows checking each condition one after the other.
+    The messages are formatted only for the rows where they apply.
+    
+    Args:
+        check_file: already open text file where to write infos for QC.
+        df_len: number of rows.
+        list_check: list of (mask, text, list_values) for each type of message:
+            mask: boolean array, True for the rows where the message is written;
+            text: message, formatted with one value of each element of list_values;
+            list_values: list of arrays with one value per row, or of scalars.
+            
+    Returns:
+        None.
+    """
+    text_rows = np.full(df_len, "", dtype = object)
+    for mask, text, list_values in list_check:
+        index_rows = np.flatnonzero(mask)
+        if len(index_rows) > 0:
+            #np.asarray: the values of a column may be a pandas array (e.g. string dtype) instead of a numpy array
+            values_rows = [np.asarray(values)[index_rows] if np.ndim(values) > 0 else [values] * len(index_rows) for values in list_values]
+            text_rows[index_rows] = text_rows[index_rows] + np.array([text.format(*values) for values in zip(*values_rows)], dtype = object)
+    check_file.write("".join(text_rows))
+    
+    return None
+
+
+
 def check_duplicate(
         df: pd.DataFrame,
         in_pathname: str,
@@ -99,14 +138,12 @@ def check_reso_id_default(df: pd.DataFrame) -> pd.DataFrame:
         df["reso_id"] = string_total
     else:
         #Fill empty resource by "All resources"
-        count_empty = 0
-        for i in range(len(df["reso_id"])):
-            if df["reso_id"].iloc[i] == "" or df["reso_id"].iloc[i] == "MI" or pd.isnull(df["reso_id"].iloc[i]):
-                count_empty += 1
-                df["reso_id"].iloc[i] = string_intermediate_total
-        if count_empty == len(df):
+        is_empty = (df["reso_id"].isin(["", "MI"]) | df["reso_id"].isnull()).values
+        if is_empty.all():
             #the column exists but all inputs are empty, assign aggregated value to all
             df["reso_id"] = string_total
+        else:
+            df["reso_id"] = np.where(is_empty, string_intermediate_total, df["reso_id"].values)
             
     return df
 
@@ -236,10 +273,9 @@ def check_main(
     #add column to show if each row in first DataFrame exists in second
     df_test["exists_main"] = np.where(df_test["exists_main"] == "both", True, False)
     
-    for i in range(len(df_test["exists_main"])):
-        if not df_test["exists_main"].iloc[i]:
-            check_file.write("The string was not recognised for input <{}> at line <{}>.\n".format(df[col_left].iloc[i], i))
-            count_not_found += 1
+    for i in np.flatnonzero(~df_test["exists_main"].values):
+        check_file.write("The string was not recognised for input <{}> at line <{}>.\n".format(df[col_left].iloc[i], i))
+        count_not_found += 1
     #drop rows without match in the official nomenclature
     df =df[df_test["exists_main"] == True]
     df.reset_index(drop = True)
@@ -303,13 +339,12 @@ def merge_with_main(
     df["exists_main"] = np.where(df["exists_main"] == "both", True, False)
     
     count_not_found = 0
-    for i in range(len(df["exists_main"])):
-        if not df["exists_main"].iloc[i]:
-            count_not_found += 1
-            if merge_with_main_left == "comp_id":
-                check_file.write("The compound was not recognised: <{}>.\n".format(df[merge_with_main_left].iloc[i]))
-            elif merge_with_main_left == "reso_id":
-                check_file.write("The resource was not recognised: <{}>.\n".format(df[merge_with_main_left].iloc[i]))
+    for i in np.flatnonzero(~df["exists_main"].values):
+        count_not_found += 1
+        if merge_with_main_left == "comp_id":
+            check_file.write("The compound was not recognised: <{}>.\n".format(df[merge_with_main_left].iloc[i]))
+        elif merge_with_main_left == "reso_id":
+            check_file.write("The resource was not recognised: <{}>.\n".format(df[merge_with_main_left].iloc[i]))
             #else:
             #    check_file.write("The compound was not recognised for input code <{}>.\n".format(df["proc_id"].iloc[i]))
                 
@@ -393,12 +428,11 @@ def merge_with_proc(
     #add column to show if each row in first DataFrame exists in second
     df["exists_proc"] = np.where(df["exists_proc"] == "both", True, False)
     
-    for i in range(len(df["exists_proc"])):
-        if not df["exists_proc"].iloc[i]:
-            if "proc_class" in col_merge_left_on and "proc_code" in col_merge_left_on and "proc_name" in col_merge_left_on:
-                check_file.write("The nomenclature was not recognised for input code <{} {}> with input name <{}>.\n".format(df["proc_class"].iloc[i], df["proc_code"].iloc[i], df["proc_name"].iloc[i]))
-            elif "proc_code" in col_merge_left_on:
-                check_file.write("The nomenclature was not recognised for input code <{}>.\n".format(df["proc_code"].iloc[i]))
+    for i in np.flatnonzero(~df["exists_proc"].values):
+        if "proc_class" in col_merge_left_on and "proc_code" in col_merge_left_on and "proc_name" in col_merge_left_on:
+            check_file.write("The nomenclature was not recognised for input code <{} {}> with input name <{}>.\n".format(df["proc_class"].iloc[i], df["proc_code"].iloc[i], df["proc_name"].iloc[i]))
+        elif "proc_code" in col_merge_left_on:
+            check_file.write("The nomenclature was not recognised for input code <{}>.\n".format(df["proc_code"].iloc[i]))
                 
     #drop rows without match in the official nomenclature
     df =df[df["exists_proc"] == True].reset_index(drop = True)   
@@ -425,6 +459,303 @@ def merge_with_proc(
 
 
 
+def read_excel_workbook(
+        dict_excel_file: dict = None,
+        **kwargs_read_excel
+        ) -> pd.DataFrame:
+    """Read a sheet from an Excel file that is opened only once.
+    
+    Opening an Excel file (unzip, decode the shared strings) is slow
+    and the same file is read for many sheets.
+    Each Excel file is opened once with pd.ExcelFile, and kept open
+    in dict_excel_file for the next sheets read from the same file.
+    
+    Args:
+        dict_excel_file: dictionary of the opened Excel files, 
+            with the path names as keys. Use None to open the Excel file
+            for this sheet only.
+        kwargs_read_excel: all arguments for pd.read_excel, 
+            io must be the path name of the Excel file.
+        
+    Returns:
+        df: pd.DataFrame, same as pd.read_excel(**kwargs_read_excel).
+    """
+    if dict_excel_file is None:
+        return pd.read_excel(**kwargs_read_excel)
+    
+    in_pathname = kwargs_read_excel.pop("io")
+    if in_pathname not in dict_excel_file:
+        dict_excel_file[in_pathname] = pd.ExcelFile(in_pathname)
+    
+    return pd.read_excel(io = dict_excel_file[in_pathname], **kwargs_read_excel)
+
+
+
+def close_excel_workbooks(
+        dict_excel_file: dict,
+        ) -> None:
+    """Close all Excel files opened by read_excel_workbook."""
+    for excel_file in dict_excel_file.values():
+        excel_file.close()
+    dict_excel_file.clear()
+
+
+
+def write_table_npz(
+        df: pd.DataFrame,
+        pathname: str,
+        ) -> bool:
+    """Save a table read from Excel in a numpy .npz file, without pickle.
+    
+    The .npz file contains only numeric and text arrays, so that it can be read
+    with np.load(allow_pickle = False): reading it never executes code,
+    even if the file was modified by someone else.
+    Columns with a numpy dtype (numbers, booleans, dates) are saved as they are.
+    Columns with the dtype object or a pandas string dtype are saved as one array 
+    with the type of each value (see const.NPZ_TYPE_...) and one array per type of value.
+    
+    Args:
+        df: pd.DataFrame with a default index (0, 1, 2, ...) 
+            and column names that are strings or integers.
+        pathname: path name of the .npz file.
+        
+    Returns:
+        True if the table was saved, 
+        False if the table contains something that cannot be saved this way
+        (the file is then not written).
+    """
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        return False
+    for col in df.columns:
+        if not isinstance(col, (str, int)) or isinstance(col, bool):
+            return False
+    
+    dict_array = {
+            "columns": np.array([str(col) for col in df.columns], dtype = str),
+            "columns_is_int": np.array([isinstance(col, int) for col in df.columns], dtype = bool),
+            }
+    for i_col in range(len(df.columns)):
+        column = df.iloc[:, i_col]
+        dtype_string = str(column.dtype)
+        dict_array["dtype_{}".format(i_col)] = np.array(dtype_string)
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind in "biufcmM":
+            dict_array["values_{}".format(i_col)] = column.to_numpy()
+            continue
+        if dtype_string not in ["object", "str", "string"]:
+            return False
+        
+        #one type code per value, then the values of each type
+        values = column.to_numpy(dtype = object)
+        type_code = np.full(len(values), -1, dtype = np.int8)
+        for i, value in enumerate(values):
+            if value is None or value is pd.NA:
+                type_code[i] = const.NPZ_TYPE_NONE
+            elif isinstance(value, (bool, np.bool_)):
+                type_code[i] = const.NPZ_TYPE_BOOL
+            elif isinstance(value, (int, np.integer)):
+                type_code[i] = const.NPZ_TYPE_INT
+            elif isinstance(value, (float, np.floating)):
+                type_code[i] = const.NPZ_TYPE_FLOAT
+            elif isinstance(value, str):
+                type_code[i] = const.NPZ_TYPE_STR
+        if np.any(type_code == -1):
+            #e.g. dates in a column with text
+            return False
+        dict_array["type_{}".format(i_col)] = type_code
+        dict_array["bool_{}".format(i_col)] = np.array(values[type_code == const.NPZ_TYPE_BOOL].tolist(), dtype = bool)
+        dict_array["int_{}".format(i_col)] = np.array(values[type_code == const.NPZ_TYPE_INT].tolist(), dtype = np.int64)
+        dict_array["float_{}".format(i_col)] = np.array(values[type_code == const.NPZ_TYPE_FLOAT].tolist(), dtype = np.float64)
+        dict_array["str_{}".format(i_col)] = np.array(values[type_code == const.NPZ_TYPE_STR].tolist(), dtype = str)
+    
+    with open(pathname, "wb") as npz_file:
+        np.savez(npz_file, **dict_array)
+    
+    return True
+
+
+
+def read_table_npz(
+        pathname: str,
+        ) -> pd.DataFrame:
+    """Read a table saved with write_table_npz.
+    
+    The file is read with np.load(allow_pickle = False):
+    a file containing Python objects is rejected with a ValueError.
+    
+    Args:
+        pathname: path name of the .npz file.
+        
+    Returns:
+        df: pd.DataFrame, same as the table given to write_table_npz.
+    """
+    dict_column = {}
+    with np.load(pathname, allow_pickle = False) as npz_file:
+        columns = [int(col) if is_int else str(col) for col, is_int in zip(npz_file["columns"], npz_file["columns_is_int"])]
+        for i_col in range(len(columns)):
+            dtype_string = str(npz_file["dtype_{}".format(i_col)])
+            if "values_{}".format(i_col) in npz_file:
+                dict_column[i_col] = npz_file["values_{}".format(i_col)]
+                continue
+            type_code = npz_file["type_{}".format(i_col)]
+            values = np.full(len(type_code), None, dtype = object)
+            values[type_code == const.NPZ_TYPE_BOOL] = npz_file["bool_{}".format(i_col)].tolist()
+            values[type_code == const.NPZ_TYPE_INT] = npz_file["int_{}".format(i_col)].tolist()
+            values[type_code == const.NPZ_TYPE_FLOAT] = npz_file["float_{}".format(i_col)].tolist()
+            values[type_code == const.NPZ_TYPE_STR] = npz_file["str_{}".format(i_col)].tolist()
+            dict_column[i_col] = pd.Series(values, dtype = dtype_string)
+    
+    df = pd.concat([pd.Series(dict_column[i_col]) for i_col in range(len(columns))], axis = 1, ignore_index = True)
+    if len(columns) == 0:
+        df = pd.DataFrame(index = pd.RangeIndex(0))
+    df.columns = columns
+    
+    return df
+
+
+
+def read_excel_cached(
+        cache_foldername: str = None,
+        dict_excel_file: dict = None,
+        **kwargs_read_excel
+        ) -> pd.DataFrame:
+    """Read a sheet from an Excel file, or the same table from the cache.
+    
+    Parsing Excel files is slow. The table read with pd.read_excel 
+    is saved in the cache folder, with a file name made from 
+    the hash of the content of the Excel file, the reading options
+    and the pandas version. 
+    The next runs read the saved table instead of the Excel file,
+    as long as the Excel file is not modified. 
+    If the Excel file is modified, its hash changes and it is read again.
+    The tables are saved in .npz files without pickle (see write_table_npz):
+    reading the cache never executes code, 
+    so that the cache folder does not need to be more trusted than the input files.
+    Only the parsed table is cached: all checks are still done on the table,
+    so that the check file is complete at each run.
+    A table that cannot be saved this way is read from the Excel file at each run.
+    
+    Args:
+        cache_foldername: folder where the tables are cached.
+            Use None to read the Excel file without cache.
+        dict_excel_file: dictionary of the opened Excel files,
+            see read_excel_workbook.
+        kwargs_read_excel: all arguments for pd.read_excel, 
+            io must be the path name of the Excel file.
+        
+    Returns:
+        df: pd.DataFrame, same as pd.read_excel(**kwargs_read_excel).
+    """
+    if cache_foldername is None:
+        return read_excel_workbook(dict_excel_file, **kwargs_read_excel)
+    
+    hash_excel = hashlib.sha256()
+    with open(kwargs_read_excel["io"], "rb") as excel_file:
+        block = excel_file.read(2**20)
+        while len(block) > 0:
+            hash_excel.update(block)
+            block = excel_file.read(2**20)
+    options = [(key, repr(kwargs_read_excel[key])) for key in sorted(kwargs_read_excel) if key != "io"]
+    hash_key = hashlib.sha256((hash_excel.hexdigest() + repr(options) + pd.__version__ + np.__version__).encode("utf-8"))
+    cache_pathname = cache_foldername + hash_key.hexdigest() + ".npz"
+    
+    if os.path.isfile(cache_pathname):
+        return read_table_npz(cache_pathname)
+    
+    df = read_excel_workbook(dict_excel_file, **kwargs_read_excel)
+    if not os.path.isdir(cache_foldername):
+        os.makedirs(cache_foldername)
+    #write to a temporary file first, 
+    #so that a process running at the same time never reads an incomplete file
+    cache_pathname_tmp = cache_pathname + ".{}.tmp".format(os.getpid())
+    if write_table_npz(df, cache_pathname_tmp):
+        os.replace(cache_pathname_tmp, cache_pathname)
+    
+    return df
+
+
+
+def read_excel_em_all_comp(
+        in_pathname: str,
+        in_sheetname: str,
+        in_header,
+        in_skiprows,
+        in_usecols_nomenc: list,
+        in_usecols_val: list,
+        in_col_names: list,
+        in_col_dtype: dict,
+        in_col_names_comp: list,
+        cache_foldername = None,
+        dict_excel_file = None,
+        ) -> pd.DataFrame:
+    """Read the input emissions of all compounds from one sheet at once.
+    
+    In the NFR table, the emissions of each pollutant are in a separate column
+    of the same sheet. All columns are read with one call, 
+    instead of parsing the same sheet again for each pollutant.
+    The emissions of one compound are then selected with select_em_comp.
+    
+    Args:
+        in_pathname: path name of the Excel file.
+        in_sheetname: name of the sheet.
+        in_header: header option for pd.read_excel.
+        in_skiprows: skiprows option for pd.read_excel.
+        in_usecols_nomenc: columns with the nomenclature.
+        in_usecols_val: columns with the emissions, one per compound,
+            in increasing order.
+        in_col_names: column names to read one compound, 
+            the column with the emission is named "EM_status".
+        in_col_dtype: column types to read one compound.
+        in_col_names_comp: names of the compounds, in the order of in_usecols_val.
+        cache_foldername: see read_excel_cached.
+        dict_excel_file: see read_excel_workbook.
+        
+    Returns:
+        df: pd.DataFrame with the nomenclature columns 
+            and one column per compound, named after the compound.
+    """
+    col_names_nomenc = [col for col in in_col_names if col != "EM_status"]
+    col_dtype = {}
+    for col in in_col_dtype:
+        if col == "EM_status":
+            for comp_string in in_col_names_comp:
+                col_dtype[comp_string] = in_col_dtype[col]
+        else:
+            col_dtype[col] = in_col_dtype[col]
+    
+    df = read_excel_cached(
+            cache_foldername = cache_foldername,
+            dict_excel_file = dict_excel_file,
+            io = in_pathname, 
+            sheetname = in_sheetname, #Warning! for newer pandas version use sheet_name
+            header = in_header, 
+            skiprows = in_skiprows,
+            usecols = in_usecols_nomenc + in_usecols_val,
+            names = col_names_nomenc + in_col_names_comp,
+            dtype = col_dtype,
+            keep_default_na = False, #required otherwise "NA" recognised as nan value
+            )
+    
+    return df
+
+
+
+def select_em_comp(
+        df: pd.DataFrame,
+        in_col_names: list,
+        comp_string: str,
+        ) -> pd.DataFrame:
+    """Select the input emissions of one compound from the output of read_excel_em_all_comp.
+    
+    Returns:
+        df: pd.DataFrame with the same columns as read for this compound only,
+            in_col_names.
+    """
+    col_names_nomenc = [col for col in in_col_names if col != "EM_status"]
+    
+    return df[col_names_nomenc + [comp_string]].rename(columns = {comp_string: "EM_status"})
+
+
+
 def read_excel_nomenc_def(
         in_pathname,
         in_sheetname,
@@ -447,27 +778,41 @@ def read_excel_nomenc_def(
         comp_string,
         use_fuel_used,
         check_file,
+        cache_foldername = None,
+        dict_excel_file = None,
+        df_in = None,
         ) -> pd.DataFrame:
     """read columns defining source categories.
     
     For the general case, these columns are: proc_id (or proc_name, proc_code, proc_class),
     comp_id, reso_id.
+    If cache_foldername is not None, the Excel sheet is read through 
+    the cache (see read_excel_cached).
+    If dict_excel_file is not None, the Excel file is opened only once
+    for all sheets read from it (see read_excel_workbook).
+    If df_in is not None, it is used instead of reading the Excel sheet:
+    it must contain the same columns as read from the Excel sheet.
     """
 
     #---------------------------------------------
     #READ INPUT VALUES AS STRING AND DROP ROWS WITH MISSING CODE
     #---------------------------------------------
-    df = pd.read_excel(
-            io = in_pathname, 
-            sheetname = in_sheetname, #Warning! for newer pandas version use sheet_name
-            header = in_header, 
-            skiprows = in_skiprows,
-            usecols = in_usecols,
-            names = in_col_names,
-            dtype = in_col_dtype,
-            keep_default_na = False, #required otherwise "NA" recognised as nan value
-            #engine = "openpyxl"
-            )
+    if df_in is None:
+        df = read_excel_cached(
+                cache_foldername = cache_foldername,
+                dict_excel_file = dict_excel_file,
+                io = in_pathname, 
+                sheetname = in_sheetname, #Warning! for newer pandas version use sheet_name
+                header = in_header, 
+                skiprows = in_skiprows,
+                usecols = in_usecols,
+                names = in_col_names,
+                dtype = in_col_dtype,
+                keep_default_na = False, #required otherwise "NA" recognised as nan value
+                #engine = "openpyxl"
+                )
+    else:
+        df = df_in.copy()
     
     #Special manual modification for pollutant-type input emission file,
     #needed because the NFR table is read and there is no column with the nomenclature class.
@@ -562,37 +907,37 @@ def input_em_data_check(
 
     """
     
+    df_len = len(df)
+    em_values = df["EM_status"].values
+    em_is_number = np.array([isinstance(val, Number) and not pd.isnull(val) for val in em_values], dtype = bool)
+    em_is_key = df["EM_status"].isin(const.NOTATION_KEY).values
+    
     #Check for notation keys or valid numeric values
     #create new col: "EM" contains numeric values
-    df["EM"] = [np.float(val) if (isinstance(val, Number) and not pd.isnull(val)) else np.float(0.0) for val in df["EM_status"]]
-   
-    for i in range(len(df["EM_status"])):
-        #if df["EM_status"][i] in ["NA", "NO", "NE", "C", "IE"]:
-            #all good, do nothing
-        val = df.iloc[i, df.columns.get_loc("EM_status")]
-        #print("val read for emission: " + str(val))
-        if val in const.NOTATION_KEY:
-            #status = val.copy()
-            #print("val recognised as notation key: " + str(val))
-            check_file.write("Code <{}>, compound <{}>, resource <{}>, <{}>: emission input recognised as notation key: {}.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], input_year, val))
-        else: #if val not in const.NOTATION_KEY:
-            #DONE GMY 20230122: in pd.read_excel, use option keep_default_na = False
-            #otherwise it seems that notation key "NA" is assimilated to nan.
-            
-            if pd.isnull(val):
-                status = "MI"
-            if not pd.isnull(val) and isinstance(val, Number):
-                status = "ES"
-            else:
-                status = "MI"
-            df.iloc[i, df.columns.get_loc("EM_status")] = status
-            if status == "MI":
-                check_file.write("Notation key or value not recognised for emission at line {}: {}.\n".format(i, val))
-            if df.iloc[i, df.columns.get_loc("EM")] == np.float(0.0):
-                check_file.write("Code <{}>, compound <{}>, resource <{}>, <{}>: emission is zero! Please write notation key instead.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], input_year))
-    
-    no_valid_input = sum([1 if val in const.NOTATION_KEY else 0 for val in df["EM_status"]])
-    df["EM_is_num"] = [True if val in const.NOTATION_KEY else False for val in df["EM_status"]]
+    df["EM"] = np.where(em_is_number, em_values, float(0.0)).astype(float)
+    
+    #DONE GMY 20230122: in pd.read_excel, use option keep_default_na = False
+    #otherwise it seems that notation key "NA" is assimilated to nan.
+    #Values that are not a notation key get status ES if numeric, MI otherwise.
+    df["EM_status"] = np.where(em_is_key, em_values, np.where(em_is_number, "ES", "MI").astype(object))
+    
+    proc_id = df["proc_id"].values
+    comp_id = df["comp_id"].values
+    reso_id = df["reso_id"].values
+    write_check_rows(check_file, df_len, [
+            (em_is_key, 
+             "Code <{}>, compound <{}>, resource <{}>, <{}>: emission input recognised as notation key: {}.\n", 
+             [proc_id, comp_id, reso_id, input_year, em_values]),
+            (~em_is_key & ~em_is_number, 
+             "Notation key or value not recognised for emission at line {}: {}.\n", 
+             [np.arange(df_len), em_values]),
+            (~em_is_key & (df["EM"].values == float(0.0)), 
+             "Code <{}>, compound <{}>, resource <{}>, <{}>: emission is zero! Please write notation key instead.\n", 
+             [proc_id, comp_id, reso_id, input_year]),
+            ])
+    
+    df["EM_is_num"] = df["EM_status"].isin(const.NOTATION_KEY).values
+    no_valid_input = np.sum(df["EM_is_num"].values)
     check_file.write("Found {} numeric entries or notation keys for EM for {}.\n".format(no_valid_input, input_year))  
 
     
@@ -633,132 +978,120 @@ def input_u_data_preparation(
     #From a pandas vector containing
     #text of distribution as from input uncertainty file, 
     #assign code for distribution type.
-    #If the text is not recognised, the assigned distribution is None.
-    
-    for i in range(df_len):
-        dist_string = df[u_dist].iloc[i]
-        #print(dist_string)
-        #dist_string = df.iloc[i]
-        #dist_string= df.iloc[i, df.columns.get_loc(col_name)]
-
-        #if dist_string in const.NOTATION_KEY:
-        #    dist_val = np.nan
-        if dist_string == "normal": 
-            dist_val = const.DIST_NORMAL
-        elif dist_string == "uniform":
-            dist_val = const.DIST_UNIFORM
-        elif dist_string == "triangle":
-            dist_val = const.DIST_TRIANGULAR
-        elif dist_string == "lognormal":
-            dist_val = const.DIST_LOGNORMAL
-        elif dist_string == "gamma":
-            dist_val = const.DIST_GAMMA
-        elif dist_string == "fractile":
-            dist_val = const.DIST_FRACTILE
-        else:
-            dist_val = int(-1) #np.nan #None
-        df[u_dist].iloc[i] = dist_val
-
-
-    if sum([0 if np.isnan(df[u_dist].iloc[i]) else 1 for i in range(df_len)]) > 0:
-        df[u_dist] = df[u_dist].astype(str).astype(int) #.astype(float)
-    
-    index_u_dist_sym = df.index[(
-            (df[u_dist] == const.DIST_NORMAL) | 
-            (df[u_dist] == const.DIST_UNIFORM) | 
-            (df[u_dist] == const.DIST_GAMMA))
-        ].tolist()
-    index_u_dist_notsym = [i for i in range(df_len) if i not in index_u_dist_sym] #will contain as well all non-recognised distributions
-
-    #print("index_u_dist_sym")
-    #print(index_u_dist_sym)
-    
-    #print("index_u_dist_notsym")
-    #print(index_u_dist_notsym)
-    
-    df[u_status] = "MI" #for missing information, by default
-    
-    if len(index_u_dist_sym) > 0:
-        for i in index_u_dist_sym:
-            if pd.isnull(df[u_sym_f].iloc[i]): 
-                val = "MI"
-            elif isinstance(df[u_sym_f].iloc[i], Number): 
-                val = "ES"
-            elif df[u_sym_f].iloc[i] in const.NOTATION_KEY: 
-                val = str(df[u_sym_f].iloc[i]) #str(df[u_sym_f].iloc[i].copy())
-            else:
-                val = "MI"
-            df[u_status].iloc[i] = val
-
-            if not df[u_dist].iloc[i] == int(-1) and not pd.isnull(df[u_dist].iloc[i]):
-                if val == "MI":
-                    #Quality check: distribution given (and symetric) but uncertainty value is missing
-                    check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value is missing <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_sym_f].iloc[i]))
-                if val == "ES" and df[u_sym_f].iloc[i] <= 0:
-                    #Quality check: distribution given (and symetric) but uncertainty value is zero
-                    check_file.write("{}, {}, {}>: distribution type is <{}> but input uncertainty value is <= zero <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_sym_f].iloc[i]))
-            if (pd.isnull(df[u_dist].iloc[i]) or df[u_dist].iloc[i] == int(-1)) and val == "ES":
-                #Quality check: uncertainty value is > 0 but distribution type is not recognised
-                check_file.write("{}, {}, {}>: distribution type is not recognised <{}> but uncertainty value is > 0 <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i]), df[u_sym_f].iloc[i])
-    
-    if len(index_u_dist_notsym) > 0:
-        
-        for i in index_u_dist_notsym:
-            if pd.isnull(df[u_lower_f].iloc[i]) or pd.isnull(df[u_upper_f].iloc[i]): 
-                val = "MI"
-            elif isinstance(df[u_lower_f].iloc[i], Number) and isinstance(df[u_upper_f].iloc[i], Number): 
-                val = "ES"
-            elif df[u_lower_f].iloc[i] in const.NOTATION_KEY and df[u_lower_f].iloc[i] == df[u_upper_f].iloc[i]: 
-                val = str(df[u_lower_f].iloc[i]) #str(df[u_lower_f].iloc[i].copy())
-            else:
-                val = "MI"
-            df[u_status].iloc[i] = val
-
-            if not df[u_dist].iloc[i] == int(-1) and not pd.isnull(df[u_dist].iloc[i]):
-                if val == "MI":
-                    #Quality check: distribution given (and not symetric) but uncertainty value is missing
-                    check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value is missing <{}> <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_lower_f].iloc[i], df[u_upper_f].iloc[i]))
-                if val == "ES" and df[u_lower_f].iloc[i] <= 0:
-                    #Quality check: distribution given (and not symetric) but uncertainty value is zero for lower edge
-                    check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value for lower edge is <= zero <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_lower_f].iloc[i]))
-                if val == "ES" and df[u_upper_f].iloc[i] <= 0:
-                    #Quality check: distribution given (and not symetric) but uncertainty value is zero for upper edge
-                    check_file.write("{}, {}, {}: distribution type is <{}> but input uncertainty value for upper edge is <= zero <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_upper_f].iloc[i]))
-
-                #TODO GMY 20230210 check that input parameters are valid for chosen distribution type
-                
-                
-                #Check that parameters for triangular distribution are valid
-                if val == "ES" and df[u_dist].iloc[i] == const.DIST_TRIANGULAR:
-                    df[u_dist].iloc[i], df[u_lower_f].iloc[i], df[u_upper_f].iloc[i] = check_dist_triangular(
-                            df[u_lower_f].iloc[i],
-                            df[u_upper_f].iloc[i],
-                            df["proc_id"].iloc[i],
-                            df["comp_id"].iloc[i],
-                            df["reso_id"].iloc[i], 
-                            "RY",
-                            "EF",
-                            check_file,
-                            )
-
-
-            if (pd.isnull(df[u_dist].iloc[i]) or df[u_dist].iloc[i] == int(-1)) and val == "ES":
-                #Quality check: distribution type is not recognised but uncertainty value is > 0 for lower edge or upper edge
-                check_file.write("{}, {}, {}: distribution type is not recognised <{}> but uncertainty value is > 0 for lower edge <{}> or upper edge <{}>.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i], df[u_dist].iloc[i], df[u_lower_f].iloc[i], df[u_upper_f].iloc[i]))
-
+    #If the text is not recognised, the assigned distribution is -1.
+    if df_len > 0:
+        df[u_dist] = df[u_dist].map(const.DIST_FROM_STRING).fillna(int(-1)).astype(int)
+    
+    is_dist_sym = df[u_dist].isin([const.DIST_NORMAL, const.DIST_UNIFORM, const.DIST_GAMMA]).values
+    index_u_dist_sym = np.flatnonzero(is_dist_sym)
+    #not symetric: will contain as well all non-recognised distributions
+    is_dist_valid = (df[u_dist] != int(-1)).values & ~pd.isnull(df[u_dist].values)
+    
+    proc_id = df["proc_id"].values
+    comp_id = df["comp_id"].values
+    reso_id = df["reso_id"].values
+    u_dist_values = df[u_dist].values.copy()
+    u_sym_values = df[u_sym_f].values
+    u_lower_values = df[u_lower_f].values.astype(object)
+    u_upper_values = df[u_upper_f].values.astype(object)
+    
+    #status for symetric distribution types, from the symetric uncertainty.
+    #Missing information (MI) by default.
+    u_sym_is_null = pd.isnull(u_sym_values)
+    u_sym_is_number = np.array([isinstance(val, Number) for val in u_sym_values], dtype = bool)
+    u_sym_is_key = df[u_sym_f].isin(const.NOTATION_KEY).values
+    status_sym = np.full(df_len, "MI", dtype = object)
+    status_sym[u_sym_is_key] = [str(val) for val in u_sym_values[u_sym_is_key]]
+    status_sym[u_sym_is_number] = "ES"
+    status_sym[u_sym_is_null] = "MI"
+    u_sym_le_zero = np.where(u_sym_is_number & ~u_sym_is_null, u_sym_values, np.nan).astype(float) <= 0
+    
+    #status for the other distribution types, from the lower and upper uncertainties
+    u_lower_upper_is_null = pd.isnull(u_lower_values) | pd.isnull(u_upper_values)
+    u_lower_is_number = np.array([isinstance(val, Number) for val in u_lower_values], dtype = bool)
+    u_upper_is_number = np.array([isinstance(val, Number) for val in u_upper_values], dtype = bool)
+    u_lower_upper_is_key = (df[u_lower_f].isin(const.NOTATION_KEY) & (df[u_lower_f] == df[u_upper_f])).values
+    status_notsym = np.full(df_len, "MI", dtype = object)
+    status_notsym[u_lower_upper_is_key] = [str(val) for val in u_lower_values[u_lower_upper_is_key]]
+    status_notsym[u_lower_is_number & u_upper_is_number] = "ES"
+    status_notsym[u_lower_upper_is_null] = "MI"
+    u_lower_le_zero = np.where(u_lower_is_number & ~u_lower_upper_is_null, u_lower_values, np.nan).astype(float) <= 0
+    u_upper_le_zero = np.where(u_upper_is_number & ~u_lower_upper_is_null, u_upper_values, np.nan).astype(float) <= 0
+    
+    status = np.where(is_dist_sym, status_sym, status_notsym)
+    is_es = status == "ES"
+    is_mi = status == "MI"
+    df[u_status] = status
+    is_notsym_valid = ~is_dist_sym & is_dist_valid
+    
+    #TODO GMY 20230210 check that input parameters are valid for chosen distribution type
+    
+    #Check that parameters for triangular distribution are valid.
+    #The check is done for each triangular distribution,
+    #its message is written with the other messages of the same row.
+    text_triangular = np.full(df_len, "", dtype = object)
+    for i in np.flatnonzero(is_notsym_valid & is_es & (u_dist_values == const.DIST_TRIANGULAR)):
+        check_file_triangular = StringIO()
+        u_dist_values[i], u_lower_values[i], u_upper_values[i] = check_dist_triangular(
+                df[u_lower_f].values[i],
+                df[u_upper_f].values[i],
+                proc_id[i],
+                comp_id[i],
+                reso_id[i], 
+                "RY",
+                "EF",
+                check_file_triangular,
+                )
+        text_triangular[i] = check_file_triangular.getvalue()
+    
+    #messages for symetric distribution types first, then for the other distribution types
+    write_check_rows(check_file, df_len, [
+            #Quality check: distribution given (and symetric) but uncertainty value is missing
+            (is_dist_sym & is_mi,
+             "{}, {}, {}: distribution type is <{}> but input uncertainty value is missing <{}>.\n",
+             [proc_id, comp_id, reso_id, df[u_dist].values, u_sym_values]),
+            #Quality check: distribution given (and symetric) but uncertainty value is zero
+            (is_dist_sym & is_es & u_sym_le_zero,
+             "{}, {}, {}>: distribution type is <{}> but input uncertainty value is <= zero <{}>.\n",
+             [proc_id, comp_id, reso_id, df[u_dist].values, u_sym_values]),
+            ])
+    write_check_rows(check_file, df_len, [
+            #Quality check: distribution given (and not symetric) but uncertainty value is missing
+            (is_notsym_valid & is_mi,
+             "{}, {}, {}: distribution type is <{}> but input uncertainty value is missing <{}> <{}>.\n",
+             [proc_id, comp_id, reso_id, df[u_dist].values, df[u_lower_f].values, df[u_upper_f].values]),
+            #Quality check: distribution given (and not symetric) but uncertainty value is zero for lower edge
+            (is_notsym_valid & is_es & u_lower_le_zero,
+             "{}, {}, {}: distribution type is <{}> but input uncertainty value for lower edge is <= zero <{}>.\n",
+             [proc_id, comp_id, reso_id, df[u_dist].values, df[u_lower_f].values]),
+            #Quality check: distribution given (and not symetric) but uncertainty value is zero for upper edge
+            (is_notsym_valid & is_es & u_upper_le_zero,
+             "{}, {}, {}: distribution type is <{}> but input uncertainty value for upper edge is <= zero <{}>.\n",
+             [proc_id, comp_id, reso_id, df[u_dist].values, df[u_upper_f].values]),
+            (text_triangular != "",
+             "{}",
+             [text_triangular]),
+            #Quality check: distribution type is not recognised but uncertainty value is > 0 for lower edge or upper edge
+            (~is_dist_sym & ~is_dist_valid & is_es,
+             "{}, {}, {}: distribution type is not recognised <{}> but uncertainty value is > 0 for lower edge <{}> or upper edge <{}>.\n",
+             [proc_id, comp_id, reso_id, df[u_dist].values, df[u_lower_f].values, df[u_upper_f].values]),
+            ])
+    
+    df[u_dist] = u_dist_values
+    df[u_lower_f] = u_lower_values
+    df[u_upper_f] = u_upper_values
 
     
     #Quality check: the input uncertainty is valid if the distribution type is valid and the input numeric values are valid.
-    df[u_is_num] = [True if df[u_status].iloc[i] == "ES" and not pd.isnull(df[u_dist].iloc[i]) else False for i in range(df_len)]    
-    #next line does not work: The truth value of a Series is ambiguous. Use a.empty, a.bool(), a.item(), a.any() or a.all()
-    #df[u_is_num] = np.where(((df[u_status] == "ES") & (not pd.isnull(df[u_dist]))), True, False)
+    df[u_is_num] = is_es & ~pd.isnull(df[u_dist].values)
 
-    check_file.write("Found {} numeric entries for u_{}_{}.\n".format(np.nansum(np.where(df[u_is_num], np.int(1), np.int(0))), input_type, input_year))  
+
+    check_file.write("Found {} numeric entries for u_{}_{}.\n".format(np.nansum(np.where(df[u_is_num], int(1), int(0))), input_type, input_year))  
    
     #replace list comprehension by where function?
-    df[u_sym_f] = [np.float(val) if (isinstance(val, Number) and not pd.isnull(val)) else np.float(0.0) for val in df[u_sym_f].copy()]
-    df[u_lower_f] = [np.float(val) if (isinstance(val, Number) and not pd.isnull(val)) else np.float(0.0) for val in df[u_lower_f].copy()]
-    df[u_upper_f] = [np.float(val) if (isinstance(val, Number) and not pd.isnull(val)) else np.float(0.0) for val in df[u_upper_f].copy()]
+    df[u_sym_f] = [float(val) if (isinstance(val, Number) and not pd.isnull(val)) else float(0.0) for val in df[u_sym_f].copy()]
+    df[u_lower_f] = [float(val) if (isinstance(val, Number) and not pd.isnull(val)) else float(0.0) for val in df[u_lower_f].copy()]
+    df[u_upper_f] = [float(val) if (isinstance(val, Number) and not pd.isnull(val)) else float(0.0) for val in df[u_upper_f].copy()]
     
     #For all distribution types, convert input in percent to fraction
     df[u_sym_f] = df[u_sym_f] / float(100.0)
@@ -767,9 +1100,10 @@ def input_u_data_preparation(
 
     #For symetric distribution types, we need to transform a 95% confidence interval to a standard deviation
     #because according to metrology standards, the variance (square of standard deviation) should be propagated, not the 95% confidence interval.
-    df[u_sym_f].iloc[index_u_dist_sym] = df[u_sym_f].iloc[index_u_dist_sym] / const.FACTOR_U_DIST_95_PERCENT
-    df[u_lower_f].iloc[index_u_dist_sym] = df[u_sym_f].iloc[index_u_dist_sym]
-    df[u_upper_f].iloc[index_u_dist_sym] = df[u_sym_f].iloc[index_u_dist_sym]
+    #(set with the position of the column: chained assignment does not modify df with copy-on-write)
+    df.iloc[index_u_dist_sym, df.columns.get_loc(u_sym_f)] = df[u_sym_f].values[index_u_dist_sym] / const.FACTOR_U_DIST_95_PERCENT
+    df.iloc[index_u_dist_sym, df.columns.get_loc(u_lower_f)] = df[u_sym_f].values[index_u_dist_sym]
+    df.iloc[index_u_dist_sym, df.columns.get_loc(u_upper_f)] = df[u_sym_f].values[index_u_dist_sym]
 
     #For the triangular distribution, do not divide by the coverage factor const.FACTOR_U_DIST_95_PERCENT.
     #We need to keep the exact edges of the distribution.
@@ -801,41 +1135,42 @@ def input_u_data_check_completeness_per_year(
         
     """
 
-    df["u_is_num"] = True
-    for i in range(len(df)):
-
-        #input valid for nothing
-        if not df["uAD_is_num"].iloc[i] and not df["uEF_is_num"].iloc[i] and not df["uEM_is_num"].iloc[i]:
-            df["u_is_num"].iloc[i] = False
-            check_file.write("Code <{}>, {}: input uncertainty is valid for neither AD, nor EF nor EM.\n".format(df["proc_id"].iloc[i], input_year))
-
-        #input valid for AD only
-        if df["uAD_is_num"].iloc[i] and not df["uEF_is_num"].iloc[i] and not df["uEM_is_num"].iloc[i]:
-            df["u_is_num"].iloc[i] = False
-            check_file.write("Code <{}>, {}: input uncertainty is valid for AD but not for EF or EM.\n".format(df["proc_id"].iloc[i], input_year))
-    
-        #input valid for EF only
-        if not df["uAD_is_num"].iloc[i] and df["uEF_is_num"].iloc[i] and not df["uEM_is_num"].iloc[i]:
-            df["u_is_num"].iloc[i] = False
-            check_file.write("Code <{}>, {}: input uncertainty is valid for EF but not for AD or EM.\n".format(df["proc_id"].iloc[i], input_year))
-    
-        #input valid for AD and EM but not for EF: input for AD will be ignored, only input for EM will be used
-        if df["uAD_is_num"].iloc[i] and not df["uEF_is_num"].iloc[i] and df["uEM_is_num"].iloc[i]:
-            df["uAD_is_num"].iloc[i] = False
-            df["uAD_status"].iloc[i] = "MI"
-            check_file.write("Code <{}>, {}: input uncertainty is valid for AD and EM but not for EF, input for EM only will be used.\n".format(df["proc_id"].iloc[i], input_year))
-    
-        #input valid for EF and EM but not for AD: inut for EF will be ignored, only input for EM will be used
-        if not df["uAD_is_num"].iloc[i] and df["uEF_is_num"].iloc[i] and df["uEM_is_num"].iloc[i]:
-            df["uEF_is_num"].iloc[i] = False
-            df["uEF_status"].iloc[i] = "MI"
-            check_file.write("Code <{}>, {}: input uncertainty is valid for EF and EM but not for AD, input for EM only will be used.\n".format(df["proc_id"].iloc[i], input_year))
-
-        #input valud for AD, EF, EM: use AD and EF only.    
-        if df["uAD_is_num"].iloc[i] and df["uEF_is_num"].iloc[i] and df["uEM_is_num"].iloc[i]:
-            df["uEM_is_num"].iloc[i] = False
-            df["uEM_status"].iloc[i] = "MI"
-            check_file.write("Code <{}>, {}: input uncertainty is valid for AD, EF and EM: input for EM will be ignored.\n".format(df["proc_id"].iloc[i], input_year))
+    df_len = len(df)
+    is_num_AD = df["uAD_is_num"].values.astype(bool)
+    is_num_EF = df["uEF_is_num"].values.astype(bool)
+    is_num_EM = df["uEM_is_num"].values.astype(bool)
+    
+    #input valid for nothing
+    is_valid_none = ~is_num_AD & ~is_num_EF & ~is_num_EM
+    #input valid for AD only
+    is_valid_AD = is_num_AD & ~is_num_EF & ~is_num_EM
+    #input valid for EF only
+    is_valid_EF = ~is_num_AD & is_num_EF & ~is_num_EM
+    #input valid for AD and EM but not for EF: input for AD will be ignored, only input for EM will be used
+    is_valid_AD_EM = is_num_AD & ~is_num_EF & is_num_EM
+    #input valid for EF and EM but not for AD: inut for EF will be ignored, only input for EM will be used
+    is_valid_EF_EM = ~is_num_AD & is_num_EF & is_num_EM
+    #input valud for AD, EF, EM: use AD and EF only.    
+    is_valid_AD_EF_EM = is_num_AD & is_num_EF & is_num_EM
+    
+    df["u_is_num"] = ~(is_valid_none | is_valid_AD | is_valid_EF)
+    df["uAD_is_num"] = is_num_AD & ~is_valid_AD_EM
+    df["uAD_status"] = np.where(is_valid_AD_EM, "MI", df["uAD_status"].values)
+    df["uEF_is_num"] = is_num_EF & ~is_valid_EF_EM
+    df["uEF_status"] = np.where(is_valid_EF_EM, "MI", df["uEF_status"].values)
+    df["uEM_is_num"] = is_num_EM & ~is_valid_AD_EF_EM
+    if "uEM_status" in df.columns:
+        df["uEM_status"] = np.where(is_valid_AD_EF_EM, "MI", df["uEM_status"].values)
+    
+    proc_id = df["proc_id"].values
+    write_check_rows(check_file, df_len, [
+            (is_valid_none, "Code <{}>, {}: input uncertainty is valid for neither AD, nor EF nor EM.\n", [proc_id, input_year]),
+            (is_valid_AD, "Code <{}>, {}: input uncertainty is valid for AD but not for EF or EM.\n", [proc_id, input_year]),
+            (is_valid_EF, "Code <{}>, {}: input uncertainty is valid for EF but not for AD or EM.\n", [proc_id, input_year]),
+            (is_valid_AD_EM, "Code <{}>, {}: input uncertainty is valid for AD and EM but not for EF, input for EM only will be used.\n", [proc_id, input_year]),
+            (is_valid_EF_EM, "Code <{}>, {}: input uncertainty is valid for EF and EM but not for AD, input for EM only will be used.\n", [proc_id, input_year]),
+            (is_valid_AD_EF_EM, "Code <{}>, {}: input uncertainty is valid for AD, EF and EM: input for EM will be ignored.\n", [proc_id, input_year]),
+            ])
     
     return df
 
@@ -859,40 +1194,104 @@ def input_u_data_check_correlation(
         None.
     """
 
-    for i in range(len(df)):
-        
-        if df["uAD_dist_BY"].iloc[i] != df["uAD_dist_RY"].iloc[i]:
-            if df["uAD_corr"].iloc[i]:
-                df["uAD_corr"].iloc[i] = False
-                check_file.write("Code <{}>: input uncertainties for BY and RY are correlated but distributions for BY and RY are not identical, correlation set to False.\n".format(df["proc_id"].iloc[i]))
-            else:
-                check_file.write("Code <{}>: use specific input uncertainty distribution for BY.\n".format(df["proc_id"].iloc[i]))
-    
-        if df["uAD_lower_f_BY"].iloc[i] != df["uAD_lower_f_RY"].iloc[i]:
-            if df["uAD_corr"].iloc[i]:
-                df["uAD_corr"].iloc[i] = False
-                check_file.write("Code <{}>: input uncertainties for BY and RY are correlated but lower uncertainty values for BY and RY are not identical, correlation set to False.\n".format(df["proc_id"].iloc[i]))
-            else:
-                check_file.write("Code <{}>: use specific input uncertainty value for BY.\n".format(df["proc_id"].iloc[i]))
+    df_len = len(df)
+    is_diff_dist = (df["uAD_dist_BY"] != df["uAD_dist_RY"]).values
+    is_diff_lower = (df["uAD_lower_f_BY"] != df["uAD_lower_f_RY"]).values
+    is_diff_upper = (df["uAD_upper_f_BY"] != df["uAD_upper_f_RY"]).values
+    
+    #the correlation is set to False by the first difference found,
+    #in the order: distribution, lower value, upper value.
+    is_corr_dist = df["uAD_corr"].values.astype(bool)
+    is_corr_lower = is_corr_dist & ~is_diff_dist
+    is_corr_upper = is_corr_lower & ~is_diff_lower
+    df["uAD_corr"] = is_corr_upper & ~is_diff_upper
+    
+    is_num_BY = df["u_is_num_BY"].values.astype(bool)
+    is_num_RY = df["u_is_num_RY"].values.astype(bool)
+    df["u_is_num"] = df["u_is_num"].values.astype(bool) & is_num_BY & is_num_RY
+    
+    proc_id = df["proc_id"].values
+    comp_id = df["comp_id"].values
+    reso_id = df["reso_id"].values
+    write_check_rows(check_file, df_len, [
+            (is_diff_dist & is_corr_dist, "Code <{}>: input uncertainties for BY and RY are correlated but distributions for BY and RY are not identical, correlation set to False.\n", [proc_id]),
+            (is_diff_dist & ~is_corr_dist, "Code <{}>: use specific input uncertainty distribution for BY.\n", [proc_id]),
+            (is_diff_lower & is_corr_lower, "Code <{}>: input uncertainties for BY and RY are correlated but lower uncertainty values for BY and RY are not identical, correlation set to False.\n", [proc_id]),
+            (is_diff_lower & ~is_corr_lower, "Code <{}>: use specific input uncertainty value for BY.\n", [proc_id]),
+            (is_diff_upper & is_corr_upper, "Code <{}>: input uncertainties for BY and RY are correlated but upper uncertainty values for BY and RY are not identical, correlation set to False.\n", [proc_id]),
+            (is_diff_upper & ~is_corr_upper, "Code <{}>: use specific input uncertainty value for BY.\n", [proc_id]),
+            (~is_num_BY, "Code <{}>, compound <{}>, resource <{}>: no input uncertainty value for BY.\n", [proc_id, comp_id, reso_id]),
+            (~is_num_RY, "Code <{}>, compound <{}>, resource <{}>: no input uncertainty value for RY.\n", [proc_id, comp_id, reso_id]),
+            ])
     
-        if df["uAD_upper_f_BY"].iloc[i] != df["uAD_upper_f_RY"].iloc[i]:
-            if df["uAD_corr"].iloc[i]:
-                df["uAD_corr"].iloc[i] = False
-                check_file.write("Code <{}>: input uncertainties for BY and RY are correlated but upper uncertainty values for BY and RY are not identical, correlation set to False.\n".format(df["proc_id"].iloc[i]))
-            else:
-                check_file.write("Code <{}>: use specific input uncertainty value for BY.\n".format(df["proc_id"].iloc[i]))
+    return df
     
-        if not df["u_is_num_BY"].iloc[i]:
-            df["u_is_num"].iloc[i] = False
-            check_file.write("Code <{}>, compound <{}>, resource <{}>: no input uncertainty value for BY.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i]))
+                    
+
+
+def input_u_data_fill_BY_from_RY(
+        df_BY: pd.DataFrame,
+        df_RY: pd.DataFrame,
+        check_file,
+        ) -> pd.DataFrame:
+    """Fill missing input uncertainties for the base year with the values for the reporting year.
     
-        if not df["u_is_num_RY"].iloc[i]:
-            df["u_is_num"].iloc[i] = False
-            check_file.write("Code <{}>, compound <{}>, resource <{}>: no input uncertainty value for RY.\n".format(df["proc_id"].iloc[i], df["comp_id"].iloc[i], df["reso_id"].iloc[i]))
+    The rows for BY and RY are matched on proc_id, comp_id and reso_id.
+    For each column found for BY and RY, the value for BY is replaced 
+    by the value for RY if:
+        - for the distribution types: the distribution for BY is not recognised (-1)
+          and the distribution for RY is;
+        - for the other columns: the value for BY is zero and the value for RY is > 0,
+          or the value for BY is missing (MI or nan).
+    If RY also has a missing data, that's ok.
     
-    return df
+    Args:
+        df_BY: pandas DataFrame containing the input uncertainties for the base year.
+        df_RY: pandas DataFrame containing the input uncertainties for the reporting year.
+        check_file: file where results of checks are written for QC.
+        
+    Returns:
+        df_BY: same as input df_BY but with the missing values filled.
+        
+    Raises:
+        None.
+    """
+    col_keys = ["proc_id", "comp_id", "reso_id"]
+    
+    #position of the matching row for RY, for each row for BY (the first one if many).
+    df_index_RY = df_RY[col_keys].copy()
+    df_index_RY["index_RY"] = np.arange(len(df_RY))
+    df_index_RY = df_index_RY.drop_duplicates(subset = col_keys, keep = "first")
+    index_RY = pd.merge(df_BY[col_keys], df_index_RY, on = col_keys, how = "left")["index_RY"].values
+    is_found = ~pd.isnull(index_RY)
+    
+    write_check_rows(check_file, len(df_BY), [
+            (~is_found, "Code <{}>: missing input for u, RY.\n", [df_BY["proc_id"].values]),
+            ])
+    
+    index_BY = np.flatnonzero(is_found)
+    index_RY = index_RY[is_found].astype(int)
+    for col in df_BY.columns.values.tolist():
+        if col in df_RY:
+            values_BY = df_BY[col].to_numpy()[index_BY].astype(object)
+            values_RY = df_RY[col].to_numpy()[index_RY].astype(object)
+            if col in ["uAD_dist", "uEF_dist", "uEM_dist"]:
+                #if there is no input distribution type for BY: take value from RY
+                is_fill = (values_BY == -1) & (values_RY != -1)
+            else:
+                is_fill = (values_BY == "MI") | pd.isnull(values_BY)
+                #value zero for BY: take value from RY if it is > 0 (nan is not, do not compare it)
+                is_zero_BY = (values_BY == float(0.0)) & pd.notnull(values_RY)
+                is_fill[is_zero_BY] = is_fill[is_zero_BY] | (values_RY[is_zero_BY] > float(0.0))
+            
+            if is_fill.any():
+                values_BY_new = df_BY[col].to_numpy().astype(np.result_type(df_BY[col].to_numpy(), df_RY[col].to_numpy()))
+                values_BY_new[index_BY[is_fill]] = values_RY[is_fill]
+                #keep the dtype (e.g. object), pandas would otherwise infer a string dtype for text only
+                df_BY[col] = pd.Series(values_BY_new, index = df_BY.index, dtype = values_BY_new.dtype)
     
-                    
+    return df_BY
+
 
 
 def check_dist_triangular(
@@ -52,6 +52,8 @@ def write_pr_mc_results(
         no_mc: int,
         routine: int,
         filename_out,
+        seed: str = None,
+        dict_mc_tolerance: dict = None,
         ) -> None:
     #HINT Write results of the uncertainty analysis to Excel for the UNECE/UNFCCC reporting
     """Write results of the uncertainty analysis to Excel for the UNECE/UNFCCC reporting.
@@ -65,7 +67,9 @@ def write_pr_mc_results(
         - tab with results for inventory with and without LULUCF (for NID only)
         - tab with detailed results for sector 3 Agriculture, source categories 3A, 3B, 3D (for NID only)
         - tab with detailed results for sector 4 LULUCF (for NID only)
-    
+    The workbook is written in write-only mode: each row is streamed to the file
+    once all its cells are filled in, with style objects shared by all cells.
+
     Args:
         df_in: pandas DataFrame with input uncertainty data
         df_pr: pandas DataFrame with produced uncertainties
@@ -91,6 +95,11 @@ def write_pr_mc_results(
         no_mc: number of Monte Carlo simulations.
         routine: computation routine, i.e. for NID (greenhouse gases) or IIR (pollutants).
         filename_out: name of excel file where the tabs are written and saved.       
+        seed: seed of the random generators of the Monte Carlo simulations,
+            written to the readme tab (None to write nothing).
+        dict_mc_tolerance: numerical tolerance of the inventory total for "BY", "RY", "trend_normed"
+            reached by the adaptive Monte Carlo procedure, written to the readme tab
+            with the number of simulations done (None to write nothing).
         
     Returns:
         Excel file.
@@ -103,6 +112,12 @@ def write_pr_mc_results(
     index_mc_output = df_mc.index[df_mc["report"] == True].tolist()  
     index_pr_output = df_pr.index[df_pr["report"] == True].tolist()
 
+    #index(es) in df_in of each (proc_id, reso_id, comp_id),
+    #so that each output row finds its input row without scanning df_in.
+    dict_in_index = {}
+    for i_in, key in enumerate(zip(df_in["proc_id"], df_in["reso_id"], df_in["comp_id"])):
+        dict_in_index.setdefault(key, []).append(df_in.index[i_in])
+
     #warning! excel tab name not more than 31 characters!
     if routine == const.ROUTINE_NID:               
         text_LULUCF_and_indirect = ", including LULUCF categories and indirect CO2 emissions"
@@ -125,10 +140,25 @@ def write_pr_mc_results(
         width_narrow_col = 7.5
 
     
-    wb = openpyxl.Workbook()
-
-    ws = wb.active #active sheet  
-    ws.title = "readme"
+    #write-only workbook: the rows are streamed to the file one after the other,
+    #the cells of the row being written are kept in dict_row.
+    wb = openpyxl.Workbook(write_only=True)
+    dict_row = {}
+
+    ws = wb.create_sheet("readme")
+    if seed is not None:
+        #written as text: the seed may have more digits than an Excel number
+        get_row_cell(ws, dict_row, "A").value = "Seed of the random generators"
+        get_row_cell(ws, dict_row, "B").value = seed
+        append_row(ws, dict_row)
+    if dict_mc_tolerance is not None:
+        get_row_cell(ws, dict_row, "A").value = "Number of Monte Carlo simulations (adaptive procedure)"
+        get_row_cell(ws, dict_row, "B").value = no_mc
+        append_row(ws, dict_row)
+        for y_string in dict_mc_tolerance:
+            get_row_cell(ws, dict_row, "A").value = "Numerical tolerance for the inventory total {}".format(y_string)
+            get_row_cell(ws, dict_row, "B").value = dict_mc_tolerance[y_string]
+            append_row(ws, dict_row)
 
     #===========================================================================
     # EXPORT EMISSION AND UNCERTAINTY PROPAGATION RESULTS TO EXCEL .XLSX (APPROACH 1)
@@ -165,17 +195,18 @@ def write_pr_mc_results(
     i_row = 1
     i_row_string = str(i_row)
         
-    ws["A" + i_row_string] = \
+    get_row_cell(ws, dict_row, "A").value = \
     "Table {}: Uncertainty analysis of {} emissions, approach 1, for ".format(tab_name, comp_label) +\
     "{} and for the trend {}-{}{}. ".format(RY_string, BY_string, RY_string, text_LULUCF_and_indirect) +\
     "The uncertainties are given considering a 95% confidence interval " +\
     "and expressed as the distance from edge to mean, in percentage of the mean. " +\
     "AD: activity data; EF: emission factor; EM: emission; corr.: correlated. {}".format(dEM_text)
 
-    ws.merge_cells("A" + i_row_string +":" + col_end + i_row_string)
+    ws.merged_cells.add("A" + i_row_string +":" + col_end + i_row_string)
     ws.row_dimensions[i_row].height = 60
-    ws["A" + i_row_string].alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)
+    get_row_cell(ws, dict_row, "A").alignment = left_alignment
 
+    append_row(ws, dict_row)
     i_row += 1
     i_row_string = str(i_row)
 
@@ -196,149 +227,146 @@ def write_pr_mc_results(
                 count_row = 0
             
                 #*********************************HEADER**********************************
-                header_row_start = i_row
-
                 #write letters A, B, C etc. according to IPCC formating Table 3.2
-                ws["A" + i_row_string].value = "A" 
-                ws["B" + i_row_string].value = "B" 
-                ws[col_EM_BY + i_row_string].value = "C" 
-                ws[col_EM_RY + i_row_string].value = "D" 
+                get_row_cell(ws, dict_row, "A").value = "A" 
+                get_row_cell(ws, dict_row, "B").value = "B" 
+                get_row_cell(ws, dict_row, col_EM_BY).value = "C" 
+                get_row_cell(ws, dict_row, col_EM_RY).value = "D" 
             
-                ws[col_EM_u_lower + i_row_string].value = "G"
-                ws.merge_cells(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EM_u_lower).value = "G"
+                ws.merged_cells.add(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
             
-                ws[col_EM_contrib_lower + i_row_string] = "H"
-                ws.merge_cells(col_EM_contrib_lower + i_row_string +":" + col_EM_contrib_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EM_contrib_lower).value = "H"
+                ws.merged_cells.add(col_EM_contrib_lower + i_row_string +":" + col_EM_contrib_upper + i_row_string)
             
-                ws[col_sens_corr + i_row_string] = "I"
-                ws[col_sens_not_corr + i_row_string] = "J"
+                get_row_cell(ws, dict_row, col_sens_corr).value = "I"
+                get_row_cell(ws, dict_row, col_sens_not_corr).value = "J"
             
-                ws[col_AD_contrib_trend_lower + i_row_string] = "K"
-                ws.merge_cells(col_AD_contrib_trend_lower + i_row_string +":" + col_AD_contrib_trend_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_AD_contrib_trend_lower).value = "K"
+                ws.merged_cells.add(col_AD_contrib_trend_lower + i_row_string +":" + col_AD_contrib_trend_upper + i_row_string)
             
-                ws[col_EF_contrib_trend_lower + i_row_string] = "L"
-                ws.merge_cells(col_EF_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EF_contrib_trend_lower).value = "L"
+                ws.merged_cells.add(col_EF_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
             
-                ws[col_EM_contrib_trend_lower + i_row_string] = "M" #total
-                ws.merge_cells(col_EM_contrib_trend_lower + i_row_string +":" + col_EM_contrib_trend_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EM_contrib_trend_lower).value = "M" #total
+                ws.merged_cells.add(col_EM_contrib_trend_lower + i_row_string +":" + col_EM_contrib_trend_upper + i_row_string)
                 
+                apply_style_row(ws, dict_row, excel_columns.index("A"), excel_columns.index(col_end), 
+                                border = medium_border, alignment = center_alignment)
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row)
                 
                 ws.row_dimensions[i_row].height = 60
                 
-                ws["A" + i_row_string] = nomenc_text
-                ws.merge_cells("A" + i_row_string +":" + "A" + str(i_row+1))
-                ws["B" + i_row_string] = comp_text
-                ws.merge_cells("B" + i_row_string +":" + "B" + str(i_row+1))
-                ws[col_EM_BY + i_row_string]= "Emissions " + BY_string
-                ws[col_EM_RY + i_row_string]= "Emissions " + RY_string
+                get_row_cell(ws, dict_row, "A").value = nomenc_text
+                ws.merged_cells.add("A" + i_row_string +":" + "A" + str(i_row+1))
+                get_row_cell(ws, dict_row, "B").value = comp_text
+                ws.merged_cells.add("B" + i_row_string +":" + "B" + str(i_row+1))
+                get_row_cell(ws, dict_row, col_EM_BY).value = "Emissions " + BY_string
+                get_row_cell(ws, dict_row, col_EM_RY).value = "Emissions " + RY_string
             
-                ws[col_EM_u_lower + i_row_string] = "Emission combined uncertainty {}".format(RY_string)
-                ws.merge_cells(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EM_u_lower).value = "Emission combined uncertainty {}".format(RY_string)
+                ws.merged_cells.add(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
             
-                ws[col_EM_contrib_lower + i_row_string] = "Category contribution to inventory variance {}".format(RY_string)
-                ws.merge_cells(col_EM_contrib_lower + i_row_string +":" + col_EM_contrib_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EM_contrib_lower).value = "Category contribution to inventory variance {}".format(RY_string)
+                ws.merged_cells.add(col_EM_contrib_lower + i_row_string +":" + col_EM_contrib_upper + i_row_string)
             
-                ws[col_sens_corr + i_row_string] = "Sensitivi- ty if corr. (type A)"
-                ws[col_sens_not_corr + i_row_string] = "Sensitivi- ty if not corr. (type B)"
+                get_row_cell(ws, dict_row, col_sens_corr).value = "Sensitivi- ty if corr. (type A)"
+                get_row_cell(ws, dict_row, col_sens_not_corr).value = "Sensitivi- ty if not corr. (type B)"
             
-                ws[col_AD_contrib_trend_lower + i_row_string] = "Contribution to inventory trend uncertainty from AD"
-                ws.merge_cells(col_AD_contrib_trend_lower + i_row_string +":" + col_AD_contrib_trend_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_AD_contrib_trend_lower).value = "Contribution to inventory trend uncertainty from AD"
+                ws.merged_cells.add(col_AD_contrib_trend_lower + i_row_string +":" + col_AD_contrib_trend_upper + i_row_string)
             
-                ws[col_EF_contrib_trend_lower + i_row_string] = "Contribution to inventory trend uncertainty from EF"
-                ws.merge_cells(col_EF_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EF_contrib_trend_lower).value = "Contribution to inventory trend uncertainty from EF"
+                ws.merged_cells.add(col_EF_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
             
-                ws[col_EM_contrib_trend_lower + i_row_string] = "Contribution to inventory trend uncertainty from EM" #total
-                ws.merge_cells(col_EM_contrib_trend_lower + i_row_string +":" + col_EM_contrib_trend_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_EM_contrib_trend_lower).value = "Contribution to inventory trend uncertainty from EM" #total
+                ws.merged_cells.add(col_EM_contrib_trend_lower + i_row_string +":" + col_EM_contrib_trend_upper + i_row_string)
                         
+                apply_style_row(ws, dict_row, excel_columns.index("A"), excel_columns.index(col_end), 
+                                border = medium_border, alignment = center_alignment)
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row)
             
-                ws[col_EM_u_lower + i_row_string] = "(-)%"
-                ws[col_EM_u_upper + i_row_string] = "(+)%"
-                ws[col_EM_contrib_lower + i_row_string] = "(-)%"
-                ws[col_EM_contrib_upper + i_row_string] = "(+)%"
-                ws[col_AD_contrib_trend_lower + i_row_string] = "(-)%"
-                ws[col_AD_contrib_trend_upper + i_row_string] = "(+)%"
-                ws[col_EF_contrib_trend_lower + i_row_string] = "(-)%"
-                ws[col_EF_contrib_trend_upper + i_row_string] = "(+)%"
-                ws[col_EM_contrib_trend_lower + i_row_string] = "(-)%"
-                ws[col_EM_contrib_trend_upper + i_row_string] = "(+)%"
-            
-                for row in ws.iter_rows(min_col = excel_columns.index("A") + 1, 
-                                        min_row= header_row_start, 
-                                        max_col= excel_columns.index(col_end) + 1, 
-                                        max_row= i_row):
-                    for cell in row:
-                        cell.border = medium_border
-                        cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
+                get_row_cell(ws, dict_row, col_EM_u_lower).value = "(-)%"
+                get_row_cell(ws, dict_row, col_EM_u_upper).value = "(+)%"
+                get_row_cell(ws, dict_row, col_EM_contrib_lower).value = "(-)%"
+                get_row_cell(ws, dict_row, col_EM_contrib_upper).value = "(+)%"
+                get_row_cell(ws, dict_row, col_AD_contrib_trend_lower).value = "(-)%"
+                get_row_cell(ws, dict_row, col_AD_contrib_trend_upper).value = "(+)%"
+                get_row_cell(ws, dict_row, col_EF_contrib_trend_lower).value = "(-)%"
+                get_row_cell(ws, dict_row, col_EF_contrib_trend_upper).value = "(+)%"
+                get_row_cell(ws, dict_row, col_EM_contrib_trend_lower).value = "(-)%"
+                get_row_cell(ws, dict_row, col_EM_contrib_trend_upper).value = "(+)%"
             
+                apply_style_row(ws, dict_row, excel_columns.index("A"), excel_columns.index(col_end), 
+                                border = medium_border, alignment = center_alignment)
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row)
             
                 #******************************END OF HEADER******************************                 
 
             ws.row_dimensions[i_row].height = 13
-            ws["A" + i_row_string].number_format = openpyxl.styles.numbers.FORMAT_TEXT
-            ws["B" + i_row_string].number_format = openpyxl.styles.numbers.FORMAT_TEXT
+            get_row_cell(ws, dict_row, "A").number_format = openpyxl.styles.numbers.FORMAT_TEXT
+            get_row_cell(ws, dict_row, "B").number_format = openpyxl.styles.numbers.FORMAT_TEXT
 
-            ws["A" + i_row_string] = code_reso_text                
-            ws["B" + i_row_string] = df_pr["comp_name"].iloc[i]
+            get_row_cell(ws, dict_row, "A").value = code_reso_text                
+            get_row_cell(ws, dict_row, "B").value = df_pr["comp_name"].iloc[i]
 
             if df_pr['EM_status_BY'].iloc[i] == "ES":
-                ws[col_EM_BY + i_row_string] = df_pr['EM_BY'].iloc[i]
-                ws[col_EM_BY + i_row_string].number_format = const.FORMAT_VAL_EM #'##0.00'
+                get_row_cell(ws, dict_row, col_EM_BY).value = df_pr['EM_BY'].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_BY).number_format = const.FORMAT_VAL_EM #'##0.00'
             else:
-                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY + i_row_string])
+                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY))
     
             if df_pr['EM_status_RY'].iloc[i] == "ES":
                 #emission for RY
-                ws[col_EM_RY + i_row_string] = df_pr["EM_RY"].iloc[i]
-                ws[col_EM_RY + i_row_string].number_format = const.FORMAT_VAL_EM #'##0.00''##0.00'
+                get_row_cell(ws, dict_row, col_EM_RY).value = df_pr["EM_RY"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_RY).number_format = const.FORMAT_VAL_EM #'##0.00''##0.00'
 
                 #emission uncertainty for RY, in percent of the mean, 95% conf. interv.
-                ws[col_EM_u_lower + i_row_string] = df_pr["EM_RY_pr_U_lower_p"].iloc[i]
-                ws[col_EM_u_upper + i_row_string] = df_pr["EM_RY_pr_U_upper_p"].iloc[i]
-                ws[col_EM_u_lower + i_row_string].number_format = const.FORMAT_VAL_U
-                ws[col_EM_u_upper + i_row_string].number_format = const.FORMAT_VAL_U
+                get_row_cell(ws, dict_row, col_EM_u_lower).value = df_pr["EM_RY_pr_U_lower_p"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_u_upper).value = df_pr["EM_RY_pr_U_upper_p"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_u_lower).number_format = const.FORMAT_VAL_U
+                get_row_cell(ws, dict_row, col_EM_u_upper).number_format = const.FORMAT_VAL_U
 
                 #emission contribution to inventory variance
-                ws[col_EM_contrib_lower + i_row_string] = df_pr["EM_RY_pr_contrib_var_normed_lower"].iloc[i]
-                ws[col_EM_contrib_upper + i_row_string] = df_pr["EM_RY_pr_contrib_var_normed_upper"].iloc[i]
-                ws[col_EM_contrib_lower + i_row_string].number_format = const.FORMAT_VAL_3D
-                ws[col_EM_contrib_upper + i_row_string].number_format = const.FORMAT_VAL_3D
+                get_row_cell(ws, dict_row, col_EM_contrib_lower).value = df_pr["EM_RY_pr_contrib_var_normed_lower"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_contrib_upper).value = df_pr["EM_RY_pr_contrib_var_normed_upper"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_contrib_lower).number_format = const.FORMAT_VAL_3D
+                get_row_cell(ws, dict_row, col_EM_contrib_upper).number_format = const.FORMAT_VAL_3D
                 
             else:
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_u_lower + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_u_upper + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_contrib_lower + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_contrib_upper + i_row_string])
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_u_lower))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_u_upper))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_contrib_lower))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_contrib_upper))
 
             #EM contribution to trend variance, columns are always filled in             
-            ws[col_EM_contrib_trend_lower + i_row_string] = df_pr["EM_trend_normed_pr_contrib_var_lower"].iloc[i]
-            ws[col_EM_contrib_trend_upper + i_row_string] = df_pr["EM_trend_normed_pr_contrib_var_upper"].iloc[i]            
-            ws[col_EM_contrib_trend_lower + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
-            ws[col_EM_contrib_trend_upper + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
+            get_row_cell(ws, dict_row, col_EM_contrib_trend_lower).value = df_pr["EM_trend_normed_pr_contrib_var_lower"].iloc[i]
+            get_row_cell(ws, dict_row, col_EM_contrib_trend_upper).value = df_pr["EM_trend_normed_pr_contrib_var_upper"].iloc[i]            
+            get_row_cell(ws, dict_row, col_EM_contrib_trend_lower).number_format = const.FORMAT_VAL_CONTRIB
+            get_row_cell(ws, dict_row, col_EM_contrib_trend_upper).number_format = const.FORMAT_VAL_CONTRIB
             
             
     
     
             #AD and EF uncertainty
             if not df_pr["import"].iloc[i]:
-                apply_style_empty(ws[col_AD_contrib_trend_lower + i_row_string])
-                apply_style_empty(ws[col_AD_contrib_trend_upper + i_row_string])
-                apply_style_empty(ws[col_EF_contrib_trend_lower + i_row_string])
-                apply_style_empty(ws[col_EF_contrib_trend_upper + i_row_string])
-                apply_style_empty(ws[col_sens_corr + i_row_string])
-                apply_style_empty(ws[col_sens_not_corr + i_row_string])
+                apply_style_empty(get_row_cell(ws, dict_row, col_AD_contrib_trend_lower))
+                apply_style_empty(get_row_cell(ws, dict_row, col_AD_contrib_trend_upper))
+                apply_style_empty(get_row_cell(ws, dict_row, col_EF_contrib_trend_lower))
+                apply_style_empty(get_row_cell(ws, dict_row, col_EF_contrib_trend_upper))
+                apply_style_empty(get_row_cell(ws, dict_row, col_sens_corr))
+                apply_style_empty(get_row_cell(ws, dict_row, col_sens_not_corr))
                 
             else:
                 #else, this is an import index
-                i_in = df_in.index[(df_in["proc_id"] == df_pr["proc_id"].iloc[i]) 
-                            & (df_in["reso_id"] == df_pr["reso_id"].iloc[i]) 
-                            & (df_in["comp_id"] == df_pr["comp_id"].iloc[i])].tolist()
+                i_in = dict_in_index.get((df_pr["proc_id"].iloc[i], df_pr["reso_id"].iloc[i], df_pr["comp_id"].iloc[i]), [])
                                 
                 if len(i_in) == 0:
                     print("***********************")
@@ -353,42 +381,38 @@ def write_pr_mc_results(
                 i_in = i_in[0]
 
                 #sensitivity, columns are always filled in
-                ws[col_sens_corr + i_row_string] = df_pr_AD_EF["sens_corr"].iloc[i_in]
-                ws[col_sens_not_corr + i_row_string] = df_pr_AD_EF["sens_no_corr"].iloc[i_in]
-                ws[col_sens_corr + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
-                ws[col_sens_not_corr + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
+                get_row_cell(ws, dict_row, col_sens_corr).value = df_pr_AD_EF["sens_corr"].iloc[i_in]
+                get_row_cell(ws, dict_row, col_sens_not_corr).value = df_pr_AD_EF["sens_no_corr"].iloc[i_in]
+                get_row_cell(ws, dict_row, col_sens_corr).number_format = const.FORMAT_VAL_CONTRIB
+                get_row_cell(ws, dict_row, col_sens_not_corr).number_format = const.FORMAT_VAL_CONTRIB
                     
                 if df_in["uEM_is_num_RY"].iloc[i_in]:
                 #input emission is not zero and this is a direct emission
-                    apply_style_dEM(ws[col_AD_contrib_trend_lower + i_row_string])
-                    apply_style_dEM(ws[col_AD_contrib_trend_upper + i_row_string])
-                    apply_style_dEM(ws[col_EF_contrib_trend_lower + i_row_string])
-                    apply_style_dEM(ws[col_EF_contrib_trend_upper + i_row_string])
+                    apply_style_dEM(get_row_cell(ws, dict_row, col_AD_contrib_trend_lower))
+                    apply_style_dEM(get_row_cell(ws, dict_row, col_AD_contrib_trend_upper))
+                    apply_style_dEM(get_row_cell(ws, dict_row, col_EF_contrib_trend_lower))
+                    apply_style_dEM(get_row_cell(ws, dict_row, col_EF_contrib_trend_upper))
                                 
                 else:
                     #print("writting values for AD and EF")
                     #input emission is not zero and input are given for AD and EF   
                     #AD contribution to trend variance, as computed from uncertainty propagation
-                    ws[col_AD_contrib_trend_lower + i_row_string] = df_pr_AD_EF["AD_trend_normed_pr_contrib_var_lower"].iloc[i_in]
-                    ws[col_AD_contrib_trend_upper + i_row_string] = df_pr_AD_EF["AD_trend_normed_pr_contrib_var_upper"].iloc[i_in]
+                    get_row_cell(ws, dict_row, col_AD_contrib_trend_lower).value = df_pr_AD_EF["AD_trend_normed_pr_contrib_var_lower"].iloc[i_in]
+                    get_row_cell(ws, dict_row, col_AD_contrib_trend_upper).value = df_pr_AD_EF["AD_trend_normed_pr_contrib_var_upper"].iloc[i_in]
     
                     #EF contribution to trend variance, as computed from uncertainty propagation
-                    ws[col_EF_contrib_trend_lower + i_row_string] = df_pr_AD_EF["EF_trend_normed_pr_contrib_var_lower"].iloc[i_in]
-                    ws[col_EF_contrib_trend_upper + i_row_string] = df_pr_AD_EF["EF_trend_normed_pr_contrib_var_upper"].iloc[i_in]
+                    get_row_cell(ws, dict_row, col_EF_contrib_trend_lower).value = df_pr_AD_EF["EF_trend_normed_pr_contrib_var_lower"].iloc[i_in]
+                    get_row_cell(ws, dict_row, col_EF_contrib_trend_upper).value = df_pr_AD_EF["EF_trend_normed_pr_contrib_var_upper"].iloc[i_in]
                     
-                    ws[col_AD_contrib_trend_lower + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
-                    ws[col_AD_contrib_trend_upper + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
-                    ws[col_EF_contrib_trend_lower + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
-                    ws[col_EF_contrib_trend_upper + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
-
-    
-            for row in ws.iter_rows(min_col = 1, 
-                                    min_row = i_row, 
-                                    max_col= excel_columns.index(col_end) + 1, 
-                                    max_row= i_row):
-                for cell in row:
-                    cell.border = thin_border
+                    get_row_cell(ws, dict_row, col_AD_contrib_trend_lower).number_format = const.FORMAT_VAL_CONTRIB
+                    get_row_cell(ws, dict_row, col_AD_contrib_trend_upper).number_format = const.FORMAT_VAL_CONTRIB
+                    get_row_cell(ws, dict_row, col_EF_contrib_trend_lower).number_format = const.FORMAT_VAL_CONTRIB
+                    get_row_cell(ws, dict_row, col_EF_contrib_trend_upper).number_format = const.FORMAT_VAL_CONTRIB
+
+    
+            apply_style_row(ws, dict_row, 0, excel_columns.index(col_end), border = thin_border)
             
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)
 
@@ -396,53 +420,42 @@ def write_pr_mc_results(
     #***************WRITE INVENTORY SUM******************************
 
     #**************inventory variance********************************
-    ws["A" + i_row_string] = "Total"
-    ws.merge_cells(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
-    ws[col_EM_contrib_lower + i_row_string] = df_pr["EM_RY_pr_contrib_var_normed_lower"].iloc[index_pr_total] 
-    ws[col_EM_contrib_upper + i_row_string] = df_pr["EM_RY_pr_contrib_var_normed_upper"].iloc[index_pr_total] 
+    get_row_cell(ws, dict_row, "A").value = "Total"
+    ws.merged_cells.add(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
+    get_row_cell(ws, dict_row, col_EM_contrib_lower).value = df_pr["EM_RY_pr_contrib_var_normed_lower"].iloc[index_pr_total] 
+    get_row_cell(ws, dict_row, col_EM_contrib_upper).value = df_pr["EM_RY_pr_contrib_var_normed_upper"].iloc[index_pr_total] 
 
-    ws.merge_cells(col_AD_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
+    ws.merged_cells.add(col_AD_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
 
-    ws[col_EM_contrib_trend_lower + i_row_string] = df_pr["EM_trend_normed_pr_contrib_var_lower"].iloc[index_pr_total] 
-    ws[col_EM_contrib_trend_upper + i_row_string] = df_pr["EM_trend_normed_pr_contrib_var_upper"].iloc[index_pr_total] 
+    get_row_cell(ws, dict_row, col_EM_contrib_trend_lower).value = df_pr["EM_trend_normed_pr_contrib_var_lower"].iloc[index_pr_total] 
+    get_row_cell(ws, dict_row, col_EM_contrib_trend_upper).value = df_pr["EM_trend_normed_pr_contrib_var_upper"].iloc[index_pr_total] 
     
-    for row in ws.iter_rows(min_col = excel_columns.index("A") + 1, 
-                            min_row= i_row, 
-                            max_col= excel_columns.index(col_end) + 1, 
-                            max_row= i_row):
-        for cell in row:
-            cell.border = thin_border
-            cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
-            cell.number_format = const.FORMAT_VAL_TOTAL
+    apply_style_row(ws, dict_row, excel_columns.index("A"), excel_columns.index(col_end), 
+                    border = thin_border, fill = total_fill, number_format = const.FORMAT_VAL_TOTAL)
 
     #**************inventory uncertainty********************************    
+    append_row(ws, dict_row)
     i_row += 1
     i_row_string = str(i_row)
     ws.row_dimensions[i_row].height = 30
-    ws["A" + i_row_string] = "Total"
-    ws[col_EM_BY + i_row_string] = df_pr['EM_BY'].iloc[index_pr_total] 
-    ws[col_EM_RY + i_row_string] = df_pr['EM_RY'].iloc[index_pr_total]
-
-    ws.merge_cells(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
-    ws[col_EM_u_lower + i_row_string] = "Emissions {} uncertainty (%):".format(RY_string)
-    ws[col_EM_u_lower + i_row_string].alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)
-    ws[col_EM_contrib_lower + i_row_string] = df_pr["EM_RY_pr_U_lower_p"].iloc[index_pr_total]
-    ws[col_EM_contrib_upper + i_row_string] = df_pr["EM_RY_pr_U_upper_p"].iloc[index_pr_total]
-
-    ws.merge_cells(col_AD_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
-    ws[col_AD_contrib_trend_lower + i_row_string] = "Trend uncertainty (%):"
-    ws[col_EM_contrib_trend_lower + i_row_string] = df_pr["EM_trend_normed_pr_U_lower_p"].iloc[index_pr_total] 
-    ws[col_EM_contrib_trend_upper + i_row_string] = df_pr["EM_trend_normed_pr_U_upper_p"].iloc[index_pr_total] 
-
-    for row in ws.iter_rows(min_col = excel_columns.index("A") + 1, 
-                            min_row= i_row, 
-                            max_col= excel_columns.index(col_end) + 1, 
-                            max_row= i_row):
-        for cell in row:
-            cell.border = thin_border
-            cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
-            cell.number_format = const.FORMAT_VAL_TOTAL
-    
+    get_row_cell(ws, dict_row, "A").value = "Total"
+    get_row_cell(ws, dict_row, col_EM_BY).value = df_pr['EM_BY'].iloc[index_pr_total] 
+    get_row_cell(ws, dict_row, col_EM_RY).value = df_pr['EM_RY'].iloc[index_pr_total]
+
+    ws.merged_cells.add(col_EM_u_lower + i_row_string +":" + col_EM_u_upper + i_row_string)
+    get_row_cell(ws, dict_row, col_EM_u_lower).value = "Emissions {} uncertainty (%):".format(RY_string)
+    get_row_cell(ws, dict_row, col_EM_u_lower).alignment = left_alignment
+    get_row_cell(ws, dict_row, col_EM_contrib_lower).value = df_pr["EM_RY_pr_U_lower_p"].iloc[index_pr_total]
+    get_row_cell(ws, dict_row, col_EM_contrib_upper).value = df_pr["EM_RY_pr_U_upper_p"].iloc[index_pr_total]
+
+    ws.merged_cells.add(col_AD_contrib_trend_lower + i_row_string +":" + col_EF_contrib_trend_upper + i_row_string)
+    get_row_cell(ws, dict_row, col_AD_contrib_trend_lower).value = "Trend uncertainty (%):"
+    get_row_cell(ws, dict_row, col_EM_contrib_trend_lower).value = df_pr["EM_trend_normed_pr_U_lower_p"].iloc[index_pr_total] 
+    get_row_cell(ws, dict_row, col_EM_contrib_trend_upper).value = df_pr["EM_trend_normed_pr_U_upper_p"].iloc[index_pr_total] 
+
+    apply_style_row(ws, dict_row, excel_columns.index("A"), excel_columns.index(col_end), 
+                    border = thin_border, fill = total_fill, number_format = const.FORMAT_VAL_TOTAL)
+    append_row(ws, dict_row)
             
     #***************END OF WRITE INVENTORY SUM******************************
 
@@ -489,7 +502,7 @@ def write_pr_mc_results(
     i_row_string = str(i_row)
     
     #Write legend of table    
-    ws["A" + i_row_string]= \
+    get_row_cell(ws, dict_row, "A").value = \
     "Table {}: Uncertainty analysis of {} emissions, approach 2, for ".format(tab_name, comp_label) +\
     "{} and for the trend {}-{}{}. {} ".format(RY_string, BY_string, RY_string, text_LULUCF_and_indirect, dEM_text) +\
     "Monte Carlo simulations " +\
@@ -498,10 +511,11 @@ def write_pr_mc_results(
     "Contributions to inventory trend (mean, uncertainties, columns I and J) " +\
     "are values normalised by the total inventory base year emission."
     
-    ws.merge_cells("A" + i_row_string + ":" + col_end +i_row_string)
+    ws.merged_cells.add("A" + i_row_string + ":" + col_end +i_row_string)
     ws.row_dimensions[i_row].height = 80
-    ws["A" + i_row_string].alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)
+    get_row_cell(ws, dict_row, "A").alignment = left_alignment
     
+    append_row(ws, dict_row)
     i_row += 1
     i_row_string = str(i_row)
     #starting_row = True
@@ -523,88 +537,83 @@ def write_pr_mc_results(
                 count_row = 0
             
                 #*********************************HEADER**********************************
-                header_row_start = i_row
                 #add lettering of columns according to IPCC 2006, VOl 1, Table 3.3 (for Monte Carlo)
-                ws["A" + i_row_string].value = "A"
-                ws["B" + i_row_string].value = "B"
-                ws["C" + i_row_string].value = "C"
-                ws["D" + i_row_string].value = "D"
+                get_row_cell(ws, dict_row, "A").value = "A"
+                get_row_cell(ws, dict_row, "B").value = "B"
+                get_row_cell(ws, dict_row, "C").value = "C"
+                get_row_cell(ws, dict_row, "D").value = "D"
                 
-                ws["E" + i_row_string].value = "E"
-                ws.merge_cells("E" + i_row_string + ":F" +i_row_string)
+                get_row_cell(ws, dict_row, "E").value = "E"
+                ws.merged_cells.add("E" + i_row_string + ":F" +i_row_string)
                 
-                ws["G" + i_row_string] = "F"
-                ws.merge_cells("G" + i_row_string + ":H" +i_row_string)
+                get_row_cell(ws, dict_row, "G").value = "F"
+                ws.merged_cells.add("G" + i_row_string + ":H" +i_row_string)
             
-                ws["I" + i_row_string] = "G"
-                ws.merge_cells("I" + i_row_string + ":J" +i_row_string)
+                get_row_cell(ws, dict_row, "I").value = "G"
+                ws.merged_cells.add("I" + i_row_string + ":J" +i_row_string)
                 
-                ws[col_EM_var_contrib + i_row_string] = "H"
+                get_row_cell(ws, dict_row, col_EM_var_contrib).value = "H"
             
-                #ws.merge_cells(col_trend_u_lower + i_row_string + ":" + col_trend_u_upper + i_row_string)
-                ws[col_trend_normed_mean + i_row_string] = "I"
-                ws[col_trend_normed_u_lower + i_row_string] = "J"
-                ws.merge_cells(col_trend_normed_u_lower + i_row_string + ":" + col_trend_normed_u_upper + i_row_string)
+                #ws.merged_cells.add(col_trend_u_lower + i_row_string + ":" + col_trend_u_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_trend_normed_mean).value = "I"
+                get_row_cell(ws, dict_row, col_trend_normed_u_lower).value = "J"
+                ws.merged_cells.add(col_trend_normed_u_lower + i_row_string + ":" + col_trend_normed_u_upper + i_row_string)
                 
+                apply_style_row(ws, dict_row, 0, c_end, border = medium_border, alignment = center_alignment)
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row)
                 ws.row_dimensions[i_row].height = 72
             
                 #assign data to cells
-                ws["A" + i_row_string]= nomenc_text
-                ws.merge_cells("A" + i_row_string + ":A" +str(i_row + 1) )
+                get_row_cell(ws, dict_row, "A").value = nomenc_text
+                ws.merged_cells.add("A" + i_row_string + ":A" +str(i_row + 1) )
             
-                ws["B" + i_row_string] = comp_text
-                ws.merge_cells("B" + i_row_string + ":B" +str(i_row + 1) )
+                get_row_cell(ws, dict_row, "B").value = comp_text
+                ws.merged_cells.add("B" + i_row_string + ":B" +str(i_row + 1) )
             
-                ws["C" + i_row_string]= "Emissions " + BY_string
-                ws["D" + i_row_string]= "Emissions " + RY_string
-                ws["E" + i_row_string]= "Activity data uncertainty " + RY_string
-                ws.merge_cells("E" + i_row_string + ":F" +i_row_string)
+                get_row_cell(ws, dict_row, "C").value = "Emissions " + BY_string
+                get_row_cell(ws, dict_row, "D").value = "Emissions " + RY_string
+                get_row_cell(ws, dict_row, "E").value = "Activity data uncertainty " + RY_string
+                ws.merged_cells.add("E" + i_row_string + ":F" +i_row_string)
             
-                ws["G" + i_row_string] = "Emission factor uncertainty " + RY_string
-                ws.merge_cells("G" + i_row_string + ":H" +i_row_string)
+                get_row_cell(ws, dict_row, "G").value = "Emission factor uncertainty " + RY_string
+                ws.merged_cells.add("G" + i_row_string + ":H" +i_row_string)
             
-                ws["I" + i_row_string] = "Emission combined uncertainty " + RY_string
-                ws.merge_cells("I" + i_row_string + ":J" +i_row_string)
+                get_row_cell(ws, dict_row, "I").value = "Emission combined uncertainty " + RY_string
+                ws.merged_cells.add("I" + i_row_string + ":J" +i_row_string)
             
-                ws[col_EM_var_contrib + i_row_string] = "Emission contri- bution to variance " + RY_string
+                get_row_cell(ws, dict_row, col_EM_var_contrib).value = "Emission contri- bution to variance " + RY_string
                             
-                ws[col_trend_normed_mean    + i_row_string] = "Contri- bution to trend"
-                ws[col_trend_normed_u_lower + i_row_string] = "Contribution to uncertainty of trend"
-                ws.merge_cells(col_trend_normed_u_lower + i_row_string + ":" + col_trend_normed_u_upper + i_row_string)
+                get_row_cell(ws, dict_row, col_trend_normed_mean).value = "Contri- bution to trend"
+                get_row_cell(ws, dict_row, col_trend_normed_u_lower).value = "Contribution to uncertainty of trend"
+                ws.merged_cells.add(col_trend_normed_u_lower + i_row_string + ":" + col_trend_normed_u_upper + i_row_string)
                 
-                ws[col_EM_BY_mc_2stddev_p + i_row_string] = "EM BY: 2 std dev %"
-                ws[col_EM_RY_mc_2stddev_p + i_row_string] = "EM RY: 2 std dev %"
-                #ws[col_EM_BY_RY_corr + i_row_string] = "EM BY RY corr"
+                get_row_cell(ws, dict_row, col_EM_BY_mc_2stddev_p).value = "EM BY: 2 std dev %"
+                get_row_cell(ws, dict_row, col_EM_RY_mc_2stddev_p).value = "EM RY: 2 std dev %"
+                #get_row_cell(ws, dict_row, col_EM_BY_RY_corr).value = "EM BY RY corr"
             
-                
+                apply_style_row(ws, dict_row, 0, c_end, border = medium_border, alignment = center_alignment)
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row)
                 
-                ws["C" + i_row_string] = unit_string
-                ws["D" + i_row_string] = unit_string
-                ws["E" + i_row_string] = "(-)%"
-                ws["F" + i_row_string] = "(+)%"
-                ws["G" + i_row_string] = "(-)%"
-                ws["H" + i_row_string] = "(+)%"
-                ws["I" + i_row_string] = "(-)%"
-                ws["J" + i_row_string] = "(+)%"
-                ws[col_EM_var_contrib + i_row_string] = "Fraction"
+                get_row_cell(ws, dict_row, "C").value = unit_string
+                get_row_cell(ws, dict_row, "D").value = unit_string
+                get_row_cell(ws, dict_row, "E").value = "(-)%"
+                get_row_cell(ws, dict_row, "F").value = "(+)%"
+                get_row_cell(ws, dict_row, "G").value = "(-)%"
+                get_row_cell(ws, dict_row, "H").value = "(+)%"
+                get_row_cell(ws, dict_row, "I").value = "(-)%"
+                get_row_cell(ws, dict_row, "J").value = "(+)%"
+                get_row_cell(ws, dict_row, col_EM_var_contrib).value = "Fraction"
             
-                ws[col_trend_normed_mean    + i_row_string] = "%"
-                ws[col_trend_normed_u_lower + i_row_string] = "(-)%"
-                ws[col_trend_normed_u_upper + i_row_string] = "(+)%"
+                get_row_cell(ws, dict_row, col_trend_normed_mean).value = "%"
+                get_row_cell(ws, dict_row, col_trend_normed_u_lower).value = "(-)%"
+                get_row_cell(ws, dict_row, col_trend_normed_u_upper).value = "(+)%"
                         
-            
-                for row in ws.iter_rows(min_col = 1, 
-                                        min_row = header_row_start, 
-                                        max_col= c_end + 1, 
-                                        max_row= i_row):
-                    for cell in row:
-                        cell.border = medium_border
-                        cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
-            
+                apply_style_row(ws, dict_row, 0, c_end, border = medium_border, alignment = center_alignment)
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row)
             
@@ -612,51 +621,45 @@ def write_pr_mc_results(
             
  
             ws.row_dimensions[i_row].height = 13
-            ws["A" + i_row_string].number_format = openpyxl.styles.numbers.FORMAT_TEXT
-            ws["B" + i_row_string].number_format = openpyxl.styles.numbers.FORMAT_TEXT
+            get_row_cell(ws, dict_row, "A").number_format = openpyxl.styles.numbers.FORMAT_TEXT
+            get_row_cell(ws, dict_row, "B").number_format = openpyxl.styles.numbers.FORMAT_TEXT
     
-            ws["A" + i_row_string] = code_reso_text            
-            ws["B" + i_row_string] = df_mc["comp_name"].iloc[i]
+            get_row_cell(ws, dict_row, "A").value = code_reso_text            
+            get_row_cell(ws, dict_row, "B").value = df_mc["comp_name"].iloc[i]
     
             if df_mc['EM_status_BY'].iloc[i] == "ES":
-                ws["C" + i_row_string] = df_mc['EM_BY'].iloc[i]
-                ws["C" + i_row_string].number_format = const.FORMAT_VAL_EM #'##0.00'
+                get_row_cell(ws, dict_row, "C").value = df_mc['EM_BY'].iloc[i]
+                get_row_cell(ws, dict_row, "C").number_format = const.FORMAT_VAL_EM #'##0.00'
             else:
-                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws["C" + i_row_string])
+                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, "C"))
     
             if df_mc['EM_status_RY'].iloc[i] == "ES":
-                ws["D" + i_row_string] = df_mc['EM_RY'].iloc[i]
-                ws["D" + i_row_string].number_format = const.FORMAT_VAL_EM #'##0.00''##0.00'
+                get_row_cell(ws, dict_row, "D").value = df_mc['EM_RY'].iloc[i]
+                get_row_cell(ws, dict_row, "D").number_format = const.FORMAT_VAL_EM #'##0.00''##0.00'
             else:
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["D" + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["E" + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["F" + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["G" + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["H" + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["I" + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["J" + i_row_string])
-                #apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["K" + i_row_string])
-    
-            for row in ws.iter_rows(min_col = excel_columns.index("E") + 1, 
-                                    min_row = i_row, 
-                                    max_col= excel_columns.index("J") + 1, 
-                                    max_row= i_row):
-                for cell in row:
-                    cell.number_format = const.FORMAT_VAL_U #'##0'
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "D"))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "E"))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "F"))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "G"))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "H"))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "I"))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "J"))
+                #apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "K"))
+    
+            apply_style_row(ws, dict_row, excel_columns.index("E"), excel_columns.index("J"), 
+                            number_format = const.FORMAT_VAL_U) #'##0'
     
     
             #AD and EF uncertainty
             if not df_mc["import"].iloc[i]:
-                apply_style_empty(ws["E" + i_row_string])
-                apply_style_empty(ws["F" + i_row_string])
-                apply_style_empty(ws["G" + i_row_string])
-                apply_style_empty(ws["H" + i_row_string])
+                apply_style_empty(get_row_cell(ws, dict_row, "E"))
+                apply_style_empty(get_row_cell(ws, dict_row, "F"))
+                apply_style_empty(get_row_cell(ws, dict_row, "G"))
+                apply_style_empty(get_row_cell(ws, dict_row, "H"))
                 
             else:
                 #else, this is an import index
-                i_in = df_in.index[(df_in["proc_id"] == df_mc["proc_id"].iloc[i]) 
-                            & (df_in["reso_id"] == df_mc["reso_id"].iloc[i]) 
-                            & (df_in["comp_id"] == df_mc["comp_id"].iloc[i])].tolist()
+                i_in = dict_in_index.get((df_mc["proc_id"].iloc[i], df_mc["reso_id"].iloc[i], df_mc["comp_id"].iloc[i]), [])
                 
                 
                 if len(i_in) == 0:
@@ -674,130 +677,114 @@ def write_pr_mc_results(
                                 
                 if df_mc["EM_status_RY"].iloc[i] != "ES":
                     #input emission is zero, write notation key instead
-                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], ws["E" + i_row_string])
-                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], ws["F" + i_row_string])
-                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], ws["G" + i_row_string])
-                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], ws["H" + i_row_string])
+                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], get_row_cell(ws, dict_row, "E"))
+                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], get_row_cell(ws, dict_row, "F"))
+                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], get_row_cell(ws, dict_row, "G"))
+                    apply_style_non_numeric(df_mc["EM_status_RY"].iloc[i], get_row_cell(ws, dict_row, "H"))
     
                 
                 elif df_in["uEM_is_num_RY"].iloc[i_in]:
                 #input emission is not zero and this is a direct emission
-                    apply_style_dEM(ws["E" + i_row_string])
-                    apply_style_dEM(ws["F" + i_row_string])
-                    apply_style_dEM(ws["G" + i_row_string])
-                    apply_style_dEM(ws["H" + i_row_string])
+                    apply_style_dEM(get_row_cell(ws, dict_row, "E"))
+                    apply_style_dEM(get_row_cell(ws, dict_row, "F"))
+                    apply_style_dEM(get_row_cell(ws, dict_row, "G"))
+                    apply_style_dEM(get_row_cell(ws, dict_row, "H"))
         
                         
                 else:
                     #print("writting values for AD and EF")
                     #input emission is not zero and input are given for AD and EF   
                     #AD uncertainty as generated from mc simulations
-                    ws["E" + i_row_string] = df_mc_AD_EF["AD_RY_mc_U_lower_p"].iloc[i_in]
-                    ws["F" + i_row_string] = df_mc_AD_EF["AD_RY_mc_U_upper_p"].iloc[i_in]
+                    get_row_cell(ws, dict_row, "E").value = df_mc_AD_EF["AD_RY_mc_U_lower_p"].iloc[i_in]
+                    get_row_cell(ws, dict_row, "F").value = df_mc_AD_EF["AD_RY_mc_U_upper_p"].iloc[i_in]
     
                     #EF uncertainty as generated from mc simulations
-                    ws["G" + i_row_string] = df_mc_AD_EF["EF_RY_mc_U_lower_p"].iloc[i_in]
-                    ws["H" + i_row_string] = df_mc_AD_EF["EF_RY_mc_U_upper_p"].iloc[i_in]
+                    get_row_cell(ws, dict_row, "G").value = df_mc_AD_EF["EF_RY_mc_U_lower_p"].iloc[i_in]
+                    get_row_cell(ws, dict_row, "H").value = df_mc_AD_EF["EF_RY_mc_U_upper_p"].iloc[i_in]
     
             #EM uncertainty from mc simulations and EM contribution to variance
             if df_mc['EM_status_RY'].iloc[i] != "ES":
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["I" + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws["J" + i_row_string])
-                ws[col_EM_var_contrib + i_row_string] = float(0)
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "I"))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, "J"))
+                get_row_cell(ws, dict_row, col_EM_var_contrib).value = float(0)
 
             elif not pd.isnull(df_mc["EM_RY_mc_mean"].iloc[i]):
                 #if the simulated emission is zero because the input is zero, write zero.
-                ws["I" + i_row_string] = df_mc["EM_RY_mc_U_lower_p"].iloc[i]
-                ws["J" + i_row_string] = df_mc["EM_RY_mc_U_upper_p"].iloc[i]
-                ws[col_EM_var_contrib + i_row_string] = df_mc["EM_RY_mc_var_normed"].iloc[i]
+                get_row_cell(ws, dict_row, "I").value = df_mc["EM_RY_mc_U_lower_p"].iloc[i]
+                get_row_cell(ws, dict_row, "J").value = df_mc["EM_RY_mc_U_upper_p"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_var_contrib).value = df_mc["EM_RY_mc_var_normed"].iloc[i]
                 
-                ws[col_EM_BY_mc_2stddev_p + i_row_string] = df_mc["EM_BY_mc_2stddev_p"].iloc[i]
-                ws[col_EM_RY_mc_2stddev_p + i_row_string] = df_mc["EM_RY_mc_2stddev_p"].iloc[i]
-                #ws[col_EM_BY_RY_corr + i_row_string] = df_mc["EM_BY_RY_mc_sensitivity"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_BY_mc_2stddev_p).value = df_mc["EM_BY_mc_2stddev_p"].iloc[i]
+                get_row_cell(ws, dict_row, col_EM_RY_mc_2stddev_p).value = df_mc["EM_RY_mc_2stddev_p"].iloc[i]
+                #get_row_cell(ws, dict_row, col_EM_BY_RY_corr).value = df_mc["EM_BY_RY_mc_sensitivity"].iloc[i]
                                 
             else:
-                ws["I" + i_row_string] = float(0)
-                ws["J" + i_row_string] = float(0)
-                ws[col_EM_var_contrib + i_row_string] = float(0)
+                get_row_cell(ws, dict_row, "I").value = float(0)
+                get_row_cell(ws, dict_row, "J").value = float(0)
+                get_row_cell(ws, dict_row, col_EM_var_contrib).value = float(0)
         
-            ws[col_EM_var_contrib + i_row_string].number_format = const.FORMAT_VAL_CONTRIB
+            get_row_cell(ws, dict_row, col_EM_var_contrib).number_format = const.FORMAT_VAL_CONTRIB
      
                     
             #fill in uncertainty for trend expressed in percent of total trend uncertainty!!!
             #so this is not the uncertainty asociated with each trend
             #the sum of this input should be the value of uncertainty for the overall trend
             #(trend of all EM summed up)
-            ws[col_trend_normed_mean    + i_row_string] = df_mc["EM_trend_normed_mc_mean"].iloc[i] 
-            ws[col_trend_normed_mean    + i_row_string].number_format = const.FORMAT_VAL_CONTRIB #'##0.000'
+            get_row_cell(ws, dict_row, col_trend_normed_mean).value = df_mc["EM_trend_normed_mc_mean"].iloc[i] 
+            get_row_cell(ws, dict_row, col_trend_normed_mean).number_format = const.FORMAT_VAL_CONTRIB #'##0.000'
                         
-            ws[col_trend_normed_u_lower + i_row_string] = df_mc["EM_trend_normed_mc_U_lower_p"].iloc[i] 
-            ws[col_trend_normed_u_lower + i_row_string].number_format = const.FORMAT_VAL_CONTRIB #'##0.000'
-            ws[col_trend_normed_u_upper + i_row_string] = df_mc["EM_trend_normed_mc_U_upper_p"].iloc[i] 
-            ws[col_trend_normed_u_upper + i_row_string].number_format = const.FORMAT_VAL_CONTRIB #'##0.000'
-    
-    
-            for row in ws.iter_rows(min_col = 1, 
-                                    min_row = i_row, 
-                                    max_col= c_end + 1, 
-                                    max_row= i_row):
-                for cell in row:
-                    cell.border = thin_border
+            get_row_cell(ws, dict_row, col_trend_normed_u_lower).value = df_mc["EM_trend_normed_mc_U_lower_p"].iloc[i] 
+            get_row_cell(ws, dict_row, col_trend_normed_u_lower).number_format = const.FORMAT_VAL_CONTRIB #'##0.000'
+            get_row_cell(ws, dict_row, col_trend_normed_u_upper).value = df_mc["EM_trend_normed_mc_U_upper_p"].iloc[i] 
+            get_row_cell(ws, dict_row, col_trend_normed_u_upper).number_format = const.FORMAT_VAL_CONTRIB #'##0.000'
+    
+    
+            apply_style_row(ws, dict_row, 0, c_end, border = thin_border)
             
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)
         
     #write average results, this is the last line
     
 
-    ws["A"+ i_row_string] = "Total, Monte Carlo simulations"
-    ws["A"+ i_row_string].alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)
+    get_row_cell(ws, dict_row, "A").value = "Total, Monte Carlo simulations"
+    get_row_cell(ws, dict_row, "A").alignment = left_alignment
     ws.row_dimensions[i_row].height = 30
-    ws.merge_cells("A" + i_row_string + ":" + "B" + i_row_string)
-    ws["B"+ i_row_string].border = thin_border
-    ws["C"+ i_row_string] = df_mc["EM_BY_mc_mean"].iloc[index_mc_total] 
-    ws["D"+ i_row_string] = df_mc["EM_RY_mc_mean"].iloc[index_mc_total] 
-    ws["I"+ i_row_string] = df_mc["EM_RY_mc_U_lower_p"].iloc[index_mc_total] 
-    ws["J"+ i_row_string] = df_mc["EM_RY_mc_U_upper_p"].iloc[index_mc_total] 
-    ws[col_EM_var_contrib    + i_row_string] = np.nansum(df_mc["EM_BY_mc_var_normed"].iloc[index_mc_output]) #this must be 1
+    ws.merged_cells.add("A" + i_row_string + ":" + "B" + i_row_string)
+    get_row_cell(ws, dict_row, "B").border = thin_border
+    get_row_cell(ws, dict_row, "C").value = df_mc["EM_BY_mc_mean"].iloc[index_mc_total] 
+    get_row_cell(ws, dict_row, "D").value = df_mc["EM_RY_mc_mean"].iloc[index_mc_total] 
+    get_row_cell(ws, dict_row, "I").value = df_mc["EM_RY_mc_U_lower_p"].iloc[index_mc_total] 
+    get_row_cell(ws, dict_row, "J").value = df_mc["EM_RY_mc_U_upper_p"].iloc[index_mc_total] 
+    get_row_cell(ws, dict_row, col_EM_var_contrib).value = np.nansum(df_mc["EM_BY_mc_var_normed"].iloc[index_mc_output]) #this must be 1
     #The following is not 1, this is only the variance of the inventory sum:
     #df_mc["EM_RY_mc_var_normed"].iloc[index_mc_total]
     
-    ws[col_trend_normed_mean    + i_row_string] = df_mc["EM_trend_normed_mc_mean"].iloc[index_mc_total]
-    ws[col_trend_normed_u_lower + i_row_string] = df_mc["EM_trend_normed_mc_U_lower_p"].iloc[index_mc_total] 
-    ws[col_trend_normed_u_upper + i_row_string] = df_mc["EM_trend_normed_mc_U_upper_p"].iloc[index_mc_total] 
-    
-    for row in ws.iter_rows(min_col = 1, 
-                            min_row = i_row, 
-                            max_col= c_end + 1, 
-                            max_row= i_row):
-        for cell in row:
-            cell.border = thin_border
-            cell.number_format = const.FORMAT_VAL_TOTAL #'##0.0'
-            cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
-            cell.alignment = openpyxl.styles.Alignment(vertical="center", wrap_text=True)
+    get_row_cell(ws, dict_row, col_trend_normed_mean).value = df_mc["EM_trend_normed_mc_mean"].iloc[index_mc_total]
+    get_row_cell(ws, dict_row, col_trend_normed_u_lower).value = df_mc["EM_trend_normed_mc_U_lower_p"].iloc[index_mc_total] 
+    get_row_cell(ws, dict_row, col_trend_normed_u_upper).value = df_mc["EM_trend_normed_mc_U_upper_p"].iloc[index_mc_total] 
     
+    apply_style_row(ws, dict_row, 0, c_end, border = thin_border, alignment = wrap_alignment, 
+                    fill = total_fill, number_format = const.FORMAT_VAL_TOTAL) #'##0.0'
     
+    append_row(ws, dict_row)
     i_row += 1
     i_row_string = str(i_row)
     
     
     #Total emissions over all processes, compounds, resources, according to the official inventory
-    ws["A"+ i_row_string] = "Total, inventory"
-    ws["A"+ i_row_string].alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)
-    ws.merge_cells("A" + i_row_string + ":" + "B" + i_row_string)
-    ws["B"+ i_row_string].border = thin_border
-    ws["C"+ i_row_string] = df_mc["EM_BY"].iloc[index_mc_total]
-    ws["D"+ i_row_string] = df_mc["EM_RY"].iloc[index_mc_total]
-    ws[col_trend_normed_mean    + i_row_string] = (df_mc["EM_RY"].iloc[index_mc_total] - df_mc["EM_BY"].iloc[index_mc_total])/df_mc["EM_BY"].iloc[index_mc_total] * float(100.0) #trend_inventory
+    get_row_cell(ws, dict_row, "A").value = "Total, inventory"
+    get_row_cell(ws, dict_row, "A").alignment = left_alignment
+    ws.merged_cells.add("A" + i_row_string + ":" + "B" + i_row_string)
+    get_row_cell(ws, dict_row, "B").border = thin_border
+    get_row_cell(ws, dict_row, "C").value = df_mc["EM_BY"].iloc[index_mc_total]
+    get_row_cell(ws, dict_row, "D").value = df_mc["EM_RY"].iloc[index_mc_total]
+    get_row_cell(ws, dict_row, col_trend_normed_mean).value = (df_mc["EM_RY"].iloc[index_mc_total] - df_mc["EM_BY"].iloc[index_mc_total])/df_mc["EM_BY"].iloc[index_mc_total] * float(100.0) #trend_inventory
     
-    for row in ws.iter_rows(min_col = 1, 
-                            min_row = i_row, 
-                            max_col= c_end + 1, 
-                            max_row= i_row):
-        for cell in row:
-            cell.border = thin_border
-            cell.number_format = const.FORMAT_VAL_TOTAL #'##0.0'
-            cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
+    apply_style_row(ws, dict_row, 0, c_end, border = thin_border, 
+                    fill = total_fill, number_format = const.FORMAT_VAL_TOTAL) #'##0.0'
+    append_row(ws, dict_row)
 
 
 
@@ -865,65 +852,54 @@ def write_pr_mc_results(
             #******************************HEADER******************************   
             i_row = 1
             i_row_string = str(i_row)
-            header_row_start = i_row
             #ws.row_dimensions[i_row].height = 45
         
             #assign data to cells
-            ws[col_cat + i_row_string] = category_text
-            ws.merge_cells(col_cat + i_row_string + ":" + col_cat + str(i_row + 1) )
+            get_row_cell(ws, dict_row, col_cat).value = category_text
+            ws.merged_cells.add(col_cat + i_row_string + ":" + col_cat + str(i_row + 1) )
         
-            ws[col_EM_BY + i_row_string]= "Emissions {}".format(BY_string)
-            ws.merge_cells(col_EM_BY + i_row_string + ":" + col_EM_BY_end + i_row_string)
+            get_row_cell(ws, dict_row, col_EM_BY).value = "Emissions {}".format(BY_string)
+            ws.merged_cells.add(col_EM_BY + i_row_string + ":" + col_EM_BY_end + i_row_string)
         
-            ws[col_EM_RY + i_row_string]= "Emissions {}".format(RY_string)
-            ws.merge_cells(col_EM_RY + i_row_string + ":" + col_EM_RY_end + i_row_string)
+            get_row_cell(ws, dict_row, col_EM_RY).value = "Emissions {}".format(RY_string)
+            ws.merged_cells.add(col_EM_RY + i_row_string + ":" + col_EM_RY_end + i_row_string)
         
-            ws[col_trend + i_row_string]= "Contribution to trend {}-{}".format(BY_string, RY_string)
-            ws.merge_cells(col_trend + i_row_string + ":" + col_trend_end + i_row_string)
+            get_row_cell(ws, dict_row, col_trend).value = "Contribution to trend {}-{}".format(BY_string, RY_string)
+            ws.merged_cells.add(col_trend + i_row_string + ":" + col_trend_end + i_row_string)
             
+            apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)
             
-            ws[col_EM_BY + i_row_string] = "Value " + unit_string
-            ws[col_EM_BY_U_lower_p + i_row_string] = "U(-)%"
-            ws[col_EM_BY_U_upper_p + i_row_string] = "U(+)%"
-            ws[col_EM_BY_U_contrib_p + i_row_string] = "Contrib. fraction"
-        
-            ws[col_EM_RY + i_row_string] = "Value " + unit_string
-            ws[col_EM_RY_U_lower_p + i_row_string] = "U(-)%"
-            ws[col_EM_RY_U_upper_p + i_row_string] = "U(+)%"
-            ws[col_EM_RY_U_contrib_p + i_row_string] = "Contrib. fraction"
+            get_row_cell(ws, dict_row, col_EM_BY).value = "Value " + unit_string
+            get_row_cell(ws, dict_row, col_EM_BY_U_lower_p).value = "U(-)%"
+            get_row_cell(ws, dict_row, col_EM_BY_U_upper_p).value = "U(+)%"
+            get_row_cell(ws, dict_row, col_EM_BY_U_contrib_p).value = "Contrib. fraction"
         
-            ws[col_trend + i_row_string] = "Value %"
-            ws[col_trend_U_lower_p + i_row_string] = "U(-)%"
-            ws[col_trend_U_upper_p + i_row_string] = "U(+)%"
-            ws[col_trend_U_contrib_p + i_row_string] = "Contrib. fraction"
+            get_row_cell(ws, dict_row, col_EM_RY).value = "Value " + unit_string
+            get_row_cell(ws, dict_row, col_EM_RY_U_lower_p).value = "U(-)%"
+            get_row_cell(ws, dict_row, col_EM_RY_U_upper_p).value = "U(+)%"
+            get_row_cell(ws, dict_row, col_EM_RY_U_contrib_p).value = "Contrib. fraction"
         
+            get_row_cell(ws, dict_row, col_trend).value = "Value %"
+            get_row_cell(ws, dict_row, col_trend_U_lower_p).value = "U(-)%"
+            get_row_cell(ws, dict_row, col_trend_U_upper_p).value = "U(+)%"
+            get_row_cell(ws, dict_row, col_trend_U_contrib_p).value = "Contrib. fraction"
         
-            for row in ws.iter_rows(min_col = 1, 
-                                    min_row = header_row_start, 
-                                    max_col= col_end + 1, 
-                                    max_row= i_row):
-                for cell in row:
-                    cell.border = medium_border
-                    cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
         
+            apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)     
             #******************************END OF HEADER***************************
     
             #******************************HEADER FOR PR***************************
-            ws[col_cat + i_row_string] = "Uncertainty propagation (approach 1)"
-            ws.merge_cells(col_cat + i_row_string + ":" + col_end_str + i_row_string)
-    
-            for row in ws.iter_rows(min_col = 1, 
-                                    min_row = i_row, 
-                                    max_col= col_end + 1, 
-                                    max_row= i_row):
-                for cell in row:
-                    cell.border = medium_border
-                    cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
-            
+            get_row_cell(ws, dict_row, col_cat).value = "Uncertainty propagation (approach 1)"
+            ws.merged_cells.add(col_cat + i_row_string + ":" + col_end_str + i_row_string)
+    
+            apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)
             #******************************END OF HEADER FOR PR********************
@@ -931,90 +907,80 @@ def write_pr_mc_results(
             for i in index_pr_list_with_total:
                 #category
                 if i == index_pr_total:
-                    ws[col_cat + i_row_string] = "Total, inventory"
-                    ws[col_cat + i_row_string].alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)               
+                    get_row_cell(ws, dict_row, col_cat).value = "Total, inventory"
+                    get_row_cell(ws, dict_row, col_cat).alignment = left_alignment
                 else:        
-                    ws[col_cat + i_row_string] = df_pr[col_cat_name].iloc[i]
+                    get_row_cell(ws, dict_row, col_cat).value = df_pr[col_cat_name].iloc[i]
                 
                 if df_pr['EM_status_BY'].iloc[i] == "ES":
                     #BY emission as per inventory
-                    apply_number_format(df_pr["EM_BY"].iloc[i], ws[col_EM_BY + i_row_string], int(2))
+                    apply_number_format(df_pr["EM_BY"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY), int(2))
                     #BY U (-) mc
-                    apply_number_format(df_pr["EM_BY_pr_U_lower_p"].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string], int(2))
+                    apply_number_format(df_pr["EM_BY_pr_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p), int(2))
                     #BY U (+) mc 
-                    apply_number_format(df_pr["EM_BY_pr_U_upper_p"].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string], int(2))
+                    apply_number_format(df_pr["EM_BY_pr_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p), int(2))
                     #BY contribution to total U mc
                     if i == index_pr_total:
                         value = np.nansum(df_pr["EM_BY_pr_var_normed"].iloc[index_pr_list])
                     else:
                         value = df_pr["EM_BY_pr_var_normed"].iloc[i]
-                    apply_number_format(value, ws[col_EM_BY_U_contrib_p + i_row_string], int(2))
+                    apply_number_format(value, get_row_cell(ws, dict_row, col_EM_BY_U_contrib_p), int(2))
                 else:
-                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY_U_contrib_p + i_row_string])
+                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY))
+                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p))
+                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p))
+                    apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_contrib_p))
     
                 if df_pr['EM_status_RY'].iloc[i] == "ES":
                     #RY emission as per inventory
-                    apply_number_format(df_pr["EM_RY"].iloc[i], ws[col_EM_RY + i_row_string], int(2))
+                    apply_number_format(df_pr["EM_RY"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY), int(2))
                     #RY U (-) mc
-                    apply_number_format(df_pr["EM_RY_pr_U_lower_p"].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string], int(2))
+                    apply_number_format(df_pr["EM_RY_pr_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p), int(2))
                     #RY U (+) mc
-                    apply_number_format(df_pr["EM_RY_pr_U_upper_p"].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string], int(2))
+                    apply_number_format(df_pr["EM_RY_pr_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p), int(2))
                     #RY contribution to total U mc
                     if i == index_pr_total:
                         value = np.nansum(df_pr["EM_RY_pr_var_normed"].iloc[index_pr_list])
                     else:
                         value = df_pr["EM_RY_pr_var_normed"].iloc[i]
-                    apply_number_format(value, ws[col_EM_RY_U_contrib_p + i_row_string], int(2))
+                    apply_number_format(value, get_row_cell(ws, dict_row, col_EM_RY_U_contrib_p), int(2))
                 else:
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY_U_contrib_p + i_row_string])
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY))
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p))
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p))
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_contrib_p))
     
                 if df_pr['EM_status_BY'].iloc[i] == "ES" or df_pr['EM_status_RY'].iloc[i] == "ES":
-                    apply_number_format(df_pr["EM_trend_normed"].iloc[i], ws[col_trend + i_row_string], int(3))
-                    apply_number_format(df_pr["EM_trend_normed_pr_U_lower_p"].iloc[i], ws[col_trend_U_lower_p + i_row_string], int(2))
-                    apply_number_format(df_pr["EM_trend_normed_pr_U_upper_p"].iloc[i], ws[col_trend_U_upper_p + i_row_string], int(2))
+                    apply_number_format(df_pr["EM_trend_normed"].iloc[i], get_row_cell(ws, dict_row, col_trend), int(3))
+                    apply_number_format(df_pr["EM_trend_normed_pr_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p), int(2))
+                    apply_number_format(df_pr["EM_trend_normed_pr_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p), int(2))
                     if i == index_pr_total:
                         value = np.nansum(df_pr["EM_trend_normed_pr_var_normed"].iloc[index_pr_list])
                     else:
                         value = df_pr["EM_trend_normed_pr_var_normed"].iloc[i]
-                    apply_number_format(value, ws[col_trend_U_contrib_p + i_row_string], int(2))
+                    apply_number_format(value, get_row_cell(ws, dict_row, col_trend_U_contrib_p), int(2))
                 else: #both are non-numeric
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend_U_lower_p + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend_U_upper_p + i_row_string])
-                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend_U_contrib_p + i_row_string])
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend))
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p))
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p))
+                    apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_contrib_p))
         
-                for row in ws.iter_rows(min_col = 1, 
-                                        min_row = i_row, 
-                                        max_col= col_end + 1, #excel_columns
-                                        max_row= i_row):
-                    for cell in row:
-                        cell.border = thin_border
-                        cell.alignment = openpyxl.styles.Alignment(vertical="center", wrap_text=True)
-                        if i == index_pr_total:
-                            cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
+                if i == index_pr_total:
+                    apply_style_row(ws, dict_row, 0, col_end, border = thin_border, alignment = wrap_alignment, fill = total_fill)
+                else:
+                    apply_style_row(ws, dict_row, 0, col_end, border = thin_border, alignment = wrap_alignment)
         
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row) 
     
             
             #******************************HEADER FOR MC***************************
-            ws[col_cat + i_row_string] = "Monte Carlo simulations (approach 2)"
-            ws.merge_cells(col_cat + i_row_string + ":" + col_end_str + i_row_string)
-    
-            for row in ws.iter_rows(min_col = 1, 
-                                    min_row = i_row, 
-                                    max_col= col_end + 1, 
-                                    max_row= i_row):
-                for cell in row:
-                    cell.border = medium_border
-                    cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
-            
+            get_row_cell(ws, dict_row, col_cat).value = "Monte Carlo simulations (approach 2)"
+            ws.merged_cells.add(col_cat + i_row_string + ":" + col_end_str + i_row_string)
+    
+            apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)
             #******************************END OF HEADER FOR MC********************
@@ -1023,74 +989,70 @@ def write_pr_mc_results(
             for i in index_mc_list_with_total:
                 #category
                 if i == index_mc_total:
-                    ws[col_cat + i_row_string] = "Total, inventory"
-                    ws[col_cat + i_row_string].alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)               
+                    get_row_cell(ws, dict_row, col_cat).value = "Total, inventory"
+                    get_row_cell(ws, dict_row, col_cat).alignment = left_alignment
                 else:        
-                    ws[col_cat + i_row_string] = df_mc[col_cat_name].iloc[i]
+                    get_row_cell(ws, dict_row, col_cat).value = df_mc[col_cat_name].iloc[i]
                 
                 if df_mc['EM_status_BY'].iloc[i] == "ES":
                     #BY emission as per inventory
-                    apply_number_format(df_mc["EM_BY"].iloc[i], ws[col_EM_BY + i_row_string], int(2))
+                    apply_number_format(df_mc["EM_BY"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY), int(2))
                     #BY U (-) mc
-                    apply_number_format(df_mc["EM_BY_mc_U_lower_p"].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string], int(2))
+                    apply_number_format(df_mc["EM_BY_mc_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p), int(2))
                     #BY U (+) mc 
-                    apply_number_format(df_mc["EM_BY_mc_U_upper_p"].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string], int(2))
+                    apply_number_format(df_mc["EM_BY_mc_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p), int(2))
                     #BY contribution to total U mc
                     if i == index_mc_total:
                         value = np.nansum(df_mc["EM_BY_mc_var_normed"].iloc[index_mc_list])
                     else:
                         value = df_mc["EM_BY_mc_var_normed"].iloc[i]
-                    apply_number_format(value, ws[col_EM_BY_U_contrib_p + i_row_string], int(2))
+                    apply_number_format(value, get_row_cell(ws, dict_row, col_EM_BY_U_contrib_p), int(2))
                 else:
-                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY_U_contrib_p + i_row_string])
+                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY))
+                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p))
+                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p))
+                    apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_contrib_p))
     
                 if df_mc['EM_status_RY'].iloc[i] == "ES":
                     #RY emission as per inventory
-                    apply_number_format(df_mc["EM_RY"].iloc[i], ws[col_EM_RY + i_row_string], int(2))
+                    apply_number_format(df_mc["EM_RY"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY), int(2))
                     #RY U (-) mc
-                    apply_number_format(df_mc["EM_RY_mc_U_lower_p"].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string], int(2))
+                    apply_number_format(df_mc["EM_RY_mc_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p), int(2))
                     #RY U (+) mc
-                    apply_number_format(df_mc["EM_RY_mc_U_upper_p"].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string], int(2))
+                    apply_number_format(df_mc["EM_RY_mc_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p), int(2))
                     #RY contribution to total U mc
                     if i == index_mc_total:
                         value = np.nansum(df_mc["EM_RY_mc_var_normed"].iloc[index_mc_list])
                     else:
                         value = df_mc["EM_RY_mc_var_normed"].iloc[i]
-                    apply_number_format(value, ws[col_EM_RY_U_contrib_p + i_row_string], int(2))
+                    apply_number_format(value, get_row_cell(ws, dict_row, col_EM_RY_U_contrib_p), int(2))
                 else:
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY_U_contrib_p + i_row_string])
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY))
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p))
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p))
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_contrib_p))
     
                 if df_mc['EM_status_BY'].iloc[i] == "ES" or df_mc['EM_status_RY'].iloc[i] == "ES":
-                    apply_number_format(df_mc["EM_trend_normed"].iloc[i], ws[col_trend + i_row_string], int(3))
-                    apply_number_format(df_mc["EM_trend_normed_mc_U_lower_p"].iloc[i], ws[col_trend_U_lower_p + i_row_string], int(2))
-                    apply_number_format(df_mc["EM_trend_normed_mc_U_upper_p"].iloc[i], ws[col_trend_U_upper_p + i_row_string], int(2))
+                    apply_number_format(df_mc["EM_trend_normed"].iloc[i], get_row_cell(ws, dict_row, col_trend), int(3))
+                    apply_number_format(df_mc["EM_trend_normed_mc_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p), int(2))
+                    apply_number_format(df_mc["EM_trend_normed_mc_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p), int(2))
                     if i == index_mc_total:
                         value = np.nansum(df_mc["EM_trend_normed_mc_var_normed"].iloc[index_mc_list])
                     else:
                         value = df_mc["EM_trend_normed_mc_var_normed"].iloc[i]
-                    apply_number_format(value, ws[col_trend_U_contrib_p + i_row_string], int(2))
+                    apply_number_format(value, get_row_cell(ws, dict_row, col_trend_U_contrib_p), int(2))
                 else: #both are non-numeric
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend_U_lower_p + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend_U_upper_p + i_row_string])
-                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend_U_contrib_p + i_row_string])
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend))
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p))
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p))
+                    apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_contrib_p))
         
-                for row in ws.iter_rows(min_col = 1, 
-                                        min_row = i_row, 
-                                        max_col= col_end + 1, #excel_columns
-                                        max_row= i_row):
-                    for cell in row:
-                        cell.border = thin_border
-                        cell.alignment = openpyxl.styles.Alignment(vertical="center", wrap_text=True)
-                        if i == index_mc_total:
-                            cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
+                if i == index_mc_total:
+                    apply_style_row(ws, dict_row, 0, col_end, border = thin_border, alignment = wrap_alignment, fill = total_fill)
+                else:
+                    apply_style_row(ws, dict_row, 0, col_end, border = thin_border, alignment = wrap_alignment)
         
+                append_row(ws, dict_row)
                 i_row += 1
                 i_row_string = str(i_row) 
 
@@ -1140,141 +1102,117 @@ def write_pr_mc_results(
         #******************************HEADER******************************   
         i_row = 1
         i_row_string = str(i_row)
-        header_row_start = i_row
         #ws.row_dimensions[i_row].height = 45
     
         #assign data to cells
-        ws[col_cat + i_row_string] = category_text
-        ws.merge_cells(col_cat + i_row_string + ":" + col_cat + str(i_row + 1) )
+        get_row_cell(ws, dict_row, col_cat).value = category_text
+        ws.merged_cells.add(col_cat + i_row_string + ":" + col_cat + str(i_row + 1) )
     
-        ws[col_EM_BY + i_row_string]= "Emissions {}".format(BY_string)
-        ws.merge_cells(col_EM_BY + i_row_string + ":" + col_EM_BY_end + i_row_string)
+        get_row_cell(ws, dict_row, col_EM_BY).value = "Emissions {}".format(BY_string)
+        ws.merged_cells.add(col_EM_BY + i_row_string + ":" + col_EM_BY_end + i_row_string)
     
-        ws[col_EM_RY + i_row_string]= "Emissions {}".format(RY_string)
-        ws.merge_cells(col_EM_RY + i_row_string + ":" + col_EM_RY_end + i_row_string)
+        get_row_cell(ws, dict_row, col_EM_RY).value = "Emissions {}".format(RY_string)
+        ws.merged_cells.add(col_EM_RY + i_row_string + ":" + col_EM_RY_end + i_row_string)
     
-        ws[col_trend + i_row_string]= "Trend {}-{}".format(BY_string, RY_string)
-        ws.merge_cells(col_trend + i_row_string + ":" + col_trend_end + i_row_string)
+        get_row_cell(ws, dict_row, col_trend).value = "Trend {}-{}".format(BY_string, RY_string)
+        ws.merged_cells.add(col_trend + i_row_string + ":" + col_trend_end + i_row_string)
         
+        apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+        append_row(ws, dict_row)
         i_row += 1
         i_row_string = str(i_row)
         
-        ws[col_EM_BY + i_row_string] = "Value " + unit_string
-        ws[col_EM_BY_U_lower_p + i_row_string] = "U(-)%"
-        ws[col_EM_BY_U_upper_p + i_row_string] = "U(+)%"
-        ws[col_EM_BY_U_mean_p + i_row_string] = "U mean %"
-    
-        ws[col_EM_RY + i_row_string] = "Value " + unit_string
-        ws[col_EM_RY_U_lower_p + i_row_string] = "U(-)%"
-        ws[col_EM_RY_U_upper_p + i_row_string] = "U(+)%"
-        ws[col_EM_RY_U_mean_p + i_row_string] = "U mean %"
-    
-        ws[col_trend + i_row_string] = "Value %"
-        ws[col_trend_U_lower_p + i_row_string] = "U(-)%"
-        ws[col_trend_U_upper_p + i_row_string] = "U(+)%"
-        ws[col_trend_U_mean_p + i_row_string] = "U mean %"
-    
-    
-        for row in ws.iter_rows(min_col = 1, 
-                                min_row = header_row_start, 
-                                max_col= col_end + 1, 
-                                max_row= i_row):
-            for cell in row:
-                cell.border = medium_border
-                cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
+        get_row_cell(ws, dict_row, col_EM_BY).value = "Value " + unit_string
+        get_row_cell(ws, dict_row, col_EM_BY_U_lower_p).value = "U(-)%"
+        get_row_cell(ws, dict_row, col_EM_BY_U_upper_p).value = "U(+)%"
+        get_row_cell(ws, dict_row, col_EM_BY_U_mean_p).value = "U mean %"
+    
+        get_row_cell(ws, dict_row, col_EM_RY).value = "Value " + unit_string
+        get_row_cell(ws, dict_row, col_EM_RY_U_lower_p).value = "U(-)%"
+        get_row_cell(ws, dict_row, col_EM_RY_U_upper_p).value = "U(+)%"
+        get_row_cell(ws, dict_row, col_EM_RY_U_mean_p).value = "U mean %"
+    
+        get_row_cell(ws, dict_row, col_trend).value = "Value %"
+        get_row_cell(ws, dict_row, col_trend_U_lower_p).value = "U(-)%"
+        get_row_cell(ws, dict_row, col_trend_U_upper_p).value = "U(+)%"
+        get_row_cell(ws, dict_row, col_trend_U_mean_p).value = "U mean %"
     
+    
+        apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+        append_row(ws, dict_row)
         i_row += 1
         i_row_string = str(i_row)     
         #******************************END OF HEADER******************************     
 
 
         #******************************HEADER FOR PR***************************
-        ws[col_cat + i_row_string] = "Uncertainty propagation (approach 1)"
-        ws.merge_cells(col_cat + i_row_string + ":" + col_end_str + i_row_string)
-
-        for row in ws.iter_rows(min_col = 1, 
-                                min_row = i_row, 
-                                max_col= col_end + 1, 
-                                max_row= i_row):
-            for cell in row:
-                cell.border = medium_border
-                cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
-        
+        get_row_cell(ws, dict_row, col_cat).value = "Uncertainty propagation (approach 1)"
+        ws.merged_cells.add(col_cat + i_row_string + ":" + col_end_str + i_row_string)
+
+        apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+        append_row(ws, dict_row)
         i_row += 1
         i_row_string = str(i_row)
         #******************************END OF HEADER FOR PR********************
 
         for i in index_pr_list_with_total:
        
-            ws[col_cat + i_row_string] = df_pr[col_cat_name].iloc[i]
+            get_row_cell(ws, dict_row, col_cat).value = df_pr[col_cat_name].iloc[i]
             
             if df_pr['EM_status_BY'].iloc[i] == "ES":
                 #BY emission as per inventory
-                apply_number_format(df_pr["EM_BY"].iloc[i], ws[col_EM_BY + i_row_string], int(2))
+                apply_number_format(df_pr["EM_BY"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY), int(2))
                 #BY U (-) mc
-                apply_number_format(df_pr["EM_BY_pr_U_lower_p"].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string], int(2))
+                apply_number_format(df_pr["EM_BY_pr_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p), int(2))
                 #BY U (+) mc 
-                apply_number_format(df_pr["EM_BY_pr_U_upper_p"].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string], int(2))
+                apply_number_format(df_pr["EM_BY_pr_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p), int(2))
                 #BY contribution to total U mc
-                apply_number_format(df_pr["EM_BY_pr_U_mean_p"].iloc[i], ws[col_EM_BY_U_mean_p + i_row_string], int(2))
+                apply_number_format(df_pr["EM_BY_pr_U_mean_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_mean_p), int(2))
             else:
-                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], ws[col_EM_BY_U_mean_p + i_row_string])
+                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY))
+                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p))
+                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p))
+                apply_style_non_numeric(df_pr['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_mean_p))
 
             if df_pr['EM_status_RY'].iloc[i] == "ES":
                 #RY emission as per inventory
-                apply_number_format(df_pr["EM_RY"].iloc[i], ws[col_EM_RY + i_row_string], int(2))
+                apply_number_format(df_pr["EM_RY"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY), int(2))
                 #RY U (-) mc
-                apply_number_format(df_pr["EM_RY_pr_U_lower_p"].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string], int(2))
+                apply_number_format(df_pr["EM_RY_pr_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p), int(2))
                 #RY U (+) mc
-                apply_number_format(df_pr["EM_RY_pr_U_upper_p"].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string], int(2))
+                apply_number_format(df_pr["EM_RY_pr_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p), int(2))
                 #RY contribution to total U mc
-                apply_number_format(df_pr["EM_RY_pr_U_mean_p"].iloc[i], ws[col_EM_RY_U_mean_p + i_row_string], int(2))
+                apply_number_format(df_pr["EM_RY_pr_U_mean_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_mean_p), int(2))
             else:
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_EM_RY_U_mean_p + i_row_string])
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_mean_p))
 
             if df_pr['EM_status_BY'].iloc[i] == "ES" or df_pr['EM_status_RY'].iloc[i] == "ES":
-                apply_number_format(df_pr["EM_trend_normed"].iloc[i], ws[col_trend + i_row_string], int(3))
-                apply_number_format(df_pr["EM_trend_normed_pr_U_lower_p"].iloc[i], ws[col_trend_U_lower_p + i_row_string], int(2))
-                apply_number_format(df_pr["EM_trend_normed_pr_U_upper_p"].iloc[i], ws[col_trend_U_upper_p + i_row_string], int(2))
-                apply_number_format(df_pr["EM_trend_normed_pr_U_mean_p"].iloc[i], ws[col_trend_U_mean_p + i_row_string], int(2))
+                apply_number_format(df_pr["EM_trend_normed"].iloc[i], get_row_cell(ws, dict_row, col_trend), int(3))
+                apply_number_format(df_pr["EM_trend_normed_pr_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p), int(2))
+                apply_number_format(df_pr["EM_trend_normed_pr_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p), int(2))
+                apply_number_format(df_pr["EM_trend_normed_pr_U_mean_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_mean_p), int(2))
             else: #both are non-numeric
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend_U_lower_p + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend_U_upper_p + i_row_string])
-                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], ws[col_trend_U_mean_p + i_row_string])
-    
-            for row in ws.iter_rows(min_col = 1, 
-                                    min_row = i_row, 
-                                    max_col= col_end + 1, #excel_columns
-                                    max_row= i_row):
-                for cell in row:
-                    cell.border = thin_border
-                    cell.alignment = openpyxl.styles.Alignment(vertical="center", wrap_text=True)
-                    #if i == index_pr_total:
-                    #    cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p))
+                apply_style_non_numeric(df_pr['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_mean_p))
     
+            apply_style_row(ws, dict_row, 0, col_end, border = thin_border, alignment = wrap_alignment)
+    
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)  
             
 
         #******************************HEADER FOR MC***************************
-        ws[col_cat + i_row_string] = "Monte Carlo simulations (approach 2)"
-        ws.merge_cells(col_cat + i_row_string + ":" + col_end_str + i_row_string)
-
-        for row in ws.iter_rows(min_col = 1, 
-                                min_row = i_row, 
-                                max_col= col_end + 1, 
-                                max_row= i_row):
-            for cell in row:
-                cell.border = medium_border
-                cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
-        
+        get_row_cell(ws, dict_row, col_cat).value = "Monte Carlo simulations (approach 2)"
+        ws.merged_cells.add(col_cat + i_row_string + ":" + col_end_str + i_row_string)
+
+        apply_style_row(ws, dict_row, 0, col_end, border = medium_border, alignment = center_alignment)
+        append_row(ws, dict_row)
         i_row += 1
         i_row_string = str(i_row)
         #******************************END OF HEADER FOR MC********************
@@ -1282,59 +1220,52 @@ def write_pr_mc_results(
         
         for i in index_mc_list_with_total:
        
-            ws[col_cat + i_row_string] = df_mc[col_cat_name].iloc[i]
+            get_row_cell(ws, dict_row, col_cat).value = df_mc[col_cat_name].iloc[i]
             
             if df_mc['EM_status_BY'].iloc[i] == "ES":
                 #BY emission as per inventory
-                apply_number_format(df_mc["EM_BY"].iloc[i], ws[col_EM_BY + i_row_string], int(2))
+                apply_number_format(df_mc["EM_BY"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY), int(2))
                 #BY U (-) mc
-                apply_number_format(df_mc["EM_BY_mc_U_lower_p"].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string], int(2))
+                apply_number_format(df_mc["EM_BY_mc_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p), int(2))
                 #BY U (+) mc 
-                apply_number_format(df_mc["EM_BY_mc_U_upper_p"].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string], int(2))
+                apply_number_format(df_mc["EM_BY_mc_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p), int(2))
                 #BY contribution to total U mc
-                apply_number_format(df_mc["EM_BY_mc_U_mean_p"].iloc[i], ws[col_EM_BY_U_mean_p + i_row_string], int(2))
+                apply_number_format(df_mc["EM_BY_mc_U_mean_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_mean_p), int(2))
             else:
-                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY_U_lower_p + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY_U_upper_p + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], ws[col_EM_BY_U_mean_p + i_row_string])
+                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY))
+                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_lower_p))
+                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_upper_p))
+                apply_style_non_numeric(df_mc['EM_status_BY'].iloc[i], get_row_cell(ws, dict_row, col_EM_BY_U_mean_p))
 
             if df_mc['EM_status_RY'].iloc[i] == "ES":
                 #RY emission as per inventory
-                apply_number_format(df_mc["EM_RY"].iloc[i], ws[col_EM_RY + i_row_string], int(2))
+                apply_number_format(df_mc["EM_RY"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY), int(2))
                 #RY U (-) mc
-                apply_number_format(df_mc["EM_RY_mc_U_lower_p"].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string], int(2))
+                apply_number_format(df_mc["EM_RY_mc_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p), int(2))
                 #RY U (+) mc
-                apply_number_format(df_mc["EM_RY_mc_U_upper_p"].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string], int(2))
+                apply_number_format(df_mc["EM_RY_mc_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p), int(2))
                 #RY contribution to total U mc
-                apply_number_format(df_mc["EM_RY_mc_U_mean_p"].iloc[i], ws[col_EM_RY_U_mean_p + i_row_string], int(2))
+                apply_number_format(df_mc["EM_RY_mc_U_mean_p"].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_mean_p), int(2))
             else:
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY_U_lower_p + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY_U_upper_p + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_EM_RY_U_mean_p + i_row_string])
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_lower_p))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_upper_p))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_EM_RY_U_mean_p))
 
             if df_mc['EM_status_BY'].iloc[i] == "ES" or df_mc['EM_status_RY'].iloc[i] == "ES":
-                apply_number_format(df_mc["EM_trend_normed"].iloc[i], ws[col_trend + i_row_string], int(3))
-                apply_number_format(df_mc["EM_trend_normed_mc_U_lower_p"].iloc[i], ws[col_trend_U_lower_p + i_row_string], int(2))
-                apply_number_format(df_mc["EM_trend_normed_mc_U_upper_p"].iloc[i], ws[col_trend_U_upper_p + i_row_string], int(2))
-                apply_number_format(df_mc["EM_trend_normed_mc_U_mean_p"].iloc[i], ws[col_trend_U_mean_p + i_row_string], int(2))
+                apply_number_format(df_mc["EM_trend_normed"].iloc[i], get_row_cell(ws, dict_row, col_trend), int(3))
+                apply_number_format(df_mc["EM_trend_normed_mc_U_lower_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p), int(2))
+                apply_number_format(df_mc["EM_trend_normed_mc_U_upper_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p), int(2))
+                apply_number_format(df_mc["EM_trend_normed_mc_U_mean_p"].iloc[i], get_row_cell(ws, dict_row, col_trend_U_mean_p), int(2))
             else: #both are non-numeric
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend_U_lower_p + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend_U_upper_p + i_row_string])
-                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], ws[col_trend_U_mean_p + i_row_string])
-    
-            for row in ws.iter_rows(min_col = 1, 
-                                    min_row = i_row, 
-                                    max_col= col_end + 1, #excel_columns
-                                    max_row= i_row):
-                for cell in row:
-                    cell.border = thin_border
-                    cell.alignment = openpyxl.styles.Alignment(vertical="center", wrap_text=True)
-                    #if i == index_mc_total:
-                    #    cell.fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_lower_p))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_upper_p))
+                apply_style_non_numeric(df_mc['EM_status_RY'].iloc[i], get_row_cell(ws, dict_row, col_trend_U_mean_p))
+    
+            apply_style_row(ws, dict_row, 0, col_end, border = thin_border, alignment = wrap_alignment)
     
+            append_row(ws, dict_row)
             i_row += 1
             i_row_string = str(i_row)         
             
@@ -1385,6 +1316,76 @@ top_medium_border = openpyxl.styles.borders.Border(
         top=openpyxl.styles.borders.Side(style='medium'), 
         bottom=openpyxl.styles.borders.Side(style='thin'))
 
+#alignments and fills shared by all cells:
+#each style object is created once instead of once per cell.
+center_alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
+left_alignment = openpyxl.styles.Alignment(horizontal="left", vertical="center", wrap_text=True)
+right_alignment = openpyxl.styles.Alignment(horizontal="right", vertical="center", wrap_text=True)
+wrap_alignment = openpyxl.styles.Alignment(vertical="center", wrap_text=True)
+
+total_fill = openpyxl.styles.PatternFill("solid", fgColor="8DB4E2")
+grey_fill = openpyxl.styles.PatternFill("solid", fgColor= const.COLOR_GREY)
+
+
+def get_row_cell(ws, dict_row, col):
+    """Get the cell of the row being written, in a write-only worksheet.
+    
+    The cells of the row are kept in dict_row until the row is appended
+    to the worksheet with append_row.
+    
+    Args:
+        ws: write-only worksheet.
+        dict_row: dictionary with the cells of the row, per column letter.
+        col: column letter of the cell.
+        
+    Returns:
+        openpyxl WriteOnlyCell.
+    
+    """
+    if col not in dict_row:
+        dict_row[col] = openpyxl.cell.WriteOnlyCell(ws)
+    return dict_row[col]
+
+def append_row(ws, dict_row):
+    """Append the row being written to a write-only worksheet.
+    
+    The row is streamed to the file and dict_row is emptied for the next row.
+    
+    Args:
+        ws: write-only worksheet.
+        dict_row: dictionary with the cells of the row, per column letter.
+        
+    Returns:
+        None.
+    
+    """
+    no_col = 0
+    for col in dict_row:
+        no_col = max(no_col, excel_columns.index(col) + 1)
+    ws.append([dict_row.get(excel_columns[c]) for c in range(no_col)])
+    dict_row.clear()
+    return None
+
+def apply_style_row(ws, dict_row, c_start, c_end, 
+                    border=None, alignment=None, fill=None, number_format=None):
+    """Apply styles to the cells of the row being written, from column index c_start to c_end.
+    
+    Missing cells are created, so that the styles are also written for empty cells.
+    Styles given as None are not modified.
+    
+    """
+    for c in range(c_start, c_end + 1):
+        cell = get_row_cell(ws, dict_row, excel_columns[c])
+        if border is not None:
+            cell.border = border
+        if alignment is not None:
+            cell.alignment = alignment
+        if fill is not None:
+            cell.fill = fill
+        if number_format is not None:
+            cell.number_format = number_format
+    return None
+
 
 def apply_style_non_numeric(code, cell):
     
@@ -1409,21 +1410,21 @@ def apply_style_non_numeric(code, cell):
         #cell.style = 'Good'
         
     #change for sub 2023: no specific color for notation keys in all tables.
-    cell.fill = openpyxl.styles.PatternFill("solid", fgColor= const.COLOR_GREY)
-    cell.alignment = openpyxl.styles.Alignment(horizontal="right", vertical="center", wrap_text=True) 
+    cell.fill = grey_fill
+    cell.alignment = right_alignment
     
     return None
 
 def apply_style_dEM(cell):
     cell.value = "d.EM"
-    cell.alignment = openpyxl.styles.Alignment(horizontal="right", vertical="center", wrap_text=True) 
-    cell.fill = openpyxl.styles.PatternFill("solid", fgColor= const.COLOR_GREY)
+    cell.alignment = right_alignment
+    cell.fill = grey_fill
     return None
 
 def apply_style_empty(cell):
     #cell.value = ""
-    cell.alignment = openpyxl.styles.Alignment(horizontal="right", vertical="center", wrap_text=True) 
-    cell.fill = openpyxl.styles.PatternFill("solid", fgColor= const.COLOR_GREY)
+    cell.alignment = right_alignment
+    cell.fill = grey_fill
     return None
 
 def apply_style_cumul_KCA(val, cell):
@@ -1443,7 +1444,7 @@ def apply_style_cumul_KCA(val, cell):
     cell.number_format = const.FORMAT_VAL_0D #'##0'
     cell.border = left_right_medium_border
     cell.fill = openpyxl.styles.PatternFill("solid", fgColor=color_set)
-    cell.alignment = openpyxl.styles.Alignment(horizontal="center", vertical="center", wrap_text=True)
+    cell.alignment = center_alignment
     
     return None
 
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright Swiss Federal Office for the Environment FOEN, 2021 - 2023.
+
+This file is part of: inventory_uncertainty_UNFCCC_CLRTAP.
+
+inventory_uncertainty_UNFCCC_CLRTAP is a free software: 
+you can redistribute it and/or modify
+it under the terms of the BSD 3-Clause "New" or "Revised" License.
+
+inventory_uncertainty_UNFCCC_CLRTAP is distributed 
+in the hope that it will be useful, but WITHOUT ANY WARRANTY; 
+without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the BSD 3-Clause "New" or "Revised" License for more details.
+
+Created on Sat Oct 17 13:40:12 2026
+
+"""
+#import from general libraries
+import pandas as pd
+
+#import from local files and libraries
+import utils_constant as const
+
+
+
+
+
+
+#HINT Various functions hereafter are used to write results to machine-readable tables.
+
+def write_pr_mc_tables(
+        df_in: pd.DataFrame,
+        df_pr: pd.DataFrame,
+        df_pr_AD_EF: pd.DataFrame,
+        df_mc: pd.DataFrame,
+        df_mc_AD_EF: pd.DataFrame,
+        BY_string: str,
+        RY_string: str,
+        no_mc: int,
+        seed: str,
+        routine: int,
+        export_format: int,
+        filename_out_root: str,
+        ) -> None:
+    #HINT Write results of the uncertainty analysis to machine-readable tables
+    """Write results of the uncertainty analysis to CSV or Parquet tables.
+
+    The tables contain the same values as the Excel file written by write_pr_mc_results,
+    without formatting, so that they can be read directly by other programs.
+    One file is written for each result DataFrame:
+        - filename_out_root + "_pr": uncertainty propagation (approach 1)
+        - filename_out_root + "_pr_AD_EF": idem for activity data and emission factors
+        - filename_out_root + "_mc": Monte Carlo simulations (approach 2)
+        - filename_out_root + "_mc_AD_EF": idem for activity data and emission factors
+    Each table starts with the run metadata columns "BY", "RY", "no_mc", "seed", "routine",
+    followed by the columns of the result DataFrame in the same order.
+    The AD_EF tables are given one row per input row,
+    the columns "proc_id", "reso_id", "comp_id" of df_in are added after the metadata.
+
+    Args:
+        df_in: pandas DataFrame with input uncertainty data.
+        df_pr: pandas DataFrame with produced uncertainties
+            based on uncertainty propagation.
+        df_pr_AD_EF: pandas DataFrame with produced uncertainties
+            for activity data and emission factors based on uncertainty propagation.
+        df_mc: pandas DataFrame with produced uncertainties
+            for emissions based on Monte Carlo simulations.
+        df_mc_AD_EF: pandas DataFrame with produced uncertainties
+            for activity data and emission factors based on Monte Carlo simulations.
+        BY_string: string with the base year, format YYYY.
+        RY_string: string with the reporting year, format YYYY.
+        no_mc: number of Monte Carlo simulations.
+        seed: string with the seed of the random generators
+            used for the Monte Carlo simulations, see routine_u_kca_wrapper.
+        routine: computation routine, i.e. for NID (greenhouse gases) or IIR (pollutants).
+        export_format: const.EXPORT_FORMAT_CSV or const.EXPORT_FORMAT_PARQUET.
+            Parquet needs the package pyarrow or fastparquet.
+        filename_out_root: name of the files, without extension.
+
+    Returns:
+        CSV or Parquet files.
+
+    Raises:
+        None.
+
+    """
+    extension = const.EXPORT_FORMAT_EXTENSION[export_format]
+
+    dict_meta = {
+            "BY": BY_string,
+            "RY": RY_string,
+            "no_mc": int(no_mc),
+            "seed": seed,
+            "routine": int(routine),
+            }
+
+    list_df_out = [
+            ("_pr", df_pr, False),
+            ("_pr_AD_EF", df_pr_AD_EF, True),
+            ("_mc", df_mc, False),
+            ("_mc_AD_EF", df_mc_AD_EF, True),
+            ]
+
+    for name_string, df, add_keys in list_df_out:
+        df_out = pd.DataFrame(index = range(len(df)))
+        for col in dict_meta:
+            df_out[col] = dict_meta[col]
+        if add_keys:
+            #the AD_EF DataFrames have the same rows as df_in
+            for col in ["proc_id", "reso_id", "comp_id"]:
+                df_out[col] = df_in[col].values
+        df_out = pd.concat([df_out, df.reset_index(drop = True)], axis = 1)
+
+        if export_format == const.EXPORT_FORMAT_PARQUET:
+            df_out.to_parquet(filename_out_root + name_string + extension, index = False)
+        else:
+            df_out.to_csv(filename_out_root + name_string + extension, index = False)
+
+    return None
@@ -151,6 +151,8 @@ def tornado_plot_EM_BY_RY(
     """
     Plot tornado plot using sensitivity results.
     Exclude nan values!
+    Categories with constant emissions have a sensitivity of zero:
+    they come after all other categories, and are shown only if there are less than 20 categories.
     
     sensitivity_max: maximum of sensitivity using sensitivity results for both base year and reporting.
     aim: same scale of x axis for both plots.